@@ -4,12 +4,30 @@
 # Usage:
 #   python diagrams.py
 #   python diagrams.py --benchmarks ../benchmarks
+#   python diagrams.py --compare u8=../benchmarks/layout-u8
+#   python diagrams.py --mpi [../benchmarks/mpi]
 #
 # Generates:
 #   time_N64.png, speedup_N64.png
 #   time_N1024.png, speedup_N1024.png
 #   time_N4096.png, speedup_N4096.png
 #   results_full.txt  (tab-separated, with Speedup column)
+#
+# If the runs were traced (make TRACE=1, then tools/trace2chrome.py on the
+# .trace files), the life_<T>_<N>.summary.txt files next to each .out add:
+#   imbalance_N*.png, barrier_N*.png
+#   Imbalance / Barrier wait columns in results_full.txt
+#
+# --compare LABEL=DIR (repeatable) adds, for other benchmark trees with the
+# same N<n>_T<t> layout (run_on_queue.sh puts non-default INIT/LAYOUT runs
+# under benchmarks/<variant>/), one plot per N with every tree on it:
+#   compare_N64.png, compare_N1024.png, compare_N4096.png
+#
+# --mpi [DIR] plots the life_mpi runs instead (run_mpi_on_queue.sh puts them
+# under benchmarks/mpi/N<n>_P<ranks>/, default DIR), with ranks on the x axis:
+#   mpi_time_N*.png, mpi_speedup_N*.png  (speedup over the fewest ranks run)
+#   mpi_breakdown_N*.png  per-rank compute / communication time (mean, max)
+#   results_mpi.txt  (N, Ranks, Time, Speedup, Compute max, Comm max)
 
 from pathlib import Path
 import argparse
@@ -18,6 +36,8 @@ import re
 import matplotlib.pyplot as plt
 
 RE_TIME = re.compile(r"Time\s+([0-9]*\.?[0-9]+)")
+RE_MPI_DIR = re.compile(r"N(\d+)_P(\d+)$")
+RE_MPI_RANK = re.compile(r"^Rank\s+\d+\b.*\bcompute\s+([0-9.]+)\s+comm\s+([0-9.]+)")
 
 EXPECTED_N = [64, 1024, 4096]
 EXPECTED_THREADS = [1, 2, 4, 6, 8]
@@ -27,6 +47,10 @@ def parse_args():
     p = argparse.ArgumentParser(description="Plot time & speedup from Game of Life benchmarks and write results_full.txt")
     p.add_argument("--benchmarks", type=Path, default=default_bench,
                    help="Path to the 'benchmarks' directory (default: ../benchmarks)")
+    p.add_argument("--compare", nargs="+", default=[], metavar="LABEL=DIR",
+                   help="Other benchmark trees to plot against --benchmarks (e.g. u8=../benchmarks/layout-u8)")
+    p.add_argument("--mpi", nargs="?", type=Path, const=default_bench / "mpi", default=None, metavar="DIR",
+                   help="Plot the life_mpi runs in DIR (default: ../benchmarks/mpi) against the number of ranks")
     return p.parse_args()
 
 def fail_if_errs(bench_root: Path):
@@ -88,58 +112,221 @@ def collect_times(bench_root: Path):
             sys.exit(1)
     return results
 
-def plot_time(n: int, times_by_threads: dict, out_dir: Path):
-    threads = sorted(times_by_threads.keys())
-    times = [times_by_threads[t] for t in threads]
+def collect_available_times(bench_root: Path):
+    """{n: {threads: time}} for whatever runs exist (no completeness checks)."""
+    results = {}
+    for n in EXPECTED_N:
+        for t in EXPECTED_THREADS:
+            try:
+                results.setdefault(n, {})[t] = read_time_from_out(bench_root / f"N{n}_T{t}" / f"life_{t}_{n}.out")
+            except (FileNotFoundError, ValueError):
+                pass
+    return results
+
+def plot_compare(n: int, series: dict, out_dir: Path):
+    """series: {label: {threads: time}}"""
     plt.figure()
     plt.title(f"Time vs Threads (N={n})")
     plt.xlabel("Threads")
     plt.ylabel("Time (s)")
+    for label, times_by_threads in series.items():
+        threads = sorted(times_by_threads.keys())
+        plt.plot(threads, [times_by_threads[t] for t in threads], marker="o", label=label)
+    plt.xticks(EXPECTED_THREADS)
+    plt.grid(True, linestyle="--", linewidth=0.5)
+    plt.legend()
+    out_path = out_dir / f"compare_N{n}.png"
+    plt.savefig(out_path, bbox_inches="tight", dpi=150)
+    plt.close()
+    print(f"Wrote {out_path}")
+
+def read_trace_summary(summary_path: Path):
+    """
+    Returns (imbalance, barrier_wait_s, barrier_frac) from a one-row
+    tools/trace2chrome.py summary, or None if the run was not traced.
+    """
+    if not summary_path.exists():
+        return None
+    lines = [l for l in summary_path.read_text().splitlines() if l.strip()]
+    if len(lines) < 2:
+        return None
+    row = dict(zip(lines[0].split("\t"), lines[1].split("\t")))
+    return float(row["IMBALANCE"]), float(row["BARRIER_WAIT"]), float(row["BARRIER_FRAC"])
+
+def collect_trace_summaries(bench_root: Path):
+    """{n: {threads: (imbalance, barrier_wait_s, barrier_frac)}} for traced runs only."""
+    summaries = {}
+    for n in EXPECTED_N:
+        for t in EXPECTED_THREADS:
+            s = read_trace_summary(bench_root / f"N{n}_T{t}" / f"life_{t}_{n}.summary.txt")
+            if s is not None:
+                summaries.setdefault(n, {})[t] = s
+    return summaries
+
+def plot_trace_metric(n: int, summary_by_threads: dict, out_dir: Path, column: int,
+                      ylabel: str, stem: str):
+    threads = sorted(summary_by_threads.keys())
+    values = [summary_by_threads[t][column] for t in threads]
+    plt.figure()
+    plt.title(f"{ylabel} vs Threads (N={n})")
+    plt.xlabel("Threads")
+    plt.ylabel(ylabel)
+    plt.plot(threads, values, marker="o")
+    plt.xticks(threads)
+    plt.grid(True, linestyle="--", linewidth=0.5)
+    out_path = out_dir / f"{stem}_N{n}.png"
+    plt.savefig(out_path, bbox_inches="tight", dpi=150)
+    plt.close()
+    print(f"Wrote {out_path}")
+
+def plot_time(n: int, times_by_threads: dict, out_dir: Path, axis: str = "Threads", prefix: str = ""):
+    threads = sorted(times_by_threads.keys())
+    times = [times_by_threads[t] for t in threads]
+    plt.figure()
+    plt.title(f"Time vs {axis} (N={n})")
+    plt.xlabel(axis)
+    plt.ylabel("Time (s)")
     plt.plot(threads, times, marker="o")
     plt.xticks(threads)
     plt.grid(True, linestyle="--", linewidth=0.5)
-    out_path = out_dir / f"time_N{n}.png"
+    out_path = out_dir / f"{prefix}time_N{n}.png"
     plt.savefig(out_path, bbox_inches="tight", dpi=150)
     plt.close()
     print(f"Wrote {out_path}")
 
-def plot_speedup(n: int, times_by_threads: dict, out_dir: Path):
+def plot_speedup(n: int, times_by_threads: dict, out_dir: Path, axis: str = "Threads", prefix: str = ""):
+    """Speedup over the smallest thread (rank) count, 1 for the OpenMP runs."""
     threads = sorted(times_by_threads.keys())
-    t1 = times_by_threads.get(1)
+    base = threads[0]
+    t1 = times_by_threads.get(base)
     if t1 is None or t1 <= 0:
-        print(f"ERROR: Missing or invalid T1 time for N={n}", file=sys.stderr)
+        print(f"ERROR: Missing or invalid T{base} time for N={n}", file=sys.stderr)
         sys.exit(1)
     speedup = [t1 / times_by_threads[t] for t in threads]
     plt.figure()
-    plt.title(f"Speedup vs Threads (N={n})")
-    plt.xlabel("Threads")
-    plt.ylabel("Speedup (T1 / Tthreads)")
+    plt.title(f"Speedup vs {axis} (N={n})")
+    plt.xlabel(axis)
+    plt.ylabel(f"Speedup (T{base} / T{axis.lower()})")
     plt.plot(threads, speedup, marker="o")
     plt.xticks(threads)
     plt.grid(True, linestyle="--", linewidth=0.5)
-    out_path = out_dir / f"speedup_N{n}.png"
+    out_path = out_dir / f"{prefix}speedup_N{n}.png"
     plt.savefig(out_path, bbox_inches="tight", dpi=150)
     plt.close()
     print(f"Wrote {out_path}")
 
-def write_results_table(results: dict, out_dir: Path):
+def write_results_table(results: dict, out_dir: Path, traces: dict = None):
     """
     Writes results_full.txt with columns:
     N\tThreads\tTime (s)\tSpeedup
+    plus Imbalance\tBarrier wait (s) when trace summaries exist ("-" for untraced runs)
     """
+    traces = traces or {}
     out_path = out_dir / "results_full.txt"
-    lines = ["N\tThreads\tTime (s)\tSpeedup"]
+    header = "N\tThreads\tTime (s)\tSpeedup"
+    if traces:
+        header += "\tImbalance\tBarrier wait (s)"
+    lines = [header]
     for n in sorted(results.keys()):
         t1 = results[n][1]
         for t in sorted(results[n].keys()):
             time = results[n][t]
             speedup = t1 / time if time > 0 else float("inf")
-            lines.append(f"{n}\t{t}\t{time:.6f}\t{speedup:.6f}")
+            line = f"{n}\t{t}\t{time:.6f}\t{speedup:.6f}"
+            if traces:
+                s = traces.get(n, {}).get(t)
+                line += f"\t{s[0]:.6f}\t{s[1]:.6f}" if s else "\t-\t-"
+            lines.append(line)
     out_path.write_text("\n".join(lines) + "\n")
     print(f"Wrote {out_path}")
 
+def collect_mpi_runs(mpi_root: Path):
+    """
+    {n: {ranks: (time, [(compute, comm) per rank])}} from the
+    N<n>_P<p>/life_mpi_<p>_<n>.out files; aborts on a non-empty .err.
+    """
+    results = {}
+    for d in sorted(mpi_root.glob("N*_P*")):
+        m = RE_MPI_DIR.match(d.name)
+        if not m:
+            continue
+        n, ranks = int(m.group(1)), int(m.group(2))
+        err = d / f"life_mpi_{ranks}_{n}.err"
+        if err.exists() and err.read_text(errors="ignore").strip():
+            print(f"ERROR: Found non-empty .err file. Aborting.\n--- {err} ---\n{err.read_text().strip()}",
+                  file=sys.stderr)
+            sys.exit(1)
+        out = d / f"life_mpi_{ranks}_{n}.out"
+        if not out.exists():
+            continue
+        per_rank = [(float(c), float(w)) for c, w in
+                    (RE_MPI_RANK.match(l).groups() for l in out.read_text(errors="ignore").splitlines()
+                     if RE_MPI_RANK.match(l))]
+        results.setdefault(n, {})[ranks] = (read_time_from_out(out), per_rank)
+    return results
+
+def plot_mpi_breakdown(n: int, runs: dict, out_dir: Path):
+    """Mean compute and comm time per rank, side by side for each rank count, max as markers."""
+    ranks = sorted(p for p in runs if runs[p][1])
+    if not ranks:
+        return
+    xs = range(len(ranks))
+    comp = [sum(c for c, _ in runs[p][1]) / len(runs[p][1]) for p in ranks]
+    comm = [sum(w for _, w in runs[p][1]) / len(runs[p][1]) for p in ranks]
+    plt.figure()
+    plt.title(f"Per-rank time breakdown (N={n})")
+    plt.xlabel("Ranks")
+    plt.ylabel("Time (s)")
+    left, right = [x - 0.2 for x in xs], [x + 0.2 for x in xs]
+    plt.bar(left, comp, width=0.4, label="compute (mean)")
+    plt.bar(right, comm, width=0.4, label="communication (mean)")
+    plt.plot(left, [max(c for c, _ in runs[p][1]) for p in ranks], "k_", markersize=14, label="max over ranks")
+    plt.plot(right, [max(w for _, w in runs[p][1]) for p in ranks], "k_", markersize=14)
+    plt.xticks(list(xs), [str(p) for p in ranks])
+    plt.grid(True, axis="y", linestyle="--", linewidth=0.5)
+    plt.legend()
+    out_path = out_dir / f"mpi_breakdown_N{n}.png"
+    plt.savefig(out_path, bbox_inches="tight", dpi=150)
+    plt.close()
+    print(f"Wrote {out_path}")
+
+def write_mpi_table(results: dict, out_dir: Path):
+    """results_mpi.txt: N, Ranks, Time (s), Speedup (over the fewest ranks), Compute/Comm max (s)"""
+    lines = ["N\tRanks\tTime (s)\tSpeedup\tCompute max (s)\tComm max (s)"]
+    for n in sorted(results.keys()):
+        base = results[n][min(results[n])][0]
+        for p in sorted(results[n].keys()):
+            time, per_rank = results[n][p]
+            line = f"{n}\t{p}\t{time:.6f}\t{base / time if time > 0 else float('inf'):.6f}"
+            if per_rank:
+                line += f"\t{max(c for c, _ in per_rank):.6f}\t{max(w for _, w in per_rank):.6f}"
+            else:
+                line += "\t-\t-"
+            lines.append(line)
+    out_path = out_dir / "results_mpi.txt"
+    out_path.write_text("\n".join(lines) + "\n")
+    print(f"Wrote {out_path}")
+
+def main_mpi(mpi_root: Path, out_dir: Path):
+    if not mpi_root.exists():
+        print(f"ERROR: MPI benchmarks directory not found: {mpi_root}", file=sys.stderr)
+        sys.exit(1)
+    results = collect_mpi_runs(mpi_root)
+    if not results:
+        print(f"ERROR: No N<n>_P<ranks>/life_mpi_*.out runs under {mpi_root}", file=sys.stderr)
+        sys.exit(1)
+    for n in sorted(results.keys()):
+        times = {p: r[0] for p, r in results[n].items()}
+        plot_time(n, times, out_dir, axis="Ranks", prefix="mpi_")
+        plot_speedup(n, times, out_dir, axis="Ranks", prefix="mpi_")
+        plot_mpi_breakdown(n, results[n], out_dir)
+    write_mpi_table(results, out_dir)
+
 def main():
     args = parse_args()
+    if args.mpi is not None:
+        main_mpi(args.mpi, Path(__file__).resolve().parent)
+        return
     bench_root = args.benchmarks
     if not bench_root.exists():
         print(f"ERROR: Benchmarks directory not found: {bench_root}", file=sys.stderr)
@@ -157,8 +344,27 @@ def main():
         plot_time(n, results[n], out_dir)
         plot_speedup(n, results[n], out_dir)
 
-    # 4) Table with speedup
-    write_results_table(results, out_dir)
+    # 4) Imbalance / barrier wait of traced runs (optional)
+    traces = collect_trace_summaries(bench_root)
+    for n in sorted(traces.keys()):
+        plot_trace_metric(n, traces[n], out_dir, 0, "Load imbalance (max/mean - 1)", "imbalance")
+        plot_trace_metric(n, traces[n], out_dir, 1, "Barrier wait (s, all threads)", "barrier")
+
+    # 5) Table with speedup
+    write_results_table(results, out_dir, traces)
+
+    # 6) Other layouts / placements against this tree (optional)
+    if args.compare:
+        others = {}
+        for spec in args.compare:
+            label, sep, path = spec.partition("=")
+            if not sep:
+                label, path = Path(spec).name, spec
+            others[label] = collect_available_times(Path(path))
+        for n in EXPECTED_N:
+            series = {"int** (default)": results[n]}
+            series.update({label: times[n] for label, times in others.items() if times.get(n)})
+            plot_compare(n, series, out_dir)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,34 @@
+#ifndef LIFE_INIT_H
+#define LIFE_INIT_H
+
+/*
+ * Initial boards of life_par (-p) and life_mpi. LIFE_INIT_RAND is
+ * life_par's default and original board: N*N/10 positions drawn from one
+ * rand() sequence, so a rank of life_mpi would have to replay all of them
+ * (O(N^2) per rank) to find the few in its block. LIFE_INIT_HASH, the
+ * board of life_mpi and of life_par -p hash, makes every interior cell
+ * (r, c) alive with probability 1/10, decided by a hash (splitmix64) of
+ * its position alone: any part of the board is generated without touching
+ * the rest, and the pattern does not depend on the layout, the thread
+ * count or how life_mpi splits the board, so the -DCHECKSUM lines of
+ * life_mpi and life_par -p hash agree.
+ */
+
+#include <stdint.h>
+
+#define LIFE_INIT_RAND 0
+#define LIFE_INIT_HASH 1
+
+static inline int life_init_alive(int N, int r, int c)
+{
+    uint64_t z = ((uint64_t)r * (uint64_t)N + (uint64_t)c + 1) * 0x9e3779b97f4a7c15ULL;
+
+    if (r <= 0 || r >= N - 1 || c <= 0 || c >= N - 1)
+        return 0;   /* dead border */
+    z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+    z ^= z >> 31;
+    return z % 10 == 0;
+}
+
+#endif
@@ -0,0 +1,91 @@
+/*
+ * life_par's -l u8 sweep as a shared library (`make liblife.so`), for
+ * callers that keep boards in memory across runs (tools/kernels.py, ctypes,
+ * and tools/bench_worker.py). Linked with life_par.c (its main() renamed
+ * away) for allocate_board / init_random_board / life_row.
+ *
+ * Boards are N rows of life_lib_stride(N) bytes. life_lib_run() never
+ * writes its initial board, so one board serves any number of runs.
+ * Threads: the caller's omp_set_num_threads() / OMP_NUM_THREADS.
+ */
+
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <omp.h>
+#include "omp_sched.h"
+#include "numa_init.h"
+#include "life_init.h"
+
+#define BOARD_ALIGN 64 /* as in life_par.c */
+
+uint8_t *allocate_board(int N, int stride, int init_mode);
+void init_random_board(uint8_t *board1, uint8_t *board2, int N, int stride, int pattern);
+void life_row(const uint8_t *restrict up, const uint8_t *restrict mid,
+              const uint8_t *restrict down, uint8_t *restrict out, int N);
+
+int life_lib_stride(int N)
+{
+    return (N + BOARD_ALIGN - 1) / BOARD_ALIGN * BOARD_ALIGN;
+}
+
+/* A zeroed board placed by init_mode (-i); free with life_lib_free */
+uint8_t *life_lib_alloc(int N, int init_mode)
+{
+    return allocate_board(N, life_lib_stride(N), init_mode);
+}
+
+/* life_par's initial pattern for N (the rand() sequence of a fresh process) */
+void life_lib_init(uint8_t *board, int N)
+{
+    srand(1);
+    init_random_board(board, board, N, life_lib_stride(N), LIFE_INIT_RAND);
+}
+
+void life_lib_free(void *p)
+{
+    free(p);
+}
+
+/*
+ * T generations from init, with work and spare as the two boards the
+ * sweep alternates between (their borders are overwritten with init's).
+ * Returns the time of the T steps, as life_par's "Time"; the final board
+ * is in work, and its live cells in *alive.
+ */
+double life_lib_run(const uint8_t *init, uint8_t *work, uint8_t *spare, int N, int T, long *alive)
+{
+    int stride = life_lib_stride(N);
+    size_t size = (size_t)N * stride;
+    uint8_t *previous = work, *current = spare, *swap;
+    double time;
+    long count = 0;
+    int i, t;
+
+    memcpy(previous, init, size);
+    memcpy(current, init, size);
+
+    sched_init();
+    time = omp_get_wtime();
+    for (t = 0; t < T; t++)
+    {
+#pragma omp parallel for schedule(runtime)
+        for (i = 1; i < N - 1; ++i)
+            life_row(previous + (size_t)(i - 1) * stride, previous + (size_t)i * stride,
+                     previous + (size_t)(i + 1) * stride, current + (size_t)i * stride, N);
+
+        swap = current;
+        current = previous;
+        previous = swap;
+    }
+    time = omp_get_wtime() - time;
+
+    if (previous != work)
+        memcpy(work, previous, size);
+#pragma omp parallel for reduction(+ : count)
+    for (i = 0; i < N; ++i)
+        for (int j = 0; j < N; ++j)
+            count += previous[(size_t)i * stride + j];
+    *alive = count;
+    return time;
+}
@@ -0,0 +1,376 @@
+/******************************************************
+ ********* Conway's game of life - MPI version ********
+ ******************************************************
+
+    Usage: mpirun -np P ./life_mpi [-w] ArraySize TimeSteps
+           (one box, more ranks than cores:
+            mpirun --oversubscribe -np 8 ./life_mpi 1024 1000)
+
+    The N x N board (dead border rows/columns, as in life_par)
+    is split over a 2D Cartesian grid of P ranks (MPI_Dims_create),
+    one block of rows x columns per rank, so N is bounded by the
+    memory of all nodes instead of one. Each rank keeps its block
+    plus one halo cell on every side.
+
+    Every generation the halos are exchanged with MPI_Isend/Irecv
+    with the 8 neighbours: rows directly, columns through a strided
+    derived datatype (MPI_Type_vector), corners as single cells.
+    While they travel the rank computes the inner part of its block,
+    which needs no halo; the one-cell ring along the block edge is
+    computed after MPI_Waitall. -w waits for the halos first
+    (no overlap), for comparison.
+
+    Output: the usual "GameOfLife: Size N Steps T Time X" line
+    first (rank 0; the slowest rank's time), then one line per rank
+    with its block and its compute / communication time, and a
+    summary line with the grid and the max/mean of both.
+
+    The initial board is life_par -p hash's (life_init.h: a hash of
+    each cell's position, so every rank generates only its own block),
+    so -DCHECKSUM prints the same "Checksum: ..." line as life_par
+    -p hash -DCHECKSUM, for any number of ranks (make check-mpi
+    compares them).
+ ******************************************************/
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
+#include <unistd.h> /* getopt() */
+#include <mpi.h>
+#include "runrec.h"
+#include "life_init.h"
+
+/* tags: the direction a halo travels in */
+enum { TO_N, TO_S, TO_W, TO_E, TO_NW, TO_NE, TO_SW, TO_SE, NDIRS };
+
+typedef struct
+{
+    int N;                   /* global board size */
+    int r0, c0;              /* global row/column of the block's first cell */
+    int rows, cols;          /* block size */
+    int stride;              /* cols + 2 */
+    int ilo, ihi, jlo, jhi;  /* local cells [ilo, ihi) x [jlo, jhi) are computed (not the board border) */
+    int nbr[NDIRS];          /* neighbour rank per direction, MPI_PROC_NULL off the board */
+    MPI_Datatype column;     /* rows cells, stride apart */
+} block_t;
+
+static long part_start(long n, int parts, int k)
+{
+    return n * k / parts;
+}
+
+static int neighbour(MPI_Comm cart, const int dims[2], const int coords[2], int dr, int dc)
+{
+    int c[2] = {coords[0] + dr, coords[1] + dc}, rank;
+
+    if (c[0] < 0 || c[0] >= dims[0] || c[1] < 0 || c[1] >= dims[1])
+        return MPI_PROC_NULL;
+    MPI_Cart_rank(cart, c, &rank);
+    return rank;
+}
+
+static void init_random_block(uint8_t *b1, uint8_t *b2, const block_t *blk);
+static void life_rect(const uint8_t *prev, uint8_t *cur, const block_t *blk,
+                      int i0, int i1, int j0, int j1);
+static void exchange_halos(uint8_t *board, const block_t *blk, MPI_Comm cart, MPI_Request req[2 * NDIRS]);
+
+int main(int argc, char *argv[])
+{
+    int N, T;                  // board size, time steps
+    int nprocs, rank, opt, wait_first = 0;
+    int dims[2] = {0, 0}, periods[2] = {0, 0}, coords[2];
+    MPI_Comm cart;
+    MPI_Request req[2 * NDIRS];
+    block_t blk;
+    uint8_t *current, *previous, *swap;
+    size_t cells;
+    int t;
+
+    double time, t0, t_step, t_comm, t_comp; // t_comm / t_comp: start of the current phase
+    double comm = 0.0, comp = 0.0; // this rank's totals
+    runrec_t rec;                  // binary run record (rank 0, only if RUNREC_FILE is set)
+
+    MPI_Init(&argc, &argv);
+    MPI_Comm_size(MPI_COMM_WORLD, &nprocs);
+
+    /*Read input arguments*/
+    while ((opt = getopt(argc, argv, "w")) != -1)
+    {
+        if (opt == 'w')
+            wait_first = 1;
+        else
+            argc = -1;
+    }
+    if (argc - optind != 2)
+    {
+        MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+        if (rank == 0)
+            fprintf(stderr, "Usage: mpirun -np P ./life_mpi [-w] ArraySize TimeSteps\n");
+        MPI_Finalize();
+        exit(-1);
+    }
+    N = atoi(argv[optind]);
+    T = atoi(argv[optind + 1]);
+
+    /*2D Cartesian decomposition*/
+    MPI_Dims_create(nprocs, 2, dims);
+    MPI_Cart_create(MPI_COMM_WORLD, 2, dims, periods, 1, &cart);
+    MPI_Comm_rank(cart, &rank);
+    MPI_Cart_coords(cart, rank, 2, coords);
+    if (N < dims[0] || N < dims[1])
+    {
+        if (rank == 0)
+            fprintf(stderr, "life_mpi: N=%d is too small for a %dx%d rank grid\n", N, dims[0], dims[1]);
+        MPI_Finalize();
+        exit(-1);
+    }
+
+    blk.N = N;
+    blk.r0 = part_start(N, dims[0], coords[0]);
+    blk.c0 = part_start(N, dims[1], coords[1]);
+    blk.rows = part_start(N, dims[0], coords[0] + 1) - blk.r0;
+    blk.cols = part_start(N, dims[1], coords[1] + 1) - blk.c0;
+    blk.stride = blk.cols + 2;
+    /* local i <-> global row r0 + i - 1; global rows/columns 0 and N-1 stay dead */
+    blk.ilo = (blk.r0 == 0) ? 2 : 1;
+    blk.ihi = (blk.r0 + blk.rows == N) ? blk.rows : blk.rows + 1;
+    blk.jlo = (blk.c0 == 0) ? 2 : 1;
+    blk.jhi = (blk.c0 + blk.cols == N) ? blk.cols : blk.cols + 1;
+    blk.nbr[TO_N] = neighbour(cart, dims, coords, -1, 0);
+    blk.nbr[TO_S] = neighbour(cart, dims, coords, 1, 0);
+    blk.nbr[TO_W] = neighbour(cart, dims, coords, 0, -1);
+    blk.nbr[TO_E] = neighbour(cart, dims, coords, 0, 1);
+    blk.nbr[TO_NW] = neighbour(cart, dims, coords, -1, -1);
+    blk.nbr[TO_NE] = neighbour(cart, dims, coords, -1, 1);
+    blk.nbr[TO_SW] = neighbour(cart, dims, coords, 1, -1);
+    blk.nbr[TO_SE] = neighbour(cart, dims, coords, 1, 1);
+    MPI_Type_vector(blk.rows, 1, blk.stride, MPI_UNSIGNED_CHAR, &blk.column);
+    MPI_Type_commit(&blk.column);
+
+    /*Allocate and initialize the blocks (halos included, zeroed)*/
+    cells = (size_t)(blk.rows + 2) * blk.stride;
+    current = calloc(cells, 1);
+    previous = calloc(cells, 1);
+    init_random_block(previous, current, &blk);
+
+    if (rank == 0)
+    {
+        runrec_init(&rec, "life_mpi");
+        runrec_param(&rec, "N", N);
+        runrec_param(&rec, "steps", T);
+        runrec_param(&rec, "ranks", nprocs);
+        runrec_param(&rec, "grid_rows", dims[0]);
+        runrec_param(&rec, "grid_cols", dims[1]);
+        runrec_param(&rec, "wait_first", wait_first);
+        runrec_reserve(&rec, T);
+    }
+
+    /*Game of Life*/
+
+    MPI_Barrier(cart);
+    t0 = MPI_Wtime();
+
+    for (t = 0; t < T; t++)
+    {
+        t_step = MPI_Wtime();
+
+        exchange_halos(previous, &blk, cart, req);
+        if (wait_first)
+            MPI_Waitall(2 * NDIRS, req, MPI_STATUSES_IGNORE);
+        t_comp = MPI_Wtime();
+        comm += t_comp - t_step;
+
+        /* inner part: every neighbour is inside the block */
+        life_rect(previous, current, &blk, 2, blk.rows, 2, blk.cols);
+        t_comm = MPI_Wtime();
+        comp += t_comm - t_comp;
+
+        if (!wait_first)
+            MPI_Waitall(2 * NDIRS, req, MPI_STATUSES_IGNORE);
+        t_comp = MPI_Wtime();
+        comm += t_comp - t_comm;
+
+        /* the ring along the block edge reads the halos */
+        life_rect(previous, current, &blk, 1, 2, 1, blk.cols + 1);
+        life_rect(previous, current, &blk, blk.rows, blk.rows + 1, 1, blk.cols + 1);
+        life_rect(previous, current, &blk, 2, blk.rows, 1, 2);
+        life_rect(previous, current, &blk, 2, blk.rows, blk.cols, blk.cols + 1);
+        comp += MPI_Wtime() - t_comp;
+
+        swap = current;
+        current = previous;
+        previous = swap;
+
+        if (rank == 0)
+            runrec_iter(&rec, MPI_Wtime() - t_step, 0.0);
+    }
+
+    time = MPI_Wtime() - t0;
+    MPI_Allreduce(MPI_IN_PLACE, &time, 1, MPI_DOUBLE, MPI_MAX, cart);
+
+#ifdef CHECKSUM
+    /* live cells and FNV-1a hash of the final board (now in previous), gathered in row order on rank 0 */
+    long alive = 0;
+    uint64_t hash = 1469598103934665603ULL;
+    uint8_t *board = NULL;
+    int i, r;
+    size_t cell;
+
+    if (rank == 0)
+    {
+        board = calloc((size_t)N * N, 1);
+        for (r = 0; r < nprocs; r++)
+        {
+            int c[2], rr0, cc0, nr, nc;
+            uint8_t *buf;
+
+            MPI_Cart_coords(cart, r, 2, c);
+            rr0 = part_start(N, dims[0], c[0]);
+            cc0 = part_start(N, dims[1], c[1]);
+            nr = part_start(N, dims[0], c[0] + 1) - rr0;
+            nc = part_start(N, dims[1], c[1] + 1) - cc0;
+            buf = malloc((size_t)(nr + 2) * (nc + 2));
+            if (r == 0)
+                memcpy(buf, previous, cells);
+            else
+                MPI_Recv(buf, (nr + 2) * (nc + 2), MPI_UNSIGNED_CHAR, r, 0, cart, MPI_STATUS_IGNORE);
+            for (i = 0; i < nr; i++)
+                memcpy(board + (size_t)(rr0 + i) * N + cc0, buf + (size_t)(i + 1) * (nc + 2) + 1, nc);
+            free(buf);
+        }
+        for (cell = 0; cell < (size_t)N * N; cell++)
+        {
+            alive += board[cell];
+            hash = (hash ^ (uint64_t)board[cell]) * 1099511628211ULL;
+        }
+        free(board);
+    }
+    else
+        MPI_Send(previous, cells, MPI_UNSIGNED_CHAR, 0, 0, cart);
+#endif
+
+    /* per-rank breakdown, printed by rank 0 after the result line (diagrams.py parses the first line) */
+    double mine[6] = {comp, comm, blk.r0, blk.c0, blk.rows, blk.cols};
+    double *all = (rank == 0) ? malloc(sizeof(mine) * nprocs) : NULL;
+    MPI_Gather(mine, 6, MPI_DOUBLE, all, 6, MPI_DOUBLE, 0, cart);
+
+    if (rank == 0)
+    {
+        double comp_max = 0, comm_max = 0, comp_sum = 0, comm_sum = 0;
+        int r;
+
+        printf("GameOfLife: Size %d Steps %d Time %lf\n", N, T, time);
+#ifdef CHECKSUM
+        printf("Checksum: alive %ld hash %016llx\n", alive, (unsigned long long)hash);
+#endif
+        for (r = 0; r < nprocs; r++)
+        {
+            double *a = all + 6 * r;
+            int c[2];
+
+            MPI_Cart_coords(cart, r, 2, c);
+            printf("Rank %d (%d,%d): rows %d+%d cols %d+%d compute %lf comm %lf\n",
+                   r, c[0], c[1], (int)a[2], (int)a[4], (int)a[3], (int)a[5], a[0], a[1]);
+            comp_max = a[0] > comp_max ? a[0] : comp_max;
+            comm_max = a[1] > comm_max ? a[1] : comm_max;
+            comp_sum += a[0];
+            comm_sum += a[1];
+        }
+        printf("MPI: ranks %d grid %dx%d overlap %s compute max %lf mean %lf comm max %lf mean %lf\n",
+               nprocs, dims[0], dims[1], wait_first ? "no" : "yes",
+               comp_max, comp_sum / nprocs, comm_max, comm_sum / nprocs);
+        free(all);
+
+        runrec_param(&rec, "comp_max", comp_max);
+        runrec_param(&rec, "comm_max", comm_max);
+        rec.threads = nprocs;
+        rec.total_time = time;
+        runrec_write(&rec);
+        runrec_free(&rec);
+    }
+
+    free(current);
+    free(previous);
+    MPI_Type_free(&blk.column);
+    MPI_Comm_free(&cart);
+    MPI_Finalize();
+    return 0;
+}
+
+/* life_par's init_random -p hash, for the cells of this rank's block only */
+static void init_random_block(uint8_t *b1, uint8_t *b2, const block_t *blk)
+{
+    int i, j;
+    size_t cell;
+
+    for (i = 0; i < blk->rows; i++)
+        for (j = 0; j < blk->cols; j++)
+            if (life_init_alive(blk->N, blk->r0 + i, blk->c0 + j))
+            {
+                cell = (size_t)(i + 1) * blk->stride + (j + 1);
+                b1[cell] = b2[cell] = 1;
+            }
+}
+
+/*
+ * Next generation of the local cells [i0, i1) x [j0, j1), clipped to the
+ * cells that are computed at all. Same branch-free rule as life_par's
+ * life_row.
+ */
+static void life_rect(const uint8_t *prev, uint8_t *cur, const block_t *blk,
+                      int i0, int i1, int j0, int j1)
+{
+    int i, j, s = blk->stride;
+
+    i0 = i0 > blk->ilo ? i0 : blk->ilo;
+    i1 = i1 < blk->ihi ? i1 : blk->ihi;
+    j0 = j0 > blk->jlo ? j0 : blk->jlo;
+    j1 = j1 < blk->jhi ? j1 : blk->jhi;
+    for (i = i0; i < i1; i++)
+    {
+        const uint8_t *up = prev + (size_t)(i - 1) * s, *mid = prev + (size_t)i * s,
+                      *down = prev + (size_t)(i + 1) * s;
+        uint8_t *out = cur + (size_t)i * s;
+
+#pragma omp simd
+        for (j = j0; j < j1; j++)
+        {
+            uint8_t nbrs = up[j - 1] + up[j] + up[j + 1] +
+                           mid[j - 1] + mid[j + 1] +
+                           down[j - 1] + down[j] + down[j + 1];
+            out[j] = (nbrs == 3) | ((nbrs == 2) & mid[j]);
+        }
+    }
+}
+
+/*
+ * Post the receives into the halo of board and the sends of its edge
+ * cells to the 8 neighbours (MPI_PROC_NULL ones complete at once).
+ * A halo travelling in direction d is sent with tag d and received from
+ * the neighbour on the opposite side.
+ */
+static void exchange_halos(uint8_t *board, const block_t *blk, MPI_Comm cart, MPI_Request req[2 * NDIRS])
+{
+    int s = blk->stride, R = blk->rows, C = blk->cols;
+#define AT(i, j) (board + (size_t)(i) * s + (j))
+
+    MPI_Irecv(AT(R + 1, 1), C, MPI_UNSIGNED_CHAR, blk->nbr[TO_S], TO_N, cart, &req[0]);
+    MPI_Irecv(AT(0, 1), C, MPI_UNSIGNED_CHAR, blk->nbr[TO_N], TO_S, cart, &req[1]);
+    MPI_Irecv(AT(1, C + 1), 1, blk->column, blk->nbr[TO_E], TO_W, cart, &req[2]);
+    MPI_Irecv(AT(1, 0), 1, blk->column, blk->nbr[TO_W], TO_E, cart, &req[3]);
+    MPI_Irecv(AT(R + 1, C + 1), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_SE], TO_NW, cart, &req[4]);
+    MPI_Irecv(AT(R + 1, 0), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_SW], TO_NE, cart, &req[5]);
+    MPI_Irecv(AT(0, C + 1), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_NE], TO_SW, cart, &req[6]);
+    MPI_Irecv(AT(0, 0), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_NW], TO_SE, cart, &req[7]);
+
+    MPI_Isend(AT(1, 1), C, MPI_UNSIGNED_CHAR, blk->nbr[TO_N], TO_N, cart, &req[8]);
+    MPI_Isend(AT(R, 1), C, MPI_UNSIGNED_CHAR, blk->nbr[TO_S], TO_S, cart, &req[9]);
+    MPI_Isend(AT(1, 1), 1, blk->column, blk->nbr[TO_W], TO_W, cart, &req[10]);
+    MPI_Isend(AT(1, C), 1, blk->column, blk->nbr[TO_E], TO_E, cart, &req[11]);
+    MPI_Isend(AT(1, 1), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_NW], TO_NW, cart, &req[12]);
+    MPI_Isend(AT(1, C), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_NE], TO_NE, cart, &req[13]);
+    MPI_Isend(AT(R, 1), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_SW], TO_SW, cart, &req[14]);
+    MPI_Isend(AT(R, C), 1, MPI_UNSIGNED_CHAR, blk->nbr[TO_SE], TO_SE, cart, &req[15]);
+#undef AT
+}
@@ -2,7 +2,26 @@
  ************* Conway's game of life ******************
  ******************************************************
 
-    Usage: ./exec ArraySize TimeSteps
+    Usage: ./exec [-i serial|first-touch|interleave] [-l int|u8]
+                  [-b steps [-r rows]] [-p rand|hash] ArraySize TimeSteps
+
+    -i selects the page placement of the two grids
+    (common/numa_init.h; default serial)
+    -l selects the board layout: int (default) is the original
+    int ** grid, u8 is one contiguous byte buffer per board with
+    64-byte aligned rows, updated by a vectorisable row kernel
+    -b enables temporal blocking (needs -l u8): every parallel
+    region advances the board `steps` generations at once, in tiles
+    of `rows` rows (default: up to 32, at least one tile per thread)
+    with `steps` ghost rows on each side, so the boards are streamed
+    and the threads synchronise once per `steps` generations
+    -p selects the initial board (life_init.h): rand (default) is the
+    original rand() pattern, hash the position-hashed one life_mpi
+    generates, to compare the two programs
+
+    Compile with -DCHECKSUM to also print the live-cell count and
+    a hash of the final board (second line of output), to check
+    that different layouts/modes compute the same generations
 
     Compile with -DOUTPUT to print output in output.gif
     (You will need ImageMagick for that - Install with
@@ -13,136 +32,433 @@
 
 #include <stdio.h>
 #include <stdlib.h>
+#include <stdint.h>
+#include <string.h>
 #include <sys/time.h>
+#include <unistd.h> /* getopt() */
 #include <omp.h>
+#include "omp_trace.h"
+#include "omp_sched.h"
+#include "runrec.h"
+#include "numa_init.h"
+#include "life_init.h"
 
 #define FINALIZE "\
 convert -delay 20 `ls -1 out*.pgm | sort -V` output.gif\n\
 rm *pgm\n\
 "
 
-int **allocate_array(int N);
+#define LAYOUT_INT 0 /* int **, one row pointer per row */
+#define LAYOUT_U8 1  /* contiguous uint8_t, rows padded to BOARD_ALIGN bytes */
+#define BOARD_ALIGN 64
+
+int **allocate_array(int N, int init_mode);
 void free_array(int **array, int N);
-void init_random(int **array1, int **array2, int N);
+void init_random(int **array1, int **array2, int N, int pattern);
 void print_to_pgm(int **array, int N, int t);
 
+uint8_t *allocate_board(int N, int stride, int init_mode);
+void init_random_board(uint8_t *board1, uint8_t *board2, int N, int stride, int pattern);
+void life_row(const uint8_t *restrict up, const uint8_t *restrict mid,
+              const uint8_t *restrict down, uint8_t *restrict out, int N);
+void life_tile(const uint8_t *src, uint8_t *dst, int N, int stride,
+               int r0, int r1, int k, uint8_t *a, uint8_t *b);
+void print_board_to_pgm(const uint8_t *board, int N, int stride, int t);
+
 int main(int argc, char *argv[])
 {
     int N;                     // array dimensions
     int T;                     // time steps
     int **current, **previous; // arrays - one for current timestep, one for previous timestep
     int **swap;                // array pointer
+    uint8_t *cur8, *prev8;     // -l u8: the same two boards, contiguous
+    uint8_t *swap8;
+    int stride;                // -l u8: bytes per board row (N rounded up to BOARD_ALIGN)
     int i, j, t, nbrs;         // helper variables
+    int block = 1, steps;      // -b: generations per parallel region (1 = plain sweep)
+    int tile_rows = 0, tile;   // -r: rows per temporal-blocking tile (0 = default)
+    uint8_t *scratch = NULL;   // -b: two private tile boards per thread
+    size_t scratch_size = 0;
 
     double time; // variables for timing
     struct timeval ts, tf;
+    double t_step;
+    runrec_t rec; // binary run record (written only if RUNREC_FILE is set)
+    int init_mode = INIT_SERIAL, layout = LAYOUT_INT, pattern = LIFE_INIT_RAND, opt;
 
     /*Read input arguments*/
-    if (argc != 3)
+    while ((opt = getopt(argc, argv, "i:l:b:r:p:")) != -1)
+    {
+        if (opt == 'i')
+            init_mode = numa_init_parse(optarg);
+        else if (opt == 'l' && strcmp(optarg, "int") == 0)
+            layout = LAYOUT_INT;
+        else if (opt == 'l' && strcmp(optarg, "u8") == 0)
+            layout = LAYOUT_U8;
+        else if (opt == 'b')
+            block = atoi(optarg);
+        else if (opt == 'r')
+            tile_rows = atoi(optarg);
+        else if (opt == 'p' && strcmp(optarg, "rand") == 0)
+            pattern = LIFE_INIT_RAND;
+        else if (opt == 'p' && strcmp(optarg, "hash") == 0)
+            pattern = LIFE_INIT_HASH;
+        else
+            init_mode = -1;
+    }
+    if (init_mode < 0 || argc - optind != 2 || block < 1 || tile_rows < 0 ||
+        (block > 1 && layout != LAYOUT_U8))
     {
-        fprintf(stderr, "Usage: ./exec ArraySize TimeSteps\n");
+        fprintf(stderr, "Usage: ./exec [-i serial|first-touch|interleave] [-l int|u8] "
+                        "[-b steps [-r rows]] [-p rand|hash] ArraySize TimeSteps\n"
+                        "       (-b > 1 needs -l u8)\n");
         exit(-1);
     }
     else
     {
-        N = atoi(argv[1]);
-        T = atoi(argv[2]);
+        N = atoi(argv[optind]);
+        T = atoi(argv[optind + 1]);
     }
 
     /*Allocate and initialize matrices*/
-    current = allocate_array(N);  // allocate array for current time step
-    previous = allocate_array(N); // allocate array for previous time step
+    current = previous = NULL;
+    cur8 = prev8 = NULL;
+    stride = (N + BOARD_ALIGN - 1) / BOARD_ALIGN * BOARD_ALIGN;
+    if (layout == LAYOUT_U8)
+    {
+        cur8 = allocate_board(N, stride, init_mode);
+        prev8 = allocate_board(N, stride, init_mode);
+        init_random_board(prev8, cur8, N, stride, pattern); // same pattern as init_random
+    }
+    else
+    {
+        current = allocate_array(N, init_mode);  // allocate array for current time step
+        previous = allocate_array(N, init_mode); // allocate array for previous time step
 
-    init_random(previous, current, N); // initialize previous array with pattern
+        init_random(previous, current, N, pattern); // initialize previous array with pattern
+    }
+
+    if (block > 1)
+    {
+        if (tile_rows == 0)
+        {
+            tile_rows = (N - 2 + omp_get_max_threads() - 1) / omp_get_max_threads();
+            tile_rows = tile_rows > 32 ? 32 : (tile_rows < 1 ? 1 : tile_rows);
+        }
+        /* zeroed once: life_row never writes columns 0, N-1 or the padding */
+        scratch_size = (size_t)(tile_rows + 2 * block) * stride;
+        scratch = calloc((size_t)omp_get_max_threads() * 2, scratch_size);
+    }
 
 #ifdef OUTPUT
-    print_to_pgm(previous, N, 0);
+    if (layout == LAYOUT_U8)
+        print_board_to_pgm(prev8, N, stride, 0);
+    else
+        print_to_pgm(previous, N, 0);
 #endif
 
     /*Game of Life*/
 
+    sched_init();
+    TRACE_INIT("life_par");
+    runrec_init(&rec, "life_par");
+    runrec_param(&rec, "N", N);
+    runrec_param(&rec, "steps", T);
+    runrec_param(&rec, "init_mode", init_mode);
+    runrec_param(&rec, "layout", layout);
+    runrec_param(&rec, "block", block);
+    runrec_param(&rec, "tile_rows", tile_rows);
+    runrec_reserve(&rec, T);
+
     gettimeofday(&ts, NULL);
 
     gettimeofday(&ts, NULL);
 
-    for (t = 0; t < T; ++t)
+    /* one iteration per parallel region: `steps` generations (1 unless -b) */
+    for (t = 0; t < T; t += steps)
     {
+        steps = (block < T - t) ? block : T - t;
+        t_step = omp_get_wtime();
 
-/* Parallelize rows; implicit barrier at loop end */
-/*  scedule is static
+        TRACE_BEGIN(TRACE_REGION);
+
+/* Parallelize rows; implicit barrier at region end */
+/*  schedule is runtime (OMP_SCHEDULE, static when unset; see omp_sched.h)
     (i, j) as loop indices are private
     (N, previous, current) are shared, as they are enclosed by the loop
     nbrs must be private
     by default */
 /* Kept here for clarity */
-#pragma omp parallel for schedule(static) private(i, j, nbrs) shared(N, previous, current)
-        for (i = 1; i < N - 1; ++i)
+/*  The loop is 'for nowait' inside its own region (same work split as
+    'parallel for') so each thread's chunk can be traced on its own;
+    the barrier wait is then region end minus chunk end */
+#pragma omp parallel private(i, j, nbrs, tile) shared(N, previous, current)
         {
-            for (j = 1; j < N - 1; ++j)
+            TRACE_BEGIN(TRACE_CHUNK);
+            if (block > 1)
             {
-                nbrs =
-                    previous[i + 1][j + 1] + previous[i + 1][j] + previous[i + 1][j - 1] +
-                    previous[i][j - 1] + previous[i][j + 1] +
-                    previous[i - 1][j - 1] + previous[i - 1][j] + previous[i - 1][j + 1];
+                /* temporal blocking: each tile goes `steps` generations in private scratch */
+                uint8_t *mine = scratch + (size_t)omp_get_thread_num() * 2 * scratch_size;
+#pragma omp for schedule(runtime) nowait
+                for (tile = 0; tile < (N - 2 + tile_rows - 1) / tile_rows; ++tile)
+                {
+                    i = 1 + tile * tile_rows;
+                    life_tile(prev8, cur8, N, stride, i, (i + tile_rows < N - 1) ? i + tile_rows : N - 1,
+                              steps, mine, mine + scratch_size);
+                }
+            }
+            else if (layout == LAYOUT_U8)
+            {
+                /* same row split; each row is one vectorised life_row call */
+#pragma omp for schedule(runtime) nowait
+                for (i = 1; i < N - 1; ++i)
+                    life_row(prev8 + (size_t)(i - 1) * stride, prev8 + (size_t)i * stride,
+                             prev8 + (size_t)(i + 1) * stride, cur8 + (size_t)i * stride, N);
+            }
+            else
+            {
+#pragma omp for schedule(runtime) nowait
+                for (i = 1; i < N - 1; ++i)
+                {
+                    for (j = 1; j < N - 1; ++j)
+                    {
+                        nbrs =
+                            previous[i + 1][j + 1] + previous[i + 1][j] + previous[i + 1][j - 1] +
+                            previous[i][j - 1] + previous[i][j + 1] +
+                            previous[i - 1][j - 1] + previous[i - 1][j] + previous[i - 1][j + 1];
 
-                current[i][j] = (nbrs == 3 || (previous[i][j] + nbrs == 3)) ? 1 : 0;
+                        current[i][j] = (nbrs == 3 || (previous[i][j] + nbrs == 3)) ? 1 : 0;
+                    }
+                }
             }
-        } /* implicit barrier here: all threads finished step t */
+            TRACE_END(TRACE_CHUNK, t);
+        } /* implicit barrier here: all threads finished step t (steps t..t+steps-1 with -b) */
+
+        TRACE_END(TRACE_REGION, t);
 
 #ifdef OUTPUT
-        print_to_pgm(current, N, t + 1); /* single thread here: we're back in serial */
+        /* single thread here: we're back in serial */
+        if (layout == LAYOUT_U8)
+            print_board_to_pgm(cur8, N, stride, t + steps);
+        else
+            print_to_pgm(current, N, t + 1);
 #endif
 
         /* Safe to swap: we're outside the parallel region created by 'parallel for' */
         swap = current;
         current = previous;
         previous = swap;
+        swap8 = cur8;
+        cur8 = prev8;
+        prev8 = swap8;
+
+        runrec_iter(&rec, omp_get_wtime() - t_step, steps); /* value: generations done */
     }
 
     gettimeofday(&tf, NULL);
     time = (tf.tv_sec - ts.tv_sec) + (tf.tv_usec - ts.tv_usec) * 0.000001;
 
-    free_array(current, N);
-    free_array(previous, N);
+#ifdef CHECKSUM
+    /* live cells and FNV-1a hash of the final board (now in previous) */
+    long alive = 0;
+    uint64_t hash = 1469598103934665603ULL;
+    for (i = 0; i < N; ++i)
+        for (j = 0; j < N; ++j)
+        {
+            int cell = (layout == LAYOUT_U8) ? prev8[(size_t)i * stride + j] : previous[i][j];
+            alive += cell;
+            hash = (hash ^ (uint64_t)cell) * 1099511628211ULL;
+        }
+#endif
+
+    if (layout == LAYOUT_U8)
+    {
+        free(cur8);
+        free(prev8);
+        free(scratch);
+    }
+    else
+    {
+        free_array(current, N);
+        free_array(previous, N);
+    }
     printf("GameOfLife: Size %d Steps %d Time %lf\n", N, T, time);
+#ifdef CHECKSUM
+    printf("Checksum: alive %ld hash %016llx\n", alive, (unsigned long long)hash);
+#endif
+    TRACE_DUMP(); /* after the result line: diagrams.py parses the first line */
+    rec.threads = omp_get_max_threads();
+    rec.total_time = time;
+    runrec_write(&rec);
+    runrec_free(&rec);
 #ifdef OUTPUT
     system(FINALIZE);
 #endif
 }
 
-int **allocate_array(int N)
+/* Rows are carved out of one page-aligned block (numa_alloc), so no
+   allocator header lands in - and first-touches - a row's pages. */
+int **allocate_array(int N, int init_mode)
 {
     int **array;
+    int *cells;
     int i, j;
     array = malloc(N * sizeof(int *));
+    cells = numa_alloc((size_t)N * N * sizeof(int), init_mode);
     for (i = 0; i < N; i++)
-        array[i] = malloc(N * sizeof(int));
-    for (i = 0; i < N; i++)
+        array[i] = cells + (size_t)i * N;
+/* first-touch: the interior rows with the compute loop's static split */
+#pragma omp parallel for private(j) schedule(static) if (init_mode == INIT_FIRST_TOUCH)
+    for (i = 1; i < N - 1; i++)
         for (j = 0; j < N; j++)
             array[i][j] = 0;
+    for (j = 0; j < N; j++)
+        array[0][j] = array[N - 1][j] = 0;
     return array;
 }
 
 void free_array(int **array, int N)
 {
-    int i;
-    for (i = 0; i < N; i++)
-        free(array[i]);
+    (void)N;
+    free(array[0]);
     free(array);
 }
 
-void init_random(int **array1, int **array2, int N)
+/* pattern (life_init.h): about one interior cell in ten alive */
+void init_random(int **array1, int **array2, int N, int pattern)
 {
-    int i, pos, x, y;
+    long long i, pos, cells = (long long)(N - 2) * (N - 2);
+    int j;
 
-    for (i = 0; i < (N * N) / 10; i++)
+    if (pattern == LIFE_INIT_HASH)
     {
-        pos = rand() % ((N - 2) * (N - 2));
+        for (i = 1; i < N - 1; i++)
+            for (j = 1; j < N - 1; j++)
+                if (life_init_alive(N, i, j))
+                    array1[i][j] = array2[i][j] = 1;
+        return;
+    }
+    for (i = 0; i < (long long)N * N / 10; i++)
+    {
+        pos = rand() % cells;
         array1[pos % (N - 2) + 1][pos / (N - 2) + 1] = 1;
         array2[pos % (N - 2) + 1][pos / (N - 2) + 1] = 1;
     }
 }
 
+/* One zeroed board: N rows of `stride` bytes (columns N..stride-1 stay 0). */
+uint8_t *allocate_board(int N, int stride, int init_mode)
+{
+    uint8_t *board;
+    int i;
+    board = numa_alloc((size_t)N * stride, init_mode);
+/* first-touch: the interior rows with the compute loop's static split */
+#pragma omp parallel for schedule(static) if (init_mode == INIT_FIRST_TOUCH)
+    for (i = 1; i < N - 1; i++)
+        memset(board + (size_t)i * stride, 0, stride);
+    memset(board, 0, stride);
+    memset(board + (size_t)(N - 1) * stride, 0, stride);
+    return board;
+}
+
+/* init_random for the u8 layout: same pattern, same cells */
+void init_random_board(uint8_t *board1, uint8_t *board2, int N, int stride, int pattern)
+{
+    long long i, pos, cells = (long long)(N - 2) * (N - 2);
+    int j;
+    size_t cell;
+
+    if (pattern == LIFE_INIT_HASH)
+    {
+        for (i = 1; i < N - 1; i++)
+            for (j = 1; j < N - 1; j++)
+                if (life_init_alive(N, i, j))
+                {
+                    cell = (size_t)i * stride + j;
+                    board1[cell] = board2[cell] = 1;
+                }
+        return;
+    }
+    for (i = 0; i < (long long)N * N / 10; i++)
+    {
+        pos = rand() % cells;
+        cell = (size_t)(pos % (N - 2) + 1) * stride + (pos / (N - 2) + 1);
+        board1[cell] = 1;
+        board2[cell] = 1;
+    }
+}
+
+/*
+ * out[1..N-2] = next generation of row mid, given its neighbours up and
+ * down. Cells are 0/1 bytes, so the neighbour sum fits a byte and the
+ * rule is branch-free: alive next iff nbrs == 3, or nbrs == 2 and alive
+ * now (the same as nbrs == 3 || cell + nbrs == 3). No aliasing and unit
+ * stride, so gcc -O3 vectorises the loop (16/32 cells per instruction).
+ */
+void life_row(const uint8_t *restrict up, const uint8_t *restrict mid,
+              const uint8_t *restrict down, uint8_t *restrict out, int N)
+{
+    int j;
+
+#pragma omp simd
+    for (j = 1; j < N - 1; ++j)
+    {
+        uint8_t nbrs = up[j - 1] + up[j] + up[j + 1] +
+                       mid[j - 1] + mid[j + 1] +
+                       down[j - 1] + down[j] + down[j + 1];
+        out[j] = (nbrs == 3) | ((nbrs == 2) & mid[j]);
+    }
+}
+
+/*
+ * Ghost-zone temporal blocking: rows [r0, r1) of dst = rows [r0, r1) of
+ * src advanced k generations. The tile plus k ghost rows per side (fewer
+ * at the board edge) is copied into scratch board a; every generation the
+ * rows that can still be computed exactly shrink by one per side, until
+ * after k generations exactly [r0, r1) is left. a and b (ping-pong) hold
+ * the rows lo..hi-1 of the board; board rows 0 and N-1 are dead forever.
+ */
+void life_tile(const uint8_t *src, uint8_t *dst, int N, int stride,
+               int r0, int r1, int k, uint8_t *a, uint8_t *b)
+{
+    int lo = (r0 - k > 0) ? r0 - k : 0;
+    int hi = (r1 + k < N) ? r1 + k : N;
+    int g, i, from, to;
+    uint8_t *in = a, *out = b, *tmp;
+
+    memcpy(a, src + (size_t)lo * stride, (size_t)(hi - lo) * stride);
+    /* the dead border rows are read but never computed: keep them 0 in b too */
+    if (lo == 0)
+        memset(b, 0, stride);
+    if (hi == N)
+        memset(b + (size_t)(hi - 1 - lo) * stride, 0, stride);
+
+    for (g = 1; g <= k; ++g)
+    {
+        from = (lo == 0) ? 1 : lo + g;
+        to = (hi == N) ? N - 1 : hi - g;
+        for (i = from; i < to; ++i)
+            life_row(in + (size_t)(i - 1 - lo) * stride, in + (size_t)(i - lo) * stride,
+                     in + (size_t)(i + 1 - lo) * stride, out + (size_t)(i - lo) * stride, N);
+        tmp = in;
+        in = out;
+        out = tmp;
+    }
+    memcpy(dst + (size_t)r0 * stride, in + (size_t)(r0 - lo) * stride, (size_t)(r1 - r0) * stride);
+}
+
+void print_board_to_pgm(const uint8_t *board, int N, int stride, int t)
+{
+    int i;
+    char s[30];
+    sprintf(s, "out%d.pgm", t);
+    FILE *f = fopen(s, "wb");
+    fprintf(f, "P5\n%d %d 1\n", N, N);
+    for (i = 0; i < N; i++)
+        fwrite(board + (size_t)i * stride, 1, N, f);
+    fclose(f);
+}
+
 void print_to_pgm(int **array, int N, int t)
 {
     int i, j;
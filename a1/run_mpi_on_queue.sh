@@ -0,0 +1,64 @@
+#!/bin/bash
+
+## Give the Job a descriptive name
+#PBS -N life_mpi
+
+## Output and error files
+#PBS -o life_mpi.out
+#PBS -e life_mpi.err
+
+## How many machines should we get?
+#PBS -l nodes=2:ppn=8
+
+## How long should the job run for?
+#PBS -l walltime=01:00:00
+
+## Module Load
+module load openmpi
+
+## Defaults if not passed via -v
+: "${RANKS:=8}"
+: "${N:=4096}"
+: "${STEPS:=1000}"
+: "${OVERLAP:=1}"        # 1: interior computed while the halos travel, 0: life_mpi -w
+: "${OVERSUBSCRIBE:=0}"  # 1: allow more ranks than slots (one box, testing)
+
+## Start
+cd /home/parallel/parlab05/a1/ || exit 1
+
+# Commit of the checkout the binaries were built in, kept with every run
+# (meta.txt, runrec env) so tools/perf_regress.py attributes the run to it
+BUILD_COMMIT="$(git rev-parse --short HEAD 2>/dev/null || echo unknown)"
+[[ -n "$(git status --porcelain --untracked-files=no 2>/dev/null)" ]] && BUILD_COMMIT+="+dirty"
+export BUILD_COMMIT
+
+# life_mpi is not in `make all`: make life_mpi (after module load openmpi)
+# One rank per core, no OpenMP inside
+export OMP_NUM_THREADS=1
+
+# benchmarks/mpi/N<n>_P<ranks>/ (benchmarks/mpi-nooverlap/ for OVERLAP=0);
+# plot with diagrams.py --mpi (ranks on the x axis)
+VARIANT="mpi"
+MPI_ARGS=()
+[[ "${OVERLAP}" == "0" ]] && VARIANT+="-nooverlap" && MPI_ARGS+=(-w)
+RESULT_DIR="benchmarks/${VARIANT}/N${N}_P${RANKS}"
+mkdir -p "${RESULT_DIR}"
+
+MPIRUN=(mpirun -np "${RANKS}")
+[[ "${OVERSUBSCRIBE}" == "1" ]] && MPIRUN+=(--oversubscribe)
+
+{
+  echo "[run_on_queue] RANKS=${RANKS}"
+  echo "[run_on_queue] BUILD_COMMIT=${BUILD_COMMIT}"
+  echo "[run_on_queue] OVERLAP=${OVERLAP}"
+  echo "[run_on_queue] PBS_NODEFILE=$(sort -u "${PBS_NODEFILE:-/dev/null}" | paste -sd' ' -)"
+  echo "[run_on_queue] Params: ${MPIRUN[*]} ./life_mpi ${MPI_ARGS[*]} ${N} ${STEPS}"
+} > "${RESULT_DIR}/meta.txt"
+
+# Binary run record of rank 0 (common/runrec.h); read with tools/runrec.py
+export RUNREC_FILE="${RESULT_DIR}/life_mpi_${RANKS}_${N}.rec"
+rm -f "${RUNREC_FILE}"
+
+"${MPIRUN[@]}" -x OMP_NUM_THREADS -x RUNREC_FILE ./life_mpi "${MPI_ARGS[@]}" "${N}" "${STEPS}" \
+  > "${RESULT_DIR}/life_mpi_${RANKS}_${N}.out" \
+  2> "${RESULT_DIR}/life_mpi_${RANKS}_${N}.err"
@@ -20,17 +20,57 @@ module load openmp
 : "${THREADS:=8}"
 : "${N:=1024}"
 : "${STEPS:=1000}"
+: "${INIT:=serial}"     # page placement: serial|first-touch|interleave (common/numa_init.h)
+: "${LAYOUT:=int}"      # board layout: int (int **) | u8 (contiguous bytes)
+: "${BLOCK:=1}"         # temporal blocking: generations per parallel region (>1 needs LAYOUT=u8)
+: "${TILE_ROWS:=0}"     # rows per blocking tile (0 = life_par's default)
+: "${RUSAGE:=1}"        # 1: run through tools/rusage_run.py (peak RSS, page faults, context switches)
 
 ## Start
 cd /home/parallel/parlab05/a1/ || exit 1
 
+# Commit of the checkout the binaries were built in, kept with every run
+# (meta.txt, runrec env) so tools/perf_regress.py attributes the run to it
+BUILD_COMMIT="$(git rev-parse --short HEAD 2>/dev/null || echo unknown)"
+[[ -n "$(git status --porcelain --untracked-files=no 2>/dev/null)" ]] && BUILD_COMMIT+="+dirty"
+export BUILD_COMMIT
+
 # --- OpenMP runtime settings ---
 export OMP_NUM_THREADS="${THREADS}"   # 1,2,4,6,8 per the assignment
 
 # Run and capture outputs by config
-RESULT_DIR="benchmarks/N${N}_T${THREADS}"
+# (non-default variants go under benchmarks/<variant>/ with the same N<n>_T<t>
+#  layout, e.g. benchmarks/layout-u8/, benchmarks/layout-u8_block-8/;
+#  plot them against the default with diagrams.py --compare)
+VARIANT=""
+[[ "${INIT}" != "serial" ]] && VARIANT+="init-${INIT}_"
+[[ "${LAYOUT}" != "int" ]] && VARIANT+="layout-${LAYOUT}_"
+[[ "${BLOCK}" != "1" ]] && VARIANT+="block-${BLOCK}_"
+[[ "${TILE_ROWS}" != "0" ]] && VARIANT+="rows-${TILE_ROWS}_"
+VARIANT="${VARIANT%_}"
+RESULT_DIR="benchmarks/${VARIANT:+${VARIANT}/}N${N}_T${THREADS}"
 mkdir -p "${RESULT_DIR}"
 
-./life_par "${N}" "${STEPS}" \
+{
+  echo "[run_on_queue] OMP_NUM_THREADS=${OMP_NUM_THREADS}"
+  echo "[run_on_queue] BUILD_COMMIT=${BUILD_COMMIT}"
+  echo "[run_on_queue] INIT_MODE=${INIT}"
+  echo "[run_on_queue] LAYOUT=${LAYOUT}"
+  echo "[run_on_queue] BLOCK=${BLOCK}"
+  echo "[run_on_queue] TILE_ROWS=${TILE_ROWS}"
+  echo "[run_on_queue] Params: -i ${INIT} -l ${LAYOUT} -b ${BLOCK} -r ${TILE_ROWS} ${N} ${STEPS}"
+} > "${RESULT_DIR}/meta.txt"
+
+# Only used by a tracing build (make TRACE=1); convert with tools/trace2chrome.py
+export TRACE_FILE="${RESULT_DIR}/life_${THREADS}_${N}.trace"
+# Binary run record (common/runrec.h); read with tools/runrec.py
+export RUNREC_FILE="${RESULT_DIR}/life_${THREADS}_${N}.rec"
+rm -f "${RUNREC_FILE}"
+# Peak RSS / page faults / context switches (wait4 + /proc); tools/rusage_run.py
+MEASURE=()
+rm -f "${RESULT_DIR}/life_${THREADS}_${N}.rusage"
+[[ "${RUSAGE}" == "1" ]] && MEASURE=(python3 ../tools/rusage_run.py -o "${RESULT_DIR}/life_${THREADS}_${N}.rusage" --)
+
+"${MEASURE[@]}" ./life_par -i "${INIT}" -l "${LAYOUT}" -b "${BLOCK}" -r "${TILE_ROWS}" "${N}" "${STEPS}" \
   > "${RESULT_DIR}/life_${THREADS}_${N}.out" \
   2> "${RESULT_DIR}/life_${THREADS}_${N}.err"
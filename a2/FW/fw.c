@@ -6,8 +6,10 @@
 #include <stdlib.h>
 #include <sys/time.h>
 #include "util.h"
+#include "runrec.h"
 
 inline int min(int a, int b);
+void FW_STD(int **A, int N);
 
 int main(int argc, char **argv)
 {
@@ -15,6 +17,7 @@ int main(int argc, char **argv)
 	int i,j,k;
 	struct timeval t1, t2;
 	double time;
+	runrec_t rec;
 	int N=1024;
 
 	if (argc != 2) {
@@ -30,16 +33,17 @@ int main(int argc, char **argv)
 	graph_init_random(A,-1,N,128*N);
 
 	gettimeofday(&t1,0);
-	for(k=0;k<N;k++)
-		for(i=0; i<N; i++)
-			for(j=0; j<N; j++)
-				A[i][j]=min(A[i][j], A[i][k] + A[k][j]);
-
+	FW_STD(A,N);
 	gettimeofday(&t2,0);
 
 	time=(double)((t2.tv_sec-t1.tv_sec)*1000000+t2.tv_usec-t1.tv_usec)/1000000;
 	printf("FW,%d,%.4f\n", N, time);
 
+	runrec_init(&rec, "fw");
+	runrec_param(&rec, "N", N);
+	rec.total_time = time;
+	runrec_write(&rec);
+
 	/*
 	for(i=0; i<N; i++)
 		for(j=0; j<N; j++) fprintf(stdout,"%d\n", A[i][j]);
@@ -54,3 +58,14 @@ inline int min(int a, int b)
 	else return b;
 }
 
+/* the timed kernel (also libfw.so's "fw" engine, fw_engines.c) */
+void FW_STD(int **A, int N)
+{
+	int i,j,k;
+
+	for(k=0;k<N;k++)
+		for(i=0; i<N; i++)
+			for(j=0; j<N; j++)
+				A[i][j]=min(A[i][j], A[i][k] + A[k][j]);
+}
+
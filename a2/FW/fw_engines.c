@@ -0,0 +1,50 @@
+/*
+ * The benchmarked engines in libfw.so: fw.c, fw_tiled.c and fw_sr_p.c's
+ * timed kernels (their main() renamed away by the Makefile) run on a flat
+ * matrix through row pointers, so tools/kernels.py, tools/bench_worker.py
+ * and tools/fwlib.py time the same code as the binaries.
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include "fw_paths.h"
+
+void FW_STD(int **A, int N);
+void FW_TILED(int **A, int N, int B);
+void FW_SR_P(int **A, int N, int B, int C);
+
+/* N, B, C as the binaries accept them (fw_sr_p: N, B, C = 2^k) */
+static int pow2(int x)
+{
+	return x > 0 && (x & (x - 1)) == 0;
+}
+
+int fw_engine_solve(const char *engine, int32_t *dist, int n, int B, int C)
+{
+	int **rows;
+	int i;
+
+	if (strcmp(engine, "fw") && strcmp(engine, "fw_tiled") && strcmp(engine, "fw_sr_p"))
+		return -1;
+	if (strcmp(engine, "fw") && (B < 1 || B > n || n % B))
+		return -2;
+	if (!strcmp(engine, "fw_sr_p") && (!pow2(n) || !pow2(B) || (C && (!pow2(C) || C < B || C > n))))
+		return -2;
+
+	rows = malloc((size_t)n * sizeof(int *));
+	if (rows == NULL)
+		return -3;
+	for(i=0; i<n; i++)
+		rows[i] = dist + (size_t)i*n;
+
+	if (!strcmp(engine, "fw"))
+		FW_STD(rows, n);
+	else if (!strcmp(engine, "fw_tiled"))
+		FW_TILED(rows, n, B);
+	else
+		FW_SR_P(rows, n, B, C);
+
+	free(rows);
+	return 0;
+}
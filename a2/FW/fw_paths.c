@@ -0,0 +1,144 @@
+/*
+ * Floyd-Warshall engine for library use: next-hop matrix for path
+ * reconstruction and O(N^2) repair after an edge weight decrease.
+ * See fw_paths.h for the API; built as libfw.so.
+ */
+
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include "fw_paths.h"
+
+void fw_graph_random(int32_t *dist, int n, int seed)
+{
+	int i, j;
+
+	/* same sequence as util.c's graph_init_random */
+	srand48(seed);
+	for(i=0; i<n; i++)
+		for(j=0; j<n; j++)
+			dist[(size_t)i*n+j] = abs(((int)lrand48()) % 1048576);
+
+	for(i=0; i<n; i++) dist[(size_t)i*n+i] = 0;
+}
+
+void fw_solve(int32_t *dist, int32_t *next, int n)
+{
+	int i, j, k;
+
+	if (next) {
+		for(i=0; i<n; i++)
+			for(j=0; j<n; j++)
+				next[(size_t)i*n+j] = (i == j) ? i : (dist[(size_t)i*n+j] < FW_INF ? j : -1);
+	}
+
+	/*
+	 * Row k and column k do not change in step k (no negative cycles), so
+	 * the rows can be updated in parallel; next[i][k] is fixed for the same
+	 * reason.
+	 */
+	for(k=0; k<n; k++) {
+		const int32_t *rowk = dist + (size_t)k*n;
+
+		#pragma omp parallel for private(j) schedule(static)
+		for(i=0; i<n; i++) {
+			int32_t *rowi = dist + (size_t)i*n;
+			int32_t dik = rowi[k];
+
+			if (dik >= FW_INF)
+				continue;
+			if (next == NULL) {
+				for(j=0; j<n; j++) {
+					/* INF + a negative dik must stay INF (branch-free, still vectorizes) */
+					int32_t d = (rowk[j] < FW_INF) ? dik + rowk[j] : FW_INF;
+					rowi[j] = (d < rowi[j]) ? d : rowi[j];
+				}
+			} else {
+				int32_t *nexti = next + (size_t)i*n;
+				int32_t hop = nexti[k];
+				for(j=0; j<n; j++) {
+					if (rowk[j] < FW_INF && dik + rowk[j] < rowi[j]) {
+						rowi[j] = dik + rowk[j];
+						nexti[j] = hop;
+					}
+				}
+			}
+		}
+	}
+}
+
+long fw_decrease_edge(int32_t *dist, int32_t *next, int n, int u, int v, int32_t w)
+{
+	const int32_t *rowv;
+	long changed = 0;
+	int i, j;
+
+	if (u < 0 || v < 0 || u >= n || v >= n)
+		return -1;
+	if (u == v)
+		return (w < 0) ? -1 : 0;
+	if (dist[(size_t)v*n+u] < FW_INF && dist[(size_t)v*n+u] + w < 0)
+		return -1;
+	/* not shorter than what we have: no path can use it to improve */
+	if (w >= dist[(size_t)u*n+v])
+		return 0;
+
+	/*
+	 * Every new shortest path is old(i, u) + w + old(v, j). Column u and
+	 * row v cannot improve (that would need a negative cycle through the
+	 * edge), so updating in place, rows in parallel, reads consistent
+	 * values; the same holds for next[i][u].
+	 */
+	rowv = dist + (size_t)v*n;
+	#pragma omp parallel for private(j) reduction(+:changed) schedule(static)
+	for(i=0; i<n; i++) {
+		int32_t *rowi = dist + (size_t)i*n;
+		int64_t base;	/* d(i,u) + w + d(v,j) can pass INT32_MAX near FW_INF */
+		int32_t hop;
+
+		if (rowi[u] >= FW_INF)
+			continue;
+		base = (int64_t)rowi[u] + w;
+		hop = (i == u) ? v : (next ? next[(size_t)i*n+u] : 0);
+		for(j=0; j<n; j++) {
+			if (rowv[j] < FW_INF && base + rowv[j] < rowi[j]) {
+				rowi[j] = (int32_t)(base + rowv[j]);	/* < rowi[j], so it fits */
+				if (next)
+					next[(size_t)i*n+j] = hop;
+				changed++;
+			}
+		}
+	}
+	return changed;
+}
+
+long fw_decrease_edges(int32_t *dist, int32_t *next, int n, const int32_t *edges, int m)
+{
+	long total = 0, c;
+	int e;
+
+	for(e=0; e<m; e++) {
+		c = fw_decrease_edge(dist, next, n, edges[3*e], edges[3*e+1], edges[3*e+2]);
+		if (c < 0)
+			return -1;
+		total += c;
+	}
+	return total;
+}
+
+int fw_path(const int32_t *next, int n, int i, int j, int32_t *path, int maxlen)
+{
+	int len = 0;
+
+	if (i < 0 || j < 0 || i >= n || j >= n || next[(size_t)i*n+j] < 0)
+		return 0;
+	for(;;) {
+		if (len < maxlen)
+			path[len] = i;
+		len++;
+		if (i == j || len > n)	/* len > n: corrupt next, stop */
+			break;
+		i = next[(size_t)i*n+j];
+	}
+	return len;
+}
@@ -0,0 +1,53 @@
+#ifndef FW_PATHS_H
+#define FW_PATHS_H
+
+/*
+ * Floyd-Warshall with path reconstruction and incremental edge decreases,
+ * plus the benchmarked engines (libfw.so, `make libfw.so`; Python binding:
+ * tools/fwlib.py).
+ *
+ * Matrices are flat, row-major n x n int32_t arrays owned by the caller:
+ *   dist[i*n+j]  distance i -> j, FW_INF if j is unreachable
+ *   next[i*n+j]  first vertex after i on a shortest path to j,
+ *                i on the diagonal, -1 if there is no path
+ * next may be NULL everywhere to skip the next-hop bookkeeping.
+ * Negative edges are fine, negative cycles are not.
+ */
+
+#include <stdint.h>
+
+#define FW_INF (INT32_MAX / 2)	/* INF + INF still fits an int32_t */
+
+/* dist = graph_init_random's complete graph (weights < 2^20, 0 diagonal) */
+void fw_graph_random(int32_t *dist, int n, int seed);
+
+/* Adjacency matrix in dist -> all-pairs distances (+ next hops), O(n^3). */
+void fw_solve(int32_t *dist, int32_t *next, int n);
+
+/*
+ * Repair solved dist/next after the weight of edge u -> v drops to w, in
+ * O(n^2): d(i,j) = min(d(i,j), d(i,u) + w + d(v,j)). Returns the number of
+ * pairs that got shorter, -1 for bad arguments or if w closes a negative cycle.
+ */
+long fw_decrease_edge(int32_t *dist, int32_t *next, int n, int u, int v, int32_t w);
+
+/* m decreases, edges = m (u, v, w) triples; pairs improved in total, -1 on error */
+long fw_decrease_edges(int32_t *dist, int32_t *next, int n, const int32_t *edges, int m);
+
+/*
+ * dist = all-pairs distances with one of the benchmarked engines, as the
+ * binaries run it (fw_engines.c): "fw" (fw.c, serial), "fw_tiled" (B x B
+ * tiles, serial) or "fw_sr_p" (tasks; C > 0 = dataflow version). Distances
+ * only, and like the binaries no FW_INF handling: for complete graphs with
+ * non-negative weights (fw_graph_random's). Returns 0, -1 for an unknown
+ * engine, -2 for N / B / C the engine does not take, -3 out of memory.
+ */
+int fw_engine_solve(const char *engine, int32_t *dist, int n, int B, int C);
+
+/*
+ * Shortest path i -> j from next: writes up to maxlen vertices (i and j
+ * included) to path and returns the path's vertex count, 0 if there is none.
+ */
+int fw_path(const int32_t *next, int n, int i, int j, int32_t *path, int maxlen);
+
+#endif /* FW_PATHS_H */
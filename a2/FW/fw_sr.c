@@ -10,6 +10,7 @@
 #include <stdlib.h>
 #include <sys/time.h>
 #include "util.h"
+#include "runrec.h"
 
 inline int min(int a, int b);
 void FW_SR (int **A, int arow, int acol, 
@@ -23,6 +24,7 @@ int main(int argc, char **argv)
 	int i,j;
 	struct timeval t1, t2;
 	double time;
+	runrec_t rec;
 	int B=16;
 	int N=1024;
 
@@ -46,6 +48,12 @@ int main(int argc, char **argv)
 	time=(double)((t2.tv_sec-t1.tv_sec)*1000000+t2.tv_usec-t1.tv_usec)/1000000;
 	printf("FW_SR,%d,%d,%.4f\n", N, B, time);
 
+	runrec_init(&rec, "fw_sr");
+	runrec_param(&rec, "N", N);
+	runrec_param(&rec, "B", B);
+	rec.total_time = time;
+	runrec_write(&rec);
+
 	/*
 	for(i=0; i<N; i++)
 		for(j=0; j<N; j++) fprintf(stdout,"%d\n", A[i][j]);
@@ -1,9 +1,14 @@
 /*
  * Recursive implementation of the Floyd-Warshall algorithm.
- * command line arguments: N, B
+ * command line arguments: N, B [, C]
  * N = size of graph
  * B = size of submatrix when recursion stops
- * works only for N, B = 2^k
+ * C = (optional) task size for the dataflow version: the recursion is
+ *     walked by one thread, every call of size C becomes one task that
+ *     finishes it serially, and the tasks are ordered only by depend
+ *     clauses on the A/B/C blocks they touch - no taskwait anywhere, so
+ *     independent quadrant updates from different levels overlap
+ * works only for N, B, C = 2^k
  */
 
 #include <stdio.h>
@@ -11,12 +16,23 @@
 #include <sys/time.h>
 #include <omp.h>
 #include "util.h"
+#include "runrec.h"
+#include "omp_trace.h"
 
 inline int min(int a, int b);
 void FW_SR (int **A, int arow, int acol, 
             int **B, int brow, int bcol, 
             int **C, int crow, int ccol, 
             int myN, int bsize);
+void FW_SR_serial (int **A, int arow, int acol, 
+                   int **B, int brow, int bcol, 
+                   int **C, int crow, int ccol, 
+                   int myN, int bsize);
+void FW_SR_dep (int **A, int arow, int acol, 
+                int **B, int brow, int bcol, 
+                int **C, int crow, int ccol, 
+                int myN, int bsize, int tsize);
+void FW_SR_P(int **A, int N, int B, int C);
 
 int main(int argc, char **argv)
 {
@@ -24,40 +40,58 @@ int main(int argc, char **argv)
 	int i,j,k;
 	struct timeval t1, t2;
 	double time;
+	runrec_t rec;
 	int B=16;
 	int N=1024;
+	int C=0;	/* task size of the dataflow version, 0 = nested tasks + taskwait */
 
-	if (argc !=3){
-		fprintf(stdout, "Usage %s N B \n", argv[0]);
+	if (argc !=3 && argc !=4){
+		fprintf(stdout, "Usage %s N B [C]\n", argv[0]);
 		exit(0);
 	}
 
 	N=atoi(argv[1]);
 	B=atoi(argv[2]);
+	if (argc == 4) C=atoi(argv[3]);
 
 	if ((N%B)!=0){
 		fprintf(stdout, "N must be multiple of B\n");
 		exit(0);
 	}
+	if (C && (C<B || (C%B)!=0 || (N%C)!=0)){
+		fprintf(stdout, "C must be a multiple of B and divide N\n");
+		exit(0);
+	}
 
 	A = (int **) malloc(N*sizeof(int *));
 	for(i=0; i<N; i++) A[i] = (int *) malloc(N*sizeof(int));
 
 	graph_init_random(A,-1,N,128*N);
 	
+	TRACE_INIT("fw_sr_p");
 //-----------------------------------------------------------------------
 	gettimeofday(&t1,0);
 
-	#pragma omp parallel
-	#pragma omp single
-	{
-	FW_SR(A,0,0, A,0,0,A,0,0,N,B);
-	}
+	TRACE_BEGIN(TRACE_REGION);
+	FW_SR_P(A,N,B,C);
+	TRACE_END(TRACE_REGION, 0);
 	
 	gettimeofday(&t2,0);
 
 	time=(double)((t2.tv_sec-t1.tv_sec)*1000000+t2.tv_usec-t1.tv_usec)/1000000;
-	printf("FW_SR,%d,%d,%.4f\n", N, B, time);
+	if (C)
+		printf("FW_SR_DEP,%d,%d,%.4f,%d\n", N, B, time, C);
+	else
+		printf("FW_SR,%d,%d,%.4f\n", N, B, time);
+
+	runrec_init(&rec, C ? "fw_sr_dep" : "fw_sr_p");
+	runrec_param(&rec, "N", N);
+	runrec_param(&rec, "B", B);
+	runrec_param(&rec, "C", C);
+	rec.threads = omp_get_max_threads();
+	rec.total_time = time;
+	runrec_write(&rec);
+	TRACE_DUMP();
 
 	
 //	for(i=0; i<N; i++)
@@ -73,6 +107,19 @@ inline int min(int a, int b)
 	else return b;
 }
 
+/* the timed kernel (also libfw.so's "fw_sr_p" engine, fw_engines.c) */
+void FW_SR_P(int **A, int N, int B, int C)
+{
+	#pragma omp parallel
+	#pragma omp single
+	{
+	if (C)
+		FW_SR_dep(A,0,0, A,0,0,A,0,0,N,B,C);	/* tasks done at the end of single */
+	else
+		FW_SR(A,0,0, A,0,0,A,0,0,N,B);
+	}
+}
+
 void FW_SR (int **A, int arow, int acol, 
             int **B, int brow, int bcol, 
             int **C, int crow, int ccol, 
@@ -106,11 +153,14 @@ void FW_SR (int **A, int arow, int acol,
 	 * The base case (when recursion stops) is not allowed to be edited!
 	 * What you can do is try different block sizes.
 	 */
-	if(myN<=bsize)
+	if(myN<=bsize) {
+		TRACE_BEGIN(TRACE_CHUNK);
 		for(k=0; k<myN; k++)
 			for(i=0; i<myN; i++)
 				for(j=0; j<myN; j++)
 					A[arow+i][acol+j]=min(A[arow+i][acol+j], B[brow+i][bcol+k]+C[crow+k][ccol+j]);
+		TRACE_END(TRACE_CHUNK, case_id);
+	}
 	else {
 
 		switch(case_id){
@@ -129,7 +179,9 @@ void FW_SR (int **A, int arow, int acol,
 					//call3
 					FW_SR(A,arow+myN/2, acol,B,brow+myN/2, bcol,C,crow, ccol, myN/2, bsize);
 				}
+				TRACE_BEGIN(TRACE_BARRIER);
 				#pragma omp taskwait
+				TRACE_END(TRACE_BARRIER, myN);
 
 				//call4
 				FW_SR(A,arow+myN/2, acol+myN/2,B,brow+myN/2, bcol,C,crow, ccol+myN/2, myN/2, bsize);
@@ -147,7 +199,9 @@ void FW_SR (int **A, int arow, int acol,
 					//call7
 					FW_SR(A,arow, acol+myN/2,B,brow, bcol+myN/2,C,crow+myN/2, ccol+myN/2, myN/2, bsize);
 				}
+				TRACE_BEGIN(TRACE_BARRIER);
 				#pragma omp taskwait
+				TRACE_END(TRACE_BARRIER, myN);
 				
 				//call8
 				FW_SR(A,arow, acol,B,brow, bcol+myN/2,C,crow+myN/2, ccol, myN/2, bsize);
@@ -178,7 +232,9 @@ void FW_SR (int **A, int arow, int acol,
 					FW_SR(A,arow+myN/2, acol,B,brow+myN/2, bcol+myN/2,C,crow+myN/2, ccol, myN/2, bsize);
 				}
 				
+				TRACE_BEGIN(TRACE_BARRIER);
 				#pragma omp taskwait
+				TRACE_END(TRACE_BARRIER, myN);
 			}
 			break;
 			case 2: //A,C same block
@@ -206,7 +262,9 @@ void FW_SR (int **A, int arow, int acol,
 					FW_SR(A,arow, acol+myN/2,B,brow, bcol+myN/2,C,crow+myN/2, ccol+myN/2, myN/2, bsize);
 				}
 				
+				TRACE_BEGIN(TRACE_BARRIER);
 				#pragma omp taskwait
+				TRACE_END(TRACE_BARRIER, myN);
 			}
 			break;
 			case 3: //A separate from B and C
@@ -239,13 +297,77 @@ void FW_SR (int **A, int arow, int acol,
 				//call5
 				FW_SR(A,arow+myN/2, acol+myN/2,B,brow+myN/2, bcol+myN/2,C,crow+myN/2, ccol+myN/2, myN/2, bsize);
 			}
+			TRACE_BEGIN(TRACE_BARRIER);
 			#pragma omp taskwait
+			TRACE_END(TRACE_BARRIER, myN);
 			
 			break;
 		}
 	}
 }
 
+/* fw_sr.c's recursion: what one dataflow task runs */
+void FW_SR_serial (int **A, int arow, int acol, 
+                   int **B, int brow, int bcol, 
+                   int **C, int crow, int ccol, 
+                   int myN, int bsize)
+{
+	int k,i,j;
+
+	if(myN<=bsize) {
+		TRACE_BEGIN(TRACE_CHUNK);
+		for(k=0; k<myN; k++)
+			for(i=0; i<myN; i++)
+				for(j=0; j<myN; j++)
+					A[arow+i][acol+j]=min(A[arow+i][acol+j], B[brow+i][bcol+k]+C[crow+k][ccol+j]);
+		TRACE_END(TRACE_CHUNK, 4);
+	}
+	else {
+		FW_SR_serial(A,arow, acol,B,brow, bcol,C,crow, ccol, myN/2, bsize);
+		FW_SR_serial(A,arow, acol+myN/2,B,brow, bcol,C,crow, ccol+myN/2, myN/2, bsize);
+		FW_SR_serial(A,arow+myN/2, acol,B,brow+myN/2, bcol,C,crow, ccol, myN/2, bsize);
+		FW_SR_serial(A,arow+myN/2, acol+myN/2,B,brow+myN/2, bcol,C,crow, ccol+myN/2, myN/2, bsize);
+		FW_SR_serial(A,arow+myN/2, acol+myN/2,B,brow+myN/2, bcol+myN/2,C,crow+myN/2, ccol+myN/2, myN/2, bsize);
+		FW_SR_serial(A,arow+myN/2, acol,B,brow+myN/2, bcol+myN/2,C,crow+myN/2, ccol, myN/2, bsize);
+		FW_SR_serial(A,arow, acol+myN/2,B,brow, bcol+myN/2,C,crow+myN/2, ccol+myN/2, myN/2, bsize);
+		FW_SR_serial(A,arow, acol,B,brow, bcol+myN/2,C,crow+myN/2, ccol, myN/2, bsize);
+	}
+}
+
+/*
+ * Dataflow version. Walks the recursion in the serial call order (call1 ..
+ * call8 at every level) without creating tasks until a call is tsize x tsize,
+ * which becomes a task: out/in dependences on the first element of its A, B
+ * and C blocks. All these tasks are siblings (children of the single thread)
+ * and blocks of one size are either identical or disjoint, so the depend
+ * clauses reproduce exactly the serial order's read/write dependences and
+ * nothing else: e.g. call4 of one quadrant can run while call2/call3 of
+ * another are still going.
+ */
+void FW_SR_dep (int **A, int arow, int acol, 
+                int **B, int brow, int bcol, 
+                int **C, int crow, int ccol, 
+                int myN, int bsize, int tsize)
+{
+	int h = myN/2;
+
+	if(myN<=tsize) {
+		/* A,B,C firstprivate too: this frame is gone before the task runs */
+		#pragma omp task firstprivate(A,B,C,arow,acol,brow,bcol,crow,ccol,myN,bsize) \
+			depend(inout: A[arow][acol]) depend(in: B[brow][bcol], C[crow][ccol])
+		FW_SR_serial(A,arow, acol,B,brow, bcol,C,crow, ccol, myN, bsize);
+		return;
+	}
+	FW_SR_dep(A,arow, acol,B,brow, bcol,C,crow, ccol, h, bsize, tsize);
+	FW_SR_dep(A,arow, acol+h,B,brow, bcol,C,crow, ccol+h, h, bsize, tsize);
+	FW_SR_dep(A,arow+h, acol,B,brow+h, bcol,C,crow, ccol, h, bsize, tsize);
+	FW_SR_dep(A,arow+h, acol+h,B,brow+h, bcol,C,crow, ccol+h, h, bsize, tsize);
+	FW_SR_dep(A,arow+h, acol+h,B,brow+h, bcol+h,C,crow+h, ccol+h, h, bsize, tsize);
+	FW_SR_dep(A,arow+h, acol,B,brow+h, bcol+h,C,crow+h, ccol, h, bsize, tsize);
+	FW_SR_dep(A,arow, acol+h,B,brow, bcol+h,C,crow+h, ccol+h, h, bsize, tsize);
+	FW_SR_dep(A,arow, acol,B,brow, bcol+h,C,crow+h, ccol, h, bsize, tsize);
+}
+
 /*
 call1
 		FW_SR(A,arow, acol,B,brow, bcol,C,crow, ccol, myN/2, bsize);
@@ -9,9 +9,11 @@
 #include <stdlib.h>
 #include <sys/time.h>
 #include "util.h"
+#include "runrec.h"
 
 inline int min(int a, int b);
 inline void FW(int **A, int K, int I, int J, int N);
+void FW_TILED(int **A, int N, int B);
 
 int main(int argc, char **argv)
 {
@@ -19,6 +21,7 @@ int main(int argc, char **argv)
 	int i,j,k;
 	struct timeval t1, t2;
 	double time;
+	runrec_t rec;
 	int B=64;
 	int N=1024;
 
@@ -36,6 +39,36 @@ int main(int argc, char **argv)
 	graph_init_random(A,-1,N,128*N);
 
 	gettimeofday(&t1,0);
+	FW_TILED(A,N,B);
+	gettimeofday(&t2,0);
+
+	time=(double)((t2.tv_sec-t1.tv_sec)*1000000+t2.tv_usec-t1.tv_usec)/1000000;
+	printf("FW_TILED,%d,%d,%.4f\n", N,B,time);
+
+	runrec_init(&rec, "fw_tiled");
+	runrec_param(&rec, "N", N);
+	runrec_param(&rec, "B", B);
+	rec.total_time = time;
+	runrec_write(&rec);
+
+	/*
+	for(i=0; i<N; i++)
+		for(j=0; j<N; j++) fprintf(stdout,"%d\n", A[i][j]);
+	*/
+	
+	return 0;
+}
+
+inline int min(int a, int b)
+{
+	if(a<=b)return a;
+	else return b;
+}
+
+/* the timed kernel (also libfw.so's "fw_tiled" engine, fw_engines.c) */
+void FW_TILED(int **A, int N, int B)
+{
+	int i,j,k;
 
 	for(k=0;k<N;k+=B){
 		FW(A,k,k,k,B);
@@ -68,23 +101,6 @@ int main(int argc, char **argv)
 			for(j=k+B; j<N; j+=B)
 				FW(A,k,i,j,B);
 	}
-	gettimeofday(&t2,0);
-
-	time=(double)((t2.tv_sec-t1.tv_sec)*1000000+t2.tv_usec-t1.tv_usec)/1000000;
-	printf("FW_TILED,%d,%d,%.4f\n", N,B,time);
-
-	/*
-	for(i=0; i<N; i++)
-		for(j=0; j<N; j++) fprintf(stdout,"%d\n", A[i][j]);
-	*/
-	
-	return 0;
-}
-
-inline int min(int a, int b)
-{
-	if(a<=b)return a;
-	else return b;
 }
 
 inline void FW(int **A, int K, int I, int J, int N)
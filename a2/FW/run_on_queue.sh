@@ -14,9 +14,17 @@
 
 cd /home/parallel/parlab05/a2/FW
 
+# Commit of the checkout the binaries were built in, kept with every run
+# (meta.txt, runrec env) so tools/perf_regress.py attributes the run to it
+BUILD_COMMIT="$(git rev-parse --short HEAD 2>/dev/null || echo unknown)"
+[[ -n "$(git status --porcelain --untracked-files=no 2>/dev/null)" ]] && BUILD_COMMIT+="+dirty"
+export BUILD_COMMIT
+
 module load openmp 
 
 N_VALUES="1024 2048 4096"
+# 1: run through tools/rusage_run.py (peak RSS, page faults, context switches), 0: bare
+: "${RUSAGE:=1}"
 
 # Block size 
 B=64
@@ -36,7 +44,16 @@ for N in $N_VALUES; do
         
         #  - stdout → OUT
         #  - stderr → ERR
-        ./fw_sr_p "$N" "$B" >"$OUT" 2>"$ERR"
+        # Only used by a tracing build (make TRACE=1)
+        export TRACE_FILE="${OUTDIR}/fw_sr_p_N${N}_T${T}.trace"
+        # Binary run record (common/runrec.h); read with tools/runrec.py
+        export RUNREC_FILE="${OUTDIR}/fw_sr_p_N${N}_T${T}.rec"
+        rm -f "${RUNREC_FILE}"
+        # Peak RSS / page faults / context switches (wait4 + /proc); tools/rusage_run.py
+        MEASURE=()
+        rm -f "${OUTDIR}/fw_sr_p_N${N}_T${T}.rusage"
+        [[ "${RUSAGE}" == "1" ]] && MEASURE=(python3 ../../tools/rusage_run.py -o "${OUTDIR}/fw_sr_p_N${N}_T${T}.rusage" --)
+        "${MEASURE[@]}" ./fw_sr_p "$N" "$B" >"$OUT" 2>"$ERR"
     done
 done
 
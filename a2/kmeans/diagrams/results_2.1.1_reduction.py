@@ -5,6 +5,8 @@
 #   - images/2.1.1_reduction_time.png          (Time vs Threads)
 #   - images/2.1.1_reduction_speedup.png       (Speedup vs seq)
 #   - images/2.1.1_reduction_speedup_par1.png  (Speedup vs 1-thread parallel)
+#   - images/2.1.1_reduction_trace.png         (load imbalance / barrier wait / merge,
+#                                               traced runs only)
 #
 # x-axis:  ["seq", "1", "2", "4", "8", "16", "32", "64"]
 # times:   total runtime for each configuration
@@ -19,6 +21,11 @@ import matplotlib.pyplot as plt
 
 
 def parse_results(path):
+    # Columns are looked up by name in the header row, so tables with extra
+    # columns (SEEDING, TTS, ...) still parse; without a header the original
+    # 12-column layout is assumed.
+    header = ["KIND", "RUN_TAG", "BIN", "T", "AFF", "SIZE", "COORDS",
+              "CLUSTERS", "LOOPS", "NLOOPS", "TOTAL", "PER_LOOP"]
     runs = []
     with open(path, "r", encoding="utf-8") as f:
         for line in f:
@@ -30,40 +37,30 @@ def parse_results(path):
                 continue
 
             parts = line.split()
-            if len(parts) < 12:
-                continue  # defensive
 
-            # Skip header row like: KIND RUN_TAG BIN T AFF ...
+            # Header row like: KIND RUN_TAG BIN T AFF ...
             if parts[0].upper() == "KIND":
+                header = [p.split("(")[0].upper() for p in parts]
                 continue
-
-            kind = parts[0]
-            run_tag = parts[1]
-            bin_name = parts[2]
-            threads = int(parts[3])
-            aff = parts[4]
-            size = int(parts[5])
-            coords = int(parts[6])
-            clusters = int(parts[7])
-            loops = int(parts[8])
-            nloops = int(parts[9])
-            total_s = float(parts[10])
-            per_loop_s = float(parts[11])
+            if len(parts) < len(header):
+                continue  # defensive
+            cells = dict(zip(header, parts))
 
             runs.append(
                 {
-                    "KIND": kind,
-                    "RUN_TAG": run_tag,
-                    "BIN": bin_name,
-                    "THREADS": threads,
-                    "AFF": aff,
-                    "SIZE": size,
-                    "COORDS": coords,
-                    "CLUSTERS": clusters,
-                    "LOOPS": loops,
-                    "NLOOPS": nloops,
-                    "TOTAL": total_s,
-                    "PER_LOOP": per_loop_s,
+                    "KIND": cells["KIND"],
+                    "RUN_TAG": cells["RUN_TAG"],
+                    "BIN": cells["BIN"],
+                    "THREADS": int(cells["T"]),
+                    "AFF": cells["AFF"],
+                    "SEEDING": cells.get("SEEDING", "first"),
+                    "SIZE": int(cells["SIZE"]),
+                    "COORDS": int(cells["COORDS"]),
+                    "CLUSTERS": int(cells["CLUSTERS"]),
+                    "LOOPS": int(cells["LOOPS"]),
+                    "NLOOPS": int(cells["NLOOPS"]),
+                    "TOTAL": float(cells["TOTAL"]),
+                    "PER_LOOP": float(cells["PER_LOOP"]),
                 }
             )
     return runs
@@ -128,6 +125,57 @@ def add_bar_labels(ax, bars, fmt="{:.4f}", fontsize=8):
         )
 
 
+def read_trace_summary(path):
+    # One-row tools/trace2chrome.py summary ({column: value}), or None if the
+    # run was not traced (make TRACE=1, then trace2chrome.py on run.trace)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [l for l in f.read().splitlines() if l.strip()]
+    if len(lines) < 2:
+        return None
+    return dict(zip(lines[0].split("\t"), lines[1].split("\t")))
+
+
+def plot_trace_summaries(runs, bench_dir, out_path, title):
+    # Load imbalance, barrier wait and serial merge time per thread count,
+    # from benchmarks/<KIND>/<AFF>/<RUN_TAG>/run.summary.txt; nothing is
+    # written if none of the runs was traced
+    traced = []
+    for r in sorted(runs, key=lambda r: r["THREADS"]):
+        s = read_trace_summary(os.path.join(bench_dir, r["KIND"], r["AFF"], r["RUN_TAG"], "run.summary.txt"))
+        if s is not None:
+            traced.append((r["THREADS"], s))
+    if not traced:
+        return None
+
+    panels = [
+        ("Load imbalance (max/mean - 1)", [float(s["IMBALANCE"]) for _, s in traced], "{:.3f}"),
+        ("Barrier wait (% of thread time)", [100 * float(s["BARRIER_FRAC"]) for _, s in traced], "{:.1f}"),
+    ]
+    merge = []
+    for _, s in traced:
+        region = float(s["REGION_TIME"])
+        merge.append(100 * float(s.get("MERGE_TIME", 0.0)) / region if region > 0 else 0.0)
+    if any(merge):
+        panels.append(("Serial merge (% of region time)", merge, "{:.3f}"))
+
+    x = list(range(len(traced)))
+    fig, axes = plt.subplots(1, len(panels), figsize=(5 * len(panels), 4.5))
+    for ax, (ylabel, values, fmt) in zip(axes, panels):
+        bars = ax.bar(x, values)
+        ax.set_xticks(x)
+        ax.set_xticklabels([str(t) for t, _ in traced])
+        ax.set_xlabel("Threads")
+        ax.set_ylabel(ylabel)
+        add_bar_labels(ax, bars, fmt=fmt)
+    fig.suptitle(title)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=150)
+    plt.close(fig)
+    return out_path
+
+
 def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     # If your .txt is in the same directory, remove "results" below
@@ -136,6 +184,9 @@ def main():
     os.makedirs(images_dir, exist_ok=True)
 
     runs = parse_results(results_path)
+
+    # first-objects seeding only; k-means|| runs (-k kmeans-par): tools/convergence.py
+    runs = [r for r in runs if r["SEEDING"] == "first"]
     labels, times, speedup_seq, speedup_par1, cfg = build_data_for_plots(runs)
     size, coords, clusters, loops = cfg
 
@@ -196,6 +247,20 @@ def main():
     fig.savefig(out_path_speed_par1, dpi=150)
     plt.close(fig)
 
+    # 4) Load imbalance / barrier wait of traced runs (optional)
+    bench_dir = os.path.join(base_dir, "..", "benchmarks")
+    kind_runs = [
+        r for r in runs
+        if r["KIND"] == "reduction" and (r["SIZE"], r["COORDS"], r["CLUSTERS"], r["LOOPS"]) == cfg
+    ]
+    plot_trace_summaries(
+        kind_runs,
+        bench_dir,
+        os.path.join(images_dir, "2.1.1_reduction_trace.png"),
+        f"K-means (reduction, shared clusters) — trace summary (default affinity)\n"
+        f"Size={size}, Coords={coords}, Clusters={clusters}, Loops={loops}",
+    )
+
 
 if __name__ == "__main__":
     main()
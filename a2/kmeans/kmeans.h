@@ -2,15 +2,59 @@
 #define _H_KMEANS
 
 #include <assert.h>
+#include "runrec.h"
+#include "numa_init.h"
 
-void kmeans(double * objects, int numCoords, int numObjs, int numClusters, double threshold, long loop_threshold, int *membership, double * clusters);
+/*
+ * Coordinates of objects and cluster centers are coord_t: double, or float
+ * when compiled with -DKMEANS_FLOAT. The Makefile builds every kernel and
+ * file_io.c both ways; the float copies get an _f32 suffix and main.c picks
+ * one at run time (-p float). The cluster sums (newClusters) are double in
+ * both, so only the streamed data is halved, not the accumulation precision.
+ * euclid_dist_2 accumulates in coord_t: a sum of numCoords squares only
+ * picks the nearest center, so float is enough there; the centroid sums
+ * add up to numObjs values and are the only place that needs double.
+ */
+#ifdef KMEANS_FLOAT
+typedef float coord_t;
+#define kmeans                   kmeans_f32
+#define dataset_generation       dataset_generation_f32
+#define dataset_generation_range dataset_generation_range_f32
+#define kmeans_seed              kmeans_seed_f32
+#define kmeans_mpi               kmeans_mpi_f32
+#else
+typedef double coord_t;
+#endif
+
+void kmeans(coord_t * objects, int numCoords, int numObjs, int numClusters, double threshold, long loop_threshold, int *membership, coord_t * clusters);
+
+coord_t * dataset_generation(int numObjs, int numCoords);
+coord_t * dataset_generation_range(long first, int numObjs, int numCoords);
+
+/* k-means|| initial centers (-k kmeans-par, file_io.c); candidates used, -1 on failure */
+int kmeans_seed(coord_t * objects, int numObjs, int numCoords, int numClusters, double * clusters);
 
-double * dataset_generation(int numObjs, int numCoords);
+#ifndef KMEANS_FLOAT
+void kmeans_f32(float * objects, int numCoords, int numObjs, int numClusters, double threshold, long loop_threshold, int *membership, float * clusters);
+float * dataset_generation_f32(int numObjs, int numCoords);
+float * dataset_generation_range_f32(long first, int numObjs, int numCoords);
+int kmeans_seed_f32(float * objects, int numObjs, int numCoords, int numClusters, double * clusters);
+#endif
+
+#ifdef MPI_VERSION
+/* distributed kmeans (mpi_kmeans.c, include mpi.h first): objects is this rank's shard of totalObjs */
+void kmeans_mpi(coord_t * objects, int numCoords, int numObjs, long totalObjs, int numClusters, double threshold, long loop_threshold, int *membership, coord_t * clusters, MPI_Comm comm);
+#ifndef KMEANS_FLOAT
+void kmeans_mpi_f32(float * objects, int numCoords, int numObjs, long totalObjs, int numClusters, double threshold, long loop_threshold, int *membership, float * clusters, MPI_Comm comm);
+#endif
+#endif
 
 int check_repeated_clusters(int, int, double*);
 
 double wtime(void);
 
 extern int _debug;
+extern int _init_mode;     /* INIT_* page placement of objects/membership (-i) */
+extern runrec_t _runrec; /* run record, written by main() if RUNREC_FILE is set */
 
 #endif
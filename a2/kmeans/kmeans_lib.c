@@ -0,0 +1,83 @@
+/*
+ * The kmeans kernels as one shared library (`make libkmeans.so`), for
+ * callers that keep a dataset in memory across runs (tools/kernels.py,
+ * ctypes, and tools/bench_worker.py). Every kernel source is compiled once
+ * more with its kmeans() renamed kmeans_<engine>; this file owns the
+ * globals main.c would define and picks a kernel by the engine name used
+ * for benchmarks/<kind>/: serial, naive, reduction or kdtree (double only).
+ *
+ * Threads: the caller's omp_set_num_threads() / OMP_NUM_THREADS, as for the
+ * binaries; the OpenMP team survives between calls.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+int _debug;
+int _init_mode;
+#include "kmeans.h"
+runrec_t _runrec;
+
+#define KMEANS_ENGINE(name) \
+    void kmeans_##name(double *objects, int numCoords, int numObjs, int numClusters, double threshold, \
+                       long loop_threshold, int *membership, double *clusters);
+KMEANS_ENGINE(serial)
+KMEANS_ENGINE(naive)
+KMEANS_ENGINE(reduction)
+KMEANS_ENGINE(kdtree)
+
+typedef void (*kmeans_fn)(double *, int, int, int, double, long, int *, double *);
+
+static const struct { const char *name; kmeans_fn fn; } engines[] = {
+    { "serial",    kmeans_serial },
+    { "naive",     kmeans_naive },
+    { "reduction", kmeans_reduction },
+    { "kdtree",    kmeans_kdtree },
+};
+
+/* main.c's dataset for -s/-n (numObjs objects), placed by init_mode (-i); free with kmeans_lib_free */
+double * kmeans_lib_dataset(int numObjs, int numCoords, int init_mode)
+{
+    _init_mode = init_mode;
+    return dataset_generation(numObjs, numCoords);
+}
+
+void kmeans_lib_free(void *p)
+{
+    free(p);
+}
+
+/*
+ * One run of an engine with main.c's -k first initial centers, written to
+ * clusters and then replaced by the final ones. The kernel prints what it
+ * prints in the binaries. Returns the loops run, with the kernel's own
+ * timed total (the "total = ..." of its nloops line) in *total; -1 for an
+ * unknown engine, -2 if the initial centers repeat.
+ */
+int kmeans_lib_run(const char *engine, double *objects, int numCoords, int numObjs, int numClusters,
+                   double threshold, long loop_threshold, int *membership, double *clusters, double *total)
+{
+    kmeans_fn fn = NULL;
+    int i, nloops;
+
+    for (i = 0; i < (int) (sizeof(engines) / sizeof(engines[0])); i++)
+        if (strcmp(engine, engines[i].name) == 0)
+            fn = engines[i].fn;
+    if (fn == NULL)
+        return -1;
+
+    memcpy(clusters, objects, (size_t) numClusters * numCoords * sizeof(double));
+    if (check_repeated_clusters(numClusters, numCoords, clusters) == 0)
+        return -2;
+
+    runrec_init(&_runrec, engine);
+    runrec_reserve(&_runrec, loop_threshold < 100000 ? loop_threshold : 100000);
+    fn(objects, numCoords, numObjs, numClusters, threshold, loop_threshold, membership, clusters);
+    fflush(stdout);
+
+    *total = _runrec.total_time;
+    nloops = _runrec.niters;
+    runrec_free(&_runrec);
+    return nloops;
+}
@@ -0,0 +1,173 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <mpi.h>
+#include "kmeans.h"
+#include <omp.h>
+#include "omp_sched.h"
+
+/*
+ * Distributed kmeans: every rank owns a shard of the objects (mpi_main.c)
+ * and a full copy of the centers. One loop is
+ *
+ *   - the OpenMP object loop over the shard (as omp_reduction_kmeans, with
+ *     an array reduction instead of hand-made per-thread slabs), giving
+ *     this rank's newClusters sums, newClusterSize and changed memberships,
+ *   - one MPI_Allreduce of those three, packed into one buffer of doubles
+ *     (sizes and the change count are exact in a double up to 2^53),
+ *   - the same averaging on every rank, so the centers stay identical
+ *     everywhere without another message.
+ *
+ * delta is the fraction of all totalObjs objects that moved, so all ranks
+ * stop after the same loop.
+ */
+
+// square of Euclid distance between two multi-dimensional points
+inline static double euclid_dist_2(int numdims,    /* no. dimensions */
+                                   coord_t *coord1, /* [numdims] */
+                                   coord_t *coord2) /* [numdims] */
+{
+    int i;
+    coord_t ans = 0.0;
+
+    for (i = 0; i < numdims; i++)
+        ans += (coord1[i] - coord2[i]) * (coord1[i] - coord2[i]);
+
+    return ans;
+}
+
+inline static int find_nearest_cluster(int numClusters,  /* no. clusters */
+                                       int numCoords,    /* no. coordinates */
+                                       coord_t *object,  /* [numCoords] */
+                                       coord_t *clusters) /* [numClusters][numCoords] */
+{
+    int index, i;
+    double dist, min_dist;
+
+    // find the cluster id that has min distance to object
+    index = 0;
+    min_dist = euclid_dist_2(numCoords, object, clusters);
+
+    for (i = 1; i < numClusters; i++)
+    {
+        dist = euclid_dist_2(numCoords, object, &clusters[i * numCoords]);
+        // no need square root
+        if (dist < min_dist)
+        { // find the min and its array index
+            min_dist = dist;
+            index = i;
+        }
+    }
+    return index;
+}
+
+void kmeans_mpi(coord_t *objects,    /* in: [numObjs][numCoords], this rank's shard */
+                int numCoords,       /* no. coordinates */
+                int numObjs,         /* no. objects in the shard */
+                long totalObjs,      /* no. objects over all ranks */
+                int numClusters,     /* no. clusters */
+                double threshold,    /* minimum fraction of objects that change membership */
+                long loop_threshold, /* maximum number of iterations */
+                int *membership,     /* out: [numObjs] */
+                coord_t *clusters,   /* in/out: [numClusters][numCoords], the same on all ranks */
+                MPI_Comm comm)
+{
+    int i, j;
+    int index, loop = 0;
+    int rank, nranks, nthreads;
+    double timing, t_loop, t_comm;
+    double comm_time = 0.0;  // this rank's time in MPI_Allreduce
+    double delta;            // fraction of objects whose clusters change in each loop
+
+    /* [numClusters*numCoords] sums, [numClusters] sizes, 1 changed count */
+    int nacc = numClusters * numCoords + numClusters + 1;
+    double *acc = (double *)malloc(nacc * sizeof(double));
+    double *newClusters = acc;
+    double *newClusterSize = acc + numClusters * numCoords;
+    double *changed = newClusterSize + numClusters;
+
+    MPI_Comm_rank(comm, &rank);
+    MPI_Comm_size(comm, &nranks);
+    nthreads = omp_get_max_threads();
+    if (rank == 0)
+        printf("MPI Kmeans - Allreduce\t(number of threads: %d, ranks: %d x %d threads)\n",
+               nranks * nthreads, nranks, nthreads);
+
+    // initialize membership
+#pragma omp parallel for schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
+    for (i = 0; i < numObjs; i++)
+        membership[i] = -1;
+
+    sched_init();
+    MPI_Barrier(comm);
+    timing = MPI_Wtime();
+    do
+    {
+        t_loop = MPI_Wtime();
+        memset(acc, 0, nacc * sizeof(double));
+
+#pragma omp parallel for private(j, index) schedule(runtime) reduction(+ : acc[:nacc])
+        for (i = 0; i < numObjs; i++)
+        {
+            // find the array index of nearest cluster center
+            index = find_nearest_cluster(numClusters, numCoords, &objects[(long)i * numCoords], clusters);
+
+            // if membership changes, count it
+            if (membership[i] != index)
+                acc[nacc - 1] += 1.0;
+            membership[i] = index;
+
+            // local sums, combined over the ranks below
+            acc[numClusters * numCoords + index] += 1.0;
+            for (j = 0; j < numCoords; j++)
+                acc[index * numCoords + j] += objects[(long)i * numCoords + j];
+        }
+
+        t_comm = MPI_Wtime();
+        MPI_Allreduce(MPI_IN_PLACE, acc, nacc, MPI_DOUBLE, MPI_SUM, comm);
+        comm_time += MPI_Wtime() - t_comm;
+
+        // average the sum and replace old cluster centers with newClusters (every rank alike)
+        for (i = 0; i < numClusters; i++)
+        {
+            if (newClusterSize[i] > 0)
+            {
+                for (j = 0; j < numCoords; j++)
+                {
+                    clusters[i * numCoords + j] = newClusters[i * numCoords + j] / newClusterSize[i];
+                }
+            }
+        }
+
+        // Get fraction of objects whose membership changed during this loop. This is used as a convergence criterion.
+        delta = *changed / totalObjs;
+        if (rank == 0)
+            runrec_iter(&_runrec, MPI_Wtime() - t_loop, delta);
+
+        loop++;
+        if (rank == 0)
+        {
+            printf("\r\tcompleted loop %d", loop);
+            fflush(stdout);
+        }
+    } while (delta > threshold && loop < loop_threshold);
+    timing = MPI_Wtime() - timing;
+
+    /* all ranks leave the loop after the same Allreduce; report the slowest */
+    double comm_max = comm_time;
+    MPI_Reduce(rank == 0 ? MPI_IN_PLACE : &timing, &timing, 1, MPI_DOUBLE, MPI_MAX, 0, comm);
+    MPI_Reduce(rank == 0 ? MPI_IN_PLACE : &comm_max, &comm_max, 1, MPI_DOUBLE, MPI_MAX, 0, comm);
+    if (rank == 0)
+    {
+        printf("\n nloops = %3d (total = %7.4fs) (per loop = %7.4fs)\n", loop, timing, timing / loop);
+        printf("MPI: ranks %d threads per rank %d allreduce max %7.4fs (%.1f%% of total)\n",
+               nranks, nthreads, comm_max, 100.0 * comm_max / timing);
+        _runrec.threads = nranks * nthreads;
+        _runrec.total_time = timing;
+        runrec_param(&_runrec, "nloops", loop);
+        runrec_param(&_runrec, "ranks", nranks);
+        runrec_param(&_runrec, "allreduce_max", comm_max);
+    }
+
+    free(acc);
+}
@@ -0,0 +1,286 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>     /* strtok() */
+#include <sys/types.h>  /* open() */
+#include <sys/stat.h>
+#include <sys/mman.h>   /* mmap() */
+#include <fcntl.h>
+#include <unistd.h>     /* getopt() */
+#include <mpi.h>
+
+int _debug;
+int _init_mode;
+#include "kmeans.h"
+runrec_t _runrec;
+
+/*
+ * Driver of mpi_kmeans (mpi_kmeans.c): main.c's switches, run under mpirun.
+ * Every rank holds objects [first, first + count) of the numObjs objects,
+ * first = numObjs * rank / nranks, either generated with the same per-object
+ * seeds as main.c (so any rank count clusters the same dataset as the
+ * OpenMP binaries) or mapped from -f, a raw [numObjs][numCoords] file of
+ * doubles. Rank 0 picks the initial centers and broadcasts them, and alone
+ * prints and writes the run record.
+ */
+
+static int rank, nranks;
+
+static void usage(char *argv0) {
+    char *help =
+        "Usage: mpirun -np P %s [switches]\n"
+        "       -c num_clusters    : number of clusters (must be > 1)\n"
+        "       -s size            : size of examined dataset\n"
+        "       -n num_coords      : number of coordinates\n"
+        "       -t threshold       : threshold value (default : 0.001)\n"
+        "       -l loop_threshold  : iterations threshold (default : 10)\n"
+        "       -i init_mode       : page placement of each shard: serial, first-touch\n"
+        "                            or interleave (default : serial)\n"
+        "       -p precision       : storage of objects/clusters: double or float\n"
+        "                            (float32, sums still in double) (default : double)\n"
+        "       -k seeding         : initial centers: first (only) (default : first)\n"
+        "       -f file            : map the objects from a raw file of doubles\n"
+        "                            ([numObjs][num_coords], -s is then ignored)\n"
+        "       -d                 : enable debug mode\n"
+        "       -h                 : print this help information\n";
+    if (rank == 0)
+        fprintf(stderr, help, argv0);
+    MPI_Finalize();
+    exit(-1);
+}
+
+/*
+ * -f: this rank's rows of a raw double file. The mapping starts at the page
+ * holding row first; only those pages are read in (on first touch, by the
+ * kernel's own loop), so every rank reads its part of the file in parallel.
+ * float runs copy the shard into a float array and drop the mapping.
+ */
+static void *map_shard(const char *path, long first, long count, long numCoords, int use_float,
+                       void **map, size_t *map_len)
+{
+    long   page = sysconf(_SC_PAGESIZE);
+    off_t  start = (off_t) first * numCoords * sizeof(double);
+    off_t  skip = start % page;
+    double *rows;
+    float  *rows_f;
+    long   i;
+    int    fd;
+
+    *map_len = skip + count * numCoords * sizeof(double);
+    if ((fd = open(path, O_RDONLY)) < 0) {
+        perror(path);
+        MPI_Abort(MPI_COMM_WORLD, 1);
+    }
+    *map = mmap(NULL, *map_len, PROT_READ, MAP_PRIVATE, fd, start - skip);
+    close(fd);
+    if (*map == MAP_FAILED) {
+        perror("mmap");
+        MPI_Abort(MPI_COMM_WORLD, 1);
+    }
+    rows = (double *) ((char *) *map + skip);
+    if (!use_float)
+        return rows;
+
+    rows_f = (float*) numa_alloc(count * numCoords * sizeof(float), _init_mode);
+    #pragma omp parallel for schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
+    for (i=0; i<count*numCoords; i++)
+        rows_f[i] = rows[i];
+    munmap(*map, *map_len);
+    *map = NULL;
+    return rows_f;
+}
+
+int main(int argc, char **argv)
+{
+    long i, j, opt;
+    extern char* optarg;
+    extern int optind;
+
+    long     numClusters=0, numCoords=0, numObjs=0;
+    long     first, count;  // this rank's shard: objects [first, first + count)
+    int    * membership;    // [count]
+    double * objects = NULL;   // [count * numCoords] data  objects (-p double)
+    float  * objects_f = NULL; // [count * numCoords] data  objects (-p float)
+    double * clusters;      // [numClusters * numCoords] cluster center
+    int      use_float = 0, provided;
+    char   * input = NULL;  // -f
+    void   * map = NULL;
+    size_t   map_len = 0;
+    double   dataset_size = 0, threshold;
+    long     loop_threshold;
+    struct stat st;
+
+    /* one thread calls MPI (outside the parallel regions) */
+    MPI_Init_thread(&argc, &argv, MPI_THREAD_FUNNELED, &provided);
+    MPI_Comm_rank(MPI_COMM_WORLD, &rank);
+    MPI_Comm_size(MPI_COMM_WORLD, &nranks);
+
+    /* some default values */
+    _debug         = 0;
+    _init_mode     = INIT_SERIAL;
+    threshold      = 0.001;
+    loop_threshold = 10;
+    numClusters    = 0;
+
+    if (rank == 0)
+        printf("\n~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n\n");
+
+    while ( (opt = getopt(argc,argv,"n:t:l:c:s:i:p:k:f:dh")) != EOF) {
+        switch (opt) {
+            case 'c': numClusters = atol(optarg);
+                      break;
+            case 't': threshold=atof(optarg);
+                      break;
+            case 'l': loop_threshold=atol(optarg);
+                      break;
+            case 's': dataset_size=atof(optarg);
+                      break;
+            case 'n': numCoords=atol(optarg);
+                      break;
+            case 'i': _init_mode = numa_init_parse(optarg);
+                      if (_init_mode < 0)
+                          usage(argv[0]);
+                      break;
+            case 'p': if (strcmp(optarg, "float") == 0)
+                          use_float = 1;
+                      else if (strcmp(optarg, "double") == 0)
+                          use_float = 0;
+                      else
+                          usage(argv[0]);
+                      break;
+            // k-means|| would need its candidate rounds distributed too
+            case 'k': if (strcmp(optarg, "first") != 0)
+                          usage(argv[0]);
+                      break;
+            case 'f': input = optarg;
+                      break;
+            case 'd': _debug = 1;
+                      break;
+            case 'h':
+            default: usage(argv[0]);
+                      break;
+        }
+    }
+    if (numClusters <= 1 || numCoords <= 0)
+        usage(argv[0]);
+
+    if (input) {
+        if (stat(input, &st) != 0) {
+            if (rank == 0)
+                perror(input);
+            MPI_Finalize();
+            return 1;
+        }
+        numObjs = st.st_size / (numCoords*sizeof(double));
+        dataset_size = (double) st.st_size / (1024*1024);
+    } else {
+        numObjs = (dataset_size*1024*1024) / (numCoords*sizeof(double));
+    }
+
+    if (numObjs < numClusters || numObjs / nranks < numClusters) {
+        if (rank == 0)
+            printf("Error: number of clusters must be larger than the number of data points (per rank) to be clustered.\n");
+        MPI_Finalize();
+        return 1;
+    }
+    first = numObjs * rank / nranks;
+    count = numObjs * (rank + 1) / nranks - first;
+    if (rank == 0)
+        printf("dataset_size = %.2f MB    numObjs = %ld    numCoords = %ld    numClusters = %ld    precision = %s\n"
+               "ranks = %d    objects per rank = %ld..%ld    input = %s\n",
+               dataset_size, numObjs, numCoords, numClusters, use_float ? "float" : "double",
+               nranks, numObjs / nranks, (numObjs + nranks - 1) / nranks, input ? input : "generated");
+
+    if (input) {
+        void *rows = map_shard(input, first, count, numCoords, use_float, &map, &map_len);
+        if (use_float)
+            objects_f = rows;
+        else
+            objects = rows;
+    } else if (use_float) {
+        objects_f = dataset_generation_range_f32(first, count, numCoords);
+    } else {
+        objects = dataset_generation_range(first, count, numCoords);
+    }
+
+    // Allocate space for clusters (coordinates of cluster centers)
+    clusters = (double*)  malloc(numClusters * numCoords * sizeof(double));
+
+    // The first numClusters elements are selected as initial centers: rank 0's, sent to all
+    if (rank == 0) {
+        for (i=0; i<numClusters; i++)
+            for (j=0; j<numCoords; j++)
+                clusters[i*numCoords + j] = use_float ? objects_f[i*numCoords + j] : objects[i*numCoords + j];
+
+        // check initial cluster centers for repeatition
+        if (check_repeated_clusters(numClusters, numCoords, clusters) == 0) {
+            printf("Error: some initial clusters are repeated. Please select distinct initial centers\n");
+            MPI_Abort(MPI_COMM_WORLD, 1);
+        }
+
+        printf("Initial cluster centers:\n");
+        for (i=0; i<numClusters; i++) {
+            printf("clusters[%ld] =",i);
+            for (j=0; j<numCoords; j++)
+                printf(" %6.2f", clusters[i*numCoords + j]);
+            printf("\n");
+        }
+    }
+    MPI_Bcast(clusters, numClusters * numCoords, MPI_DOUBLE, 0, MPI_COMM_WORLD);
+
+    // membership: the cluster id for each data object of the shard
+    membership = (int*) numa_alloc(count * sizeof(int), _init_mode);
+
+    runrec_init(&_runrec, strrchr(argv[0], '/') ? strrchr(argv[0], '/') + 1 : argv[0]);
+    runrec_param(&_runrec, "size_mb", dataset_size);
+    runrec_param(&_runrec, "numObjs", numObjs);
+    runrec_param(&_runrec, "numCoords", numCoords);
+    runrec_param(&_runrec, "numClusters", numClusters);
+    runrec_param(&_runrec, "threshold", threshold);
+    runrec_param(&_runrec, "loop_thresh", loop_threshold);
+    runrec_param(&_runrec, "init_mode", _init_mode);
+    runrec_param(&_runrec, "float", use_float);
+    // per-iteration (time, delta) buffer, allocated up front so kmeans_mpi() never reallocs
+    runrec_reserve(&_runrec, loop_threshold < 100000 ? loop_threshold : 100000);
+
+    // start the core computation
+    if (rank == 0)
+        printf("\n");
+    if (use_float) {
+        float *clusters_f = (float*) malloc(numClusters * numCoords * sizeof(float));
+        for (i=0; i<numClusters*numCoords; i++)
+            clusters_f[i] = clusters[i];
+        kmeans_mpi_f32(objects_f, numCoords, count, numObjs, numClusters, threshold, loop_threshold,
+                       membership, clusters_f, MPI_COMM_WORLD);
+        for (i=0; i<numClusters*numCoords; i++)
+            clusters[i] = clusters_f[i];
+        free(clusters_f);
+    } else {
+        kmeans_mpi(objects, numCoords, count, numObjs, numClusters, threshold, loop_threshold,
+                   membership, clusters, MPI_COMM_WORLD);
+    }
+
+    if (rank == 0) {
+        printf("\n");
+        printf("Final cluster centers:\n");
+        for (i=0; i<numClusters; i++) {
+            printf("clusters[%ld] = ",i);
+            for (j=0; j<numCoords; j++)
+                printf("%6.2f ", clusters[i*numCoords + j]);
+            printf("\n");
+        }
+        runrec_write(&_runrec);
+    }
+    runrec_free(&_runrec);
+
+    if (map)
+        munmap(map, map_len);
+    else {
+        free(objects);
+        free(objects_f);
+    }
+    free(membership);
+    free(clusters);
+
+    MPI_Finalize();
+    return 0;
+}
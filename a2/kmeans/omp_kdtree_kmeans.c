@@ -0,0 +1,527 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <float.h>
+#include "kmeans.h"
+#include <omp.h>
+#include "omp_trace.h"
+
+/*
+ * kd-tree filtering assignment (Kanungo et al., "An efficient k-means
+ * clustering algorithm: analysis and implementation", 2002).
+ *
+ * A kd-tree over the objects is built once, before the first loop: each node
+ * splits its objects at the median of the widest side of its bounding box,
+ * down to leaves of at most KD_LEAF objects. Every node keeps its bounding
+ * box, its object count and the coordinate sums of its objects.
+ *
+ * Each loop walks the tree with a list of candidate centers. At a node, z*
+ * is the candidate closest to the middle of the box, and any other candidate
+ * z is dropped when the box corner farthest in the direction z - z* is not
+ * closer to z than to z*: then no object in the box is. Once z* is the only
+ * one left, the whole subtree is z*'s: its cached sums and count go straight
+ * into the partial newClusters, without looking at its objects. Leaves scan
+ * their objects like find_nearest_cluster, over the surviving candidates.
+ *
+ * Memberships: a node assigned whole remembers its owner, and while it keeps
+ * the same owner the next loops skip its objects (delta counts none of them).
+ * When a walk splits such a node again, the owner is pushed to its children
+ * first, so it is always true for the nodes the walk reaches.
+ *
+ * This pays off for low numCoords, where boxes are tight and most objects
+ * are settled high up in the tree; with many coordinates hardly anything is
+ * pruned and the walk only adds overhead over omp_reduction_kmeans.
+ *
+ * The tree (object ids, a copy of the objects in tree order, the per-node
+ * data) is about as large as the dataset again. Its build time is part of
+ * the total time (and so of per loop), not of any loop's record.
+ *
+ * A candidate at exactly the same distance as z* can be dropped, so on exact
+ * ties an object may get another, equally near, center than the lowest index.
+ */
+
+#define KD_LEAF         32        // max objects per leaf
+#define KD_TASK_MIN     (1 << 16) // build subtrees of fewer objects in the parent's task
+#define KD_FRONTIER_PER_THREAD 8  // subtrees per thread in the loop's work list
+
+typedef struct
+{
+    int lo, hi;  // objects [lo, hi) in tree order
+    int owner;   // cluster every object here had after its last loop, -1 if unknown/mixed
+} kd_node_t;
+
+typedef struct
+{
+    int numCoords;
+    int depth;       // leaves are the nodes at this level; node i has children 2i+1, 2i+2
+    int nnodes;
+    kd_node_t *nodes;  // [nnodes]
+    double *bmin;      // [nnodes][numCoords] bounding box
+    double *bmax;      // [nnodes][numCoords]
+    double *sum;       // [nnodes][numCoords] coordinate sums
+    int *idx;          // [numObjs] object id at each tree position
+    coord_t *pts;      // [numObjs][numCoords] objects in tree order (leaf scans stream it)
+} kd_tree_t;
+
+// square of Euclid distance between two multi-dimensional points
+inline static double euclid_dist_2(int numdims,    /* no. dimensions */
+                                   coord_t *coord1, /* [numdims] */
+                                   coord_t *coord2) /* [numdims] */
+{
+    int i;
+    coord_t ans = 0.0;
+
+    for (i = 0; i < numdims; i++)
+        ans += (coord1[i] - coord2[i]) * (coord1[i] - coord2[i]);
+
+    return ans;
+}
+
+/*
+ * Reorder the objects [lo, hi) (rows of pts, with their ids) so that the
+ * one at kth has the kth smallest coordinate dim, with no larger ones
+ * before it and no smaller ones after.
+ */
+static void kd_select(kd_tree_t *t, int dim, int lo, int hi, int kth)
+{
+    int nc = t->numCoords;
+#define KEY(i) (t->pts[(long)(i) * nc + dim])
+    int i, j, m, tmp;
+    coord_t pivot, c;
+
+    hi--;
+    while (lo < hi)
+    {
+        pivot = KEY(lo + (hi - lo) / 2);
+        i = lo;
+        j = hi;
+        while (i <= j)
+        {
+            while (KEY(i) < pivot)
+                i++;
+            while (KEY(j) > pivot)
+                j--;
+            if (i <= j)
+            {
+                for (m = 0; m < nc; m++)
+                {
+                    c = t->pts[(long)i * nc + m];
+                    t->pts[(long)i * nc + m] = t->pts[(long)j * nc + m];
+                    t->pts[(long)j * nc + m] = c;
+                }
+                tmp = t->idx[i];
+                t->idx[i] = t->idx[j];
+                t->idx[j] = tmp;
+                i++;
+                j--;
+            }
+        }
+        // [lo, j] <= pivot <= [i, hi], anything in between equals pivot
+        if (kth <= j)
+            hi = j;
+        else if (kth >= i)
+            lo = i;
+        else
+            break;
+    }
+#undef KEY
+}
+
+/*
+ * On entry bmin/bmax of node hold a box around its objects, the parent's
+ * box cut at the split (only the root's is tight): enough to pick the
+ * widest side without scanning the objects at every level. On return the
+ * node has its tight box and sums, from its leaves up.
+ */
+static void kd_build(kd_tree_t *t, int node, int level, int lo, int hi)
+{
+    int nc = t->numCoords;
+    double *bmin = t->bmin + (long)node * nc, *bmax = t->bmax + (long)node * nc;
+    double *sum = t->sum + (long)node * nc;
+    int i, j, dim, mid, l = 2 * node + 1, r = 2 * node + 2;
+
+    t->nodes[node].lo = lo;
+    t->nodes[node].hi = hi;
+    t->nodes[node].owner = -1;
+    if (level == t->depth)
+    {
+        for (j = 0; j < nc; j++)
+        {
+            bmin[j] = DBL_MAX;
+            bmax[j] = -DBL_MAX;
+            sum[j] = 0.0;
+        }
+        for (i = lo; i < hi; i++)
+        {
+            coord_t *p = &t->pts[(long)i * nc];
+            for (j = 0; j < nc; j++)
+            {
+                if (p[j] < bmin[j])
+                    bmin[j] = p[j];
+                if (p[j] > bmax[j])
+                    bmax[j] = p[j];
+                sum[j] += p[j];
+            }
+        }
+        return;
+    }
+
+    // median split across the widest side
+    dim = 0;
+    for (j = 1; j < nc; j++)
+        if (bmax[j] - bmin[j] > bmax[dim] - bmin[dim])
+            dim = j;
+    mid = lo + (hi - lo) / 2;
+    kd_select(t, dim, lo, hi, mid);
+    memcpy(t->bmin + (long)l * nc, bmin, nc * sizeof(double));
+    memcpy(t->bmax + (long)l * nc, bmax, nc * sizeof(double));
+    memcpy(t->bmin + (long)r * nc, bmin, nc * sizeof(double));
+    memcpy(t->bmax + (long)r * nc, bmax, nc * sizeof(double));
+    t->bmax[(long)l * nc + dim] = t->pts[(long)mid * nc + dim];
+    t->bmin[(long)r * nc + dim] = t->pts[(long)mid * nc + dim];
+
+#pragma omp task if (hi - lo > KD_TASK_MIN)
+    kd_build(t, l, level + 1, lo, mid);
+    kd_build(t, r, level + 1, mid, hi);
+#pragma omp taskwait
+
+    for (j = 0; j < nc; j++)
+    {
+        double *lmin = t->bmin + (long)l * nc, *lmax = t->bmax + (long)l * nc;
+        double *rmin = t->bmin + (long)r * nc, *rmax = t->bmax + (long)r * nc;
+        bmin[j] = lmin[j] < rmin[j] ? lmin[j] : rmin[j];
+        bmax[j] = lmax[j] > rmax[j] ? lmax[j] : rmax[j];
+        sum[j] = t->sum[(long)l * nc + j] + t->sum[(long)r * nc + j];
+    }
+}
+
+static void kd_tree_init(kd_tree_t *t, coord_t *objects, int numObjs, int numCoords)
+{
+    long i;
+    int j;
+
+    // fewest levels that leave at most KD_LEAF objects per leaf (leaves then hold >= KD_LEAF/2)
+    t->numCoords = numCoords;
+    t->depth = 0;
+    while (((long)numObjs + (1L << t->depth) - 1) >> t->depth > KD_LEAF)
+        t->depth++;
+    t->nnodes = (2 << t->depth) - 1;
+    t->nodes = (kd_node_t *)malloc(t->nnodes * sizeof(kd_node_t));
+    t->bmin = (double *)malloc((long)t->nnodes * numCoords * sizeof(double));
+    t->bmax = (double *)malloc((long)t->nnodes * numCoords * sizeof(double));
+    t->sum = (double *)malloc((long)t->nnodes * numCoords * sizeof(double));
+    t->idx = (int *)numa_alloc(numObjs * sizeof(int), _init_mode);
+    t->pts = (coord_t *)numa_alloc((long)numObjs * numCoords * sizeof(coord_t), _init_mode);
+
+    // the build sorts a copy of the objects in place, so the leaves end up contiguous
+#pragma omp parallel for private(j) schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
+    for (i = 0; i < numObjs; i++)
+    {
+        t->idx[i] = i;
+        for (j = 0; j < numCoords; j++)
+            t->pts[i * numCoords + j] = objects[i * numCoords + j];
+    }
+    for (j = 0; j < numCoords; j++)
+    {
+        t->bmin[j] = DBL_MAX;
+        t->bmax[j] = -DBL_MAX;
+    }
+    for (i = 0; i < numObjs; i++)
+        for (j = 0; j < numCoords; j++)
+        {
+            if (t->pts[i * numCoords + j] < t->bmin[j])
+                t->bmin[j] = t->pts[i * numCoords + j];
+            if (t->pts[i * numCoords + j] > t->bmax[j])
+                t->bmax[j] = t->pts[i * numCoords + j];
+        }
+
+#pragma omp parallel
+#pragma omp single
+    kd_build(t, 0, 0, 0, numObjs);
+}
+
+static void kd_tree_free(kd_tree_t *t)
+{
+    free(t->nodes);
+    free(t->bmin);
+    free(t->bmax);
+    free(t->sum);
+    free(t->idx);
+    free(t->pts);
+}
+
+/*
+ * Assign the objects under node to their nearest of the ncand candidates
+ * (cluster ids, ascending), adding them to the partial sums/sizes.
+ * Returns the number of objects whose membership changed.
+ */
+static long kd_filter(kd_tree_t *t, int node, int level, const int *cand, int ncand,
+                      coord_t *clusters, int *membership, double *sums, int *sizes)
+{
+    int nc = t->numCoords;
+    kd_node_t *nd = &t->nodes[node];
+    double *bmin = t->bmin + (long)node * nc, *bmax = t->bmax + (long)node * nc;
+    int keep[ncand];
+    int nkeep = 0, best, c, i, j;
+    long changed = 0;
+    double dist, min_dist;
+
+    if (level == t->depth)
+    {
+        for (i = nd->lo; i < nd->hi; i++)
+        {
+            coord_t *p = &t->pts[(long)i * nc];
+            int o = t->idx[i];
+
+            best = cand[0];
+            min_dist = euclid_dist_2(nc, p, &clusters[best * nc]);
+            for (c = 1; c < ncand; c++)
+            {
+                dist = euclid_dist_2(nc, p, &clusters[cand[c] * nc]);
+                if (dist < min_dist)
+                {
+                    min_dist = dist;
+                    best = cand[c];
+                }
+            }
+            if (membership[o] != best)
+            {
+                membership[o] = best;
+                changed++;
+            }
+            sizes[best]++;
+            for (j = 0; j < nc; j++)
+                sums[best * nc + j] += p[j];
+        }
+        nd->owner = -1;
+        return changed;
+    }
+
+    // z*: the candidate closest to the middle of the box
+    best = cand[0];
+    min_dist = DBL_MAX;
+    for (c = 0; c < ncand; c++)
+    {
+        coord_t *z = &clusters[cand[c] * nc];
+        dist = 0.0;
+        for (j = 0; j < nc; j++)
+        {
+            double d = 0.5 * (bmin[j] + bmax[j]) - z[j];
+            dist += d * d;
+        }
+        if (dist < min_dist)
+        {
+            min_dist = dist;
+            best = cand[c];
+        }
+    }
+
+    // keep z only if the box corner farthest along z - z* is closer to z than to z*
+    for (c = 0; c < ncand; c++)
+    {
+        coord_t *z = &clusters[cand[c] * nc], *zs = &clusters[best * nc];
+        double dz = 0.0, dzs = 0.0;
+
+        if (cand[c] == best)
+        {
+            keep[nkeep++] = best;
+            continue;
+        }
+        for (j = 0; j < nc; j++)
+        {
+            double v = (z[j] > zs[j]) ? bmax[j] : bmin[j];
+            dz += (z[j] - v) * (z[j] - v);
+            dzs += (zs[j] - v) * (zs[j] - v);
+        }
+        if (dz < dzs)
+            keep[nkeep++] = cand[c];
+    }
+
+    if (nkeep == 1)
+    {
+        // the whole subtree is best's
+        double *sum = t->sum + (long)node * nc;
+
+        sizes[best] += nd->hi - nd->lo;
+        for (j = 0; j < nc; j++)
+            sums[best * nc + j] += sum[j];
+        if (nd->owner != best)
+        {
+            for (i = nd->lo; i < nd->hi; i++)
+            {
+                int o = t->idx[i];
+                if (membership[o] != best)
+                {
+                    membership[o] = best;
+                    changed++;
+                }
+            }
+            nd->owner = best;
+        }
+        return changed;
+    }
+
+    // split again: the children's owners are stale if this node was assigned whole since
+    if (nd->owner >= 0)
+    {
+        t->nodes[2 * node + 1].owner = nd->owner;
+        t->nodes[2 * node + 2].owner = nd->owner;
+        nd->owner = -1;
+    }
+    changed += kd_filter(t, 2 * node + 1, level + 1, keep, nkeep, clusters, membership, sums, sizes);
+    changed += kd_filter(t, 2 * node + 2, level + 1, keep, nkeep, clusters, membership, sums, sizes);
+    return changed;
+}
+
+void kmeans(coord_t *objects,    /* in: [numObjs][numCoords] */
+            int numCoords,       /* no. coordinates */
+            int numObjs,         /* no. objects */
+            int numClusters,     /* no. clusters */
+            double threshold,    /* minimum fraction of objects that change membership */
+            long loop_threshold, /* maximum number of iterations */
+            int *membership,     /* out: [numObjs] */
+            coord_t *clusters)   /* out: [numClusters][numCoords] */
+{
+    int i, j, k;
+    int loop = 0;
+    double timing = 0, build_timing;
+    double t_loop;       // start of the current loop (per-iteration record)
+
+    double delta;        // fraction of objects whose clusters change in each loop
+    int *newClusterSize; // [numClusters]: no. objects assigned in each new cluster
+    double *newClusters; // [numClusters][numCoords]
+    int nthreads;        // no. threads
+    kd_tree_t tree;
+    int front_level;     // level of the subtrees the loop hands out
+    int nfront;          // 2^front_level of them
+    size_t slab;         // bytes per thread slab (partial sums + sizes)
+    char *slabs;         // [nthreads][slab]
+
+    nthreads = omp_get_max_threads();
+    printf("OpenMP Kmeans - kd-tree filtering\t(number of threads: %d)\n", nthreads);
+
+    // initialize membership
+#pragma omp parallel for schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
+    for (i = 0; i < numObjs; i++)
+        membership[i] = -1;
+
+    newClusterSize = (typeof(newClusterSize))calloc(numClusters, sizeof(*newClusterSize));
+    newClusters = (typeof(newClusters))calloc(numClusters * numCoords, sizeof(*newClusters));
+
+    // per-thread partial sums, slabs laid out as in omp_reduction_kmeans
+    int *local_newClusterSize[nthreads]; // [nthreads][numClusters]
+    double *local_newClusters[nthreads]; // [nthreads][numClusters][numCoords]
+    long page = sysconf(_SC_PAGESIZE);
+    slab = numClusters * numCoords * sizeof(double) + numClusters * sizeof(int);
+    slab = (slab + 63) & ~(size_t)63;
+    if (page > 0 && slab >= (size_t)page)
+        slab = (slab + page - 1) / page * page;
+    slabs = (char *)numa_alloc(slab * nthreads, INIT_SERIAL);
+    for (k = 0; k < nthreads; k++)
+    {
+        local_newClusters[k] = (double *)(slabs + k * slab);
+        local_newClusterSize[k] = (int *)(local_newClusters[k] + numClusters * numCoords);
+    }
+
+    TRACE_INIT("omp_kdtree_kmeans");
+    timing = wtime();
+    build_timing = wtime();
+    kd_tree_init(&tree, objects, numObjs, numCoords);
+    build_timing = wtime() - build_timing;
+
+    // enough subtrees for dynamic load balancing: boundary regions cost far more than settled ones
+    front_level = 0;
+    while ((1 << front_level) < KD_FRONTIER_PER_THREAD * nthreads && front_level < tree.depth)
+        front_level++;
+    nfront = 1 << front_level;
+    printf("kd-tree: %d nodes (depth %d, <= %d objects per leaf, %d subtrees per loop) built in %7.4fs\n",
+           tree.nnodes, tree.depth, KD_LEAF, nfront, build_timing);
+
+    do
+    {
+        t_loop = wtime();
+        delta = 0.0;
+
+        TRACE_BEGIN(TRACE_REGION);
+#pragma omp parallel private(i, k)
+        {
+            int tid = omp_get_thread_num();
+            int T   = omp_get_num_threads();
+            int all[numClusters];
+
+            for (i = 0; i < numClusters; i++)
+            {
+                all[i] = i;
+                local_newClusterSize[tid][i] = 0;
+            }
+            for (i = 0; i < numClusters * numCoords; i++)
+                local_newClusters[tid][i] = 0.0;
+
+            // the subtrees' costs differ by orders of magnitude, so they are not split statically
+            TRACE_BEGIN(TRACE_CHUNK);
+#pragma omp for schedule(dynamic, 1) reduction(+ : delta) nowait
+            for (i = 0; i < nfront; i++)
+                delta += kd_filter(&tree, nfront - 1 + i, front_level, all, numClusters, clusters,
+                                   membership, local_newClusters[tid], local_newClusterSize[tid]);
+            TRACE_END(TRACE_CHUNK, loop);
+
+            TRACE_BEGIN(TRACE_BARRIER);
+#pragma omp barrier
+            TRACE_END(TRACE_BARRIER, loop);
+
+            // merge the partials, split over the team as omp_reduction_kmeans' KMEANS_MERGE=split
+            TRACE_BEGIN(TRACE_CHUNK);
+#pragma omp for schedule(static) nowait
+            for (i = 0; i < numClusters * numCoords; i++)
+            {
+                double sum = 0.0;
+                for (k = 0; k < T; k++)
+                    sum += local_newClusters[k][i];
+                newClusters[i] = sum;
+            }
+#pragma omp for schedule(static)
+            for (i = 0; i < numClusters; i++)
+            {
+                int size = 0;
+                for (k = 0; k < T; k++)
+                    size += local_newClusterSize[k][i];
+                newClusterSize[i] = size;
+            }
+            TRACE_END(TRACE_CHUNK, loop);
+        }
+        TRACE_END(TRACE_REGION, loop);
+
+        // average the sum and replace old cluster centers with newClusters
+        for (i = 0; i < numClusters; i++)
+        {
+            if (newClusterSize[i] > 0)
+            {
+                for (j = 0; j < numCoords; j++)
+                {
+                    clusters[i * numCoords + j] = newClusters[i * numCoords + j] / newClusterSize[i];
+                }
+            }
+        }
+
+        // Get fraction of objects whose membership changed during this loop. This is used as a convergence criterion.
+        delta /= numObjs;
+        runrec_iter(&_runrec, wtime() - t_loop, delta);
+
+        loop++;
+        printf("\r\tcompleted loop %d", loop);
+        fflush(stdout);
+    } while (delta > threshold && loop < loop_threshold);
+    timing = wtime() - timing;
+    printf("\n nloops = %3d (total = %7.4fs) (per loop = %7.4fs)\n", loop, timing, timing / loop);
+    _runrec.threads = nthreads;
+    _runrec.total_time = timing;
+    runrec_param(&_runrec, "nloops", loop);
+    runrec_param(&_runrec, "kd_build", build_timing);
+    runrec_param(&_runrec, "kd_leaf", KD_LEAF);
+    TRACE_DUMP();
+
+    kd_tree_free(&tree);
+    free(slabs);
+    free(newClusters);
+    free(newClusterSize);
+}
@@ -5,14 +5,16 @@
  * TODO: include openmp header file
  */
 #include <omp.h>
+#include "omp_trace.h"
+#include "omp_sched.h"
 
 // square of Euclid distance between two multi-dimensional points
 inline static double euclid_dist_2(int numdims,    /* no. dimensions */
-                                   double *coord1, /* [numdims] */
-                                   double *coord2) /* [numdims] */
+                                   coord_t *coord1, /* [numdims] */
+                                   coord_t *coord2) /* [numdims] */
 {
     int i;
-    double ans = 0.0;
+    coord_t ans = 0.0;
 
     for (i = 0; i < numdims; i++)
         ans += (coord1[i] - coord2[i]) * (coord1[i] - coord2[i]);
@@ -22,8 +24,8 @@ inline static double euclid_dist_2(int numdims,    /* no. dimensions */
 
 inline static int find_nearest_cluster(int numClusters,  /* no. clusters */
                                        int numCoords,    /* no. coordinates */
-                                       double *object,   /* [numCoords] */
-                                       double *clusters) /* [numClusters][numCoords] */
+                                       coord_t *object,  /* [numCoords] */
+                                       coord_t *clusters) /* [numClusters][numCoords] */
 {
     int index, i;
     double dist, min_dist;
@@ -45,18 +47,19 @@ inline static int find_nearest_cluster(int numClusters,  /* no. clusters */
     return index;
 }
 
-void kmeans(double *objects,     /* in: [numObjs][numCoords] */
+void kmeans(coord_t *objects,    /* in: [numObjs][numCoords] */
             int numCoords,       /* no. coordinates */
             int numObjs,         /* no. objects */
             int numClusters,     /* no. clusters */
             double threshold,    /* minimum fraction of objects that change membership */
             long loop_threshold, /* maximum number of iterations */
             int *membership,     /* out: [numObjs] */
-            double *clusters)    /* out: [numClusters][numCoords] */
+            coord_t *clusters)   /* out: [numClusters][numCoords] */
 {
     int i, j;
     int index, loop = 0;
     double timing = 0;
+    double t_loop;       // start of the current loop (per-iteration record)
 
     double delta;        // fraction of objects whose clusters change in each loop
     int *newClusterSize; // [numClusters]: no. objects assigned in each new cluster
@@ -67,6 +70,8 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
     printf("OpenMP Kmeans - Naive\t(number of threads: %d)\n", nthreads);
 
     // initialize membership
+    // (in parallel for -i first-touch: same static split as the object loop below)
+#pragma omp parallel for schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
     for (i = 0; i < numObjs; i++)
         membership[i] = -1;
 
@@ -74,10 +79,14 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
     newClusterSize = (typeof(newClusterSize))calloc(numClusters, sizeof(*newClusterSize));
     newClusters = (typeof(newClusters))calloc(numClusters * numCoords, sizeof(*newClusters));
 
+    sched_init();
+    TRACE_INIT("omp_naive_kmeans");
     timing = wtime();
 
     do
     {
+        t_loop = wtime();
+
         // before each loop, set cluster data to 0
         for (i = 0; i < numClusters; i++)
         {
@@ -91,36 +100,43 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
 /*
  * TODO: Detect parallelizable region and use appropriate OpenMP pragmas
  */
-#pragma omp parallel for private(index, j)
-        for (i = 0; i < numObjs; i++)
+        TRACE_BEGIN(TRACE_REGION);
+#pragma omp parallel private(index, j)
         {
-            // find the array index of nearest cluster center
-            index = find_nearest_cluster(numClusters, numCoords, &objects[i * numCoords], clusters);
-
-            // if membership changes, increase delta by 1
-            if (membership[i] != index)
+            TRACE_BEGIN(TRACE_CHUNK);
+#pragma omp for schedule(runtime) nowait
+            for (i = 0; i < numObjs; i++)
             {
+                // find the array index of nearest cluster center
+                index = find_nearest_cluster(numClusters, numCoords, &objects[i * numCoords], clusters);
+
+                // if membership changes, increase delta by 1
+                if (membership[i] != index)
+                {
 
 #pragma omp atomic // protect update on shared "delta" variable
-                delta += 1.0;
-            }
+                    delta += 1.0;
+                }
 
-            // assign the membership to object i
-            membership[i] = index;
+                // assign the membership to object i
+                membership[i] = index;
 
 // update new cluster centers : sum of objects located within
 /*
  * TODO: protect update on shared "newClusterSize" array
  */
 #pragma omp atomic
-            newClusterSize[index]++;
-            for (j = 0; j < numCoords; j++)
+                newClusterSize[index]++;
+                for (j = 0; j < numCoords; j++)
 /*
  * TODO: protect update on shared "newClusters" array
  */
 #pragma omp atomic
-                newClusters[index * numCoords + j] += objects[i * numCoords + j];
-        }
+                    newClusters[index * numCoords + j] += objects[i * numCoords + j];
+            }
+            TRACE_END(TRACE_CHUNK, loop);
+        } /* implicit barrier: end of parallel region */
+        TRACE_END(TRACE_REGION, loop);
 
         // average the sum and replace old cluster centers with newClusters
         for (i = 0; i < numClusters; i++)
@@ -136,6 +152,7 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
 
         // Get fraction of objects whose membership changed during this loop. This is used as a convergence criterion.
         delta /= numObjs;
+        runrec_iter(&_runrec, wtime() - t_loop, delta);
 
         loop++;
         printf("\r\tcompleted loop %d", loop);
@@ -143,6 +160,10 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
     } while (delta > threshold && loop < loop_threshold);
     timing = wtime() - timing;
     printf("\n        nloops = %3d   (total = %7.4fs)  (per loop = %7.4fs)\n", loop, timing, timing / loop);
+    _runrec.threads = nthreads;
+    _runrec.total_time = timing;
+    runrec_param(&_runrec, "nloops", loop);
+    TRACE_DUMP();
 
     free(newClusters);
     free(newClusterSize);
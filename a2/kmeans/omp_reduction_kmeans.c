@@ -1,18 +1,49 @@
 #include <stdio.h>
 #include <stdlib.h>
+#include <string.h>
 #include "kmeans.h"
 /*
  * TODO: include openmp header file
  */
 #include <omp.h>
+#include "omp_trace.h"
+#include "omp_sched.h"
+
+/*
+ * How the per-thread partial sums are merged after the object loop,
+ * selected with KMEANS_MERGE (run_on_queue.sh MERGE=...):
+ *   single  (default) one thread adds up all T partials, O(T*K*D) on one core
+ *   split   the K*D coordinate sums (and the K sizes) are split over the team
+ *           with omp for: each thread sums its slice across all T slabs, in
+ *           the same order as single, so the result is bit-identical
+ *   tree    pairwise in ceil(log2 T) rounds: in the round with stride s,
+ *           thread tid (tid % 2s == 0) adds slab tid+s into its own slab;
+ *           slab 0 holds the total at the end
+ */
+enum { MERGE_SINGLE = 0, MERGE_SPLIT = 1, MERGE_TREE = 2 };
+static const char *const merge_names[] = { "single", "split", "tree" };
+
+static int merge_mode(void)
+{
+    char *env = getenv("KMEANS_MERGE");
+    int m;
+
+    if (env == NULL || *env == '\0')
+        return MERGE_SINGLE;
+    for (m = MERGE_SINGLE; m <= MERGE_TREE; m++)
+        if (strcmp(env, merge_names[m]) == 0)
+            return m;
+    fprintf(stderr, "KMEANS_MERGE=%s: unknown merge mode, using single\n", env);
+    return MERGE_SINGLE;
+}
 
 // square of Euclid distance between two multi-dimensional points
 inline static double euclid_dist_2(int numdims,    /* no. dimensions */
-                                   double *coord1, /* [numdims] */
-                                   double *coord2) /* [numdims] */
+                                   coord_t *coord1, /* [numdims] */
+                                   coord_t *coord2) /* [numdims] */
 {
     int i;
-    double ans = 0.0;
+    coord_t ans = 0.0;
 
     for (i = 0; i < numdims; i++)
         ans += (coord1[i] - coord2[i]) * (coord1[i] - coord2[i]);
@@ -22,8 +53,8 @@ inline static double euclid_dist_2(int numdims,    /* no. dimensions */
 
 inline static int find_nearest_cluster(int numClusters,  /* no. clusters */
                                        int numCoords,    /* no. coordinates */
-                                       double *object,   /* [numCoords] */
-                                       double *clusters) /* [numClusters][numCoords] */
+                                       coord_t *object,  /* [numCoords] */
+                                       coord_t *clusters) /* [numClusters][numCoords] */
 {
     int index, i;
     double dist, min_dist;
@@ -45,28 +76,35 @@ inline static int find_nearest_cluster(int numClusters,  /* no. clusters */
     return index;
 }
 
-void kmeans(double *objects,     /* in: [numObjs][numCoords] */
+void kmeans(coord_t *objects,    /* in: [numObjs][numCoords] */
             int numCoords,       /* no. coordinates */
             int numObjs,         /* no. objects */
             int numClusters,     /* no. clusters */
             double threshold,    /* minimum fraction of objects that change membership */
             long loop_threshold, /* maximum number of iterations */
             int *membership,     /* out: [numObjs] */
-            double *clusters)    /* out: [numClusters][numCoords] */
+            coord_t *clusters)   /* out: [numClusters][numCoords] */
 {
     int i, j, k;
     int index, loop = 0;
     double timing = 0;
+    double t_loop;       // start of the current loop (per-iteration record)
 
     double delta;        // fraction of objects whose clusters change in each loop
     int *newClusterSize; // [numClusters]: no. objects assigned in each new cluster
     double *newClusters; // [numClusters][numCoords]
     int nthreads;        // no. threads
+    int merge;           // MERGE_* (KMEANS_MERGE)
+    size_t slab;         // bytes per thread slab (partial sums + sizes)
+    char *slabs;         // [nthreads][slab]
 
     nthreads = omp_get_max_threads();
-    printf("OpenMP Kmeans - Reduction\t(number of threads: %d)\n", nthreads);
+    merge = merge_mode();
+    printf("OpenMP Kmeans - Reduction\t(number of threads: %d, merge: %s)\n", nthreads, merge_names[merge]);
 
     // initialize membership
+    // (in parallel for -i first-touch: same static split as the object loop below)
+#pragma omp parallel for schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
     for (i = 0; i < numObjs; i++)
         membership[i] = -1;
 
@@ -82,17 +120,33 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
      * Hint for false-sharing
      * This is noticed when numCoords is low (and neighboring local_newClusters exist close to each other).
      * Allocate local cluster data with a "first-touch" policy.
+     *
+     * One untouched page-aligned block, cut into per-thread slabs of
+     * [numClusters*numCoords] doubles followed by [numClusters] ints. A slab
+     * is rounded up to a cache line, so no two threads share a line, and to
+     * whole pages once it is at least a page, so each page is first touched
+     * (and placed) by its owner: the zeroing at the top of the parallel
+     * region below is the first write to it.
      */
-    // Initialize local (per-thread) arrays (and later collect result on global arrays)
+    long page = sysconf(_SC_PAGESIZE);
+    slab = numClusters * numCoords * sizeof(double) + numClusters * sizeof(int);
+    slab = (slab + 63) & ~(size_t)63;
+    if (page > 0 && slab >= (size_t)page)
+        slab = (slab + page - 1) / page * page;
+    slabs = (char *)numa_alloc(slab * nthreads, INIT_SERIAL);
     for (k = 0; k < nthreads; k++)
     {
-        local_newClusterSize[k] = (typeof(*local_newClusterSize))calloc(numClusters, sizeof(**local_newClusterSize));
-        local_newClusters[k] = (typeof(*local_newClusters))calloc(numClusters * numCoords, sizeof(**local_newClusters));
+        local_newClusters[k] = (double *)(slabs + k * slab);
+        local_newClusterSize[k] = (int *)(local_newClusters[k] + numClusters * numCoords);
     }
 
+    sched_init();
+    TRACE_INIT("omp_reduction_kmeans");
     timing = wtime();
     do
     {
+        t_loop = wtime();
+
         // before each loop, set cluster data to 0
         for (i = 0; i < numClusters; i++)
         {
@@ -112,6 +166,7 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
          *  - The object loop is distributed with 'omp for' and 'reduction(+ : delta)'.
          *  - A single thread reduces the per-thread local arrays into the shared arrays.
          */
+        TRACE_BEGIN(TRACE_REGION);
 #pragma omp parallel private(i, j, k, index)
         {
             int tid = omp_get_thread_num();
@@ -125,7 +180,9 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
 
             // Distribute objects across threads and compute per-thread contributions.
             // delta is accumulated using a reduction to avoid atomics on a shared variable.
-#pragma omp for reduction(+ : delta)
+            // 'nowait' + explicit barrier is the same sync as the implicit one, but traceable.
+            TRACE_BEGIN(TRACE_CHUNK);
+#pragma omp for schedule(runtime) reduction(+ : delta) nowait
             for (i = 0; i < numObjs; i++)
             {
                 // find the array index of nearest cluster center
@@ -148,31 +205,93 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
                 for (j = 0; j < numCoords; j++)
                     local_newClusters[tid][index * numCoords + j] += objects[i * numCoords + j];
             }
+            TRACE_END(TRACE_CHUNK, loop);
+
+            TRACE_BEGIN(TRACE_BARRIER);
+#pragma omp barrier
+            TRACE_END(TRACE_BARRIER, loop);
 
             /*
              * TODO: Reduction of cluster data from local arrays to shared.
              *       This operation will be performed by one thread
              *
              * Here we use 'omp single' so that exactly one thread accumulates
-             * all per-thread local arrays into the shared newClusterSize/newClusters.
+             * all per-thread local arrays into the shared newClusterSize/newClusters
+             * (or the whole team does, with KMEANS_MERGE=split|tree, see merge_mode()).
              */
-#pragma omp single
+            if (merge == MERGE_SPLIT)
+            {
+                TRACE_BEGIN(TRACE_CHUNK);
+#pragma omp for schedule(static) nowait
+                for (i = 0; i < numClusters * numCoords; i++)
+                {
+                    double sum = 0.0;
+                    for (k = 0; k < T; k++)
+                        sum += local_newClusters[k][i];
+                    newClusters[i] = sum;
+                }
+#pragma omp for schedule(static) nowait
+                for (i = 0; i < numClusters; i++)
+                {
+                    int size = 0;
+                    for (k = 0; k < T; k++)
+                        size += local_newClusterSize[k][i];
+                    newClusterSize[i] = size;
+                }
+                TRACE_END(TRACE_CHUNK, loop);
+#pragma omp barrier
+            }
+            else if (merge == MERGE_TREE)
             {
-                for (k = 0; k < T; k++)   // only sum over the threads actually in this team
+                int step;
+
+                for (step = 1; step < T; step *= 2)
                 {
-                    int *srcS = local_newClusterSize[k];
-                    double *srcC = local_newClusters[k];
-                    if (!srcS || !srcC)
-                        continue;
-                    for (i = 0; i < numClusters; i++)
+                    if (tid % (2 * step) == 0 && tid + step < T)
                     {
-                        newClusterSize[i] += srcS[i];
-                        for (j = 0; j < numCoords; j++)
-                            newClusters[i * numCoords + j] += srcC[i * numCoords + j];
+                        int *dstS = local_newClusterSize[tid], *srcS = local_newClusterSize[tid + step];
+                        double *dstC = local_newClusters[tid], *srcC = local_newClusters[tid + step];
+
+                        TRACE_BEGIN(TRACE_CHUNK);
+                        for (i = 0; i < numClusters; i++)
+                            dstS[i] += srcS[i];
+                        for (i = 0; i < numClusters * numCoords; i++)
+                            dstC[i] += srcC[i];
+                        TRACE_END(TRACE_CHUNK, loop);
                     }
+                    TRACE_BEGIN(TRACE_BARRIER);
+#pragma omp barrier
+                    TRACE_END(TRACE_BARRIER, loop);
                 }
-            } /* implicit barrier after single */
+                // slab 0 has the totals
+#pragma omp for schedule(static) nowait
+                for (i = 0; i < numClusters * numCoords; i++)
+                    newClusters[i] = local_newClusters[0][i];
+#pragma omp for schedule(static)
+                for (i = 0; i < numClusters; i++)
+                    newClusterSize[i] = local_newClusterSize[0][i];
+            }
+            else
+            {
+#pragma omp single
+                {
+                    TRACE_BEGIN(TRACE_MERGE);
+                    for (k = 0; k < T; k++)   // only sum over the threads actually in this team
+                    {
+                        int *srcS = local_newClusterSize[k];
+                        double *srcC = local_newClusters[k];
+                        for (i = 0; i < numClusters; i++)
+                        {
+                            newClusterSize[i] += srcS[i];
+                            for (j = 0; j < numCoords; j++)
+                                newClusters[i * numCoords + j] += srcC[i * numCoords + j];
+                        }
+                    }
+                    TRACE_END(TRACE_MERGE, loop);
+                } /* implicit barrier after single */
+            }
         }     /* end parallel region */
+        TRACE_END(TRACE_REGION, loop);
 
         // average the sum and replace old cluster centers with newClusters
         for (i = 0; i < numClusters; i++)
@@ -188,6 +307,7 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
 
         // Get fraction of objects whose membership changed during this loop. This is used as a convergence criterion.
         delta /= numObjs;
+        runrec_iter(&_runrec, wtime() - t_loop, delta);
 
         loop++;
         printf("\r\tcompleted loop %d", loop);
@@ -195,12 +315,13 @@ void kmeans(double *objects,     /* in: [numObjs][numCoords] */
     } while (delta > threshold && loop < loop_threshold);
     timing = wtime() - timing;
     printf("\n nloops = %3d (total = %7.4fs) (per loop = %7.4fs)\n", loop, timing, timing / loop);
+    _runrec.threads = nthreads;
+    _runrec.total_time = timing;
+    runrec_param(&_runrec, "nloops", loop);
+    runrec_param(&_runrec, "merge", merge);
+    TRACE_DUMP();
 
-    for (k = 0; k < nthreads; k++)
-    {
-        free(local_newClusterSize[k]);
-        free(local_newClusters[k]);
-    }
+    free(slabs);
     free(newClusters);
     free(newClusterSize);
 }
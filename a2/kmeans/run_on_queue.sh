@@ -9,12 +9,36 @@
 # Submission details
 # usage—no affinity (default): C
 # with default affinity (bind 0..T-1): qsub -q serial -l nodes=sandman:ppn=64 -v THREADS=32,AFFINITY=default,BIN=omp_naive_kmeans run_on_queue.sh
-# BIN=seq_kmeans|omp_naive_kmeans|omp_reduction_kmeans
+# BIN=seq_kmeans|omp_naive_kmeans|omp_reduction_kmeans|omp_kdtree_kmeans
+#   (kd-tree filtering, for low COORDS; tools/kdtree_speedup.py compares it with reduction)
 # optional VARS: SIZE=256,COORDS=16,CLUSTERS=32,LOOPS=10
+# page placement (common/numa_init.h): INIT=serial|first-touch|interleave (default serial;
+#   other modes get a _ft / _il RUN_TAG suffix so they sit next to the serial runs)
+# partial-sum merge of omp_reduction_kmeans: MERGE=single|split|tree (default single;
+#   exported as KMEANS_MERGE, split/tree get a _msplit / _mtree RUN_TAG suffix)
+# storage precision: PRECISION=double|float (-p; float runs go to <kind>_f32/, a KIND of
+#   their own), VALIDATE=1 adds -V (double reference run + membership/center comparison)
+# initial centers: SEEDING=first|kmeans-par (-k; default first, k-means|| runs get a _kpar
+#   RUN_TAG suffix); raise LOOPS to see iterations / time to convergence
+# MPI: BIN=mpi_kmeans (make mpi_kmeans after module load openmpi) runs RANKS=<P> ranks of
+#   THREADS OpenMP threads each under mpirun (default 1; the runs go to mpi/, with an _R<P>
+#   RUN_TAG suffix), e.g. qsub -l nodes=2:ppn=8 -v BIN=mpi_kmeans,RANKS=4,THREADS=4 ...;
+#   OVERSUBSCRIBE=1 allows more ranks than slots (one box, testing)
+# memory footprint: every run goes through tools/rusage_run.py (peak RSS, page faults,
+#   context switches -> <tag>/rusage.txt, read by tools/bench_results.py and plotted by
+#   tools/memory_scaling.py); RUSAGE=0 runs the binary bare
+# custom placement (used by tools/placement.py): AFFINITY=custom,CPUSET="0 2 4 6",AFF_LABEL=scatter
+#   or AFFINITY=omp,OMP_PLACES=cores,OMP_PROC_BIND=spread,AFF_LABEL=cores-spread
 
 set -euo pipefail
 cd /home/parallel/parlab05/a2/kmeans || exit 1
 
+# Commit of the checkout the binaries were built in, kept with every run
+# (meta.txt, runrec env) so tools/perf_regress.py attributes the run to it
+BUILD_COMMIT="$(git rev-parse --short HEAD 2>/dev/null || echo unknown)"
+[[ -n "$(git status --porcelain --untracked-files=no 2>/dev/null)" ]] && BUILD_COMMIT+="+dirty"
+export BUILD_COMMIT
+
 : "${BIN:=seq_kmeans}"
 : "${SIZE:=256}"
 : "${COORDS:=16}"
@@ -22,15 +46,32 @@ cd /home/parallel/parlab05/a2/kmeans || exit 1
 : "${LOOPS:=10}"
 : "${THREADS:?Set THREADS via qsub -v THREADS=...}"
 : "${AFFINITY:=none}"
+: "${INIT:=serial}"
+: "${MERGE:=single}"
+: "${PRECISION:=double}"
+: "${VALIDATE:=0}"
+: "${SEEDING:=first}"
+: "${RANKS:=1}"
+: "${OVERSUBSCRIBE:=0}"
+: "${RUSAGE:=1}"
 
 export OMP_NUM_THREADS="${THREADS}"
-AFF_LABEL="noaff"
+export KMEANS_MERGE="${MERGE}"
 if [[ "${AFFINITY,,}" == "default" ]]; then
   CPUSET="$(seq 0 $((THREADS-1)) | paste -sd' ' -)"
   export GOMP_CPU_AFFINITY="${CPUSET}"
-  AFF_LABEL="aff"
+  : "${AFF_LABEL:=aff}"
+elif [[ "${AFFINITY,,}" == "custom" ]]; then
+  : "${CPUSET:?Set CPUSET with AFFINITY=custom}"
+  export GOMP_CPU_AFFINITY="${CPUSET}"
+  : "${AFF_LABEL:=custom}"
+elif [[ "${AFFINITY,,}" == "omp" ]]; then
+  unset GOMP_CPU_AFFINITY || true
+  export OMP_PLACES="${OMP_PLACES:-cores}" OMP_PROC_BIND="${OMP_PROC_BIND:-close}"
+  : "${AFF_LABEL:=${OMP_PLACES}-${OMP_PROC_BIND}}"
 else
   unset GOMP_CPU_AFFINITY || true
+  : "${AFF_LABEL:=noaff}"
 fi
 
 BENCH_ROOT="/home/parallel/parlab05/a2/kmeans/benchmarks"
@@ -38,24 +79,79 @@ case "${BIN}" in
   *seq*)                BENCH_SUBDIR_BASE="serial" ;;
   *naive*)              BENCH_SUBDIR_BASE="naive" ;;
   *reduction*|*copied*) BENCH_SUBDIR_BASE="reduction" ;;
+  *kdtree*)             BENCH_SUBDIR_BASE="kdtree" ;;
+  *mpi*)                BENCH_SUBDIR_BASE="mpi" ;;
   *)                    BENCH_SUBDIR_BASE="other" ;;
 esac
+case "${PRECISION}" in
+  double) ;;
+  float)  BENCH_SUBDIR_BASE+="_f32" ;;
+  *)      echo "Unknown PRECISION=${PRECISION}" >&2; exit 1 ;;
+esac
 BENCH_SUBDIR="${BENCH_SUBDIR_BASE}/${AFF_LABEL}"
+EXTRA_ARGS=()
+[[ "${VALIDATE}" == "1" ]] && EXTRA_ARGS+=(-V)
+LAUNCH=()
+if [[ "${BENCH_SUBDIR_BASE}" == mpi* ]]; then
+  [[ "${VALIDATE}" == "1" ]] && { echo "VALIDATE=1 is not supported by ${BIN}" >&2; exit 1; }
+  # ranks place their own threads: no mpirun core binding under OpenMP affinity
+  LAUNCH=(mpirun -np "${RANKS}" --bind-to none -x OMP_NUM_THREADS -x KMEANS_MERGE -x RUNREC_FILE)
+  # only the affinity variables that are set: mpirun warns (on .err) about unset ones
+  for v in GOMP_CPU_AFFINITY OMP_PLACES OMP_PROC_BIND; do
+    [[ -n "${!v:-}" ]] && LAUNCH+=(-x "$v")
+  done
+  [[ "${OVERSUBSCRIBE}" == "1" ]] && LAUNCH+=(--oversubscribe)
+fi
 
 RUN_TAG="S${SIZE}_N${COORDS}_C${CLUSTERS}_L${LOOPS}_T${THREADS}"
+case "${INIT}" in
+  serial)      ;;
+  first-touch) RUN_TAG+="_ft" ;;
+  interleave)  RUN_TAG+="_il" ;;
+  *)           echo "Unknown INIT=${INIT}" >&2; exit 1 ;;
+esac
+case "${MERGE}" in
+  single)      ;;
+  split|tree)  RUN_TAG+="_m${MERGE}" ;;
+  *)           echo "Unknown MERGE=${MERGE}" >&2; exit 1 ;;
+esac
+case "${SEEDING}" in
+  first)       ;;
+  kmeans-par)  RUN_TAG+="_kpar" ;;
+  *)           echo "Unknown SEEDING=${SEEDING}" >&2; exit 1 ;;
+esac
+[[ "${BENCH_SUBDIR_BASE}" == mpi* ]] && RUN_TAG+="_R${RANKS}"
 RESULT_DIR="${BENCH_ROOT}/${BENCH_SUBDIR}/${RUN_TAG}"
 mkdir -p "${RESULT_DIR}"
 
 {
   echo "[run_on_queue] BIN=${BIN}"
+  echo "[run_on_queue] BUILD_COMMIT=${BUILD_COMMIT}"
   echo "[run_on_queue] OMP_NUM_THREADS=${OMP_NUM_THREADS}"
   echo "[run_on_queue] GOMP_CPU_AFFINITY=${GOMP_CPU_AFFINITY:-<unset>}"
+  echo "[run_on_queue] OMP_PLACES=${OMP_PLACES:-<unset>}"
+  echo "[run_on_queue] OMP_PROC_BIND=${OMP_PROC_BIND:-<unset>}"
   echo "[run_on_queue] AFF_LABEL=${AFF_LABEL}"
-  echo "[run_on_queue] Params: -s ${SIZE} -n ${COORDS} -c ${CLUSTERS} -l ${LOOPS}"
+  echo "[run_on_queue] INIT_MODE=${INIT}"
+  echo "[run_on_queue] MERGE_MODE=${MERGE}"
+  echo "[run_on_queue] PRECISION=${PRECISION}"
+  echo "[run_on_queue] SEEDING=${SEEDING}"
+  echo "[run_on_queue] RANKS=${RANKS}"
+  echo "[run_on_queue] Params: -s ${SIZE} -n ${COORDS} -c ${CLUSTERS} -l ${LOOPS} -i ${INIT} -p ${PRECISION} -k ${SEEDING} ${EXTRA_ARGS[*]:-}"
   echo "[run_on_queue] Result dir: ${RESULT_DIR}"
 } | tee "${RESULT_DIR}/meta.txt"
 
-"./${BIN}" -s "${SIZE}" -n "${COORDS}" -c "${CLUSTERS}" -l "${LOOPS}" \
+# Only used by a tracing build (make TRACE=1); convert with tools/trace2chrome.py
+export TRACE_FILE="${RESULT_DIR}/run.trace"
+# Binary run record (common/runrec.h); read with tools/runrec.py
+export RUNREC_FILE="${RESULT_DIR}/run.rec"
+rm -f "${RUNREC_FILE}"
+# Peak RSS / page faults / context switches (wait4 + /proc); tools/rusage_run.py
+MEASURE=()
+rm -f "${RESULT_DIR}/rusage.txt"
+[[ "${RUSAGE}" == "1" ]] && MEASURE=(python3 ../../tools/rusage_run.py -o "${RESULT_DIR}/rusage.txt" --)
+
+"${MEASURE[@]}" "${LAUNCH[@]}" "./${BIN}" -s "${SIZE}" -n "${COORDS}" -c "${CLUSTERS}" -l "${LOOPS}" -i "${INIT}" -p "${PRECISION}" -k "${SEEDING}" "${EXTRA_ARGS[@]}" \
   | tee "${RESULT_DIR}/output.txt"
 
 
@@ -4,11 +4,11 @@
 
 // square of Euclid distance between two multi-dimensional points
 inline static double euclid_dist_2(int    numdims,  /* no. dimensions */
-                                 double * coord1,   /* [numdims] */
-                                 double * coord2)   /* [numdims] */
+                                 coord_t * coord1,  /* [numdims] */
+                                 coord_t * coord2)  /* [numdims] */
 {
     int i;
-    double ans = 0.0;
+    coord_t ans = 0.0;
 
     for(i=0; i<numdims; i++)
         ans += (coord1[i]-coord2[i]) * (coord1[i]-coord2[i]);
@@ -18,8 +18,8 @@ inline static double euclid_dist_2(int    numdims,  /* no. dimensions */
 
 inline static int find_nearest_cluster(int      numClusters, /* no. clusters */
                                        int      numCoords,   /* no. coordinates */
-                                       double * object,      /* [numCoords] */
-                                       double * clusters)    /* [numClusters][numCoords] */
+                                       coord_t * object,     /* [numCoords] */
+                                       coord_t * clusters)   /* [numClusters][numCoords] */
 {
     int index, i;
     double dist, min_dist;
@@ -39,18 +39,19 @@ inline static int find_nearest_cluster(int      numClusters, /* no. clusters */
     return index;
 }
 
-void kmeans(double * objects,          /* in: [numObjs][numCoords] */
+void kmeans(coord_t * objects,         /* in: [numObjs][numCoords] */
             int      numCoords,        /* no. coordinates */
             int      numObjs,          /* no. objects */
             int      numClusters,      /* no. clusters */
             double   threshold,        /* minimum fraction of objects that change membership */
             long     loop_threshold,   /* maximum number of iterations */
             int    * membership,       /* out: [numObjs] */
-            double * clusters)         /* out: [numClusters][numCoords] */
+            coord_t * clusters)        /* out: [numClusters][numCoords] */
 {
     int i, j;
     int index, loop=0;
     double timing = 0;
+    double t_loop;       // start of the current loop (per-iteration record)
 
     double delta;          // fraction of objects whose clusters change in each loop 
     int * newClusterSize; // [numClusters]: no. objects assigned in each new cluster 
@@ -69,6 +70,8 @@ void kmeans(double * objects,          /* in: [numObjs][numCoords] */
     timing = wtime();   
     
     do {
+        t_loop = wtime();
+
         // before each loop, set cluster data to 0
         for (i=0; i<numClusters; i++) {
             for (j=0; j<numCoords; j++)
@@ -106,6 +109,7 @@ void kmeans(double * objects,          /* in: [numObjs][numCoords] */
 
         // Get fraction of objects whose membership changed during this loop. This is used as a convergence criterion.
         delta /= numObjs;
+        runrec_iter(&_runrec, wtime() - t_loop, delta);
 
         loop++;
         printf("\r\tcompleted loop %d", loop);
@@ -113,6 +117,8 @@ void kmeans(double * objects,          /* in: [numObjs][numCoords] */
     } while (delta > threshold && loop < loop_threshold);
     timing = wtime() - timing;
     printf("\n        nloops = %3d   (total = %7.4fs)  (per loop = %7.4fs)\n", loop, timing, timing/loop);
+    _runrec.total_time = timing;
+    runrec_param(&_runrec, "nloops", loop);
 
     free(newClusters);
     free(newClusterSize);
@@ -4,6 +4,11 @@ Generate execution-time diagrams for every results_*.txt table.
 
 Usage:
     python diagrams.py [--metric {total,per_loop}]
+
+If the runs were traced (make TRACE=1, then tools/trace2chrome.py on the
+run.trace files), the run.summary.txt files in benchmarks/<lock>/<tag>/ add
+images/trace_summary.png: load imbalance and barrier wait per thread
+count, one line per lock.
 """
 
 from __future__ import annotations
@@ -11,7 +16,7 @@ from __future__ import annotations
 import argparse
 import re
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import matplotlib
 
@@ -22,6 +27,7 @@ import matplotlib.pyplot as plt  # noqa: E402
 BASE_DIR = Path(__file__).resolve().parent
 RESULTS_DIR = BASE_DIR / "results"
 IMAGES_DIR = BASE_DIR / "images"
+BENCH_DIR = BASE_DIR.parent / "benchmarks"
 TAG_RE = re.compile(r"S\d+_N\d+_C\d+_L\d+_T\d+")
 
 
@@ -39,12 +45,22 @@ def parse_args() -> argparse.Namespace:
 
 
 def parse_results_table(path: Path) -> List[Tuple[int, float, float]]:
-    """Return list of (thread_count, total_time, per_loop_time)."""
+    """
+    Return list of (thread_count, total_time, per_loop_time).
+
+    TOTAL / PER_LOOP are found by name in the header row (so extra columns
+    such as SEEDING or TTS do not shift them), else taken as the last two
+    columns; rows with a SEEDING other than "first" (k-means||) are skipped.
+    """
     rows: List[Tuple[int, float, float]] = []
+    header: List[str] = []
     with path.open() as file:
         for line in file:
             stripped = line.strip()
-            if not stripped or stripped.startswith("KIND") or stripped.startswith("-"):
+            if not stripped or stripped.startswith("-"):
+                continue
+            if stripped.startswith("KIND"):
+                header = [h.split("(")[0].upper() for h in stripped.split()]
                 continue
             tag_match = TAG_RE.search(line)
             if not tag_match:
@@ -53,9 +69,12 @@ def parse_results_table(path: Path) -> List[Tuple[int, float, float]]:
             tokens = stripped.split()
             if len(tokens) < 2:
                 continue
+            cells = dict(zip(header, tokens))
+            if cells.get("SEEDING", "first") != "first":
+                continue
             try:
-                total = float(tokens[-2])
-                per_loop = float(tokens[-1])
+                total = float(cells.get("TOTAL", tokens[-2]))
+                per_loop = float(cells.get("PER_LOOP", tokens[-1]))
             except ValueError:
                 continue
             threads = int(run_tag.rsplit("_T", 1)[-1])
@@ -167,6 +186,57 @@ def plot_combined(metric: str) -> Path | None:
     return output_path
 
 
+def read_trace_summary(path: Path) -> Optional[Dict[str, str]]:
+    """The one-row tools/trace2chrome.py summary as {column: cell}, or None if absent."""
+    if not path.exists():
+        return None
+    lines = [l for l in path.read_text().splitlines() if l.strip()]
+    if len(lines) < 2:
+        return None
+    return dict(zip(lines[0].split("\t"), lines[1].split("\t")))
+
+
+def collect_trace_summaries() -> Dict[str, Dict[int, Dict[str, str]]]:
+    """{lock: {threads: summary}} for the traced runs of the default tags (no suffix)."""
+    traces: Dict[str, Dict[int, Dict[str, str]]] = {}
+    if not BENCH_DIR.exists():
+        return traces
+    for path in sorted(BENCH_DIR.glob("*/*/run.summary.txt")):
+        if not TAG_RE.fullmatch(path.parent.name):
+            continue
+        summary = read_trace_summary(path)
+        if summary is not None:
+            threads = int(path.parent.name.rsplit("_T", 1)[-1])
+            traces.setdefault(path.parent.parent.name, {})[threads] = summary
+    return traces
+
+
+def plot_trace_summaries() -> Path | None:
+    traces = collect_trace_summaries()
+    if not traces:
+        return None
+    panels = (("IMBALANCE", "Load imbalance (max/mean - 1)", 1.0),
+              ("BARRIER_FRAC", "Barrier wait (% of thread time)", 100.0))
+    fig, axes = plt.subplots(1, len(panels), figsize=(12, 5))
+    for lock, by_threads in sorted(traces.items()):
+        threads = sorted(by_threads)
+        for ax, (column, _, scale) in zip(axes, panels):
+            ax.plot(threads, [scale * float(by_threads[t][column]) for t in threads],
+                    marker="o", label=lock)
+    for ax, (_, ylabel, _) in zip(axes, panels):
+        ax.set_xscale("log", base=2)
+        ax.set_xlabel("Threads")
+        ax.set_ylabel(ylabel)
+        ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.7)
+    axes[0].legend(ncol=2, fontsize=8)
+    fig.suptitle("All locks - trace summary")
+    output_path = IMAGES_DIR / "trace_summary.png"
+    fig.tight_layout()
+    fig.savefig(output_path, dpi=150)
+    plt.close(fig)
+    return output_path
+
+
 def main() -> None:
     args = parse_args()
     IMAGES_DIR.mkdir(parents=True, exist_ok=True)
@@ -178,6 +248,9 @@ def main() -> None:
     combined = plot_combined(args.metric)
     if combined:
         generated.append(combined)
+    traced = plot_trace_summaries()
+    if traced:
+        generated.append(traced)
     if not generated:
         raise SystemExit("No diagrams produced (no results files?).")
     print(f"Generated {len(generated)} diagram(s):")
@@ -5,37 +5,237 @@
 #include <sys/stat.h>
 #include <fcntl.h>
 #include <unistd.h>     /* read(), close() */
+#include <float.h>      /* DBL_MAX */
 // TODO: remove comment from following line
 #include <omp.h>
 
 #include "kmeans.h"
 
-double * dataset_generation(int numObjs, int numCoords)
+coord_t * dataset_generation(int numObjs, int numCoords)
 {
-    double * objects = NULL;
+    return dataset_generation_range(0, numObjs, numCoords);
+}
+
+/* objects [first, first + numObjs) of the dataset above (mpi_main.c: one shard per rank) */
+coord_t * dataset_generation_range(long first, int numObjs, int numCoords)
+{
+    coord_t * objects = NULL;
     long i, j;
     // Random values that will be generated will be between 0 and 10.
     double val_range = 10;
 
     /* allocate space for objects[][] and read all objects */
-    objects = (typeof(objects)) malloc(numObjs * numCoords * sizeof(*objects));
+    objects = (typeof(objects)) numa_alloc(numObjs * numCoords * sizeof(*objects), _init_mode);
 
     /*
-     * Hint : Could dataset generation be performed in a more "NUMA-Aware" way?
-     *        Need to place data "close" to the threads that will perform operations on them.
-     *        reminder : First-touch data placement policy
+     * First-touch: generate in parallel with the static split of the kmeans
+     * loops over objects, so each thread's objects live on its own node.
+     * Every object is seeded with its index, so the data is the same in all modes.
      */
-
+    #pragma omp parallel for private(j) schedule(static) if (_init_mode == INIT_FIRST_TOUCH)
     for (i=0; i<numObjs; i++)
     {
-        unsigned int seed = i;
+        unsigned int seed = first + i;
         for (j=0; j<numCoords; j++)
         {
             objects[i*numCoords + j] = (rand_r(&seed) / ((double) RAND_MAX)) * val_range;
-            if (_debug && i == 0)
+            if (_debug && first + i == 0)
                 printf("object[i=%ld][j=%ld]=%f\n",i,j,objects[i*numCoords + j]);
         }
     } 
 
     return objects;
 }
+
+/*
+ * k-means|| seeding (Bahmani et al., "Scalable K-Means++"), -k kmeans-par.
+ *
+ * Starts from one random object and runs SEED_ROUNDS rounds; in each one
+ * every object is picked independently with probability
+ * min(1, l * d2(x) / psi), where d2 is the squared distance to the nearest
+ * candidate so far, psi the sum of d2 and l = numClusters the oversampling
+ * factor. Each round is two parallel passes over the objects (sample, then
+ * update d2 against the new candidates only), so the cost is about
+ * SEED_ROUNDS kmeans loops. The ~l * SEED_ROUNDS candidates are weighted by
+ * the number of objects closest to them and reduced to numClusters centers
+ * on the master thread: weighted k-means++, then a few weighted Lloyd steps.
+ *
+ * The random number for (object, round) is a hash of the two, not of the
+ * thread that draws it. The centers are still not bitwise independent of
+ * the thread count: psi is a floating-point reduction, so its rounding
+ * changes with the team size, and a pick whose u * psi lands within that
+ * rounding of l * d2 can flip. They are reproducible for a fixed thread
+ * count.
+ * Returns the number of candidates, -1 if fewer than numClusters distinct
+ * objects could be found.
+ */
+#define SEED_ROUNDS      5
+#define SEED_LLOYD_ITERS 10
+
+static inline double seed_uniform(unsigned long a, unsigned long b)
+{
+    /* splitmix64 finalizer of (a, b) -> [0, 1) */
+    unsigned long long z = (unsigned long long) a * 0x9E3779B97F4A7C15ULL + b + 0x632BE59BD9B4E019ULL;
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    z ^= z >> 31;
+    return (z >> 11) * (1.0 / 9007199254740992.0);
+}
+
+static inline double seed_dist2(int numCoords, const coord_t *a, const coord_t *b)
+{
+    double d, ans = 0.0;
+    int j;
+
+    for (j=0; j<numCoords; j++) {
+        d = (double) a[j] - (double) b[j];
+        ans += d * d;
+    }
+    return ans;
+}
+
+int kmeans_seed(coord_t *objects, int numObjs, int numCoords, int numClusters, double *clusters)
+{
+    double *d2, *w, *cw, *wsum, *pd, psi = 0.0, u, acc, best, d;
+    int *near, *cand, *assign;
+    unsigned char *pick;
+    int m = 0, cap, first, round, c, k, i, j, chosen, changed, it;
+    long n = numObjs;
+
+    if (numObjs < numClusters)
+        return -1;
+
+    d2   = (double *) numa_alloc(n * sizeof(double), _init_mode);
+    near = (int *) numa_alloc(n * sizeof(int), _init_mode);
+    pick = (unsigned char *) numa_alloc(n, _init_mode);
+    cap  = 2 * numClusters * (SEED_ROUNDS + 1) + 1;
+    cand = (int *) malloc(cap * sizeof(int));
+
+    cand[m++] = (int) (seed_uniform(0, 0) * numObjs);
+    #pragma omp parallel for schedule(static) reduction(+ : psi)
+    for (i=0; i<numObjs; i++) {
+        d2[i] = seed_dist2(numCoords, &objects[(long) i*numCoords], &objects[(long) cand[0]*numCoords]);
+        near[i] = 0;
+        psi += d2[i];
+    }
+
+    /* more rounds only if the candidates do not cover numClusters yet */
+    for (round=1; (round <= SEED_ROUNDS || m < numClusters) && round <= 4 * SEED_ROUNDS && psi > 0; round++) {
+        const double l = numClusters;
+
+        #pragma omp parallel for schedule(static)
+        for (i=0; i<numObjs; i++)
+            pick[i] = seed_uniform(i + 1, round) * psi < l * d2[i];
+
+        /* collect in index order (deterministic); ~l picks, so grow rarely */
+        first = m;
+        for (i=0; i<numObjs; i++) {
+            if (!pick[i])
+                continue;
+            if (m == cap) {
+                cap *= 2;
+                cand = (int *) realloc(cand, cap * sizeof(int));
+            }
+            cand[m++] = i;
+        }
+
+        psi = 0.0;
+        #pragma omp parallel for private(c, d) schedule(static) reduction(+ : psi)
+        for (i=0; i<numObjs; i++) {
+            for (c=first; c<m; c++) {
+                d = seed_dist2(numCoords, &objects[(long) i*numCoords], &objects[(long) cand[c]*numCoords]);
+                if (d < d2[i]) {
+                    d2[i] = d;
+                    near[i] = c;
+                }
+            }
+            psi += d2[i];
+        }
+    }
+
+    /* candidate weights: objects closest to each */
+    w = (double *) calloc(m, sizeof(double));
+    #pragma omp parallel for schedule(static) reduction(+ : w[:m])
+    for (i=0; i<numObjs; i++)
+        w[near[i]] += 1.0;
+
+    /* weighted k-means++ over the candidates (a duplicate gets pd = 0, so no center is picked twice) */
+    pd = (double *) malloc(m * sizeof(double));
+    cw = (double *) malloc(m * sizeof(double));
+    chosen = 0;
+    if (m >= numClusters) {
+        for (c=0, acc=0.0; c<m; c++)
+            acc += w[c];
+        u = seed_uniform(n + 1, 0) * acc;
+        for (c=0; c<m-1 && (u -= w[c]) >= 0; c++)
+            ;
+        for (j=0; j<numCoords; j++)
+            clusters[j] = objects[(long) cand[c]*numCoords + j];
+        for (c=0; c<m; c++)
+            pd[c] = DBL_MAX;
+        for (chosen=1; chosen<numClusters; chosen++) {
+            for (c=0, acc=0.0; c<m; c++) {
+                for (j=0, d=0.0; j<numCoords; j++) {
+                    double t = objects[(long) cand[c]*numCoords + j] - clusters[(chosen-1)*numCoords + j];
+                    d += t * t;
+                }
+                if (d < pd[c])
+                    pd[c] = d;
+                cw[c] = w[c] * pd[c];
+                acc += cw[c];
+            }
+            if (acc <= 0)
+                break;
+            u = seed_uniform(n + 1, chosen) * acc;
+            for (c=0; c<m-1 && (u -= cw[c]) >= 0; c++)
+                ;
+            while (cw[c] <= 0)     /* rounding left u past the last positive weight */
+                c--;
+            for (j=0; j<numCoords; j++)
+                clusters[chosen*numCoords + j] = objects[(long) cand[c]*numCoords + j];
+        }
+    }
+
+    /* weighted Lloyd on the candidates */
+    assign = (int *) malloc(m * sizeof(int));
+    wsum = (double *) malloc(numClusters * (numCoords + 1) * sizeof(double));
+    for (c=0; c<m; c++)
+        assign[c] = -1;
+    for (it=0, changed=1; chosen == numClusters && changed && it < SEED_LLOYD_ITERS; it++) {
+        changed = 0;
+        memset(wsum, 0, numClusters * (numCoords + 1) * sizeof(double));
+        for (c=0; c<m; c++) {
+            int idx = 0;
+            for (k=0, best=DBL_MAX; k<numClusters; k++) {
+                for (j=0, d=0.0; j<numCoords; j++) {
+                    double t = objects[(long) cand[c]*numCoords + j] - clusters[k*numCoords + j];
+                    d += t * t;
+                }
+                if (d < best) {
+                    best = d;
+                    idx = k;
+                }
+            }
+            changed += (assign[c] != idx);
+            assign[c] = idx;
+            wsum[idx*(numCoords+1) + numCoords] += w[c];
+            for (j=0; j<numCoords; j++)
+                wsum[idx*(numCoords+1) + j] += w[c] * objects[(long) cand[c]*numCoords + j];
+        }
+        for (k=0; k<numClusters; k++)
+            if (wsum[k*(numCoords+1) + numCoords] > 0)
+                for (j=0; j<numCoords; j++)
+                    clusters[k*numCoords + j] = wsum[k*(numCoords+1) + j] / wsum[k*(numCoords+1) + numCoords];
+    }
+
+    free(d2);
+    free(near);
+    free(pick);
+    free(cand);
+    free(w);
+    free(pd);
+    free(cw);
+    free(assign);
+    free(wsum);
+    return (chosen == numClusters) ? m : -1;
+}
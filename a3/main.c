@@ -7,7 +7,13 @@
 #include <unistd.h>     /* getopt() */
 
 int _debug;
+int _init_mode;
 #include "kmeans.h"
+runrec_t _runrec;
+
+// initial centers (-k): the first numClusters objects, or k-means|| (kmeans_seed() in file_io.c)
+enum { SEED_FIRST = 0, SEED_KMEANS_PAR = 1 };
+static const char *const seeding_names[] = { "first", "kmeans-par" };
 
 static void usage(char *argv0) {
     char *help =
@@ -17,12 +23,80 @@ static void usage(char *argv0) {
         "       -n num_coords      : number of coordinates\n"
         "       -t threshold       : threshold value (default : 0.001)\n"
         "       -l loop_threshold  : iterations threshold (default : 10)\n"
+        "       -i init_mode       : page placement of the data: serial, first-touch\n"
+        "                            or interleave (default : serial)\n"
+        "       -p precision       : storage of objects/clusters: double or float\n"
+        "                            (float32, sums still in double) (default : double)\n"
+        "       -k seeding         : initial centers: first (the first num_clusters\n"
+        "                            objects) or kmeans-par (k-means||) (default : first)\n"
+        "       -V                 : also run the double kernel and compare memberships\n"
+        "                            and final centers with it (validation of -p float)\n"
         "       -d                 : enable debug mode\n"
         "       -h                 : print this help information\n";
     fprintf(stderr, help, argv0);
     exit(-1);
 }
 
+/*
+ * -V: run the double kernel from the same initial centers and compare its
+ * memberships and final centers with the ones just computed. Printed after
+ * the run's own output (the "nloops = ..." line the scripts read stays the
+ * first one), and kept out of the run record apart from the two results.
+ */
+static void validate_double(long numObjs, long numCoords, long numClusters, double threshold,
+                            long loop_threshold, int seeding, int *membership, double *clusters)
+{
+    double  *objects = dataset_generation(numObjs, numCoords);
+    double  *ref_clusters = (double*) malloc(numClusters * numCoords * sizeof(double));
+    int     *ref_membership = (int*) numa_alloc(numObjs * sizeof(int), _init_mode);
+    runrec_t saved = _runrec;
+    long     i, mismatch = 0;
+    double   max_delta = 0.0, d;
+    char    *trace_file;
+
+    // initial centers picked the same way as in main(), in check_repeated_clusters()'s sorted order
+    if (seeding == SEED_KMEANS_PAR)
+        kmeans_seed(objects, numObjs, numCoords, numClusters, ref_clusters);
+    else
+        for (i=0; i<numClusters*numCoords; i++)
+            ref_clusters[i] = objects[i];
+    check_repeated_clusters(numClusters, numCoords, ref_clusters);
+
+    /* TRACE_FILE="" (omp_trace.h): the reference run must not overwrite the run's trace */
+    trace_file = getenv("TRACE_FILE");
+    trace_file = trace_file ? strdup(trace_file) : NULL;
+    setenv("TRACE_FILE", "", 1);
+    printf("Validation: double reference run\n");
+    kmeans(objects, numCoords, numObjs, numClusters, threshold, loop_threshold, ref_membership, ref_clusters);
+    printf("\n");
+    if (trace_file)
+        setenv("TRACE_FILE", trace_file, 1);
+    else
+        unsetenv("TRACE_FILE");
+    free(trace_file);
+
+    /* drop what the reference run added to the record (same buffer, reserved up front) */
+    saved.iters = _runrec.iters;
+    saved.capacity = _runrec.capacity;
+    _runrec = saved;
+
+    for (i=0; i<numObjs; i++)
+        mismatch += (membership[i] != ref_membership[i]);
+    for (i=0; i<numClusters*numCoords; i++) {
+        d = clusters[i] - ref_clusters[i];
+        if (d < 0) d = -d;
+        if (d > max_delta) max_delta = d;
+    }
+    printf("Validation: membership mismatch = %ld / %ld (%.4f%%)    max centroid delta = %.3e\n",
+           mismatch, numObjs, 100.0 * mismatch / numObjs, max_delta);
+    runrec_param(&_runrec, "mismatch_frac", (double) mismatch / numObjs);
+    runrec_param(&_runrec, "max_cdelta", max_delta);
+
+    free(objects);
+    free(ref_clusters);
+    free(ref_membership);
+}
+
 int main(int argc, char **argv)
 {
     long i, j, opt;
@@ -31,21 +105,25 @@ int main(int argc, char **argv)
 
     long     numClusters=0, numCoords=0, numObjs=0;
     int    * membership;    // [numObjs]
-    double * objects;       // [numObjs * numCoords] data  objects
+    double * objects = NULL;   // [numObjs * numCoords] data  objects (-p double)
+    float  * objects_f = NULL; // [numObjs * numCoords] data  objects (-p float)
     double * clusters;      // [numClusters * numCoords] cluster center
+    int      use_float = 0, validate = 0, seeding = SEED_FIRST, ncand = 0;
+    double   seed_timing = 0, tts;
     double   dataset_size = 0, threshold;
     long     loop_threshold;
     double   io_timing_read;
 
     /* some default values */
     _debug         = 0;
+    _init_mode     = INIT_SERIAL;
     threshold      = 0.001;
     loop_threshold = 10;
     numClusters    = 0;
 
     printf("\n~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~\n\n");
 
-    while ( (opt = getopt(argc,argv,"n:t:l:c:s:dh")) != EOF) {
+    while ( (opt = getopt(argc,argv,"n:t:l:c:s:i:p:k:Vdh")) != EOF) {
         switch (opt) {
             case 'c': numClusters = atol(optarg);
                       break;
@@ -57,6 +135,26 @@ int main(int argc, char **argv)
                       break;
             case 'n': numCoords=atol(optarg);
                       break;
+            case 'i': _init_mode = numa_init_parse(optarg);
+                      if (_init_mode < 0)
+                          usage(argv[0]);
+                      break;
+            case 'p': if (strcmp(optarg, "float") == 0)
+                          use_float = 1;
+                      else if (strcmp(optarg, "double") == 0)
+                          use_float = 0;
+                      else
+                          usage(argv[0]);
+                      break;
+            case 'k': if (strcmp(optarg, seeding_names[SEED_KMEANS_PAR]) == 0)
+                          seeding = SEED_KMEANS_PAR;
+                      else if (strcmp(optarg, seeding_names[SEED_FIRST]) == 0)
+                          seeding = SEED_FIRST;
+                      else
+                          usage(argv[0]);
+                      break;
+            case 'V': validate = 1;
+                      break;
             case 'd': _debug = 1;
                       break;
             case 'h':
@@ -73,17 +171,34 @@ int main(int argc, char **argv)
         printf("Error: number of clusters must be larger than the number of data points to be clustered.\n");
         return 1;
     }
-    printf("dataset_size = %.2f MB    numObjs = %ld    numCoords = %ld    numClusters = %ld\n", dataset_size, numObjs, numCoords, numClusters);
+    // numObjs is the same for both precisions (sized as doubles), so -p float runs the same objects in half the bytes
+    printf("dataset_size = %.2f MB    numObjs = %ld    numCoords = %ld    numClusters = %ld    precision = %s\n", dataset_size, numObjs, numCoords, numClusters, use_float ? "float" : "double");
 
-    objects = dataset_generation(numObjs, numCoords);
+    if (use_float)
+        objects_f = dataset_generation_f32(numObjs, numCoords);
+    else
+        objects = dataset_generation(numObjs, numCoords);
 
     // Allocate space for clusters (coordinates of cluster centers)
     clusters = (double*)  malloc(numClusters * numCoords * sizeof(double));
 
-    // The first numClusters elements are selected as initial centers
-    for (i=0; i<numClusters; i++)
-        for (j=0; j<numCoords; j++)
-            clusters[i*numCoords + j] = objects[i*numCoords + j];
+    if (seeding == SEED_KMEANS_PAR) {
+        // k-means|| over the whole dataset, in parallel (timed: part of the time to solution)
+        seed_timing = wtime();
+        ncand = use_float ? kmeans_seed_f32(objects_f, numObjs, numCoords, numClusters, clusters)
+                          : kmeans_seed(objects, numObjs, numCoords, numClusters, clusters);
+        seed_timing = wtime() - seed_timing;
+        if (ncand < 0) {
+            printf("Error: k-means|| seeding found fewer than %ld distinct objects\n", numClusters);
+            return 1;
+        }
+        printf("Seeding: kmeans-par (%d candidates) in %7.4fs\n", ncand, seed_timing);
+    } else {
+        // The first numClusters elements are selected as initial centers
+        for (i=0; i<numClusters; i++)
+            for (j=0; j<numCoords; j++)
+                clusters[i*numCoords + j] = use_float ? objects_f[i*numCoords + j] : objects[i*numCoords + j];
+    }
 
     // check initial cluster centers for repeatition 
     if (check_repeated_clusters(numClusters, numCoords, clusters) == 0) {
@@ -100,13 +215,47 @@ int main(int argc, char **argv)
     }
 
     // membership: the cluster id for each data object
-    membership = (int*) malloc(numObjs * sizeof(int));
+    membership = (int*) numa_alloc(numObjs * sizeof(int), _init_mode);
+
+    runrec_init(&_runrec, strrchr(argv[0], '/') ? strrchr(argv[0], '/') + 1 : argv[0]);
+    runrec_param(&_runrec, "size_mb", dataset_size);
+    runrec_param(&_runrec, "numObjs", numObjs);
+    runrec_param(&_runrec, "numCoords", numCoords);
+    runrec_param(&_runrec, "numClusters", numClusters);
+    runrec_param(&_runrec, "threshold", threshold);
+    runrec_param(&_runrec, "loop_thresh", loop_threshold);
+    runrec_param(&_runrec, "init_mode", _init_mode);
+    runrec_param(&_runrec, "float", use_float);
+    runrec_param(&_runrec, "seeding", seeding);
+    runrec_param(&_runrec, "seed_time", seed_timing);
+    // per-iteration (time, delta) buffer, allocated up front so kmeans() never reallocs
+    runrec_reserve(&_runrec, loop_threshold < 100000 ? loop_threshold : 100000);
 
     // start the core computation
     printf("\n");
-    kmeans(objects, numCoords, numObjs, numClusters, threshold, loop_threshold, membership, clusters);
+    if (use_float) {
+        float *clusters_f = (float*) malloc(numClusters * numCoords * sizeof(float));
+        for (i=0; i<numClusters*numCoords; i++)
+            clusters_f[i] = clusters[i];
+        kmeans_f32(objects_f, numCoords, numObjs, numClusters, threshold, loop_threshold, membership, clusters_f);
+        for (i=0; i<numClusters*numCoords; i++)
+            clusters[i] = clusters_f[i];
+        free(clusters_f);
+    } else {
+        kmeans(objects, numCoords, numObjs, numClusters, threshold, loop_threshold, membership, clusters);
+    }
     printf("\n");
 
+    // end to end: seeding + all loops; converged = the last loop moved no more than threshold
+    tts = seed_timing + _runrec.total_time;
+    printf("Time to solution = %7.4fs (seeding = %s %7.4fs + loops = %7.4fs)    iterations = %u    converged = %s\n",
+           tts, seeding_names[seeding], seed_timing, _runrec.total_time, _runrec.niters,
+           (_runrec.niters && _runrec.iters[_runrec.niters-1].value <= threshold) ? "yes" : "no");
+    runrec_param(&_runrec, "tts", tts);
+
+    if (validate)
+        validate_double(numObjs, numCoords, numClusters, threshold, loop_threshold, seeding, membership, clusters);
+
     printf("Final cluster centers:\n");
     for (i=0; i<numClusters; i++) {
         printf("clusters[%ld] = ",i);
@@ -115,7 +264,11 @@ int main(int argc, char **argv)
         printf("\n");
     }
 
+    runrec_write(&_runrec);
+    runrec_free(&_runrec);
+
     free(objects);
+    free(objects_f);
     free(membership);
     free(clusters);
 
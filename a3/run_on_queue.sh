@@ -14,17 +14,55 @@
 ##   COORDS=16
 ##   CLUSTERS=32
 ##   LOOPS=10
+##   INIT=serial        page placement: serial|first-touch|interleave (common/numa_init.h);
+##                      non-serial runs get a _ft / _il RUN_TAG suffix
+##   PRECISION=double   storage precision (-p): double|float; float runs go to
+##                      benchmarks/<lock>_f32/, a KIND of their own
+##   VALIDATE=0         1 adds -V (double reference run + membership/center comparison)
+##   SEEDING=first      initial centers (-k): first|kmeans-par (k-means||);
+##                      kmeans-par runs get a _kpar RUN_TAG suffix
+##   RUSAGE=1           run through tools/rusage_run.py (peak RSS, page faults,
+##                      context switches -> <tag>/rusage.txt); 0 runs the binary bare
 
 set -euo pipefail
 
 # Work in the directory where qsub was executed (your a3 folder)
 cd "${PBS_O_WORKDIR:-.}" || exit 1
 
+# Commit of the checkout the binaries were built in, kept with every run
+# (meta.txt, runrec env) so tools/perf_regress.py attributes the run to it
+BUILD_COMMIT="$(git rev-parse --short HEAD 2>/dev/null || echo unknown)"
+[[ -n "$(git status --porcelain --untracked-files=no 2>/dev/null)" ]] && BUILD_COMMIT+="+dirty"
+export BUILD_COMMIT
+
 # Fixed configuration required by the exercise (override with env if needed)
 SIZE="${SIZE:-32}"
 COORDS="${COORDS:-16}"
 CLUSTERS="${CLUSTERS:-32}"
 LOOPS="${LOOPS:-10}"
+INIT="${INIT:-serial}"
+PRECISION="${PRECISION:-double}"
+VALIDATE="${VALIDATE:-0}"
+RUSAGE="${RUSAGE:-1}"
+case "${PRECISION}" in
+  double) KIND_SUFFIX="" ;;
+  float)  KIND_SUFFIX="_f32" ;;
+  *)      echo "Unknown PRECISION=${PRECISION}" >&2; exit 1 ;;
+esac
+EXTRA_ARGS=()
+[[ "${VALIDATE}" == "1" ]] && EXTRA_ARGS+=(-V)
+case "${INIT}" in
+  serial)      TAG_SUFFIX="" ;;
+  first-touch) TAG_SUFFIX="_ft" ;;
+  interleave)  TAG_SUFFIX="_il" ;;
+  *)           echo "Unknown INIT=${INIT}" >&2; exit 1 ;;
+esac
+SEEDING="${SEEDING:-first}"
+case "${SEEDING}" in
+  first)       ;;
+  kmeans-par)  TAG_SUFFIX+="_kpar" ;;
+  *)           echo "Unknown SEEDING=${SEEDING}" >&2; exit 1 ;;
+esac
 
 # Thread configurations to test
 THREADS_LIST=(1 2 4 8 16 32 64)
@@ -70,21 +108,35 @@ run_one() {
   export GOMP_CPU_AFFINITY="${affinity}"
 
   # Result directory:
-  #   benchmarks/<lock_name>/S32_N16_C32_L10_T8/
-  local result_dir="benchmarks/${lock_name}/S${SIZE}_N${COORDS}_C${CLUSTERS}_L${LOOPS}_T${threads}"
+  #   benchmarks/<lock_name>[_f32]/S32_N16_C32_L10_T8/
+  local result_dir="benchmarks/${lock_name}${KIND_SUFFIX}/S${SIZE}_N${COORDS}_C${CLUSTERS}_L${LOOPS}_T${threads}${TAG_SUFFIX}"
   mkdir -p "${result_dir}"
 
   {
     echo "[run_on_queue] BIN=${bin}"
+    echo "[run_on_queue] BUILD_COMMIT=${BUILD_COMMIT}"
     echo "[run_on_queue] LOCK=${lock_name}"
     echo "[run_on_queue] OMP_NUM_THREADS=${OMP_NUM_THREADS}"
     echo "[run_on_queue] GOMP_CPU_AFFINITY=${GOMP_CPU_AFFINITY}"
-    echo "[run_on_queue] Params: -s ${SIZE} -n ${COORDS} -c ${CLUSTERS} -l ${LOOPS}"
+    echo "[run_on_queue] INIT_MODE=${INIT}"
+    echo "[run_on_queue] PRECISION=${PRECISION}"
+    echo "[run_on_queue] SEEDING=${SEEDING}"
+    echo "[run_on_queue] Params: -s ${SIZE} -n ${COORDS} -c ${CLUSTERS} -l ${LOOPS} -i ${INIT} -p ${PRECISION} -k ${SEEDING} ${EXTRA_ARGS[*]:-}"
     echo "[run_on_queue] Result dir: ${result_dir}"
   } > "${result_dir}/meta.txt"
 
+  # Only used by a tracing build (make TRACE=1); convert with tools/trace2chrome.py
+  export TRACE_FILE="${result_dir}/run.trace"
+  # Binary run record (common/runrec.h); read with tools/runrec.py
+  export RUNREC_FILE="${result_dir}/run.rec"
+  rm -f "${RUNREC_FILE}"
+  # Peak RSS / page faults / context switches (wait4 + /proc); tools/rusage_run.py
+  local measure=()
+  rm -f "${result_dir}/rusage.txt"
+  [[ "${RUSAGE}" == "1" ]] && measure=(python3 ../tools/rusage_run.py -o "${result_dir}/rusage.txt" --)
+
   echo "[INFO] Running lock='${lock_name}', threads=${threads}, bin='${bin}'"
-  ./"${bin}" -s "${SIZE}" -n "${COORDS}" -c "${CLUSTERS}" -l "${LOOPS}" \
+  "${measure[@]}" ./"${bin}" -s "${SIZE}" -n "${COORDS}" -c "${CLUSTERS}" -l "${LOOPS}" -i "${INIT}" -p "${PRECISION}" -k "${SEEDING}" "${EXTRA_ARGS[@]}" \
     | tee "${result_dir}/output.txt"
 }
 
@@ -0,0 +1,107 @@
+#ifndef NUMA_INIT_H
+#define NUMA_INIT_H
+
+/*
+ * Page placement of the big benchmark buffers (kmeans objects/membership,
+ * the life grids). Selected with -i on the command line:
+ *
+ *   serial       (default) initialised by the master thread, so Linux's
+ *                first-touch policy puts every page on the master's node
+ *   first-touch  initialised in parallel with schedule(static), the same
+ *                split as the compute loops, so each block of pages lands
+ *                on the node of the thread that later works on it (only
+ *                meaningful with pinned threads)
+ *   interleave   pages bound round-robin over all memory nodes with
+ *                mbind(MPOL_INTERLEAVE) before anything touches them
+ *
+ * Buffers come from numa_alloc(): page aligned, so the allocator's own
+ * bookkeeping never touches (and places) the first page of a buffer.
+ * No libnuma: mbind is called through syscall(2); where it is not
+ * available interleave falls back to the default policy with a warning.
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <errno.h>
+#include <unistd.h>
+#include <sys/syscall.h>
+
+#ifndef MPOL_INTERLEAVE
+#define MPOL_INTERLEAVE 3
+#endif
+
+enum { INIT_SERIAL = 0, INIT_FIRST_TOUCH = 1, INIT_INTERLEAVE = 2 };
+
+static const char *const numa_init_names[] = { "serial", "first-touch", "interleave" };
+
+/* INIT_* for a -i argument, -1 if unknown */
+static inline int numa_init_parse(const char *s)
+{
+    int m;
+
+    for (m = INIT_SERIAL; m <= INIT_INTERLEAVE; m++)
+        if (strcmp(s, numa_init_names[m]) == 0)
+            return m;
+    return -1;
+}
+
+static inline const char *numa_init_name(int mode)
+{
+    return (mode >= INIT_SERIAL && mode <= INIT_INTERLEAVE) ? numa_init_names[mode] : "?";
+}
+
+/* Bind [p, p + size) round-robin over the online memory nodes. */
+static inline int numa_interleave(void *p, size_t size)
+{
+#ifdef SYS_mbind
+    unsigned long mask[1024 / (8 * sizeof(unsigned long))];
+    FILE *f = fopen("/sys/devices/system/node/online", "r");
+    unsigned lo, hi, n;
+    char sep;
+
+    memset(mask, 0, sizeof(mask));
+    if (f == NULL) {
+        mask[0] = 1;   /* no NUMA sysfs: a single node 0 */
+    } else {
+        /* "0", "0-3", "0-1,4-5" ... */
+        while (fscanf(f, "%u", &lo) == 1) {
+            hi = lo;
+            if (fscanf(f, "%c", &sep) == 1 && sep == '-') {
+                if (fscanf(f, "%u", &hi) != 1)
+                    break;
+                if (fscanf(f, "%c", &sep) != 1)
+                    sep = '\n';
+            }
+            for (n = lo; n <= hi && n < 1024; n++)
+                mask[n / (8 * sizeof(unsigned long))] |= 1UL << (n % (8 * sizeof(unsigned long)));
+            if (sep != ',')
+                break;
+        }
+        fclose(f);
+    }
+    /* maxnode is one past the last bit, as libnuma passes it */
+    if (syscall(SYS_mbind, p, size, MPOL_INTERLEAVE, mask, 8 * sizeof(mask) + 1, 0) == 0)
+        return 0;
+    fprintf(stderr, "numa_interleave: mbind: %s (using the default policy)\n", strerror(errno));
+#else
+    (void) p; (void) size;
+    fprintf(stderr, "numa_interleave: mbind not available (using the default policy)\n");
+#endif
+    return -1;
+}
+
+/* Page-aligned, untouched buffer; interleaved up front for INIT_INTERLEAVE. free() it. */
+static inline void *numa_alloc(size_t size, int mode)
+{
+    long page = sysconf(_SC_PAGESIZE);
+    void *p;
+
+    if (posix_memalign(&p, page > 0 ? (size_t) page : 4096, size ? size : 1) != 0)
+        return NULL;
+    if (mode == INIT_INTERLEAVE && size > 0)
+        numa_interleave(p, size);   /* the kernel rounds the length up to whole pages */
+    return p;
+}
+
+#endif /* NUMA_INIT_H */
@@ -0,0 +1,25 @@
+#ifndef OMP_SCHED_H
+#define OMP_SCHED_H
+
+/*
+ * Loop-schedule selection for the OpenMP kernels.
+ *
+ * The work-sharing loops use schedule(runtime), so the schedule and chunk
+ * size come from OMP_SCHEDULE (e.g. OMP_SCHEDULE="dynamic,64"), which is
+ * what tools/autotune.py sweeps without rebuilding. sched_init() keeps the
+ * original behaviour when OMP_SCHEDULE is not set: plain schedule(static),
+ * i.e. one contiguous block per thread, instead of the runtime's own default.
+ *
+ * Call it once, before the first parallel region.
+ */
+
+#include <stdlib.h>
+#include <omp.h>
+
+static inline void sched_init(void)
+{
+    if (getenv("OMP_SCHEDULE") == NULL)
+        omp_set_schedule(omp_sched_static, 0);
+}
+
+#endif /* OMP_SCHED_H */
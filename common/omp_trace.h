@@ -0,0 +1,211 @@
+#ifndef OMP_TRACE_H
+#define OMP_TRACE_H
+
+/*
+ * Lightweight per-thread timeline tracing for the OpenMP kernels.
+ *
+ * Compile with -DTRACE to enable it (e.g. `make TRACE=1`); without it every
+ * macro below expands to nothing and the kernels are unchanged.
+ *
+ * Each thread owns a ring buffer of trace_event_t preallocated by
+ * trace_init(), so recording an event in the hot loop is two timestamp reads
+ * and one store, never an allocation. When the buffer wraps, the oldest
+ * events are overwritten. trace_dump() writes everything to a binary file
+ * that tools/trace2chrome.py turns into Chrome trace-event JSON plus load
+ * imbalance / barrier-wait summaries.
+ *
+ * Runtime knobs (environment):
+ *   TRACE_FILE    output path            (default: <name>.trace; set but
+ *                 empty: no tracing, e.g. for a reference run that must not
+ *                 overwrite the measured run's trace)
+ *   TRACE_EVENTS  events per thread ring (default: 65536)
+ *
+ * The tracer state is static, so trace_init/trace_dump and all TRACE_*
+ * macros must live in the same translation unit.
+ */
+
+/* event kinds; keep in sync with KIND_NAMES in tools/trace2chrome.py */
+#define TRACE_REGION  0   /* a thread's whole share of one parallel region */
+#define TRACE_CHUNK   1   /* work-sharing loop body / base-case kernel      */
+#define TRACE_BARRIER 2   /* time spent waiting in a barrier / taskwait     */
+#define TRACE_MERGE   3   /* one thread's serial merge (omp single) while
+                             the rest of the team waits; kept out of CHUNK
+                             so it does not count as load imbalance       */
+#define TRACE_NKINDS  4
+
+#ifdef TRACE
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <omp.h>
+
+#define TRACE_MAGIC   "OMPTRACE"
+#define TRACE_VERSION 1
+
+typedef struct {
+    double  t_begin;     /* seconds since trace_init() */
+    double  t_end;
+    int32_t kind;        /* TRACE_REGION / TRACE_CHUNK / TRACE_BARRIER / TRACE_MERGE */
+    int32_t id;          /* region instance, e.g. time step or kmeans loop */
+} trace_event_t;
+
+/* begin timestamps nest (a thread in a taskwait may run tasks that trace) */
+#define TRACE_MAXDEPTH 32
+
+typedef struct {
+    trace_event_t *events;                             /* [trace_capacity] ring */
+    uint64_t       count;                              /* events ever recorded */
+    int            depth[TRACE_NKINDS];                /* open begins per kind */
+    double         open[TRACE_NKINDS][TRACE_MAXDEPTH]; /* pending begin timestamps */
+} __attribute__((aligned(64))) trace_thread_t;
+
+static trace_thread_t *trace_threads;
+static int             trace_nthreads;
+static uint64_t        trace_capacity;
+static double          trace_t0;
+static char            trace_name[32];
+static int             trace_enabled;
+
+/* TRACE_FILE="" turns the tracer off for this kmeans()/sweep call */
+static int trace_wanted(void)
+{
+    char *env = getenv("TRACE_FILE");
+
+    return !env || env[0] != '\0';
+}
+
+static void trace_init(const char *name)
+{
+    int k;
+    char *env = getenv("TRACE_EVENTS");
+
+    trace_enabled = trace_wanted();
+    if (!trace_enabled)
+        return;
+    trace_nthreads = omp_get_max_threads();
+    trace_capacity = (env && atol(env) > 0) ? (uint64_t) atol(env) : 65536;
+    strncpy(trace_name, name, sizeof(trace_name) - 1);
+
+    if (posix_memalign((void **) &trace_threads, 64, trace_nthreads * sizeof(*trace_threads))) {
+        fprintf(stderr, "trace: out of memory\n");
+        exit(1);
+    }
+    for (k = 0; k < trace_nthreads; k++) {
+        trace_threads[k].events = (trace_event_t *) calloc(trace_capacity, sizeof(trace_event_t));
+        trace_threads[k].count = 0;
+        memset(trace_threads[k].depth, 0, sizeof(trace_threads[k].depth));
+        if (!trace_threads[k].events) {
+            fprintf(stderr, "trace: out of memory\n");
+            exit(1);
+        }
+    }
+    trace_t0 = omp_get_wtime();
+}
+
+static inline void trace_begin(int kind)
+{
+    trace_thread_t *th;
+    int d;
+
+    if (!trace_enabled)
+        return;
+    th = &trace_threads[omp_get_thread_num()];
+    d = th->depth[kind]++;
+
+    if (d < TRACE_MAXDEPTH)
+        th->open[kind][d] = omp_get_wtime() - trace_t0;
+}
+
+static inline void trace_end(int kind, int id)
+{
+    trace_thread_t *th;
+    trace_event_t *ev;
+    int d;
+
+    if (!trace_enabled)
+        return;
+    th = &trace_threads[omp_get_thread_num()];
+    d = --th->depth[kind];
+
+    if (d >= TRACE_MAXDEPTH)   /* nested too deep to time: drop it */
+        return;
+    ev = &th->events[th->count % trace_capacity];
+    ev->t_begin = th->open[kind][d];
+    ev->t_end   = omp_get_wtime() - trace_t0;
+    ev->kind    = kind;
+    ev->id      = id;
+    th->count++;
+}
+
+/*
+ * File layout (native endianness):
+ *   char[8] magic, uint32 version, uint32 nthreads, uint64 capacity, char[32] name
+ *   per thread: uint64 count, uint64 stored, trace_event_t[stored] (oldest first)
+ */
+static void trace_dump(void)
+{
+    int k;
+    uint32_t version = TRACE_VERSION, nthreads = trace_nthreads;
+    char path[256];
+    char *env = getenv("TRACE_FILE");
+    FILE *f;
+
+    if (!trace_enabled)
+        return;
+    trace_enabled = 0;
+    if (env)
+        snprintf(path, sizeof(path), "%s", env);
+    else
+        snprintf(path, sizeof(path), "%s.trace", trace_name);
+
+    f = fopen(path, "wb");
+    if (!f) {
+        perror("trace: fopen");
+        return;
+    }
+    fwrite(TRACE_MAGIC, 1, 8, f);
+    fwrite(&version, sizeof(version), 1, f);
+    fwrite(&nthreads, sizeof(nthreads), 1, f);
+    fwrite(&trace_capacity, sizeof(trace_capacity), 1, f);
+    fwrite(trace_name, 1, sizeof(trace_name), f);
+
+    for (k = 0; k < trace_nthreads; k++) {
+        trace_thread_t *th = &trace_threads[k];
+        uint64_t stored = th->count < trace_capacity ? th->count : trace_capacity;
+        uint64_t first = th->count - stored;   /* oldest surviving event */
+        uint64_t head = first % trace_capacity;
+
+        fwrite(&th->count, sizeof(th->count), 1, f);
+        fwrite(&stored, sizeof(stored), 1, f);
+        /* unwrap the ring: [head, capacity) then [0, head) */
+        if (stored == trace_capacity) {
+            fwrite(&th->events[head], sizeof(trace_event_t), trace_capacity - head, f);
+            fwrite(th->events, sizeof(trace_event_t), head, f);
+        } else {
+            fwrite(th->events, sizeof(trace_event_t), stored, f);
+        }
+        free(th->events);
+    }
+    fclose(f);
+    free(trace_threads);
+    /* stdout on purpose: the queue scripts treat a non-empty .err as a failed run */
+    printf("trace: wrote %s\n", path);
+}
+
+#define TRACE_INIT(name)       trace_init(name)
+#define TRACE_BEGIN(kind)      trace_begin(kind)
+#define TRACE_END(kind, id)    trace_end((kind), (id))
+#define TRACE_DUMP()           trace_dump()
+
+#else /* !TRACE */
+
+#define TRACE_INIT(name)       ((void) 0)
+#define TRACE_BEGIN(kind)      ((void) 0)
+#define TRACE_END(kind, id)    ((void) 0)
+#define TRACE_DUMP()           ((void) 0)
+
+#endif /* TRACE */
+
+#endif /* OMP_TRACE_H */
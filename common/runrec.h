@@ -0,0 +1,185 @@
+#ifndef RUNREC_H
+#define RUNREC_H
+
+/*
+ * Compact binary run records, written by the benchmark drivers so the
+ * analysis side can load results without scraping the human-oriented
+ * output (tools/runrec.py reads them with struct / numpy.frombuffer).
+ *
+ * A record is only written when RUNREC_FILE is set (the run_on_queue.sh
+ * scripts point it into the result directory); records are appended, so
+ * one file may hold many runs. Nothing else about the programs changes.
+ *
+ * Layout (native byte order, every field fixed size, no padding):
+ *
+ *   runrec_header_t                          64 bytes
+ *   runrec_param_t   [nparams]               24 bytes each   name -> double
+ *   runrec_env_t     [nenv]                 128 bytes each   name -> string
+ *   runrec_iter_t    [niters]                16 bytes each   time, value
+ *
+ * header.size is the size of the whole record, so readers can skip
+ * records (or versions) they do not understand. Per-iteration `value` is
+ * kernel specific (kmeans: delta), 0 when unused.
+ *
+ * Usage (the runrec_t lives wherever the driver keeps its globals; all
+ * functions take it by pointer, so several translation units may share it):
+ *
+ *   runrec_init(&rec, "life_par");
+ *   runrec_param(&rec, "N", N);
+ *   runrec_reserve(&rec, T);                   // no allocation in the loop
+ *   ... runrec_iter(&rec, step_time, 0.0); ...
+ *   rec.threads = nthreads; rec.total_time = time;
+ *   runrec_write(&rec);
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <stdint.h>
+#include <time.h>
+#include <unistd.h>
+
+#define RUNREC_MAGIC     "RUNR"
+#define RUNREC_VERSION   1
+#define RUNREC_MAXPARAMS 32
+
+/* environment captured with every record (when set) */
+#define RUNREC_ENV_KEYS { "OMP_NUM_THREADS", "OMP_SCHEDULE", "OMP_PLACES", \
+                          "OMP_PROC_BIND", "GOMP_CPU_AFFINITY", "AFF_LABEL", \
+                          "PBS_JOBID", "BUILD_COMMIT", NULL }
+
+typedef struct {
+    char     magic[4];      /* "RUNR" */
+    uint16_t version;
+    uint16_t header_size;   /* sizeof(runrec_header_t) */
+    uint32_t size;          /* whole record, header included */
+    int32_t  threads;
+    char     kernel[24];
+    double   total_time;    /* seconds, as printed by the program */
+    double   wall_start;    /* epoch seconds when the record was started */
+    uint16_t nparams;
+    uint16_t nenv;
+    uint32_t niters;
+} runrec_header_t;
+
+/* the readers rely on this exact size */
+typedef char runrec_header_size_check[sizeof(runrec_header_t) == 64 ? 1 : -1];
+
+typedef struct { char name[16]; double value; } runrec_param_t;
+typedef struct { char name[32]; char value[96]; } runrec_env_t;
+typedef struct { double time; double value; } runrec_iter_t;
+
+typedef struct {
+    char           kernel[24];
+    int            threads;
+    double         total_time;
+    double         wall_start;
+    int            nparams;
+    runrec_param_t params[RUNREC_MAXPARAMS];
+    uint32_t       niters;
+    uint32_t       capacity;
+    runrec_iter_t *iters;
+} runrec_t;
+
+static inline void runrec_init(runrec_t *r, const char *kernel)
+{
+    memset(r, 0, sizeof(*r));
+    strncpy(r->kernel, kernel, sizeof(r->kernel) - 1);
+    r->threads = 1;
+    r->wall_start = (double) time(NULL);
+}
+
+static inline void runrec_param(runrec_t *r, const char *name, double value)
+{
+    if (r->nparams == RUNREC_MAXPARAMS)
+        return;
+    strncpy(r->params[r->nparams].name, name, sizeof(r->params[0].name) - 1);
+    r->params[r->nparams].value = value;
+    r->nparams++;
+}
+
+static inline void runrec_reserve(runrec_t *r, uint32_t n)
+{
+    runrec_iter_t *p;
+
+    if (n <= r->capacity)
+        return;
+    p = (runrec_iter_t *) realloc(r->iters, n * sizeof(*p));
+    if (p == NULL)
+        return;   /* keep what we have; runrec_iter drops the excess */
+    r->iters = p;
+    r->capacity = n;
+}
+
+static inline void runrec_iter(runrec_t *r, double time, double value)
+{
+    if (r->niters == r->capacity)
+        runrec_reserve(r, r->capacity ? 2 * r->capacity : 64);
+    if (r->niters == r->capacity)
+        return;
+    r->iters[r->niters].time = time;
+    r->iters[r->niters].value = value;
+    r->niters++;
+}
+
+/* Append the record to $RUNREC_FILE; 0 on success or when disabled. */
+static inline int runrec_write(runrec_t *r)
+{
+    static const char *keys[] = RUNREC_ENV_KEYS;
+    runrec_env_t env[sizeof(keys) / sizeof(keys[0])];
+    runrec_header_t h;
+    const char *path = getenv("RUNREC_FILE");
+    FILE *f;
+    int i, nenv = 0;
+
+    if (path == NULL || *path == '\0')
+        return 0;
+
+    memset(env, 0, sizeof(env));
+    for (i = 0; keys[i] != NULL; i++) {
+        const char *v = getenv(keys[i]);
+        if (v == NULL)
+            continue;
+        strncpy(env[nenv].name, keys[i], sizeof(env[0].name) - 1);
+        strncpy(env[nenv].value, v, sizeof(env[0].value) - 1);
+        nenv++;
+    }
+    strcpy(env[nenv].name, "HOSTNAME");
+    gethostname(env[nenv].value, sizeof(env[0].value) - 1);
+    nenv++;
+
+    memset(&h, 0, sizeof(h));
+    memcpy(h.magic, RUNREC_MAGIC, 4);
+    h.version = RUNREC_VERSION;
+    h.header_size = sizeof(h);
+    h.size = sizeof(h) + r->nparams * sizeof(runrec_param_t)
+           + nenv * sizeof(runrec_env_t) + r->niters * sizeof(runrec_iter_t);
+    h.threads = r->threads;
+    memcpy(h.kernel, r->kernel, sizeof(h.kernel));
+    h.total_time = r->total_time;
+    h.wall_start = r->wall_start;
+    h.nparams = r->nparams;
+    h.nenv = nenv;
+    h.niters = r->niters;
+
+    if ((f = fopen(path, "ab")) == NULL) {
+        perror(path);
+        return -1;
+    }
+    fwrite(&h, sizeof(h), 1, f);
+    fwrite(r->params, sizeof(runrec_param_t), r->nparams, f);
+    fwrite(env, sizeof(runrec_env_t), nenv, f);
+    if (r->niters)
+        fwrite(r->iters, sizeof(runrec_iter_t), r->niters, f);
+    fclose(f);
+    return 0;
+}
+
+static inline void runrec_free(runrec_t *r)
+{
+    free(r->iters);
+    r->iters = NULL;
+    r->niters = r->capacity = 0;
+}
+
+#endif /* RUNREC_H */
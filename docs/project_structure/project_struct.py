@@ -9,11 +9,16 @@ Usage:
     ./project_struct.py [--root /path/to/project]
                         [--outdir /dir/for/output]
                         [--top-level-gitignore-only]
+                        [--workers N]
+                        [--max-depth D] [--max-entries N]
 """
 
 import argparse
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 import pathspec  # pip install pathspec
 
@@ -74,79 +79,224 @@ def _read_gitignore_file(gi_path: Path, rel_prefix: str) -> List[str]:
     return pats
 
 
-def load_gitignore_patterns(root: Path, top_level_only: bool) -> pathspec.PathSpec:
-    """Build a gitwildmatch PathSpec from .gitignore files."""
-    all_patterns: List[str] = []
-    top = root / ".gitignore"
-    if top.exists():
-        all_patterns.extend(_read_gitignore_file(top, rel_prefix=""))
-    if not top_level_only:
-        for gi in root.rglob(".gitignore"):
-            if gi == top:
+class _IgnoreRules:
+    """
+    Per-directory .gitignore matchers.
+
+    Each .gitignore is compiled once into its own PathSpec, attached to its
+    directory. Its patterns keep the folder prefix added by
+    _read_gitignore_file, so they are anchored there and can only ever match
+    inside it: the rules in effect for a path are just the matchers of its
+    ancestor directories. A directory's chain (tuple of matchers, root first)
+    is built once from its parent's and shared by all of its entries, so
+    checking an entry costs one pass over the few matchers on its own path
+    instead of over every pattern in the repo.
+
+    As with one flattened PathSpec, the last matching pattern wins, and the
+    chain is evaluated leaf first so the first matcher with a match decides.
+    """
+
+    def __init__(self, top_level_only: bool):
+        self.top_level_only = top_level_only
+        self._matchers: Dict[str, Optional[pathspec.PathSpec]] = {}
+        self._lock = threading.Lock()
+
+    def _matcher(self, gi: str, rel: str) -> Optional[pathspec.PathSpec]:
+        """Compiled matcher of one .gitignore (memoized per directory)."""
+        with self._lock:
+            if rel in self._matchers:
+                return self._matchers[rel]
+        lines = _read_gitignore_file(Path(gi), rel_prefix=rel)
+        spec = pathspec.PathSpec.from_lines("gitwildmatch", lines) if lines else None
+        with self._lock:
+            self._matchers[rel] = spec
+        return spec
+
+    def chain(self, path: str, rel: str, parent: Tuple[pathspec.PathSpec, ...],
+              linked: bool) -> Tuple[pathspec.PathSpec, ...]:
+        """Matchers in effect inside directory `rel`: the parent's chain plus its own."""
+        if linked or (self.top_level_only and rel):
+            return parent
+        gi = os.path.join(path, ".gitignore")
+        if not os.path.isfile(gi):
+            return parent
+        spec = self._matcher(gi, rel)
+        return parent + (spec,) if spec is not None else parent
+
+    @staticmethod
+    def ignored(rel: str, chain: Tuple[pathspec.PathSpec, ...]) -> bool:
+        for spec in reversed(chain):
+            for pat in reversed(spec.patterns):
+                if pat.include is not None and pat.match_file(rel) is not None:
+                    return bool(pat.include)
+        return False
+
+
+class _Listing(NamedTuple):
+    chain: Tuple[pathspec.PathSpec, ...]   # matchers in effect inside the directory
+    children: List[Tuple[str, bool, bool, str, str]]  # (name, is_dir, is_link, path, rel)
+
+
+class _Frame:
+    """One open directory on the render stack, with a bounded prefetch window."""
+
+    def __init__(self, walker: "TreeStreamer", listing: _Listing, prefix: str,
+                 depth: int, linked: bool):
+        self.walker = walker
+        self.prefix = prefix
+        self.depth = depth
+        self.linked = linked
+        self.chain = listing.chain
+        cap = walker.max_entries
+        kids = listing.children
+        self.items = kids if cap is None or len(kids) <= cap else kids[:cap]
+        self.elided = kids[len(self.items):]
+        self.i = 0
+        self.pending: Dict[int, Future] = {}
+        self.next_fetch = 0
+
+    def prefetch(self) -> None:
+        """Keep listings of the next few child directories in flight on the pool."""
+        w = self.walker
+        if w.pool is None or (w.max_depth is not None and self.depth + 1 >= w.max_depth):
+            return
+        while self.next_fetch < len(self.items) and len(self.pending) < w.window:
+            name, is_dir, is_link, path, rel = self.items[self.next_fetch]
+            if is_dir:
+                self.pending[self.next_fetch] = w.pool.submit(
+                    w.list_dir, path, rel, self.chain, self.linked or is_link)
+            self.next_fetch += 1
+
+    def listing(self, idx: int) -> _Listing:
+        fut = self.pending.pop(idx, None)
+        if fut is not None:
+            return fut.result()
+        name, _, is_link, path, rel = self.items[idx]
+        return self.walker.list_dir(path, rel, self.chain, self.linked or is_link)
+
+
+class TreeStreamer:
+    """
+    Walk, count and render the tree in one pass, yielding ASCII lines in
+    order so the caller can write them out as they come.
+
+    The walk is iterative (an explicit stack of _Frame), so deep trees are
+    not bounded by the recursion limit, and only the open directories'
+    listings are in memory, however many entries the tree holds. Listings
+    of upcoming sibling directories are fetched ahead on a thread pool
+    (scandir/stat release the GIL), at most `window` per open directory.
+
+    Nested .gitignore files are picked up as each directory is listed (see
+    _IgnoreRules); like the rglob(".gitignore") pass this replaced, they are
+    not read through symlinked directories.
+
+    Caps (both off by default, which renders the full tree):
+      max_depth    directories at this depth are shown with a one-line
+                   summary of their direct entries instead of their contents
+                   (the root is depth 0, so 0 summarises the root itself,
+                   1 its top-level directories)
+      max_entries  at most this many entries per directory, then a summary
+                   line such as "… 4,812 more directories"
+    Elided entries are counted in the totals; what lies below them is not
+    walked and therefore not counted.
+    """
+
+    def __init__(self, root_dir: Path, top_level_only: bool = False,
+                 workers: Optional[int] = None, max_depth: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        self.root = str(root_dir)
+        self.rules = _IgnoreRules(top_level_only)
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.window = 2 * self.workers
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.dirs = 0
+        self.files = 0
+
+    def list_dir(self, path: str, rel: str, parent: Tuple[pathspec.PathSpec, ...],
+                 linked: bool) -> _Listing:
+        """Sorted, filtered entries of one directory (safe to run on the pool)."""
+        chain = self.rules.chain(path, rel, parent, linked)
+        try:
+            with os.scandir(path) as it:
+                entries = [(e.name, e.is_dir(), e.is_symlink(), e.path) for e in it]
+        except OSError:
+            entries = []
+        entries.sort(key=lambda e: (not e[1], e[0].lower()))
+        kept = []
+        for name, is_dir, is_link, child_path in entries:
+            if name in DEFAULT_FOLDER_IGNORES:
                 continue
-            rel_dir = gi.parent.relative_to(root).as_posix()
-            all_patterns.extend(_read_gitignore_file(gi, rel_prefix=rel_dir))
-    return pathspec.PathSpec.from_lines("gitwildmatch", all_patterns)
-
-
-def build_tree(root_dir: Path, ignore_spec: pathspec.PathSpec) -> Dict[str, Any]:
-    """Return nested dict similar to `tree -J`, filtered by ignore rules."""
-    def node_for(p: Path) -> Optional[Dict[str, Any]]:
-        rel = p.relative_to(root_dir).as_posix()
-        if p.name in DEFAULT_FOLDER_IGNORES:
-            return None
-        if rel and ignore_spec.match_file(rel):
-            return None
-
-        entry: Dict[str, Any] = {"name": p.name}
-        if p.is_dir():
-            entry["type"] = "directory"
-            children: List[Dict[str, Any]] = []
-            for c in sorted(p.iterdir(), key=lambda q: (not q.is_dir(), q.name.lower())):
-                child = node_for(c)
-                if child is not None:
-                    children.append(child)
-            entry["contents"] = children
-        else:
-            entry["type"] = "file"
-        return entry
-
-    return node_for(root_dir) or {"name": root_dir.name, "type": "directory", "contents": []}
-
-
-def count_files_dirs(node: Dict[str, Any]) -> Tuple[int, int]:
-    files = 0
-    dirs = 0
-    def rec(n: Dict[str, Any]):
-        nonlocal files, dirs
-        if n.get("type") == "directory":
-            dirs += 1
-            for ch in n.get("contents", []):
-                rec(ch)
-        elif n.get("type") == "file":
-            files += 1
-    rec(node)
-    return files, dirs
-
-
-def render_ascii(node: Dict[str, Any], prefix: str = "") -> List[str]:
-    lines: List[str] = []
-    if node["type"] == "directory":
-        lines.append(f"{prefix}{node['name']}/")
-        kids = node.get("contents", [])
-        for i, ch in enumerate(kids):
-            last = (i == len(kids) - 1)
-            branch = "└── " if last else "├── "
-            ext = "    " if last else "│   "
-            if ch["type"] == "directory":
-                lines.append(f"{prefix}{branch}{ch['name']}/")
-                # Skip the header of the recursive call (first line)
-                lines.extend(render_ascii(ch, prefix + ext)[1:])
-            else:
-                lines.append(f"{prefix}{branch}{ch['name']}")
-    else:
-        lines.append(f"{prefix}{node['name']}")
-    return lines
+            child_rel = f"{rel}/{name}" if rel else name
+            if self.rules.ignored(child_rel, chain):
+                continue
+            kept.append((name, is_dir, is_link, child_path, child_rel))
+        return _Listing(chain, kept)
+
+    def _elide(self, entries, more: bool) -> str:
+        """Count `entries` into the totals and describe them in one line."""
+        n_dirs = sum(1 for e in entries if e[1])
+        n_files = len(entries) - n_dirs
+        self.dirs += n_dirs
+        self.files += n_files
+        word = "more " if more else ""
+        parts = []
+        if n_dirs:
+            parts.append(f"{n_dirs:,} {word}director{'y' if n_dirs == 1 else 'ies'}")
+            word = ""
+        if n_files:
+            parts.append(f"{n_files:,} {word}file{'' if n_files == 1 else 's'}")
+        return "… " + " and ".join(parts)
+
+    def lines(self) -> Iterator[str]:
+        name = os.path.basename(self.root)
+        self.dirs, self.files = 1, 0
+        yield f"{name}/"
+        if name in DEFAULT_FOLDER_IGNORES:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self.pool = pool
+            listing = self.list_dir(self.root, "", (), False)
+            if self.max_depth == 0:
+                if listing.children:
+                    yield f"└── {self._elide(listing.children, more=False)}"
+                self.pool = None
+                return
+            root = _Frame(self, listing, "", 0, False)
+            root.prefetch()
+            stack = [root]
+            while stack:
+                f = stack[-1]
+                if f.i == len(f.items):
+                    if f.elided:
+                        yield f"{f.prefix}└── {self._elide(f.elided, more=True)}"
+                    stack.pop()
+                    continue
+                idx = f.i
+                f.i += 1
+                c_name, c_is_dir, c_link, _, _ = f.items[idx]
+                last = f.i == len(f.items) and not f.elided
+                branch = "└── " if last else "├── "
+                if not c_is_dir:
+                    self.files += 1
+                    yield f"{f.prefix}{branch}{c_name}"
+                    continue
+
+                self.dirs += 1
+                yield f"{f.prefix}{branch}{c_name}/"
+                listing = f.listing(idx)
+                f.prefetch()
+                ext = f.prefix + ("    " if last else "│   ")
+                if self.max_depth is not None and f.depth + 1 >= self.max_depth:
+                    if listing.children:
+                        yield f"{ext}└── {self._elide(listing.children, more=False)}"
+                    continue
+                child = _Frame(self, listing, ext, f.depth + 1, f.linked or c_link)
+                child.prefetch()
+                stack.append(child)
+            self.pool = None
 
 
 def parse_args() -> argparse.Namespace:
@@ -159,7 +309,19 @@ def parse_args() -> argparse.Namespace:
                     help="Output directory. Defaults to the script's folder.")
     ap.add_argument("--top-level-gitignore-only", action="store_true",
                     help="Honor only the top-level .gitignore.")
-    return ap.parse_args()
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Threads for listing directories ahead (default: CPUs + 4, max 32).")
+    ap.add_argument("--max-depth", type=int, default=None,
+                    help="Summarise directories at this depth instead of expanding them "
+                         "(0: only the root's summary, 1: its top-level directories).")
+    ap.add_argument("--max-entries", type=int, default=None,
+                    help="Show at most this many entries per directory, then a summary line.")
+    args = ap.parse_args()
+    if args.max_depth is not None and args.max_depth < 0:
+        ap.error("--max-depth must be >= 0")
+    if args.max_entries is not None and args.max_entries < 0:
+        ap.error("--max-entries must be >= 0")
+    return args
 
 
 def main() -> None:
@@ -168,17 +330,19 @@ def main() -> None:
     script_dir = Path(__file__).resolve().parent
     project_root = args.root.resolve() if args.root else find_project_root(script_dir)
 
-    ignore_spec = load_gitignore_patterns(project_root, top_level_only=args.top_level_gitignore_only)
-
-    tree = build_tree(project_root, ignore_spec)
-    files, dirs = count_files_dirs(tree)
-
-    lines = render_ascii(tree)
-    lines += ["", f"Total directories: {dirs}, Total files: {files}"]
+    streamer = TreeStreamer(project_root, top_level_only=args.top_level_gitignore_only,
+                            workers=args.workers, max_depth=args.max_depth,
+                            max_entries=args.max_entries)
 
     out_dir = args.outdir.resolve() if args.outdir else script_dir
     out_dir.mkdir(parents=True, exist_ok=True)
-    (out_dir / "project_struct.txt").write_text("\n".join(lines), encoding="utf-8")
+    # Lines go out as they are produced; joined with "\n", no trailing newline.
+    with (out_dir / "project_struct.txt").open("w", encoding="utf-8") as f:
+        sep = ""
+        for line in streamer.lines():
+            f.write(sep + line)
+            sep = "\n"
+        f.write(f"\n\nTotal directories: {streamer.dirs}, Total files: {streamer.files}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+OpenMP schedule / chunk-size autotuner for the parallel loops.
+
+Usage:
+    python autotune.py life   [--n 1024] [--steps 1000] [--threads 1 2 4 8]
+    python autotune.py kmeans [--bin a2/kmeans/omp_reduction_kmeans]
+                              [--size 256 --coords 16 --clusters 32 --loops 10]
+                              [--threads 1 2 4 8 16 32 64]
+    common options: [--schedules static dynamic guided]
+                    [--chunks 0 1 4 16 64 256 1024] [--eta 3] [--repeats 3]
+                    [--outdir DIR]
+
+The kernels' work-sharing loops use schedule(runtime) (common/omp_sched.h),
+so every candidate is just a run with a different OMP_SCHEDULE ("dynamic,64";
+chunk 0 means the runtime's default chunk). No rebuild is needed.
+
+Search: successive halving over the schedule x chunk grid, per thread count.
+Rung r runs every surviving candidate with budget steps/loops / eta^(R-r)
+(at least MIN_RUNG_BUDGET, so no rung ranks candidates on the cold first
+iteration alone) and keeps the best 1/eta by time per iteration; the last
+rung uses the full problem, --repeats times, and its median decides. The
+grid is therefore only ever run in full on the cheapest budget.
+
+Outputs (in --outdir, default tools/analysis/):
+    autotune_best.json           best (schedule, chunk) per "kernel|problem|T<t>",
+                                 merged with what is already there
+    results_autotune_<kernel>.txt
+        kmeans: the results_*.txt table (KIND RUN_TAG BIN T AFF ... TOTAL
+                PER_LOOP) with a trailing SCHEDULE column, KIND = autotune
+        life:   the a1 results_full.txt layout (N, Threads, Time, Speedup)
+                with a trailing Schedule column
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+BEST_FILE = "autotune_best.json"
+MIN_RUNG_BUDGET = 3   # iterations per run on the early rungs
+
+Candidate = Tuple[str, int]   # (schedule kind, chunk; 0 = runtime default)
+
+
+def omp_schedule(cand: Candidate) -> str:
+    kind, chunk = cand
+    return f"{kind},{chunk}" if chunk > 0 else kind
+
+
+# --------------------------------------------------------------------------
+# one measurement
+# --------------------------------------------------------------------------
+
+def _env(threads: int, cand: Candidate) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["OMP_NUM_THREADS"] = str(threads)
+    env["OMP_SCHEDULE"] = omp_schedule(cand)
+    return env
+
+
+def measure(args: argparse.Namespace, threads: int, cand: Candidate,
+            budget: int) -> Optional[Dict[str, float]]:
+    """Run the kernel once with `budget` iterations; None if it gave no result."""
+    if args.kernel == "life":
+        cmd = [str(args.bin), str(args.n), str(budget)]
+    else:
+        # -t 0: no delta threshold, but a loop in which no object moves still
+        # ends the run, so NLOOPS may be below `budget` (PER_LOOP uses NLOOPS)
+        cmd = [str(args.bin), "-s", str(args.size), "-n", str(args.coords),
+               "-c", str(args.clusters), "-l", str(budget), "-t", "0"]
+    proc = subprocess.run(cmd, cwd=args.bin.parent, env=_env(threads, cand),
+                          capture_output=True, text=True)
+    # parse through the shared readers (they take a path)
+    with tempfile.NamedTemporaryFile("w", suffix=".out", delete=False) as f:
+        f.write(proc.stdout)
+    out = Path(f.name)
+    try:
+        if args.kernel == "life":
+            parsed = br.parse_life_out(out)
+            if parsed is None:
+                return None
+            return {"TOTAL": parsed["TIME"], "NLOOPS": budget,
+                    "PER_LOOP": parsed["TIME"] / budget}
+        parsed = br.parse_kmeans_output(out)
+        if parsed is None:
+            return None
+        return {"TOTAL": parsed["TOTAL"], "NLOOPS": parsed["NLOOPS"],
+                "PER_LOOP": parsed["TOTAL"] / max(parsed["NLOOPS"], 1), "TTS": parsed["TTS"]}
+    finally:
+        out.unlink()
+
+
+# --------------------------------------------------------------------------
+# successive halving
+# --------------------------------------------------------------------------
+
+def successive_halving(args: argparse.Namespace, threads: int,
+                       candidates: List[Candidate]) -> Tuple[Candidate, List[Dict[str, object]]]:
+    full = args.steps if args.kernel == "life" else args.loops
+    rungs = max(1, math.ceil(math.log(len(candidates), args.eta)))
+    alive = list(candidates)
+    final: List[Dict[str, object]] = []
+
+    for r in range(rungs + 1):
+        last = r == rungs or len(alive) == 1
+        budget = full if last else min(full, max(MIN_RUNG_BUDGET, full // args.eta ** (rungs - r)))
+        repeats = args.repeats if last else 1
+        scored: List[Tuple[float, Candidate, Dict[str, float]]] = []
+        for cand in alive:
+            runs = [m for m in (measure(args, threads, cand, budget) for _ in range(repeats)) if m]
+            if not runs:
+                print(f"WARNING: {omp_schedule(cand)} T={threads}: no result", file=sys.stderr)
+                continue
+            per_loop = statistics.median(m["PER_LOOP"] for m in runs)
+            best_run = min(runs, key=lambda m: abs(m["PER_LOOP"] - per_loop))
+            scored.append((per_loop, cand, best_run))
+        if not scored:
+            raise SystemExit(f"No candidate produced a result for T={threads}.")
+        scored.sort(key=lambda s: s[0])
+        print(f"  T={threads} rung {r}: budget={budget} x{repeats}, {len(scored)} candidates, "
+              f"best {omp_schedule(scored[0][1])} {scored[0][0]:.6f}s/iter")
+        if last:
+            final = [{"SCHEDULE": omp_schedule(c), **m} for _, c, m in scored]
+            return scored[0][1], final
+        alive = [c for _, c, _ in scored[:max(1, math.ceil(len(scored) / args.eta))]]
+    return alive[0], final
+
+
+# --------------------------------------------------------------------------
+# persistence / tables
+# --------------------------------------------------------------------------
+
+def problem_key(args: argparse.Namespace) -> str:
+    if args.kernel == "life":
+        return f"N{args.n}_S{args.steps}"
+    return f"{args.bin.name}:S{args.size}_N{args.coords}_C{args.clusters}"
+
+
+def save_best(path: Path, updates: Dict[str, Dict[str, object]]) -> None:
+    best = json.loads(path.read_text()) if path.exists() else {}
+    best.update(updates)
+    path.write_text(json.dumps(best, indent=2, sort_keys=True) + "\n")
+
+
+def kmeans_table(args: argparse.Namespace, rows: List[Dict[str, object]]) -> str:
+    table_rows = []
+    for r in rows:
+        t = r["THREADS"]
+        table_rows.append({
+            "KIND": "autotune",
+            "RUN_TAG": f"S{args.size}_N{args.coords}_C{args.clusters}_L{args.loops}_T{t}",
+            "BIN": args.bin.name, "T": t, "AFF": os.environ.get("AFF_LABEL", "noaff"),
+            "SEEDING": "first", "SIZE": args.size, "COORDS": args.coords, "CLUSTERS": args.clusters,
+            "LOOPS": args.loops, "NLOOPS": r["NLOOPS"], "TOTAL": r["TOTAL"],
+            "PER_LOOP": r["PER_LOOP"], "TTS": r["TTS"], "SCHEDULE": r["SCHEDULE"],
+        })
+    return br.format_kmeans_table(table_rows, br.KMEANS_COLUMNS + ("SCHEDULE",))
+
+
+def life_table(args: argparse.Namespace, rows: List[Dict[str, object]]) -> str:
+    """results_full.txt's columns; Speedup is over the best time at the fewest threads tuned (T=1 normally)."""
+    t_min = min(r["THREADS"] for r in rows)
+    t1 = min(r["TOTAL"] for r in rows if r["THREADS"] == t_min)
+    lines = ["N\tThreads\tTime (s)\tSpeedup\tSchedule"]
+    for r in rows:
+        speedup = t1 / r["TOTAL"] if r["TOTAL"] > 0 else float("inf")
+        lines.append(f"{args.n}\t{r['THREADS']}\t{r['TOTAL']:.6f}\t{speedup:.6f}\t{r['SCHEDULE']}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Autotune OMP_SCHEDULE for life / kmeans.")
+    parser.add_argument("kernel", choices=("life", "kmeans"))
+    parser.add_argument("--bin", type=Path, default=None,
+                        help="Kernel binary (default: a1/life_par or a2/kmeans/omp_reduction_kmeans).")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--schedules", nargs="+", choices=("static", "dynamic", "guided"),
+                        default=["static", "dynamic", "guided"])
+    parser.add_argument("--chunks", nargs="+", type=int, default=[0, 1, 4, 16, 64, 256, 1024],
+                        help="Chunk sizes to try (0 = runtime default).")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta per rung (default: 3).")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per candidate on the last rung.")
+    parser.add_argument("--n", type=int, default=1024, help="life: array size.")
+    parser.add_argument("--steps", type=int, default=1000, help="life: time steps (full budget).")
+    parser.add_argument("--size", type=int, default=256, help="kmeans: dataset size (MB).")
+    parser.add_argument("--coords", type=int, default=16)
+    parser.add_argument("--clusters", type=int, default=32)
+    parser.add_argument("--loops", type=int, default=10, help="kmeans: loops (full budget).")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis).")
+    args = parser.parse_args()
+    if args.bin is None:
+        args.bin = (br.REPO_ROOT / "a1" / "life_par" if args.kernel == "life"
+                    else br.REPO_ROOT / "a2" / "kmeans" / "omp_reduction_kmeans")
+    args.bin = args.bin.resolve()
+    if not args.bin.exists():
+        parser.error(f"{args.bin} not found (build it first)")
+    if args.eta < 2:
+        parser.error("--eta must be >= 2")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    candidates = [(s, c) for s in args.schedules for c in args.chunks]
+    key = problem_key(args)
+    print(f"Autotuning {args.kernel} {key}: {len(candidates)} candidates, eta={args.eta}")
+
+    best: Dict[str, Dict[str, object]] = {}
+    rows: List[Dict[str, object]] = []
+    for t in args.threads:
+        winner, final = successive_halving(args, t, candidates)
+        for row in final:
+            row["THREADS"] = t
+        rows.extend(final)
+        top = final[0]
+        best[f"{args.kernel}|{key}|T{t}"] = {
+            "OMP_SCHEDULE": omp_schedule(winner), "schedule": winner[0], "chunk": winner[1],
+            "per_iter": top["PER_LOOP"], "total": top["TOTAL"], "binary": str(args.bin),
+        }
+        print(f"T={t}: best OMP_SCHEDULE={omp_schedule(winner)} ({top['PER_LOOP']:.6f}s/iter)")
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    save_best(args.outdir / BEST_FILE, best)
+    table = args.outdir / f"results_autotune_{args.kernel}.txt"
+    table.write_text(kmeans_table(args, rows) if args.kernel == "kmeans" else life_table(args, rows))
+    print(f"Wrote {args.outdir / BEST_FILE} and {table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Shared readers for the benchmark artefacts of all three assignments.
+
+Every analysis script in tools/ goes through these functions so the repo has
+exactly one place that knows each on-disk format:
+
+    a1  benchmarks/N<n>_T<t>/life_<t>_<n>.out   "GameOfLife: Size N Steps S Time X"
+        diagrams/results_full.txt               N / Threads / Time (s) / Speedup
+    a2  kmeans/benchmarks/<kind>/<aff>/<tag>/{output.txt,meta.txt}
+        kmeans/diagrams/results/results_*.txt   KIND RUN_TAG BIN T AFF SEEDING ... TOTAL PER_LOOP TTS
+        FW/benchmarks/<bin>_N<n>_T<t>.out        "FW_SR,N,B,time" (CSV, one line)
+    a3  benchmarks/<lock>/<tag>/{output.txt,meta.txt}
+        diagrams/results/results_*.txt          same table layout as a2
+
+Rows are plain dicts keyed by the upper-case column names used in the
+results tables (THREADS, TOTAL, PER_LOOP, ...), so they can be written back
+with format_kmeans_table().
+
+Runs launched through tools/rusage_run.py (all run_on_queue.sh scripts) also
+leave a rusage file next to their output: <tag>/rusage.txt for kmeans and
+locks, life_<t>_<n>.rusage and <bin>_N<n>_T<t>.rusage for a1 and FW. Its
+RUSAGE_COLUMNS are added to the rows of all three collectors when present.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+A1_BENCH = REPO_ROOT / "a1" / "benchmarks"
+A1_RESULTS = REPO_ROOT / "a1" / "diagrams" / "results_full.txt"
+A2_KMEANS_BENCH = REPO_ROOT / "a2" / "kmeans" / "benchmarks"
+A2_KMEANS_RESULTS = REPO_ROOT / "a2" / "kmeans" / "diagrams" / "results"
+A2_FW_BENCH = REPO_ROOT / "a2" / "FW" / "benchmarks"
+A3_BENCH = REPO_ROOT / "a3" / "benchmarks"
+A3_RESULTS = REPO_ROOT / "a3" / "diagrams" / "results"
+
+RE_LIFE = re.compile(r"GameOfLife:\s+Size\s+(\d+)\s+Steps\s+(\d+)\s+Time\s+([0-9]*\.?[0-9]+)")
+RE_LIFE_DIR = re.compile(r"N(\d+)_T(\d+)$")
+RE_RUN_TAG = re.compile(r"S(\d+)_N(\d+)_C(\d+)_L(\d+)_T(\d+)")
+RE_NLOOPS = re.compile(
+    r"nloops\s*=\s*(\d+)\s+\(total\s*=\s*([0-9.]+)s\)\s+\(per loop\s*=\s*([0-9.]+)s\)"
+)
+RE_THREADS = re.compile(r"number of threads:\s*(\d+)")
+RE_DATASET = re.compile(
+    r"dataset_size\s*=\s*([0-9.]+)\s*MB\s+numObjs\s*=\s*(\d+)\s+"
+    r"numCoords\s*=\s*(\d+)\s+numClusters\s*=\s*(\d+)"
+)
+RE_VALIDATE = re.compile(
+    r"Validation: membership mismatch\s*=\s*(\d+)\s*/\s*(\d+).*max centroid delta\s*=\s*([0-9.eE+-]+)"
+)
+RE_TTS = re.compile(
+    r"Time to solution\s*=\s*([0-9.]+)s\s+\(seeding\s*=\s*(\S+)\s+([0-9.]+)s.*?"
+    r"iterations\s*=\s*(\d+)\s+converged\s*=\s*(\w+)"
+)
+RE_KD_BUILD = re.compile(r"kd-tree:.*built in\s*([0-9.]+)s")
+RE_MPI_COMM = re.compile(r"MPI: ranks\s*(\d+).*allreduce max\s*([0-9.]+)s")
+RE_META = re.compile(r"^\[run_on_queue\]\s+([A-Za-z_]+)=(.*)$")
+RE_RUSAGE = re.compile(r"^\[rusage\]\s+([A-Z_]+)=(\S+)$")
+RE_FW_THREADS = re.compile(r"_T(\d+)")
+
+# results-table columns in their canonical order; TTS (time to solution) is
+# seeding + TOTAL, SEEDING the -k initial-centers mode
+KMEANS_COLUMNS = ("KIND", "RUN_TAG", "BIN", "T", "AFF", "SEEDING", "SIZE", "COORDS",
+                  "CLUSTERS", "LOOPS", "NLOOPS", "TOTAL", "PER_LOOP", "TTS")
+# layout of the tables written before SEEDING/TTS, for header-less files
+LEGACY_KMEANS_COLUMNS = ("KIND", "RUN_TAG", "BIN", "T", "AFF", "SIZE", "COORDS",
+                         "CLUSTERS", "LOOPS", "NLOOPS", "TOTAL", "PER_LOOP")
+# memory / scheduling footprint of a run (rusage_run.py): peak RSS of the
+# largest process and of the whole process tree, page faults, context switches
+RUSAGE_COLUMNS = ("MAXRSS_MB", "RSS_PEAK_MB", "MINFLT", "MAJFLT", "NVCSW", "NIVCSW")
+INT_COLUMNS = {"T", "THREADS", "SIZE", "COORDS", "CLUSTERS", "LOOPS", "NLOOPS",
+               "MINFLT", "MAJFLT", "NVCSW", "NIVCSW"}
+FLOAT_COLUMNS = {"TOTAL", "PER_LOOP", "TTS", "SEED_TIME", "KD_BUILD", "COMM", "MAXRSS_MB", "RSS_PEAK_MB"}
+
+
+def _convert(col: str, cell: str):
+    if cell == "-":     # format_kmeans_table's filler for a missing value
+        return None
+    if col in INT_COLUMNS:
+        return int(cell)
+    if col in FLOAT_COLUMNS:
+        return float(cell)
+    try:
+        return float(cell) if "." in cell else int(cell)
+    except ValueError:
+        return cell
+
+
+# --------------------------------------------------------------------------
+# kmeans / locks results tables (a2 + a3)
+# --------------------------------------------------------------------------
+
+def parse_kmeans_table(path: Path) -> List[Dict[str, object]]:
+    """
+    Parse a whitespace-aligned results_*.txt table.
+
+    Column positions come from the header row (so extra columns appended by
+    newer tools are picked up by name); "TOTAL(s)" style headers are
+    normalised to "TOTAL". Tables without a header fall back to the
+    LEGACY_KMEANS_COLUMNS order. THREADS is added as an alias of T, and
+    SEEDING defaults to "first" for tables that predate the column.
+    """
+    header: List[str] = list(LEGACY_KMEANS_COLUMNS)
+    rows: List[Dict[str, object]] = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if set(stripped) <= {"-", " "}:
+            continue
+        parts = stripped.split()
+        if parts[0].upper() == "KIND":
+            header = [re.sub(r"\(.*\)$", "", p).upper() for p in parts]
+            continue
+        if len(parts) < len(header):
+            continue  # defensive: half-written row
+        row = {col: _convert(col, cell) for col, cell in zip(header, parts)}
+        row["THREADS"] = row.get("T")
+        row.setdefault("SEEDING", "first")
+        row["SOURCE"] = str(path)
+        rows.append(row)
+    return rows
+
+
+def format_kmeans_table(rows: Iterable[Dict[str, object]],
+                        columns: Iterable[str] = KMEANS_COLUMNS) -> str:
+    """Render rows in the aligned KIND RUN_TAG BIN ... layout of results_*.txt."""
+    columns = list(columns)
+    cells = [[_fmt_cell(col, row.get(col, "-")) for col in columns] for row in rows]
+    widths = [max([len(col)] + [len(r[i]) for r in cells]) for i, col in enumerate(columns)]
+    out = ["  ".join(col.ljust(w) for col, w in zip(columns, widths)).rstrip(),
+           "  ".join("-" * w for w in widths)]
+    for r in cells:
+        out.append("  ".join(c.ljust(w) for c, w in zip(r, widths)).rstrip())
+    return "\n".join(out) + "\n"
+
+
+def _fmt_cell(col: str, value: object) -> str:
+    if isinstance(value, float):
+        return f"{value:.4f}" if col in FLOAT_COLUMNS else f"{value:.6g}"
+    return str(value)
+
+
+def kmeans_num_objs(size_mb: float, coords: int) -> int:
+    """numObjs as computed by main.c from the -s (MB) and -n flags."""
+    return int((size_mb * 1024 * 1024) / (coords * 8))
+
+
+# --------------------------------------------------------------------------
+# rusage files (tools/rusage_run.py)
+# --------------------------------------------------------------------------
+
+def parse_rusage(path: Path) -> Dict[str, object]:
+    """RUSAGE_COLUMNS (KB converted to MB) from a rusage file; {} if there is none."""
+    raw: Dict[str, str] = {}
+    if not path.exists():
+        return raw
+    for line in path.read_text(errors="ignore").splitlines():
+        m = RE_RUSAGE.match(line.strip())
+        if m:
+            raw[m.group(1)] = m.group(2)
+    row: Dict[str, object] = {}
+    for col in RUSAGE_COLUMNS:
+        key = col.replace("_MB", "_KB")
+        if key in raw:
+            row[col] = int(raw[key]) / 1024.0 if col in FLOAT_COLUMNS else int(raw[key])
+    return row
+
+
+# --------------------------------------------------------------------------
+# kmeans / locks raw run directories (output.txt + meta.txt)
+# --------------------------------------------------------------------------
+
+def parse_meta(path: Path) -> Dict[str, str]:
+    """Key/value pairs from the "[run_on_queue] KEY=VALUE" lines of meta.txt."""
+    meta: Dict[str, str] = {}
+    if not path.exists():
+        return meta
+    for line in path.read_text(errors="ignore").splitlines():
+        m = RE_META.match(line.strip())
+        if m:
+            meta[m.group(1)] = m.group(2).strip()
+    return meta
+
+
+def parse_kmeans_output(path: Path) -> Optional[Dict[str, object]]:
+    """
+    NLOOPS/TOTAL/PER_LOOP (+ dataset parameters) from a kmeans output.txt,
+    plus MISMATCH (fraction of memberships) / CDELTA for -V validation runs
+    and SEED_TIME / TTS / CONVERGED from the "Time to solution" line (TTS is
+    TOTAL for outputs that predate it). KD_BUILD is omp_kdtree_kmeans' tree
+    build time, part of its TOTAL; COMM is mpi_kmeans' slowest rank's time
+    in MPI_Allreduce, part of its TOTAL.
+    """
+    text = path.read_text(errors="ignore")
+    m = RE_NLOOPS.search(text)
+    if not m:
+        return None
+    row: Dict[str, object] = {
+        "NLOOPS": int(m.group(1)),
+        "TOTAL": float(m.group(2)),
+        "PER_LOOP": float(m.group(3)),
+    }
+    d = RE_DATASET.search(text)
+    if d:
+        row.update(SIZE_MB=float(d.group(1)), NUM_OBJS=int(d.group(2)),
+                   COORDS=int(d.group(3)), CLUSTERS=int(d.group(4)))
+    t = RE_THREADS.search(text)
+    row["THREADS"] = int(t.group(1)) if t else 1
+    s = RE_TTS.search(text)
+    if s:
+        row.update(TTS=float(s.group(1)), SEED_TIME=float(s.group(3)), CONVERGED=s.group(5) == "yes")
+    else:
+        row.update(TTS=row["TOTAL"], SEED_TIME=0.0)
+    v = RE_VALIDATE.search(text)
+    if v:
+        row.update(MISMATCH=int(v.group(1)) / int(v.group(2)), CDELTA=float(v.group(3)))
+    k = RE_KD_BUILD.search(text)
+    if k:
+        row["KD_BUILD"] = float(k.group(1))
+    c = RE_MPI_COMM.search(text)
+    if c:
+        row["COMM"] = float(c.group(2))
+    return row
+
+
+def collect_kmeans_runs(bench_root: Path) -> List[Dict[str, object]]:
+    """
+    One row per <tag>/output.txt under a kmeans or locks benchmarks tree.
+
+    KIND is the first directory level below bench_root (serial / naive /
+    reduction for a2, the lock name for a3); AFF comes from meta.txt
+    AFF_LABEL when present, else from the directory name. INIT is the page
+    placement (-i) from meta.txt INIT_MODE, serial for older runs; MERGE the
+    reduction variant's partial-sum merge (MERGE_MODE), single for older runs.
+    -p float runs live in <kind>_f32/ and so come out as their own KIND.
+    SEEDING is the -k initial-centers mode (meta.txt SEEDING, first for older runs).
+    RANKS is the MPI rank count of mpi_kmeans runs (1 otherwise); T stays
+    the OpenMP threads per rank. RUSAGE_COLUMNS come from <tag>/rusage.txt.
+    """
+    rows: List[Dict[str, object]] = []
+    for out in sorted(bench_root.rglob("output.txt")):
+        run_dir = out.parent
+        tag = RE_RUN_TAG.search(run_dir.name)
+        parsed = parse_kmeans_output(out)
+        if not tag or parsed is None:
+            continue
+        meta = parse_meta(run_dir / "meta.txt")
+        rel = run_dir.relative_to(bench_root).parts
+        size, coords, clusters, loops, threads = (int(g) for g in tag.groups())
+        row: Dict[str, object] = {
+            "KIND": rel[0],
+            "RUN_TAG": run_dir.name,
+            "BIN": meta.get("BIN", "-"),
+            "T": threads,
+            "THREADS": threads,
+            "AFF": meta.get("AFF_LABEL", rel[1] if len(rel) > 2 else "aff"),
+            "INIT": meta.get("INIT_MODE", "serial"),
+            "MERGE": meta.get("MERGE_MODE", "single"),
+            "PRECISION": meta.get("PRECISION", "double"),
+            "SEEDING": meta.get("SEEDING", "first"),
+            "RANKS": int(meta.get("RANKS", 1)),
+            "SIZE": size,
+            "COORDS": coords,
+            "CLUSTERS": clusters,
+            "LOOPS": loops,
+            "DIR": str(run_dir),
+            "META": meta,
+        }
+        row.update({k: v for k, v in parsed.items() if k not in ("THREADS", "COORDS", "CLUSTERS")})
+        row.update(parse_rusage(run_dir / "rusage.txt"))
+        rows.append(row)
+    return rows
+
+
+# --------------------------------------------------------------------------
+# a1 Game of Life
+# --------------------------------------------------------------------------
+
+def parse_life_out(path: Path) -> Optional[Dict[str, object]]:
+    """N/STEPS/TIME from the first "GameOfLife: ..." line of a .out file."""
+    text = path.read_text(errors="ignore")
+    m = RE_LIFE.search(text)
+    if not m:
+        return None
+    return {"N": int(m.group(1)), "STEPS": int(m.group(2)), "TIME": float(m.group(3))}
+
+
+def collect_life_runs(bench_root: Path = A1_BENCH) -> List[Dict[str, object]]:
+    """
+    One row per benchmarks/N<n>_T<t>/life_<t>_<n>.out (pass
+    A1_BENCH / "init-first-touch" etc. for the other page placements),
+    with the RUSAGE_COLUMNS of life_<t>_<n>.rusage when present.
+    """
+    rows: List[Dict[str, object]] = []
+    for d in sorted(bench_root.glob("N*_T*")):
+        m = RE_LIFE_DIR.match(d.name)
+        if not m:
+            continue
+        n, t = int(m.group(1)), int(m.group(2))
+        out = d / f"life_{t}_{n}.out"
+        if not out.exists():
+            continue
+        parsed = parse_life_out(out)
+        if parsed is None:
+            continue
+        parsed.update(THREADS=t, DIR=str(d),
+                      INIT=parse_meta(d / "meta.txt").get("INIT_MODE", "serial"))
+        parsed.update(parse_rusage(out.with_suffix(".rusage")))
+        rows.append(parsed)
+    return rows
+
+
+def parse_life_table(path: Path = A1_RESULTS) -> List[Dict[str, object]]:
+    """Rows of a1/diagrams/results_full.txt (N, THREADS, TIME, SPEEDUP, ...)."""
+    lines = [l for l in path.read_text().splitlines() if l.strip()]
+    header = [h.split(" (")[0].upper() for h in lines[0].split("\t")]
+    rows: List[Dict[str, object]] = []
+    for line in lines[1:]:
+        row: Dict[str, object] = {}
+        for col, cell in zip(header, line.split("\t")):
+            if cell == "-":
+                continue
+            row[col] = _convert(col, cell)
+        row["N"] = int(row["N"])
+        row["THREADS"] = int(row["THREADS"])
+        rows.append(row)
+    return rows
+
+
+# --------------------------------------------------------------------------
+# a2 Floyd-Warshall
+# --------------------------------------------------------------------------
+
+def parse_fw_out(path: Path) -> Optional[Dict[str, object]]:
+    """
+    Parse the one-line CSV printed by the FW binaries:
+        FW,N,time | FW_TILED,N,B,time | FW_SR,N,B,time | FW_SR_DEP,N,B,time,C
+    THREADS comes from a _T<t> tag in the file name (1 if absent); C (the
+    dataflow task size of fw_sr_p) is None for the other binaries.
+    """
+    for line in path.read_text(errors="ignore").splitlines():
+        parts = line.strip().split(",")
+        if not parts or not parts[0].startswith("FW"):
+            continue
+        try:
+            if len(parts) == 3:
+                row = {"ALGO": parts[0], "N": int(parts[1]), "B": None, "TIME": float(parts[2]),
+                       "C": None}
+            elif len(parts) >= 4:
+                row = {"ALGO": parts[0], "N": int(parts[1]), "B": int(parts[2]),
+                       "TIME": float(parts[3]), "C": int(parts[4]) if len(parts) > 4 else None}
+            else:
+                continue
+        except ValueError:
+            continue
+        t = RE_FW_THREADS.search(path.stem)
+        row["THREADS"] = int(t.group(1)) if t else 1
+        row["SOURCE"] = str(path)
+        return row
+    return None
+
+
+def collect_fw_runs(bench_root: Path = A2_FW_BENCH) -> List[Dict[str, object]]:
+    """One row per *.out, with the RUSAGE_COLUMNS of the matching .rusage when present."""
+    rows: List[Dict[str, object]] = []
+    for out in sorted(bench_root.glob("*.out")):
+        parsed = parse_fw_out(out)
+        if parsed is not None:
+            parsed.update(parse_rusage(out.with_suffix(".rusage")))
+            rows.append(parsed)
+    return rows
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Resident benchmark worker: keeps datasets and the OpenMP team of one
+process alive across many runs of the kmeans, Game of Life and FW kernels
+(kernels.py, ctypes), instead of a fresh binary per benchmark point that
+regenerates its input and faults in its pages before the timed part.
+
+Usage:
+    python bench_worker.py serve [--calibrate] [--quiet]
+    python bench_worker.py run kmeans [--engines reduction naive] [--threads 1 2 4 8]
+                               [--size 32] [--coords 16] [--clusters 32] [--loops 10]
+    python bench_worker.py run life [--n 1024 4096] [--steps 100] [--threads ...]
+    python bench_worker.py run fw [--engines fw_sr_p fw_tiled fw] [--n 1024 2048] [--b 64] [--c 0]
+                               [--threads ...]
+        run options: [--repeat 3] [--init serial] [--calibrate] [--quiet] [--outdir DIR]
+
+serve reads one JSON request per stdin line and answers with one JSON line:
+    {"kernel": "kmeans", "engine": "reduction", "threads": 8, "size": 32,
+     "coords": 16, "clusters": 32, "loops": 10}       (threshold, init optional)
+    {"kernel": "life", "threads": 8, "n": 4096, "steps": 100}
+    {"kernel": "fw", "engine": "fw_sr_p", "threads": 8, "n": 2048,
+     "b": 64, "c": 0}                                  (engine, b, c optional)
+    {"cmd": "stats"} | {"cmd": "drop"} (free the datasets) | {"cmd": "quit"}
+Replies carry the kernel's result and
+    kernel_s   in-process kernel time (the figure the binary would print)
+    setup_s    dataset generation paid by this request (0 once it is cached)
+    cold_s     what a fresh process spends outside its timed kernel for this
+               configuration: with --calibrate (or "calibrate": true) the
+               wall time of one run of the binary minus the time it prints,
+               measured once per configuration (cold_source "measured");
+               otherwise the dataset's setup_s, a lower bound without exec
+               and team start-up (cold_source "setup").
+    avoided_s  cold_s - setup_s: the start-up this request did not pay
+run sends a grid of requests through the same code, prints one line per
+request and writes <outdir>/bench_worker_<kernel>.txt (default tools/analysis/).
+
+What the kernels print goes to stderr (to /dev/null with --quiet), so
+stdout only carries the replies.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import bench_results as br
+import kernels
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+KMEANS_BINS = {"serial": "seq_kmeans", "naive": "omp_naive_kmeans",
+               "reduction": "omp_reduction_kmeans", "kdtree": "omp_kdtree_kmeans"}
+KMEANS_BIN_DIR = br.REPO_ROOT / "a2" / "kmeans"
+LIFE_BIN = br.REPO_ROOT / "a1" / "life_par"
+FW_BIN_DIR = br.REPO_ROOT / "a2" / "FW"
+
+COLUMNS = ("KERNEL", "ENGINE", "T", "PARAMS", "REP", "KERNEL_S", "SETUP_S", "COLD_S", "AVOIDED_S", "COLD_SOURCE")
+
+
+class Worker:
+    def __init__(self, calibrate: bool = False):
+        self.calibrate = calibrate
+        self.datasets: Dict[Tuple, object] = {}
+        self.setup: Dict[Tuple, float] = {}      # dataset key -> generation time when it was loaded
+        self.cold: Dict[Tuple, float] = {}       # run key -> measured cold-start overhead
+        self.totals = {"requests": 0, "kernel_s": 0.0, "setup_s": 0.0, "avoided_s": 0.0}
+
+    # -- datasets -----------------------------------------------------------
+
+    def _dataset(self, key: Tuple, make) -> Tuple[object, float]:
+        if key in self.datasets:
+            return self.datasets[key], 0.0
+        t0 = time.perf_counter()
+        self.datasets[key] = make()
+        self.setup[key] = time.perf_counter() - t0
+        return self.datasets[key], self.setup[key]
+
+    def drop(self) -> None:
+        for d in self.datasets.values():
+            d.close()
+        self.datasets.clear()
+
+    # -- cold start ---------------------------------------------------------
+
+    def _cold_start(self, run_key: Tuple, cmd: Optional[List[str]], threads: int,
+                    kernel_time) -> Optional[float]:
+        """Wall time of one fresh run of cmd minus the kernel time it prints (once per run_key)."""
+        if run_key in self.cold:
+            return self.cold[run_key]
+        if cmd is None or not Path(cmd[0]).exists():
+            return None
+        env = dict(os.environ, OMP_NUM_THREADS=str(threads))
+        env.pop("RUNREC_FILE", None)
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        wall = time.perf_counter() - t0
+        printed = kernel_time(proc.stdout)
+        self.cold[run_key] = max(wall - printed, 0.0) if printed is not None else None
+        return self.cold[run_key]
+
+    # -- requests -----------------------------------------------------------
+
+    def handle(self, req: Dict[str, object]) -> Dict[str, object]:
+        cmd = req.get("cmd")
+        if cmd == "stats":
+            return {"ok": True, "datasets": len(self.datasets), **self.totals}
+        if cmd == "drop":
+            self.drop()
+            return {"ok": True, "datasets": 0}
+        if cmd is not None:
+            return {"ok": False, "error": f"unknown cmd {cmd!r}"}
+
+        kernel = req.get("kernel")
+        threads = int(req.get("threads", os.cpu_count() or 1))
+        init = str(req.get("init", "serial"))
+        calibrate = bool(req.get("calibrate", self.calibrate))
+        kernels.set_threads(threads)
+
+        if kernel == "kmeans":
+            engine = str(req.get("engine", "reduction"))
+            size, coords = float(req["size"]), int(req["coords"])
+            clusters, loops = int(req["clusters"]), int(req.get("loops", 10))
+            threshold = float(req.get("threshold", 0.001))
+            data_key = ("kmeans", size, coords, init)
+            data, setup_s = self._dataset(data_key, lambda: kernels.KmeansData(size, coords, init))
+            res = data.run(engine, clusters, loops, threshold)
+            kernel_s = res.pop("TOTAL")
+            res.pop("CLUSTERS")
+            cmd_line = [str(KMEANS_BIN_DIR / KMEANS_BINS[engine]), "-s", f"{size:g}", "-n", str(coords),
+                        "-c", str(clusters), "-l", str(loops), "-t", f"{threshold:g}", "-i", init]
+
+            def printed(out: str) -> Optional[float]:
+                m = br.RE_NLOOPS.search(out)
+                return float(m.group(2)) if m else None
+        elif kernel == "life":
+            n, steps = int(req["n"]), int(req["steps"])
+            data_key = ("life", n, init)
+            data, setup_s = self._dataset(data_key, lambda: kernels.LifeBoard(n, init))
+            res = data.run(steps)
+            kernel_s = res.pop("TIME")
+            engine = "u8"
+            cmd_line = [str(LIFE_BIN), "-l", "u8", "-i", init, str(n), str(steps)]
+
+            def printed(out: str) -> Optional[float]:
+                m = br.RE_LIFE.search(out)
+                return float(m.group(3)) if m else None
+        elif kernel == "fw":
+            engine = str(req.get("engine", "fw_sr_p"))
+            n, b, c = int(req["n"]), int(req.get("b", 64)), int(req.get("c", 0))
+            data_key = ("fw", n)
+            data, setup_s = self._dataset(data_key, lambda: kernels.FWData(n))
+            res = data.run(engine, b, c)
+            kernel_s = res.pop("TIME")
+            cmd_line = [str(FW_BIN_DIR / engine), str(n)] + {
+                "fw": [], "fw_tiled": [str(b)], "fw_sr_p": [str(b)] + ([str(c)] if c else [])}[engine]
+
+            def printed(out: str) -> Optional[float]:
+                for line in out.splitlines():     # FW,N,time | FW_TILED,N,B,time | FW_SR*,N,B,time[,C]
+                    parts = line.strip().split(",")
+                    if parts[0].startswith("FW") and len(parts) >= 3:
+                        return float(parts[2] if len(parts) == 3 else parts[3])
+                return None
+        else:
+            return {"ok": False, "error": f"unknown kernel {kernel!r} (kmeans, life or fw)"}
+
+        run_key = tuple(cmd_line or ()) + (threads,)
+        cold_s = self._cold_start(run_key, cmd_line, threads, printed) if calibrate else None
+        source = "measured" if cold_s is not None else "setup"
+        if cold_s is None:
+            cold_s = self.setup[data_key]
+        avoided_s = max(cold_s - setup_s, 0.0)
+
+        self.totals["requests"] += 1
+        self.totals["kernel_s"] += kernel_s
+        self.totals["setup_s"] += setup_s
+        self.totals["avoided_s"] += avoided_s
+        reply = dict(req)
+        reply.update(ok=True, engine=engine, threads=threads, cached=setup_s == 0.0, **res,
+                     kernel_s=round(kernel_s, 6), setup_s=round(setup_s, 6), cold_s=round(cold_s, 6),
+                     avoided_s=round(avoided_s, 6), cold_source=source)
+        return reply
+
+
+def claim_stdout(quiet: bool):
+    """Keep the real stdout for replies; point fd 1 (the kernels' printf) at stderr or /dev/null."""
+    sys.stdout.flush()
+    replies = os.fdopen(os.dup(1), "w", buffering=1)
+    os.dup2(os.open(os.devnull, os.O_WRONLY) if quiet else 2, 1)
+    sys.stdout = replies
+    return replies
+
+
+def serve(args: argparse.Namespace) -> None:
+    out = claim_stdout(args.quiet)
+    worker = Worker(args.calibrate)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+            if req.get("cmd") == "quit":
+                break
+            reply = worker.handle(req)
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        out.write(json.dumps(reply) + "\n")
+    worker.drop()
+
+
+def grid(args: argparse.Namespace) -> List[Dict[str, object]]:
+    reqs: List[Dict[str, object]] = []
+    for t in args.threads:
+        if args.kernel == "kmeans":
+            reqs += [{"kernel": "kmeans", "engine": e, "threads": t, "size": args.size, "coords": args.coords,
+                      "clusters": args.clusters, "loops": args.loops} for e in args.engines]
+        elif args.kernel == "life":
+            reqs += [{"kernel": "life", "threads": t, "n": n, "steps": args.steps} for n in args.n]
+        else:
+            reqs += [{"kernel": "fw", "engine": e, "threads": t, "n": n, "b": args.b, "c": args.c}
+                     for e in args.engines for n in args.n]
+    for r in reqs:
+        r["init"] = args.init
+    return reqs
+
+
+def run(args: argparse.Namespace) -> None:
+    out = claim_stdout(args.quiet)
+    worker = Worker(args.calibrate)
+    lines = ["\t".join(COLUMNS)]
+    for req in grid(args):
+        params = " ".join(f"{k}={req[k]}" for k in ("size", "coords", "clusters", "loops", "n", "steps", "b", "c")
+                          if k in req)
+        for rep in range(1, args.repeat + 1):
+            r = worker.handle(req)
+            lines.append("\t".join(str(v) for v in (
+                args.kernel, r["engine"], r["threads"], params, rep, f"{r['kernel_s']:.4f}",
+                f"{r['setup_s']:.4f}", f"{r['cold_s']:.4f}", f"{r['avoided_s']:.4f}", r["cold_source"])))
+            out.write(f"  {args.kernel} {r['engine']} T={r['threads']} {params} #{rep}: kernel {r['kernel_s']:.4f}s"
+                      f"  setup {r['setup_s']:.4f}s  avoided {r['avoided_s']:.4f}s ({r['cold_source']})\n")
+    worker.drop()
+
+    t = worker.totals
+    out.write(f"{t['requests']} runs: kernel {t['kernel_s']:.4f}s, setup paid {t['setup_s']:.4f}s, "
+              f"cold start avoided {t['avoided_s']:.4f}s\n")
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    table = args.outdir / f"bench_worker_{args.kernel}.txt"
+    table.write_text("\n".join(lines) + "\n")
+    out.write(f"Wrote {table}\n")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Resident worker for the kmeans / life / FW kernels.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--calibrate", action="store_true",
+                        help="Measure the cold start with one run of the binary per configuration.")
+    common.add_argument("--quiet", action="store_true", help="Drop the kernels' own output.")
+
+    sub.add_parser("serve", parents=[common], help="JSON requests on stdin, JSON replies on stdout.")
+
+    r = sub.add_parser("run", parents=[common], help="Run a grid of requests and write a table.")
+    r.add_argument("kernel", choices=("kmeans", "life", "fw"))
+    r.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 8])
+    r.add_argument("--repeat", type=int, default=3, help="Runs per configuration (default: 3).")
+    r.add_argument("--init", choices=kernels.INIT_MODES, default="serial", help="Page placement (-i).")
+    r.add_argument("--engines", nargs="+", choices=kernels.KMEANS_ENGINES + kernels.FW_ENGINES, default=None,
+                   help="kmeans or FW engines (default: reduction / fw_sr_p).")
+    r.add_argument("--size", type=float, default=32, help="kmeans dataset size in MB (-s).")
+    r.add_argument("--coords", type=int, default=16)
+    r.add_argument("--clusters", type=int, default=32)
+    r.add_argument("--loops", type=int, default=10)
+    r.add_argument("--n", nargs="+", type=int, default=None,
+                   help="Board / graph sizes (default: life 1024 4096, fw 1024 2048).")
+    r.add_argument("--steps", type=int, default=100, help="life generations.")
+    r.add_argument("--b", type=int, default=64, help="FW block size B of fw_tiled / fw_sr_p (default: 64).")
+    r.add_argument("--c", type=int, default=0, help="fw_sr_p's task size C (default: 0, nested tasks).")
+    r.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                   help="Output directory (default: tools/analysis).")
+    args = parser.parse_args()
+    if args.cmd == "run" and args.n is None:
+        args.n = [1024, 4096] if args.kernel == "life" else [1024, 2048]
+    if args.cmd == "run" and args.kernel in ("kmeans", "fw"):
+        allowed = kernels.KMEANS_ENGINES if args.kernel == "kmeans" else kernels.FW_ENGINES
+        if args.engines is None:
+            args.engines = ["reduction" if args.kernel == "kmeans" else "fw_sr_p"]
+        wrong = [e for e in args.engines if e not in allowed]
+        if wrong:
+            parser.error(f"{', '.join(wrong)}: not a {args.kernel} engine (one of {', '.join(allowed)})")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if args.cmd == "serve":
+        serve(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Per-iteration timing and convergence curves for the kmeans runs.
+
+Usage:
+    python convergence.py [a2/kmeans/benchmarks a3/benchmarks ...]
+                          [--warmup N] [--tol 0.10] [--outdir DIR] [--no-plots]
+
+Every kmeans variant records (wall time, delta) for each loop into its run
+record (common/runrec.h, written when RUNREC_FILE is set; run_on_queue.sh
+points it at <result dir>/run.rec). The output.txt line only has the mean
+"(per loop = ...)", which folds the first, cold iterations (page faults on
+first touch, cold caches, thread start-up) into the average; this script
+reports both.
+
+Warm-up detection: the steady-state reference is the median time of the
+second half of the loops; leading loops slower than reference x (1 + --tol)
+are warm-up, at most half of them. --warmup N overrides the detection.
+
+Seeding (-k first|kmeans-par) changes how many loops a run needs, so the
+table also has the end-to-end time to solution, TTS = seeding + all loops.
+
+Outputs (in --outdir, default tools/analysis/):
+    convergence_kmeans.txt    results_*.txt style table, one row per record:
+                              ... SEEDING NLOOPS TOTAL PER_LOOP FIRST_ITER
+                              WARMUP STEADY_PER_LOOP FINAL_DELTA SEED_TIME TTS
+    convergence_<config>.png  per-iteration time and delta vs iteration,
+                              one line per binary / seeding / thread count
+    tts_<config>.png          time to solution vs threads per binary and
+                              seeding (seeding + loops stacked, loop counts
+                              on top), with the speedup over first seeding
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import bench_results as br
+import runrec
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+DEFAULT_PATHS = [br.REPO_ROOT / "a2" / "kmeans" / "benchmarks", br.REPO_ROOT / "a3" / "benchmarks"]
+
+COLUMNS = ("BIN", "T", "AFF", "SIZE", "COORDS", "CLUSTERS", "SEEDING", "NLOOPS", "TOTAL",
+           "PER_LOOP", "FIRST_ITER", "WARMUP", "STEADY_PER_LOOP", "FINAL_DELTA", "SEED_TIME", "TTS")
+SEEDING_NAMES = ("first", "kmeans-par")   # main.c's -k, runrec param "seeding"
+
+
+def warmup_iters(times: Sequence[float], tol: float = 0.10) -> int:
+    """Number of leading loops slower than the steady state (at most half)."""
+    n = len(times)
+    if n < 4:
+        return 0
+    ref = statistics.median(times[n // 2:])
+    w = 0
+    while w < n // 2 and times[w] > ref * (1.0 + tol):
+        w += 1
+    return w
+
+
+def summarize(rec: runrec.RunRecord, warmup: Optional[int], tol: float) -> Dict[str, object]:
+    times = [float(t) for t in rec.iter_times()]
+    deltas = [float(v) for v in rec.iter_values()]
+    w = warmup_iters(times, tol) if warmup is None else min(warmup, max(len(times) - 1, 0))
+    steady = times[w:]
+    p = rec.params
+    return {
+        "BIN": rec.kernel,
+        "T": rec.threads,
+        "AFF": rec.env.get("AFF_LABEL", "-"),
+        "SIZE": int(p.get("size_mb", 0)),
+        "COORDS": int(p.get("numCoords", 0)),
+        "CLUSTERS": int(p.get("numClusters", 0)),
+        "SEEDING": SEEDING_NAMES[int(p.get("seeding", 0))],
+        "NLOOPS": len(times),
+        "TOTAL": rec.total_time,
+        "PER_LOOP": rec.total_time / max(len(times), 1),
+        "FIRST_ITER": times[0] if times else float("nan"),
+        "WARMUP": w,
+        "STEADY_PER_LOOP": sum(steady) / len(steady) if steady else float("nan"),
+        "FINAL_DELTA": deltas[-1] if deltas else float("nan"),
+        "SEED_TIME": p.get("seed_time", 0.0),
+        "TTS": p.get("tts", rec.total_time),
+        "TIMES": times,
+        "DELTAS": deltas,
+        "SOURCE": rec.source,
+    }
+
+
+def config_key(row: Dict[str, object]) -> str:
+    return f"S{row['SIZE']}_N{row['COORDS']}_C{row['CLUSTERS']}"
+
+
+def plot_curves(rows: List[Dict[str, object]], outdir: Path) -> List[Path]:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    groups: Dict[str, List[Dict[str, object]]] = defaultdict(list)
+    for r in rows:
+        groups[config_key(r)].append(r)
+
+    written: List[Path] = []
+    for cfg, grows in sorted(groups.items()):
+        fig, (ax_t, ax_d) = plt.subplots(2, 1, figsize=(8, 7), sharex=True)
+        for r in sorted(grows, key=lambda r: (r["BIN"], r["SEEDING"], r["T"])):
+            xs = range(1, len(r["TIMES"]) + 1)
+            seeding = "" if r["SEEDING"] == "first" else f" {r['SEEDING']}"
+            line, = ax_t.plot(xs, r["TIMES"], marker=".", linewidth=1,
+                              label=f"{r['BIN']}{seeding} T={r['T']}")
+            if r["WARMUP"]:
+                ax_t.axvline(r["WARMUP"] + 0.5, color=line.get_color(), linestyle=":", linewidth=0.8)
+            ax_d.plot(xs, [max(d, 1e-12) for d in r["DELTAS"]], color=line.get_color(), linewidth=1)
+        ax_t.set_yscale("log")
+        ax_t.set_ylabel("Time per loop (s)")
+        ax_t.set_title(f"kmeans per-iteration time and convergence - {cfg}")
+        ax_t.legend(fontsize=7, ncol=2)
+        ax_d.set_yscale("log")
+        ax_d.set_ylabel("delta (fraction of objects moved)")
+        ax_d.set_xlabel("Iteration")
+        for ax in (ax_t, ax_d):
+            ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+        out = outdir / f"convergence_{cfg}.png"
+        fig.tight_layout()
+        fig.savefig(out, dpi=150)
+        plt.close(fig)
+        written.append(out)
+    return written
+
+
+def plot_tts(rows: List[Dict[str, object]], outdir: Path) -> List[Path]:
+    """Stacked seeding + loops bars per thread count, one bar per (binary, seeding)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    groups: Dict[str, List[Dict[str, object]]] = defaultdict(list)
+    for r in rows:
+        groups[config_key(r)].append(r)
+
+    written: List[Path] = []
+    for cfg, grows in sorted(groups.items()):
+        # last record wins for repeated (binary, seeding, threads) runs
+        best: Dict[tuple, Dict[str, object]] = {(r["BIN"], r["SEEDING"], r["T"]): r for r in grows}
+        series = sorted({(b, s) for b, s, _ in best})
+        if not any(s != "first" for _, s in series):
+            continue
+        threads = sorted({t for _, _, t in best})
+        width = 0.8 / len(series)
+        fig, ax = plt.subplots(figsize=(9, 5))
+        for idx, (b, s) in enumerate(series):
+            xs, seed, loops, labels = [], [], [], []
+            for i, t in enumerate(threads):
+                r = best.get((b, s, t))
+                if r is None:
+                    continue
+                xs.append(i - 0.4 + (idx + 0.5) * width)
+                seed.append(r["SEED_TIME"])
+                loops.append(r["TTS"] - r["SEED_TIME"])
+                base = best.get((b, "first", t))
+                labels.append(f"{r['NLOOPS']}" + (f"\n{base['TTS'] / r['TTS']:.2f}x"
+                                                  if base is not None and s != "first" else ""))
+            bars = ax.bar(xs, loops, width=width, bottom=seed, label=f"{b} {s}")
+            ax.bar(xs, seed, width=width, color=bars.patches[0].get_facecolor(), alpha=0.4, hatch="//")
+            for x, y, text in zip(xs, (sd + lp for sd, lp in zip(seed, loops)), labels):
+                ax.text(x, y, text, ha="center", va="bottom", fontsize=7)
+        ax.set_xticks(range(len(threads)))
+        ax.set_xticklabels([str(t) for t in threads])
+        ax.set_xlabel("Threads")
+        ax.set_ylabel("Time to solution (s)")
+        ax.set_title(f"kmeans time to solution by seeding - {cfg}\n"
+                     f"(hatched: seeding; labels: loops, speedup over first seeding)")
+        ax.grid(True, axis="y", linestyle="--", linewidth=0.5, alpha=0.7)
+        ax.margins(y=0.2)   # room for the labels and the legend
+        ax.legend(fontsize=7, loc="upper left")
+        out = outdir / f"tts_{cfg}.png"
+        fig.tight_layout()
+        fig.savefig(out, dpi=150)
+        plt.close(fig)
+        written.append(out)
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="kmeans per-iteration time / delta curves.")
+    parser.add_argument("paths", nargs="*", type=Path, default=DEFAULT_PATHS,
+                        help="*.rec files or directories (default: a2/kmeans and a3 benchmarks).")
+    parser.add_argument("--warmup", type=int, default=None,
+                        help="Fixed number of warm-up loops to exclude (default: detect).")
+    parser.add_argument("--tol", type=float, default=0.10,
+                        help="Warm-up loops are slower than steady state by more than this (default: 0.10).")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis).")
+    parser.add_argument("--no-plots", action="store_true", help="Only write the table.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    records = [r for r in runrec.load_records(p for p in args.paths if p.exists())
+               if "kmeans" in r.kernel and r.niters]
+    if not records:
+        raise SystemExit("No kmeans run records with per-iteration data found "
+                         "(run with RUNREC_FILE set).")
+    rows = [summarize(r, args.warmup, args.tol) for r in records]
+    rows.sort(key=lambda r: (config_key(r), r["BIN"], r["SEEDING"], r["T"]))
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    table = args.outdir / "convergence_kmeans.txt"
+    table.write_text(br.format_kmeans_table(rows, COLUMNS))
+    print(f"Wrote {table} ({len(rows)} records)")
+
+    if not args.no_plots:
+        for path in plot_curves(rows, args.outdir) + plot_tts(rows, args.outdir):
+            print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+N x B (x task size) sweep and block-size search for the recursive FW (fw_sr_p).
+
+Usage:
+    python fw_sweep.py [--n 1024 2048 4096] [--b 16 32 64 128 256]
+                       [--c 0 64 256] [--threads 1 2 4 8 16 32 64]
+                       [--repeats 3] [--bin a2/FW/fw_sr_p]
+                       [--bench-dir a2/FW/benchmarks] [--outdir DIR]
+    python fw_sweep.py --auto [--n ...] [--threads ...]
+
+C is fw_sr_p's optional third argument: 0 runs the nested task version
+(taskwait per recursion level), C > 0 the dataflow version with one task
+per CxC call ordered by depend clauses. C values that are not a multiple
+of B (or do not divide N) are skipped.
+
+--auto replaces the grid by a search per (N, threads): B is hill-climbed
+over powers of two from the first --b value (halved while that improves,
+else doubled while that improves), first for the nested version, then for
+the dataflow version (with C = 4B), whose task size C is then climbed the
+same way from 4B. The base case is cache bound, so time vs B is close
+to unimodal and a climb needs a handful of runs instead of the full grid.
+
+Every measured point keeps the median of --repeats runs. Outputs:
+    <bench-dir>/fw_sr_p_N<n>_B<b>[_C<c>]_T<t>.out (+ .rec run record)
+        the binary's stdout, named like run_on_queue.sh's, so
+        bench_results.collect_fw_runs() (roofline.py, perf_regress.py) picks
+        them up with the existing FW runs
+    <outdir>/results_fw_sweep.txt   ALGO N B C T TIME, one row per point
+    <outdir>/fw_sweep_best.json     best (B, C) per "N<n>|T<t>|<algo>", merged
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+BEST_FILE = "fw_sweep_best.json"
+
+Point = Tuple[int, int, int, int]   # (N, B, C, threads)
+
+
+def out_name(n: int, b: int, c: int, t: int) -> str:
+    return f"fw_sr_p_N{n}_B{b}" + (f"_C{c}" if c else "") + f"_T{t}"
+
+
+def valid(n: int, b: int, c: int) -> bool:
+    if b < 1 or b > n or n % b:
+        return False
+    return c == 0 or (b <= c <= n and c % b == 0 and n % c == 0)
+
+
+class Sweep:
+    """Runs points once each (memoised) and keeps every result."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.results: Dict[Point, Dict[str, object]] = {}
+
+    def measure(self, n: int, b: int, c: int, t: int) -> Optional[float]:
+        key = (n, b, c, t)
+        if key in self.results:
+            return self.results[key]["TIME"]
+        if not valid(n, b, c):
+            return None
+
+        args = self.args
+        stem = args.bench_dir / out_name(n, b, c, t)
+        env = dict(os.environ)
+        env["OMP_NUM_THREADS"] = str(t)
+        env["RUNREC_FILE"] = str(stem.with_suffix(".rec"))
+        stem.with_suffix(".rec").unlink(missing_ok=True)
+        cmd = [str(args.bin), str(n), str(b)] + ([str(c)] if c else [])
+
+        runs: List[Tuple[float, str]] = []
+        for _ in range(args.repeats):
+            proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+            for line in proc.stdout.splitlines():
+                parts = line.strip().split(",")
+                if parts[0].startswith("FW_SR") and len(parts) >= 4:
+                    runs.append((float(parts[3]), proc.stdout))
+                    break
+        if not runs:
+            print(f"WARNING: {' '.join(cmd)} (T={t}): no result", file=sys.stderr)
+            return None
+
+        runs.sort(key=lambda r: r[0])
+        time, stdout = runs[(len(runs) - 1) // 2]    # median (lower for even counts)
+        stem.with_suffix(".out").write_text(stdout)
+        self.results[key] = {"ALGO": "FW_SR_DEP" if c else "FW_SR", "N": n, "B": b, "C": c,
+                             "T": t, "TIME": time}
+        print(f"  N={n} B={b} C={c} T={t}: {time:.4f}s")
+        return time
+
+
+def climb(measure, start: int, lo: int, hi: int) -> Tuple[int, float]:
+    """Hill-climb a power-of-two parameter in [lo, hi]; returns (best, time)."""
+    best, best_t = start, measure(start)
+    if best_t is None:
+        raise SystemExit(f"No result for the search start point {start}.")
+    for step in (0.5, 2):
+        while True:
+            cand = int(best * step)
+            if cand < lo or cand > hi:
+                break
+            t = measure(cand)
+            if t is None or t >= best_t:
+                break
+            best, best_t = cand, t
+        # went down successfully: no need to try the other direction
+        if best != start:
+            break
+    return best, best_t
+
+
+def auto_search(sweep: Sweep, n: int, t: int) -> Dict[str, Dict[str, object]]:
+    b0 = min(sweep.args.b[0], n)
+    found: Dict[str, Dict[str, object]] = {}
+
+    b, time = climb(lambda b: sweep.measure(n, b, 0, t), b0, min(8, n), n)
+    found["FW_SR"] = {"B": b, "C": 0, "TIME": time}
+
+    bd, _ = climb(lambda b: sweep.measure(n, b, min(4 * b, n), t), b, min(8, n), n)
+    c, time = climb(lambda c: sweep.measure(n, bd, c, t), min(4 * bd, n), bd, n)
+    found["FW_SR_DEP"] = {"B": bd, "C": c, "TIME": time}
+    return found
+
+
+def grid(sweep: Sweep, n: int, t: int) -> Dict[str, Dict[str, object]]:
+    found: Dict[str, Dict[str, object]] = {}
+    for b in sweep.args.b:
+        for c in sweep.args.c:
+            time = sweep.measure(n, b, c, t)
+            algo = "FW_SR_DEP" if c else "FW_SR"
+            if time is not None and (algo not in found or time < found[algo]["TIME"]):
+                found[algo] = {"B": b, "C": c, "TIME": time}
+    return found
+
+
+def format_table(results: Dict[Point, Dict[str, object]]) -> str:
+    lines = ["ALGO\tN\tB\tC\tT\tTIME"]
+    for key in sorted(results):
+        r = results[key]
+        lines.append(f"{r['ALGO']}\t{r['N']}\t{r['B']}\t{r['C']}\t{r['T']}\t{r['TIME']:.4f}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sweep / search N, B and task size for fw_sr_p.")
+    parser.add_argument("--bin", type=Path, default=br.REPO_ROOT / "a2" / "FW" / "fw_sr_p")
+    parser.add_argument("--n", nargs="+", type=int, default=[1024, 2048, 4096])
+    parser.add_argument("--b", nargs="+", type=int, default=[16, 32, 64, 128, 256],
+                        help="Base-case sizes (with --auto: the first one is the search start).")
+    parser.add_argument("--c", nargs="+", type=int, default=[0, 64, 256],
+                        help="Task sizes, 0 = nested tasks + taskwait (ignored with --auto).")
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per point (median kept).")
+    parser.add_argument("--auto", action="store_true", help="Search B (and C) instead of the grid.")
+    parser.add_argument("--bench-dir", type=Path, default=br.A2_FW_BENCH,
+                        help="Where the .out/.rec files go (default: a2/FW/benchmarks).")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory for the table/json (default: tools/analysis).")
+    args = parser.parse_args()
+    args.bin = args.bin.resolve()
+    if not args.bin.exists():
+        parser.error(f"{args.bin} not found (build it first)")
+    if args.repeats < 1:
+        parser.error("--repeats must be >= 1")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    args.bench_dir.mkdir(parents=True, exist_ok=True)
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    sweep = Sweep(args)
+
+    best: Dict[str, Dict[str, object]] = {}
+    for n in args.n:
+        for t in args.threads:
+            print(f"N={n} T={t}:")
+            found = auto_search(sweep, n, t) if args.auto else grid(sweep, n, t)
+            for algo, f in found.items():
+                best[f"N{n}|T{t}|{algo}"] = f
+                print(f"N={n} T={t} {algo}: best B={f['B']} C={f['C']} ({f['TIME']:.4f}s)")
+
+    table = args.outdir / "results_fw_sweep.txt"
+    table.write_text(format_table(sweep.results))
+    path = args.outdir / BEST_FILE
+    merged = json.loads(path.read_text()) if path.exists() else {}
+    merged.update(best)
+    path.write_text(json.dumps(merged, indent=2, sort_keys=True) + "\n")
+    print(f"Wrote {table}, {path} and {len(sweep.results)} runs in {args.bench_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+ctypes binding for libfw.so (a2/FW/fw_paths.c): all-pairs shortest paths with
+path reconstruction and incremental edge-weight decreases, plus the
+benchmarked engines (fw, fw_tiled, fw_sr_p; a2/FW/fw_engines.c).
+
+The next hops live in fw_paths.c's own solver (fw_solve, the naive k-i-j
+sweep with the rows in parallel); the benchmarked engines compute distances
+only, so the repair is timed against fw_sr_p, the engine the sweeps run.
+
+Build the library first:  make -C a2/FW libfw.so   (or set FWLIB=/path/to/libfw.so)
+
+API:
+    g = FWGraph.load("graph.txt")          # "n" line, then "u v w" lines
+    g = FWGraph.from_edges(n, [(u, v, w), ...])
+    g = FWGraph.random(1024, seed=-1)      # graph_init_random's complete graph
+    g.solve()                              # O(n^3), distances + next hops
+    g.distance(i, j), g.path(i, j)         # None / [] when j is unreachable
+    g.decrease_edges([(u, v, w), ...])     # O(n^2) per edge, w must be lower
+    g.set_edges([(u, v, w), ...])          # any change; increases recompute
+    g.solve_engine("fw_sr_p", b=64, c=0)   # distances only, with a benchmarked engine
+
+CLI:
+    python fwlib.py path  (--graph FILE | --random N) I J
+    python fwlib.py check
+    python fwlib.py bench [--n 512 1024 2048] [--updates 1 10 100] [--seed 0]
+                          [--engine fw_sr_p] [--b 64] [--c 0] [--outdir DIR]
+
+check solves the small KNOWN_ANSWERS graphs (negative edges next to
+unreachable pairs, sums near FW_INF) with and without next hops; bench runs
+it first.
+
+bench compares, on the random graph, applying k random decreases (each edge
+set to half its current distance) with the incremental repair against
+recomputing from the updated adjacency with --engine (FULL_S, SPEEDUP) and
+with fw_solve plus next hops (NEXT_S), checks that all three give the same
+matrix and that sampled paths add up to their distance, and writes
+<outdir>/fw_incremental.txt (default tools/analysis/):
+    N  UPDATES  INCR_S  FULL_S  SPEEDUP  NEXT_S  PAIRS  MATCH
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+DEFAULT_LIB = br.REPO_ROOT / "a2" / "FW" / "libfw.so"
+
+FW_INF = (2 ** 31 - 1) // 2      # keep in sync with fw_paths.h
+ENGINES = ("fw", "fw_tiled", "fw_sr_p")
+
+Edge = Tuple[int, int, int]
+_I32P = ctypes.POINTER(ctypes.c_int32)
+_lib = None
+
+
+def load_library(path: Optional[Path] = None) -> ctypes.CDLL:
+    global _lib
+    if _lib is None:
+        path = Path(path or os.environ.get("FWLIB", DEFAULT_LIB))
+        if not path.exists():
+            raise FileNotFoundError(f"{path} not found (make -C a2/FW libfw.so)")
+        lib = ctypes.CDLL(str(path))
+        lib.fw_graph_random.argtypes = [_I32P, ctypes.c_int, ctypes.c_int]
+        lib.fw_graph_random.restype = None
+        lib.fw_solve.argtypes = [_I32P, _I32P, ctypes.c_int]
+        lib.fw_solve.restype = None
+        lib.fw_engine_solve.argtypes = [ctypes.c_char_p, _I32P, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.fw_engine_solve.restype = ctypes.c_int
+        lib.fw_decrease_edges.argtypes = [_I32P, _I32P, ctypes.c_int, _I32P, ctypes.c_int]
+        lib.fw_decrease_edges.restype = ctypes.c_long
+        lib.fw_path.argtypes = [_I32P, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                _I32P, ctypes.c_int]
+        lib.fw_path.restype = ctypes.c_int
+        _lib = lib
+    return _lib
+
+
+class FWGraph:
+    """A weighted digraph plus its solved distance / next-hop matrices."""
+
+    def __init__(self, n: int, next_hops: bool = True):
+        self.lib = load_library()
+        self.n = n
+        size = n * n
+        self.adj = (ctypes.c_int32 * size)(*([FW_INF] * size))
+        for i in range(n):
+            self.adj[i * n + i] = 0
+        self.dist = (ctypes.c_int32 * size)()
+        self.next = (ctypes.c_int32 * size)() if next_hops else None
+        self.solved = False
+
+    # -- construction -------------------------------------------------------
+
+    @classmethod
+    def random(cls, n: int, seed: int = -1, next_hops: bool = True) -> "FWGraph":
+        g = cls(n, next_hops)
+        g.lib.fw_graph_random(g.adj, n, seed)
+        return g
+
+    @classmethod
+    def from_edges(cls, n: int, edges: Iterable[Edge], next_hops: bool = True) -> "FWGraph":
+        g = cls(n, next_hops)
+        for u, v, w in edges:
+            g._check(u, v)
+            g.adj[u * n + v] = min(g.adj[u * n + v], w) if u != v else 0
+        return g
+
+    @classmethod
+    def load(cls, path: Path, next_hops: bool = True) -> "FWGraph":
+        """Text file: the vertex count, then one "u v w" edge per line (# comments)."""
+        lines = [l.split("#", 1)[0].split() for l in Path(path).read_text().splitlines()]
+        lines = [l for l in lines if l]
+        if not lines or len(lines[0]) != 1:
+            raise ValueError(f"{path}: first line must be the vertex count")
+        edges = [(int(u), int(v), int(w)) for u, v, w in lines[1:]]
+        return cls.from_edges(int(lines[0][0]), edges, next_hops)
+
+    def _check(self, u: int, v: int) -> None:
+        if not (0 <= u < self.n and 0 <= v < self.n):
+            raise IndexError(f"vertex out of range: ({u}, {v}) with n={self.n}")
+
+    # -- solving / queries --------------------------------------------------
+
+    def solve(self) -> None:
+        ctypes.memmove(self.dist, self.adj, ctypes.sizeof(self.adj))
+        self.lib.fw_solve(self.dist, self.next, self.n)
+        self.solved = True
+
+    def solve_engine(self, engine: str, b: int = 64, c: int = 0) -> None:
+        """
+        Distances with a benchmarked engine (fw_engines.c); next hops are
+        dropped. Like the binaries, only for graphs without FW_INF entries
+        and with non-negative weights (FWGraph.random's).
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine {engine!r} (one of {', '.join(ENGINES)})")
+        ctypes.memmove(self.dist, self.adj, ctypes.sizeof(self.adj))
+        rc = self.lib.fw_engine_solve(engine.encode(), self.dist, self.n, b, c)
+        if rc == -2:
+            raise ValueError(f"{engine} does not take n={self.n}, B={b}, C={c}")
+        if rc:
+            raise MemoryError(f"{engine}: row pointers for n={self.n}")
+        self.next = None
+        self.solved = True
+
+    def _require_solved(self) -> None:
+        if not self.solved:
+            self.solve()
+
+    def distance(self, i: int, j: int) -> Optional[int]:
+        self._check(i, j)
+        self._require_solved()
+        d = self.dist[i * self.n + j]
+        return None if d >= FW_INF else d
+
+    def path(self, i: int, j: int) -> List[int]:
+        if self.next is None:
+            raise ValueError("graph was built with next_hops=False")
+        self._check(i, j)
+        self._require_solved()
+        buf = (ctypes.c_int32 * self.n)()
+        count = self.lib.fw_path(self.next, self.n, i, j, buf, self.n)
+        return list(buf[:min(count, self.n)])
+
+    def decrease_edges(self, edges: Sequence[Edge]) -> int:
+        """Lower edge weights, repairing in O(n^2) each; returns pairs improved."""
+        self._require_solved()
+        flat: List[int] = []
+        for u, v, w in edges:
+            self._check(u, v)
+            if w >= self.adj[u * self.n + v]:
+                raise ValueError(f"edge ({u}, {v}): {w} is not a decrease "
+                                 f"from {self.adj[u * self.n + v]}")
+            flat.extend((u, v, w))
+        arr = (ctypes.c_int32 * len(flat))(*flat)
+        changed = self.lib.fw_decrease_edges(self.dist, self.next, self.n, arr, len(edges))
+        if changed < 0:
+            self.solved = False     # partially applied: recompute on next query
+            raise ValueError("update rejected (negative cycle or bad edge)")
+        for u, v, w in edges:
+            self.adj[u * self.n + v] = w
+        return changed
+
+    def set_edges(self, edges: Sequence[Edge]) -> Optional[int]:
+        """
+        Set edge weights. Pure decreases go through decrease_edges; if any
+        weight goes up, the adjacency is updated and everything recomputed
+        (returns None then).
+        """
+        if all(w < self.adj[u * self.n + v] for u, v, w in edges):
+            return self.decrease_edges(edges)
+        for u, v, w in edges:
+            self._check(u, v)
+            self.adj[u * self.n + v] = w
+        self.solve()
+        return None
+
+
+# --------------------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------------------
+
+def _path_weight(g: FWGraph, path: List[int]) -> int:
+    return sum(g.adj[a * g.n + b] for a, b in zip(path, path[1:]))
+
+
+# (n, edges, decreases applied after the solve, {(i, j): distance, None = unreachable})
+KNOWN_ANSWERS = [
+    # INF + a negative edge must stay INF
+    (3, [(0, 1, -5)], [], {(0, 1): -5, (0, 2): None, (1, 0): None}),
+    (3, [(0, 1, 4), (1, 2, -2), (0, 2, 3)], [], {(0, 2): 2, (1, 2): -2, (2, 0): None}),
+    # the repair's d(0,1) + w + d(2,3) is past INT32_MAX
+    (4, [(0, 1, FW_INF - 2), (2, 3, FW_INF - 2)], [(1, 2, FW_INF - 3)],
+     {(0, 3): None, (1, 2): FW_INF - 3, (0, 1): FW_INF - 2}),
+]
+
+
+def check_known_answers() -> List[str]:
+    failures: List[str] = []
+    for n, edges, decreases, expect in KNOWN_ANSWERS:
+        for next_hops in (True, False):
+            g = FWGraph.from_edges(n, edges, next_hops)
+            g.solve()
+            if decreases:
+                g.decrease_edges(decreases)
+            for (i, j), d in expect.items():
+                got = g.distance(i, j)
+                if got != d:
+                    failures.append(f"n={n} edges={edges} decreases={decreases} next_hops={next_hops}: "
+                                    f"d({i},{j}) = {got}, expected {d}")
+    return failures
+
+
+def check(_args: argparse.Namespace) -> None:
+    failures = check_known_answers()
+    for f in failures:
+        print(f"FAIL {f}", file=sys.stderr)
+    print(f"{len(KNOWN_ANSWERS)} known-answer graphs: {'ok' if not failures else f'{len(failures)} failure(s)'}")
+    if failures:
+        sys.exit(1)
+
+
+def bench(args: argparse.Namespace) -> None:
+    check(args)
+    rng = random.Random(args.seed)
+    lines = ["N\tUPDATES\tINCR_S\tFULL_S\tSPEEDUP\tNEXT_S\tPAIRS\tMATCH"]
+    ok = True
+    for n in args.n:
+        base = FWGraph.random(n)
+        t0 = time.perf_counter()
+        base.solve()
+        print(f"N={n}: fw_solve + next hops {time.perf_counter() - t0:.4f}s")
+        size = ctypes.sizeof(base.adj)
+
+        for k in args.updates:
+            g = FWGraph(n)
+            ctypes.memmove(g.adj, base.adj, size)
+            ctypes.memmove(g.dist, base.dist, size)
+            ctypes.memmove(g.next, base.next, size)
+            g.solved = True
+
+            edges: List[Edge] = []
+            while len(edges) < k:
+                u, v = rng.randrange(n), rng.randrange(n)
+                # half the current distance: always a decrease, and one
+                # that shortens at least the pair (u, v)
+                d = g.dist[u * n + v]
+                if u != v and d > 1 and all((u, v) != e[:2] for e in edges):
+                    edges.append((u, v, d // 2))
+
+            t0 = time.perf_counter()
+            pairs = g.decrease_edges(edges)
+            incr = time.perf_counter() - t0
+
+            full = FWGraph(n, next_hops=False)
+            ctypes.memmove(full.adj, g.adj, size)
+            t0 = time.perf_counter()
+            full.solve_engine(args.engine, args.b, args.c)
+            full_t = time.perf_counter() - t0
+
+            with_next = FWGraph(n)
+            ctypes.memmove(with_next.adj, g.adj, size)
+            t0 = time.perf_counter()
+            with_next.solve()
+            next_t = time.perf_counter() - t0
+
+            match = bytes(g.dist) == bytes(full.dist) == bytes(with_next.dist)
+            for _ in range(32):
+                i, j = rng.randrange(n), rng.randrange(n)
+                p = g.path(i, j)
+                match &= bool(p) and p[0] == i and p[-1] == j and _path_weight(g, p) == g.dist[i * n + j]
+            ok &= match
+            lines.append(f"{n}\t{k}\t{incr:.6f}\t{full_t:.6f}\t{full_t / incr:.1f}\t{next_t:.6f}\t"
+                         f"{pairs}\t{'yes' if match else 'NO'}")
+            print(f"N={n} updates={k}: incremental {incr:.6f}s, {args.engine} {full_t:.6f}s, "
+                  f"fw_solve+next {next_t:.6f}s, {pairs} pairs improved, match={match}")
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    out = args.outdir / "fw_incremental.txt"
+    out.write_text("\n".join(lines) + "\n")
+    print(f"Wrote {out}")
+    if not ok:
+        sys.exit(1)
+
+
+def path_cmd(args: argparse.Namespace) -> None:
+    g = FWGraph.load(args.graph) if args.graph else FWGraph.random(args.random)
+    g.solve()
+    d = g.distance(args.i, args.j)
+    if d is None:
+        print(f"{args.i} -> {args.j}: unreachable")
+        return
+    print(f"{args.i} -> {args.j}: distance {d}, path {' '.join(map(str, g.path(args.i, args.j)))}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Shortest paths / incremental updates with libfw.so.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("path", help="Print the shortest path i -> j.")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--graph", type=Path, help="Edge list file (n, then u v w lines).")
+    src.add_argument("--random", type=int, metavar="N", help="graph_init_random graph of N vertices.")
+    p.add_argument("i", type=int)
+    p.add_argument("j", type=int)
+
+    sub.add_parser("check", help="Known-answer graphs, with and without next hops.")
+
+    b = sub.add_parser("bench", help="Incremental repair vs full recompute.")
+    b.add_argument("--n", nargs="+", type=int, default=[512, 1024, 2048])
+    b.add_argument("--updates", nargs="+", type=int, default=[1, 10, 100])
+    b.add_argument("--seed", type=int, default=0, help="Seed for the chosen edges.")
+    b.add_argument("--engine", choices=ENGINES, default="fw_sr_p",
+                   help="Engine of the full recompute (default: fw_sr_p, as the sweeps run it).")
+    b.add_argument("--b", type=int, default=64, help="Block size B of fw_tiled / fw_sr_p (default: 64).")
+    b.add_argument("--c", type=int, default=0, help="fw_sr_p's task size C (default: 0, nested tasks).")
+    b.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                   help="Output directory (default: tools/analysis).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.cmd == "bench":
+        bench(args)
+    elif args.cmd == "check":
+        check(args)
+    else:
+        path_cmd(args)
+
+
+if __name__ == "__main__":
+    main()
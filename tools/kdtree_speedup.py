@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Speedup of the kd-tree filtering kmeans (omp_kdtree_kmeans) over the brute
+force assignment, against numCoords.
+
+Usage:
+    python kdtree_speedup.py [--bench-dir a2/kmeans/benchmarks] [--base reduction]
+                             [--outdir DIR] [--no-plots]
+    python kdtree_speedup.py --run [--coords 1 2 4 8 16 32] [--size 256]
+                             [--clusters 32] [--loops 10] [--threads 1 8]
+                             [--bin-dir a2/kmeans] [--aff local] ...
+
+The report pairs every kdtree/<aff>/<tag> run with the --base kind's run
+(reduction by default, or serial / naive) of the same dataset, loops,
+threads, affinity, placement, precision and seeding. float runs
+(<kind>_f32/) are paired with each other.
+
+--run first runs --base's binary and omp_kdtree_kmeans over the --coords x
+--threads grid on this machine and stores them like run_on_queue.sh does
+(<bench-dir>/<kind>/<aff>/<tag>/{output.txt,meta.txt}, AFF_LABEL=--aff),
+so they are reported together with the queue runs.
+
+Outputs (in --outdir, default tools/analysis/):
+    kdtree_speedup.txt   one row per pair: ... BASE_TOTAL KD_TOTAL KD_BUILD
+                         SPEEDUP (total, tree build included) and
+                         LOOP_SPEEDUP (loops only, build left out)
+    kdtree_speedup.png   both speedups vs numCoords, one line per
+                         (clusters, threads, precision)
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+KD_KIND = "kdtree"
+KD_BIN = "omp_kdtree_kmeans"
+# run_on_queue.sh's BIN -> benchmarks/<kind> mapping
+BASE_BINS = {"serial": "seq_kmeans", "naive": "omp_naive_kmeans", "reduction": "omp_reduction_kmeans"}
+
+COLUMNS = ("SIZE", "COORDS", "CLUSTERS", "LOOPS", "T", "AFF", "PRECISION", "SEEDING", "BASE",
+           "BASE_TOTAL", "KD_TOTAL", "KD_BUILD", "SPEEDUP", "LOOP_SPEEDUP")
+PAIR_KEYS = ("SIZE", "COORDS", "CLUSTERS", "LOOPS", "T", "AFF", "INIT", "PRECISION", "SEEDING")
+
+
+def run_grid(args: argparse.Namespace) -> None:
+    for kind, binary in ((args.base, BASE_BINS[args.base]), (KD_KIND, KD_BIN)):
+        path = args.bin_dir / binary
+        if not path.exists():
+            raise SystemExit(f"{path} not found (make -C a2/kmeans {binary})")
+        for coords in args.coords:
+            for t in args.threads:
+                tag = f"S{args.size}_N{coords}_C{args.clusters}_L{args.loops}_T{t}"
+                run_dir = args.bench_dir / kind / args.aff / tag
+                run_dir.mkdir(parents=True, exist_ok=True)
+                env = dict(os.environ, OMP_NUM_THREADS=str(t), RUNREC_FILE=str(run_dir / "run.rec"))
+                cmd = [str(path), "-s", str(args.size), "-n", str(coords), "-c", str(args.clusters),
+                       "-l", str(args.loops)]
+                proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+                (run_dir / "output.txt").write_text(proc.stdout)
+                (run_dir / "meta.txt").write_text(
+                    "".join(f"[run_on_queue] {k}={v}\n" for k, v in (
+                        ("BIN", binary), ("OMP_NUM_THREADS", t), ("AFF_LABEL", args.aff),
+                        ("INIT_MODE", "serial"), ("PRECISION", "double"), ("SEEDING", "first"))))
+                parsed = br.parse_kmeans_output(run_dir / "output.txt")
+                if proc.returncode != 0 or parsed is None:
+                    print(f"WARNING: {' '.join(cmd)} (T={t}) failed", file=sys.stderr)
+                    continue
+                print(f"  {binary} N={coords} T={t}: {parsed['TOTAL']:.4f}s")
+
+
+def pair_runs(rows: List[Dict[str, object]], base: str) -> List[Dict[str, object]]:
+    kd: Dict[Tuple, Dict[str, object]] = {}
+    ref: Dict[Tuple, Dict[str, object]] = {}
+    for r in rows:
+        kind = str(r["KIND"]).removesuffix("_f32")
+        key = tuple(r[k] for k in PAIR_KEYS)
+        # last (sorted) run wins for repeated configurations
+        if kind == KD_KIND:
+            kd[key] = r
+        elif kind == base:
+            ref[key] = r
+
+    pairs: List[Dict[str, object]] = []
+    for key in sorted(kd.keys() & ref.keys()):
+        k, b = kd[key], ref[key]
+        build = float(k.get("KD_BUILD", 0.0))
+        row = dict(zip(PAIR_KEYS, key))
+        row.update(BASE=base, BASE_TOTAL=b["TOTAL"], KD_TOTAL=k["TOTAL"], KD_BUILD=build,
+                   SPEEDUP=round(b["TOTAL"] / k["TOTAL"], 2),
+                   LOOP_SPEEDUP=round(b["TOTAL"] / max(k["TOTAL"] - build, 1e-9), 2))
+        pairs.append(row)
+    return pairs
+
+
+def plot_speedup(pairs: List[Dict[str, object]], outdir: Path) -> Path:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    series: Dict[Tuple, List[Dict[str, object]]] = defaultdict(list)
+    for p in pairs:
+        series[(p["CLUSTERS"], p["T"], p["PRECISION"], p["AFF"])].append(p)
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for (clusters, t, precision, aff), ps in sorted(series.items()):
+        ps.sort(key=lambda p: p["COORDS"])
+        xs = [p["COORDS"] for p in ps]
+        line, = ax.plot(xs, [p["SPEEDUP"] for p in ps], marker="o",
+                        label=f"C={clusters} T={t} {precision} {aff}")
+        ax.plot(xs, [p["LOOP_SPEEDUP"] for p in ps], marker=".", linestyle="--",
+                color=line.get_color())
+    ax.axhline(1.0, color="gray", linewidth=0.8)
+    ax.set_xscale("log", base=2)
+    ax.set_yscale("log")
+    ax.set_xlabel("numCoords")
+    ax.set_ylabel(f"Speedup over {pairs[0]['BASE']}")
+    ax.set_title("kd-tree filtering kmeans vs brute force assignment\n"
+                 "(solid: total incl. tree build; dashed: loops only)")
+    ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+    ax.legend(fontsize=7)
+    out = outdir / "kdtree_speedup.png"
+    fig.tight_layout()
+    fig.savefig(out, dpi=150)
+    plt.close(fig)
+    return out
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="kd-tree kmeans speedup vs numCoords.")
+    parser.add_argument("--bench-dir", type=Path, default=br.A2_KMEANS_BENCH,
+                        help="kmeans benchmarks tree (default: a2/kmeans/benchmarks).")
+    parser.add_argument("--base", choices=sorted(BASE_BINS), default="reduction",
+                        help="Brute force kind to compare against (default: reduction).")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis).")
+    parser.add_argument("--no-plots", action="store_true", help="Only write the table.")
+    run = parser.add_argument_group("--run: measure here first")
+    run.add_argument("--run", action="store_true", help="Run the --coords x --threads grid.")
+    run.add_argument("--bin-dir", type=Path, default=br.REPO_ROOT / "a2" / "kmeans")
+    run.add_argument("--coords", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    run.add_argument("--size", type=int, default=256, help="Dataset size in MB (-s).")
+    run.add_argument("--clusters", type=int, default=32)
+    run.add_argument("--loops", type=int, default=10)
+    run.add_argument("--threads", nargs="+", type=int, default=[1, 8])
+    run.add_argument("--aff", default="local", help="AFF_LABEL of the runs (default: local).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.run:
+        run_grid(args)
+    pairs = pair_runs(br.collect_kmeans_runs(args.bench_dir), args.base)
+    if not pairs:
+        raise SystemExit(f"No {KD_KIND} runs with a matching {args.base} run under {args.bench_dir}.")
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    table = args.outdir / "kdtree_speedup.txt"
+    table.write_text(br.format_kmeans_table(pairs, COLUMNS))
+    print(f"Wrote {table} ({len(pairs)} pairs)")
+    if not args.no_plots:
+        print(f"Wrote {plot_speedup(pairs, args.outdir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+ctypes binding for the kernels built as shared libraries: the a2 kmeans
+engines (a2/kmeans/kmeans_lib.c) and a1's life_par -l u8 sweep
+(a1/life_lib.c); Floyd-Warshall comes from fwlib.py's libfw.so. A dataset
+is generated once and can then be run any number of times, with any thread
+count, in this process (bench_worker.py serves requests this way).
+
+Build the libraries first:
+    make -C a2/kmeans libkmeans.so     (or set KMEANSLIB=/path/to/libkmeans.so)
+    make -C a1 liblife.so              (or set LIFELIB=/path/to/liblife.so)
+    make -C a2/FW libfw.so             (or set FWLIB=/path/to/libfw.so)
+
+API:
+    set_threads(8)                             # omp_set_num_threads for all three
+    d = KmeansData(size_mb=32, coords=16)      # main.c's dataset for -s 32 -n 16
+    d.run("reduction", clusters=32, loops=10)  # {"NLOOPS", "TOTAL", "PER_LOOP", "CLUSTERS"}
+    b = LifeBoard(4096)                        # life_par's initial board for N=4096
+    b.run(steps=100)                           # {"TIME", "ALIVE"}
+    g = FWData(2048)                           # graph_init_random's graph
+    g.run("fw_sr_p", b=64, c=0)                # {"TIME"}; fw, fw_tiled or fw_sr_p
+
+The kernels print what they print in the binaries, to the process' stdout.
+TOTAL / TIME are the kernels' own timings (what the binaries print); FW's
+is taken around fw_engine_solve, the same call the binaries time.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import bench_results as br
+import fwlib
+
+KMEANS_LIB = br.REPO_ROOT / "a2" / "kmeans" / "libkmeans.so"
+LIFE_LIB = br.REPO_ROOT / "a1" / "liblife.so"
+
+KMEANS_ENGINES = ("serial", "naive", "reduction", "kdtree")
+FW_ENGINES = fwlib.ENGINES                             # fw, fw_tiled, fw_sr_p
+INIT_MODES = ("serial", "first-touch", "interleave")   # common/numa_init.h order
+
+_DP = ctypes.POINTER(ctypes.c_double)
+_U8P = ctypes.POINTER(ctypes.c_uint8)
+_kmeans = None
+_life = None
+_gomp = None
+
+
+def _open(path: Path, env: str, target: str) -> ctypes.CDLL:
+    path = Path(os.environ.get(env, path))
+    if not path.exists():
+        raise FileNotFoundError(f"{path} not found (make -C {path.parent.relative_to(br.REPO_ROOT)} {target})")
+    return ctypes.CDLL(str(path))
+
+
+def load_kmeans() -> ctypes.CDLL:
+    global _kmeans
+    if _kmeans is None:
+        lib = _open(KMEANS_LIB, "KMEANSLIB", "libkmeans.so")
+        lib.kmeans_lib_dataset.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.kmeans_lib_dataset.restype = _DP
+        lib.kmeans_lib_free.argtypes = [ctypes.c_void_p]
+        lib.kmeans_lib_free.restype = None
+        lib.kmeans_lib_run.argtypes = [ctypes.c_char_p, _DP, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                       ctypes.c_double, ctypes.c_long, ctypes.POINTER(ctypes.c_int),
+                                       _DP, _DP]
+        lib.kmeans_lib_run.restype = ctypes.c_int
+        _kmeans = lib
+    return _kmeans
+
+
+def load_life() -> ctypes.CDLL:
+    global _life
+    if _life is None:
+        lib = _open(LIFE_LIB, "LIFELIB", "liblife.so")
+        lib.life_lib_stride.argtypes = [ctypes.c_int]
+        lib.life_lib_stride.restype = ctypes.c_int
+        lib.life_lib_alloc.argtypes = [ctypes.c_int, ctypes.c_int]
+        lib.life_lib_alloc.restype = _U8P
+        lib.life_lib_init.argtypes = [_U8P, ctypes.c_int]
+        lib.life_lib_init.restype = None
+        lib.life_lib_free.argtypes = [ctypes.c_void_p]
+        lib.life_lib_free.restype = None
+        lib.life_lib_run.argtypes = [_U8P, _U8P, _U8P, ctypes.c_int, ctypes.c_int,
+                                     ctypes.POINTER(ctypes.c_long)]
+        lib.life_lib_run.restype = ctypes.c_double
+        _life = lib
+    return _life
+
+
+def set_threads(n: int) -> None:
+    """omp_set_num_threads(n) for the calling thread: all three libraries share libgomp."""
+    global _gomp
+    if _gomp is None:
+        _gomp = ctypes.CDLL("libgomp.so.1")
+        _gomp.omp_set_num_threads.argtypes = [ctypes.c_int]
+    _gomp.omp_set_num_threads(n)
+
+
+def init_mode(name: str) -> int:
+    if name not in INIT_MODES:
+        raise ValueError(f"unknown init mode {name!r} (one of {', '.join(INIT_MODES)})")
+    return INIT_MODES.index(name)
+
+
+class KmeansData:
+    """main.c's generated objects for -s size_mb -n coords, plus a membership array."""
+
+    def __init__(self, size_mb: float, coords: int, init: str = "serial"):
+        self.lib = load_kmeans()
+        self.size_mb, self.coords = size_mb, coords
+        self.num_objs = br.kmeans_num_objs(size_mb, coords)
+        self.objects = self.lib.kmeans_lib_dataset(self.num_objs, coords, init_mode(init))
+        if not self.objects:
+            raise MemoryError(f"dataset of {self.num_objs} x {coords} doubles")
+        self.membership = (ctypes.c_int * self.num_objs)()
+
+    def run(self, engine: str, clusters: int, loops: int = 10, threshold: float = 0.001) -> Dict[str, object]:
+        if engine not in KMEANS_ENGINES:
+            raise ValueError(f"unknown engine {engine!r} (one of {', '.join(KMEANS_ENGINES)})")
+        if not 1 < clusters <= self.num_objs:
+            raise ValueError(f"clusters must be in 2..{self.num_objs}")
+        centers = (ctypes.c_double * (clusters * self.coords))()
+        total = ctypes.c_double()
+        nloops = self.lib.kmeans_lib_run(engine.encode(), self.objects, self.coords, self.num_objs,
+                                         clusters, threshold, loops, self.membership, centers,
+                                         ctypes.byref(total))
+        if nloops == -2:
+            raise ValueError("some initial clusters are repeated")
+        return {"NLOOPS": nloops, "TOTAL": total.value, "PER_LOOP": total.value / max(nloops, 1),
+                "CLUSTERS": [list(centers[i * self.coords:(i + 1) * self.coords]) for i in range(clusters)]}
+
+    def close(self) -> None:
+        if self.objects:
+            self.lib.kmeans_lib_free(self.objects)
+            self.objects = None
+
+
+class LifeBoard:
+    """life_par's initial board for N (-l u8 layout) and the two boards a run sweeps."""
+
+    def __init__(self, n: int, init: str = "serial"):
+        self.lib = load_life()
+        self.n = n
+        mode = init_mode(init)
+        self.init = self.lib.life_lib_alloc(n, mode)
+        self.work = self.lib.life_lib_alloc(n, mode)
+        self.spare = self.lib.life_lib_alloc(n, mode)
+        if not (self.init and self.work and self.spare):
+            raise MemoryError(f"three {n} x {n} boards")
+        self.lib.life_lib_init(self.init, n)
+
+    def run(self, steps: int) -> Dict[str, object]:
+        alive = ctypes.c_long()
+        t = self.lib.life_lib_run(self.init, self.work, self.spare, self.n, steps, ctypes.byref(alive))
+        return {"TIME": t, "ALIVE": alive.value}
+
+    def close(self) -> None:
+        for b in (self.init, self.work, self.spare):
+            if b:
+                self.lib.life_lib_free(b)
+        self.init = self.work = self.spare = None
+
+
+class FWData:
+    """graph_init_random's complete graph on n vertices (fw.c's input) and a distance matrix."""
+
+    def __init__(self, n: int, seed: int = -1):
+        self.lib = fwlib.load_library()
+        self.n = n
+        self.adj = (ctypes.c_int32 * (n * n))()
+        self.dist = (ctypes.c_int32 * (n * n))()
+        self.lib.fw_graph_random(self.adj, n, seed)
+
+    def run(self, engine: str = "fw_sr_p", b: int = 64, c: int = 0) -> Dict[str, object]:
+        """One solve with a benchmarked engine (FW_ENGINES); B / C as the binaries take them."""
+        if engine not in FW_ENGINES:
+            raise ValueError(f"unknown engine {engine!r} (one of {', '.join(FW_ENGINES)})")
+        ctypes.memmove(self.dist, self.adj, ctypes.sizeof(self.adj))
+        t0 = time.perf_counter()
+        rc = self.lib.fw_engine_solve(engine.encode(), self.dist, self.n, b, c)
+        t = time.perf_counter() - t0
+        if rc == -2:
+            raise ValueError(f"{engine} does not take n={self.n}, B={b}, C={c}")
+        if rc:
+            raise MemoryError(f"{engine}: row pointers for n={self.n}")
+        return {"TIME": t}
+
+    def close(self) -> None:
+        self.adj = self.dist = None
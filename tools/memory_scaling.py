@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Memory footprint, page faults and context switches per thread count.
+
+Usage:
+    python memory_scaling.py [--outdir DIR] [--no-plots]
+
+Reads the rusage files that tools/rusage_run.py leaves next to every run
+launched by the run_on_queue.sh scripts (bench_results.RUSAGE_COLUMNS):
+    life    a1/benchmarks/N*_T*/life_<t>_<n>.rusage
+    kmeans  a2/kmeans/benchmarks/<kind>/<aff>/<tag>/rusage.txt
+    locks   a3/benchmarks/<lock>/<tag>/rusage.txt
+    fw      a2/FW/benchmarks/<bin>_N<n>_T<t>.rusage
+Runs without one (older sweeps) are left out.
+
+Outputs (in --outdir, default tools/analysis/):
+    memory_scaling.txt       one row per run: TOTAL / PER_LOOP next to
+                             MAXRSS_MB RSS_PEAK_MB MINFLT MAJFLT NVCSW NIVCSW,
+                             then per series the peak-RSS growth from the
+                             fewest to the most threads (MB per added thread:
+                             per-thread copies such as omp_reduction_kmeans'
+                             local_newClusters show up here)
+    memory_<family>.png      peak RSS, minor / major faults and context
+                             switches against threads, one line per series
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+
+COLUMNS = ("FAMILY", "SERIES", "T", "TOTAL", "PER_LOOP") + br.RUSAGE_COLUMNS
+GROWTH_COLUMNS = ("FAMILY", "SERIES", "T_MIN", "T_MAX", "RSS_MIN_MB", "RSS_MAX_MB", "MB_PER_THREAD",
+                  "MINFLT_RATIO")
+
+Row = Dict[str, object]
+
+
+def collect_rows() -> List[Row]:
+    rows: List[Row] = []
+
+    for r in br.collect_life_runs():
+        init = "" if r["INIT"] == "serial" else f"_{r['INIT']}"
+        rows.append({"FAMILY": "life", "SERIES": f"life_par_N{r['N']}{init}", "T": r["THREADS"],
+                     "TOTAL": r["TIME"], "PER_LOOP": r["TIME"] / r["STEPS"], **_rusage(r)})
+
+    for family, root in (("kmeans", br.A2_KMEANS_BENCH), ("locks", br.A3_BENCH)):
+        for r in br.collect_kmeans_runs(root):
+            tag = re.sub(r"_T\d+", "", str(r["RUN_TAG"]))
+            kind = f"{r['KIND']}/{r['AFF']}" if family == "kmeans" else str(r["KIND"])
+            rows.append({"FAMILY": family, "SERIES": f"{kind}:{tag}", "T": r["THREADS"],
+                         "TOTAL": r["TOTAL"], "PER_LOOP": r["PER_LOOP"], **_rusage(r)})
+
+    for r in br.collect_fw_runs():
+        binary = Path(str(r["SOURCE"])).stem.split("_N")[0]
+        extra = (f"_B{r['B']}" if r["B"] else "") + (f"_C{r['C']}" if r["C"] else "")
+        rows.append({"FAMILY": "fw", "SERIES": f"{binary}_N{r['N']}{extra}", "T": r["THREADS"],
+                     "TOTAL": r["TIME"], "PER_LOOP": "-", **_rusage(r)})
+
+    rows = [r for r in rows if "MAXRSS_MB" in r]
+    rows.sort(key=lambda r: (r["FAMILY"], r["SERIES"], r["T"]))
+    return rows
+
+
+def _rusage(row: Row) -> Row:
+    return {c: row[c] for c in br.RUSAGE_COLUMNS if c in row}
+
+
+def by_series(rows: List[Row]) -> Dict[tuple, List[Row]]:
+    series: Dict[tuple, List[Row]] = defaultdict(list)
+    for r in rows:
+        series[(r["FAMILY"], r["SERIES"])].append(r)
+    return series
+
+
+def growth(rows: List[Row]) -> List[Row]:
+    """Peak-RSS change from the fewest to the most threads, per series (median over repeats)."""
+    out: List[Row] = []
+    for (family, name), runs in sorted(by_series(rows).items()):
+        per_t: Dict[int, List[Row]] = defaultdict(list)
+        for r in runs:
+            per_t[int(r["T"])].append(r)
+        if len(per_t) < 2:
+            continue
+        lo, hi = min(per_t), max(per_t)
+        rss = {t: _median([float(r.get("RSS_PEAK_MB", r["MAXRSS_MB"])) for r in per_t[t]]) for t in (lo, hi)}
+        flt = {t: _median([float(r["MINFLT"]) for r in per_t[t] if "MINFLT" in r] or [0.0]) for t in (lo, hi)}
+        out.append({"FAMILY": family, "SERIES": name, "T_MIN": lo, "T_MAX": hi,
+                    "RSS_MIN_MB": rss[lo], "RSS_MAX_MB": rss[hi],
+                    "MB_PER_THREAD": (rss[hi] - rss[lo]) / (hi - lo),
+                    "MINFLT_RATIO": flt[hi] / flt[lo] if flt[lo] else float("nan")})
+    return out
+
+
+def _median(xs: List[float]) -> float:
+    xs = sorted(xs)
+    mid = len(xs) // 2
+    return xs[mid] if len(xs) % 2 else 0.5 * (xs[mid - 1] + xs[mid])
+
+
+def plot_family(family: str, rows: List[Row], outdir: Path) -> Path:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    panels = (("RSS_PEAK_MB", "Peak RSS (MB)"), ("MINFLT", "Minor page faults"),
+              ("MAJFLT", "Major page faults"), ("NVCSW", "Context switches (solid: vol., dashed: invol.)"))
+    fig, axes = plt.subplots(2, 2, figsize=(12, 8), sharex=True)
+    for (name, runs) in sorted((k[1], v) for k, v in by_series(rows).items()):
+        color = None
+        for ax, (col, _) in zip(axes.flat, panels):
+            pts = sorted((int(r["T"]), float(r[col])) for r in runs if col in r)
+            if not pts:
+                continue
+            line, = ax.plot([t for t, _ in pts], [v for _, v in pts], "o-", markersize=3,
+                            color=color, label=name)
+            color = line.get_color()
+            if col == "NVCSW":
+                inv = sorted((int(r["T"]), float(r["NIVCSW"])) for r in runs if "NIVCSW" in r)
+                ax.plot([t for t, _ in inv], [v for _, v in inv], "x--", markersize=3, color=color)
+    for ax, (col, label) in zip(axes.flat, panels):
+        ax.set_xscale("log", base=2)
+        if col == "NVCSW":     # from a handful (T=1) to thousands
+            ax.set_yscale("symlog", linthresh=1)
+            ax.set_ylim(0, ax.get_ylim()[1] * 2)
+        else:                  # from 0, so flat lines (the usual case) read as flat
+            ax.set_ylim(0, max(ax.get_ylim()[1], 1) * 1.1)
+        ax.set_ylabel(label)
+        ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+    for ax in axes[1]:
+        ax.set_xlabel("Threads")
+    axes[0][0].legend(fontsize=6)
+    fig.suptitle(f"{family}: memory and scheduling footprint per thread count")
+    out = outdir / f"memory_{family}.png"
+    fig.tight_layout()
+    fig.savefig(out, dpi=150)
+    plt.close(fig)
+    return out
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Peak RSS, page faults and context switches per thread count.")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis).")
+    parser.add_argument("--no-plots", action="store_true", help="Only write the table.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rows = collect_rows()
+    if not rows:
+        raise SystemExit("No runs with a rusage file found (launch them through tools/rusage_run.py, "
+                         "as the run_on_queue.sh scripts do).")
+    grow = growth(rows)
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    table = args.outdir / "memory_scaling.txt"
+    text = br.format_kmeans_table(rows, COLUMNS)
+    if grow:
+        text += "\n" + br.format_kmeans_table(grow, GROWTH_COLUMNS)
+    table.write_text(text)
+    print(f"Wrote {table} ({len(rows)} runs)")
+    for g in grow:
+        print(f"  {g['FAMILY']:6s} {g['SERIES']:40s} T{g['T_MIN']}->T{g['T_MAX']}: "
+              f"{g['RSS_MIN_MB']:.1f} -> {g['RSS_MAX_MB']:.1f} MB ({g['MB_PER_THREAD']:+.2f} MB/thread), "
+              f"minor faults x{g['MINFLT_RATIO']:.2f}")
+
+    if not args.no_plots:
+        families: Dict[str, List[Row]] = defaultdict(list)
+        for r in rows:
+            families[str(r["FAMILY"])].append(r)
+        for family, fr in sorted(families.items()):
+            print(f"Wrote {plot_family(family, fr, args.outdir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Performance-regression detector over the benchmark history.
+
+Usage:
+    python perf_regress.py [record|check|run] [--history FILE] [--report FILE]
+                           [--alpha 0.05] [--min-slowdown 0.05] [--commit SHA]
+                           [--metric time|maxrss_mb|rss_peak_mb|minflt|majflt|nvcsw|nivcsw]
+
+    record  scan the benchmark trees and append unseen runs to the history
+    check   test every (binary, config, threads) series for a slowdown
+    run     record, then check (default)
+
+Sources (same formats the diagram scripts parse, via bench_results):
+    a1/benchmarks/N*_T*/life_*.out
+    a2/kmeans/benchmarks/**/output.txt + meta.txt
+    a3/benchmarks/**/output.txt + meta.txt
+    a2/FW/benchmarks/*.out
+
+Each history record (JSON lines) carries the series key, the measured time,
+the commit the binaries were built from (BUILD_COMMIT, which the
+run_on_queue.sh scripts write into meta.txt and the run record; runs
+without one fall back to --commit / git HEAD at record time, and
+commit_source says which), the meta.txt environment
+(GOMP_CPU_AFFINITY, OMP_NUM_THREADS, AFF_LABEL, ...) and a content hash so
+re-recording the same file is a no-op. Runs launched through
+tools/rusage_run.py also carry their rusage (peak RSS, page faults,
+context switches; bench_results.RUSAGE_COLUMNS, lower-cased), and
+--metric checks one of those instead of the time: a "slowdown" is then
+growth of that counter.
+
+A series is flagged when the samples of its newest commit are slower than
+the earlier ones by at least --min-slowdown AND
+  - Mann-Whitney U (one-sided, new > old) gives p < alpha, when both sides
+    have >= MIN_SAMPLES samples (repeated runs per commit), or
+  - otherwise (one or two runs per commit), the newest commit's median is
+    an outlier against the per-commit medians of the >= MIN_BASELINE
+    earlier commits: robust z = (new - median) / (1.4826 MAD), one-sided
+    normal p < alpha. Fewer earlier commits are not tested (p = 1).
+
+Exit code: 0 no regression, 1 regression(s) found, 2 usage / input error.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import bench_results as br
+import runrec
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_HISTORY = BASE_DIR / "analysis" / "perf_history.jsonl"
+DEFAULT_REPORT = BASE_DIR / "analysis" / "perf_report.json"
+
+MIN_SAMPLES = 3        # per side, for Mann-Whitney
+MIN_BASELINE = 3       # earlier commits, for the robust z-score
+ENV_KEYS = ("GOMP_CPU_AFFINITY", "OMP_NUM_THREADS", "AFF_LABEL", "OMP_PLACES", "OMP_PROC_BIND")
+METRICS = ("time",) + tuple(c.lower() for c in br.RUSAGE_COLUMNS)
+
+
+# --------------------------------------------------------------------------
+# history
+# --------------------------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=br.REPO_ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=br.REPO_ROOT, capture_output=True, text=True).stdout.strip()
+        return f"{sha}+dirty" if dirty else sha
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def build_commit(meta: Dict[str, str], rec_path: Path) -> Optional[str]:
+    """BUILD_COMMIT of a run: from meta.txt, else from the env of its run record."""
+    if meta.get("BUILD_COMMIT"):
+        return meta["BUILD_COMMIT"]
+    try:
+        recs = runrec.read_records(rec_path) if rec_path.exists() else []
+    except (OSError, ValueError):
+        recs = []
+    return next((r.env["BUILD_COMMIT"] for r in recs if r.env.get("BUILD_COMMIT")), None)
+
+
+def _rusage(row: Dict[str, object], path: Path) -> Tuple[Dict[str, object], str]:
+    """The run's rusage fields (lower-cased) and the digest of its rusage file ("" without one)."""
+    if not path.exists():
+        return {}, ""
+    return {c.lower(): row[c] for c in br.RUSAGE_COLUMNS if c in row}, _digest(path)
+
+
+def scan_sources() -> List[Dict[str, object]]:
+    """Current runs on disk as history records (build_commit instead of commit, no recorded_at)."""
+    records: List[Dict[str, object]] = []
+
+    for r in br.collect_life_runs():
+        out = Path(r["DIR"]) / f"life_{r['THREADS']}_{r['N']}.out"
+        rusage, ru_digest = _rusage(r, out.with_suffix(".rusage"))
+        built = build_commit(br.parse_meta(out.with_name("meta.txt")), out.with_suffix(".rec"))
+        records.append({"binary": "life_par", "config": f"N{r['N']}_S{r['STEPS']}",
+                        "threads": r["THREADS"], "time": r["TIME"], "env": {}, "rusage": rusage,
+                        "build_commit": built,
+                        "source": str(out.relative_to(br.REPO_ROOT)),
+                        "mtime": out.stat().st_mtime, "digest": _digest(out) + ru_digest})
+
+    for root in (br.A2_KMEANS_BENCH, br.A3_BENCH):
+        for r in br.collect_kmeans_runs(root):
+            out = Path(r["DIR"]) / "output.txt"
+            meta = r["META"]
+            # drop only the thread count: the _ft/_msplit/_kpar/... suffixes are part of the config
+            tag = re.sub(r"_T\d+", "", str(r["RUN_TAG"]))
+            rusage, ru_digest = _rusage(r, out.with_name("rusage.txt"))
+            records.append({"binary": r["BIN"], "config": f"{tag}:{r['AFF']}",
+                            "threads": r["THREADS"], "time": r["TOTAL"],
+                            "env": {k: meta[k] for k in ENV_KEYS if k in meta}, "rusage": rusage,
+                            "build_commit": build_commit(meta, out.with_name("run.rec")),
+                            "source": str(out.relative_to(br.REPO_ROOT)),
+                            "mtime": out.stat().st_mtime,
+                            "digest": (_digest(out) + _digest(out.with_name("meta.txt"))
+                                       if out.with_name("meta.txt").exists() else _digest(out)) + ru_digest})
+
+    for r in br.collect_fw_runs():
+        out = Path(r["SOURCE"])
+        binary = out.stem.split("_N")[0]
+        config = f"N{r['N']}" + (f"_B{r['B']}" if r["B"] else "") + (f"_C{r['C']}" if r["C"] else "")
+        rusage, ru_digest = _rusage(r, out.with_suffix(".rusage"))
+        records.append({"binary": binary, "config": config, "threads": r["THREADS"],
+                        "time": r["TIME"], "env": {}, "rusage": rusage,
+                        "build_commit": build_commit({}, out.with_suffix(".rec")),
+                        "source": str(out.relative_to(br.REPO_ROOT)),
+                        "mtime": out.stat().st_mtime, "digest": _digest(out) + ru_digest})
+    return records
+
+
+def load_history(path: Path) -> List[Dict[str, object]]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def record(history_path: Path, commit: str) -> int:
+    """Append the unseen runs; commit is used for runs that carry no BUILD_COMMIT."""
+    history = load_history(history_path)
+    seen = {h["digest"] for h in history}
+    now = time.time()
+    new = []
+    for rec in scan_sources():
+        if rec["digest"] in seen:
+            continue
+        built = rec.pop("build_commit")
+        rec.update(commit=built or commit, commit_source="run" if built else "record", recorded_at=now)
+        new.append(rec)
+        seen.add(rec["digest"])
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with history_path.open("a") as f:
+        for rec in new:
+            f.write(json.dumps(rec, sort_keys=True) + "\n")
+    return len(new)
+
+
+# --------------------------------------------------------------------------
+# statistics
+# --------------------------------------------------------------------------
+
+def median(xs: Sequence[float]) -> float:
+    s = sorted(xs)
+    n = len(s)
+    return s[n // 2] if n % 2 else 0.5 * (s[n // 2 - 1] + s[n // 2])
+
+
+def mann_whitney_greater(new: Sequence[float], old: Sequence[float]) -> float:
+    """
+    One-sided p-value for H1: `new` tends to be larger than `old`.
+    Normal approximation with tie correction and continuity correction.
+    """
+    n1, n2 = len(new), len(old)
+    pooled = sorted([(v, 0) for v in new] + [(v, 1) for v in old])
+    ranks = [0.0] * len(pooled)
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        avg = (i + j) / 2.0 + 1.0
+        for k in range(i, j + 1):
+            ranks[k] = avg
+        t = j - i + 1
+        tie_term += t ** 3 - t
+        i = j + 1
+    r1 = sum(r for r, (_, grp) in zip(ranks, pooled) if grp == 0)
+    u1 = r1 - n1 * (n1 + 1) / 2.0
+    mu = n1 * n2 / 2.0
+    n = n1 + n2
+    sigma2 = n1 * n2 / 12.0 * ((n + 1) - tie_term / (n * (n - 1)))
+    if sigma2 <= 0:
+        return 1.0
+    z = (u1 - mu - 0.5) / math.sqrt(sigma2)
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def robust_z_greater(new: float, old: Sequence[float]) -> Tuple[float, float]:
+    """
+    Robust z-score of `new` against `old` (median / MAD, the MAD scaled by
+    1.4826 to a standard deviation under normality; the mean absolute
+    deviation scaled by 1.2533 when more than half of `old` is identical)
+    and its one-sided normal p-value for H1: `new` is larger.
+    """
+    center = median(old)
+    scale = 1.4826 * median([abs(v - center) for v in old])
+    if scale == 0.0:
+        scale = 1.2533 * sum(abs(v - center) for v in old) / len(old)
+    if scale == 0.0:      # a flat baseline: any increase is out of it
+        z = math.inf if new > center else 0.0
+    else:
+        z = (new - center) / scale
+    return z, 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def metric_value(sample: Dict[str, object], metric: str) -> Optional[float]:
+    value = sample["time"] if metric == "time" else sample.get("rusage", {}).get(metric)
+    return None if value is None else float(value)
+
+
+def check_series(samples: List[Dict[str, object]], alpha: float,
+                 min_slowdown: float, metric: str = "time") -> Optional[Dict[str, object]]:
+    """Verdict for one (binary, config, threads) series, or None if untestable."""
+    # group by commit, in the order the commits were first run (output file mtime)
+    by_commit: Dict[str, List[float]] = {}
+    for s in sorted(samples, key=lambda s: (s["mtime"], s["recorded_at"])):
+        value = metric_value(s, metric)
+        if value is not None:   # runs recorded before rusage_run.py have no rusage
+            by_commit.setdefault(s["commit"], []).append(value)
+    commits = list(by_commit)
+    if len(commits) < 2:
+        return None
+
+    latest = by_commit[commits[-1]]
+    baseline = [t for c in commits[:-1] for t in by_commit[c]]
+    base_med, new_med = median(baseline), median(latest)
+    slowdown = new_med / base_med - 1.0 if base_med > 0 else 0.0
+
+    if len(latest) >= MIN_SAMPLES and len(baseline) >= MIN_SAMPLES:
+        method = "mann-whitney"
+        p = mann_whitney_greater(latest, baseline)
+    else:
+        # one or two runs per commit: is the newest commit outside the spread
+        # of the earlier commits' medians?
+        method = "robust-z"
+        earlier = [median(by_commit[c]) for c in commits[:-1]]
+        if len(earlier) < MIN_BASELINE:
+            p = 1.0  # too few earlier commits to know their spread
+        else:
+            _, p = robust_z_greater(new_med, earlier)
+
+    return {
+        "method": method,
+        "p_value": p,
+        "baseline_median": base_med,
+        "latest_median": new_med,
+        "slowdown": slowdown,
+        "latest_commit": commits[-1],
+        "n_baseline": len(baseline),
+        "n_latest": len(latest),
+        "regression": p < alpha and slowdown >= min_slowdown,
+        "improvement": new_med < base_med * (1.0 - min_slowdown),
+    }
+
+
+def check(history_path: Path, report_path: Path, alpha: float, min_slowdown: float,
+          metric: str = "time") -> int:
+    history = load_history(history_path)
+    series: Dict[Tuple[str, str, int], List[Dict[str, object]]] = {}
+    for h in history:
+        series.setdefault((h["binary"], h["config"], int(h["threads"])), []).append(h)
+
+    regressions, improvements = [], []
+    checked = 0
+    for (binary, config, threads), samples in sorted(series.items()):
+        verdict = check_series(samples, alpha, min_slowdown, metric)
+        if verdict is None:
+            continue
+        checked += 1
+        entry = {"binary": binary, "config": config, "threads": threads,
+                 "env": samples[-1].get("env", {}), **verdict}
+        if verdict["regression"]:
+            regressions.append(entry)
+        elif verdict["improvement"]:
+            improvements.append(entry)
+
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "history": str(history_path),
+        "metric": metric,
+        "alpha": alpha,
+        "min_slowdown": min_slowdown,
+        "series_total": len(series),
+        "series_checked": checked,
+        "regressions": regressions,
+        "improvements": improvements,
+    }
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2) + "\n")
+
+    unit = "s" if metric == "time" else f" {metric}"
+    for r in regressions:
+        print(f"REGRESSION {r['binary']} {r['config']} T={r['threads']}: "
+              f"{r['baseline_median']:.4f}{unit} -> {r['latest_median']:.4f}{unit} "
+              f"(+{100 * r['slowdown']:.1f}%, {r['method']} p={r['p_value']:.3g})",
+              file=sys.stderr)
+    print(f"Checked {checked}/{len(series)} series, {len(regressions)} regression(s); "
+          f"report: {report_path}")
+    return 1 if regressions else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Detect performance regressions in benchmark history.")
+    parser.add_argument("command", nargs="?", choices=("record", "check", "run"), default="run")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY,
+                        help="JSON-lines history file (default: tools/analysis/perf_history.jsonl).")
+    parser.add_argument("--report", type=Path, default=DEFAULT_REPORT,
+                        help="JSON report path (default: tools/analysis/perf_report.json).")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level.")
+    parser.add_argument("--min-slowdown", type=float, default=0.05,
+                        help="Ignore slowdowns smaller than this fraction (default: 0.05).")
+    parser.add_argument("--metric", choices=METRICS, default="time",
+                        help="What check compares: the time (default) or a rusage column.")
+    parser.add_argument("--commit", default=None,
+                        help="Commit for new runs without a BUILD_COMMIT of their own (default: git HEAD).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if not 0 < args.alpha < 1:
+        print("ERROR: --alpha must be in (0, 1)", file=sys.stderr)
+        sys.exit(2)
+    if args.command in ("record", "run"):
+        n = record(args.history, args.commit or git_commit())
+        print(f"Recorded {n} new run(s) into {args.history}")
+    if args.command in ("check", "run"):
+        sys.exit(check(args.history, args.report, args.alpha, args.min_slowdown, args.metric))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Thread-placement explorer for the kmeans and Game of Life kernels.
+
+Usage:
+    python placement.py [--kernels kmeans life] [--threads 1 2 4 8 16 32 64]
+                        [--policies compact cores scatter ...] [--repeats 3]
+                        [--kmeans-bin omp_reduction_kmeans] [--outdir DIR]
+                        [--dry-run]
+
+Run it on the benchmark node itself (inside a PBS job, see run_placement.sh):
+the topology is read from hwloc (lstopo-no-graphics --of xml) when installed,
+else from /sys/devices/system/cpu/cpu*/topology.
+
+Policies (T threads):
+    compact         fill a core's SMT siblings first, cores socket by socket
+    cores           one thread per physical core, socket by socket
+    scatter         one thread per physical core, round-robin over sockets
+    smt-scatter     all SMT siblings of a core, cores round-robin over sockets
+    <places>-<bind> OMP_PLACES in {threads, cores, sockets} x OMP_PROC_BIND
+                    in {close, spread}, left to the OpenMP runtime
+    noaff           unbound (what run_on_queue.sh AFFINITY=none does)
+The explicit policies are passed as GOMP_CPU_AFFINITY cpu lists; a policy
+that needs more CPUs than it can use (e.g. cores with T > #cores) is skipped.
+
+Every run is stored in the same layout run_on_queue.sh produces, with the
+policy name as AFF_LABEL:
+    <outdir>/kmeans/<kind>/<policy>/<RUN_TAG>/{output.txt,meta.txt}
+    <outdir>/life/<policy>/N<n>_T<t>/{life_<t>_<n>.out,meta.txt}
+plus
+    <outdir>/results_placement.txt  kmeans table (KIND RUN_TAG BIN T AFF ...),
+                                    AFF = policy, readable by the a2 diagrams
+    <outdir>/placement_best.txt     best policy per kernel and thread count
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis" / "placement"
+A1_DIR = br.REPO_ROOT / "a1"
+A2_KMEANS_DIR = br.REPO_ROOT / "a2" / "kmeans"
+
+CPU_POLICIES = ("compact", "cores", "scatter", "smt-scatter")
+OMP_POLICIES = tuple(f"{p}-{b}" for p in ("threads", "cores", "sockets") for b in ("close", "spread"))
+ALL_POLICIES = CPU_POLICIES + OMP_POLICIES + ("noaff",)
+
+KMEANS_KIND = {"seq_kmeans": "serial", "omp_naive_kmeans": "naive",
+               "omp_reduction_kmeans": "reduction"}
+
+
+class PU(NamedTuple):
+    os_index: int
+    core: int      # global core number (unique across sockets)
+    socket: int
+
+
+# --------------------------------------------------------------------------
+# topology
+# --------------------------------------------------------------------------
+
+def topology_hwloc() -> Optional[List[PU]]:
+    exe = shutil.which("lstopo-no-graphics") or shutil.which("lstopo")
+    if exe is None:
+        return None
+    try:
+        xml = subprocess.run([exe, "--of", "xml", "-"], capture_output=True,
+                             text=True, check=True).stdout
+        root = ET.fromstring(xml)
+    except (OSError, subprocess.CalledProcessError, ET.ParseError):
+        return None
+
+    pus: List[PU] = []
+    core_ids: Dict[int, int] = {}
+
+    def walk(node: ET.Element, socket: int, core: Optional[int]) -> None:
+        kind = node.get("type")
+        if kind == "Package":
+            socket = int(node.get("os_index", socket))
+        elif kind == "Core":
+            core = core_ids.setdefault(id(node), len(core_ids))
+        elif kind == "PU":
+            idx = int(node.get("os_index"))
+            pus.append(PU(idx, core if core is not None else idx, socket))
+        for child in node.findall("object"):
+            walk(child, socket, core)
+
+    walk(root, 0, None)
+    return pus or None
+
+
+def topology_sysfs() -> List[PU]:
+    cpus = sorted(
+        int(p.name[3:]) for p in Path("/sys/devices/system/cpu").glob("cpu[0-9]*")
+        if (p / "topology").exists()
+    )
+    if not cpus:
+        return [PU(i, i, 0) for i in range(os.cpu_count() or 1)]
+    pus: List[PU] = []
+    core_ids: Dict[tuple, int] = {}
+    for cpu in cpus:
+        topo = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        socket = int((topo / "physical_package_id").read_text())
+        core = int((topo / "core_id").read_text())
+        pus.append(PU(cpu, core_ids.setdefault((socket, core), len(core_ids)), socket))
+    return pus
+
+
+def read_topology() -> List[PU]:
+    return topology_hwloc() or topology_sysfs()
+
+
+def describe(pus: List[PU]) -> str:
+    sockets = len({p.socket for p in pus})
+    cores = len({p.core for p in pus})
+    return f"{sockets} socket(s), {cores} core(s), {len(pus)} PU(s)"
+
+
+# --------------------------------------------------------------------------
+# policies
+# --------------------------------------------------------------------------
+
+def _cores_by_socket(pus: List[PU]) -> Dict[int, List[List[int]]]:
+    """socket -> list of cores, each core the sorted list of its PU os indices."""
+    cores: Dict[int, Dict[int, List[int]]] = {}
+    for p in pus:
+        cores.setdefault(p.socket, {}).setdefault(p.core, []).append(p.os_index)
+    return {s: [sorted(c[k]) for k in sorted(c)] for s, c in sorted(cores.items())}
+
+
+def _round_robin(by_socket: Dict[int, List[List[int]]]) -> List[List[int]]:
+    queues = [list(cores) for cores in by_socket.values()]
+    out: List[List[int]] = []
+    while any(queues):
+        for q in queues:
+            if q:
+                out.append(q.pop(0))
+    return out
+
+
+def cpu_list(policy: str, pus: List[PU], threads: int) -> Optional[List[int]]:
+    """Ordered CPU list for an explicit policy, None if it cannot host `threads`."""
+    by_socket = _cores_by_socket(pus)
+    socket_major = [core for cores in by_socket.values() for core in cores]
+    if policy == "compact":
+        cpus = [cpu for core in socket_major for cpu in core]
+    elif policy == "cores":
+        cpus = [core[0] for core in socket_major]
+    elif policy == "scatter":
+        cpus = [core[0] for core in _round_robin(by_socket)]
+    elif policy == "smt-scatter":
+        cpus = [cpu for core in _round_robin(by_socket) for cpu in core]
+    else:
+        raise ValueError(f"not an explicit cpu-list policy: {policy}")
+    return cpus[:threads] if len(cpus) >= threads else None
+
+
+def policy_env(policy: str, pus: List[PU], threads: int) -> Optional[Dict[str, str]]:
+    """Environment overrides for one run; None when the policy does not apply."""
+    env = {"OMP_NUM_THREADS": str(threads)}
+    if policy in CPU_POLICIES:
+        cpus = cpu_list(policy, pus, threads)
+        if cpus is None:
+            return None
+        env["GOMP_CPU_AFFINITY"] = " ".join(map(str, cpus))
+    elif policy in OMP_POLICIES:
+        places, bind = policy.split("-")
+        env["OMP_PLACES"] = places
+        env["OMP_PROC_BIND"] = bind
+    return env
+
+
+# --------------------------------------------------------------------------
+# running
+# --------------------------------------------------------------------------
+
+def _clean_env(overrides: Dict[str, str]) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items()
+           if k not in ("GOMP_CPU_AFFINITY", "OMP_PLACES", "OMP_PROC_BIND", "OMP_NUM_THREADS")}
+    env.update(overrides)
+    return env
+
+
+def _write_meta(path: Path, fields: Dict[str, str]) -> None:
+    """meta.txt as run_on_queue.sh writes it (KEY=VALUE, free-text lines with ': ')."""
+    path.write_text("".join(f"[run_on_queue] {k}{'=' if k.isupper() else ': '}{v}\n"
+                            for k, v in fields.items()))
+
+
+def _meta_fields(binary: str, policy: str, env: Dict[str, str], params: str,
+                 result_dir: Path) -> Dict[str, str]:
+    return {
+        "BIN": binary,
+        "OMP_NUM_THREADS": env["OMP_NUM_THREADS"],
+        "GOMP_CPU_AFFINITY": env.get("GOMP_CPU_AFFINITY", "<unset>"),
+        "OMP_PLACES": env.get("OMP_PLACES", "<unset>"),
+        "OMP_PROC_BIND": env.get("OMP_PROC_BIND", "<unset>"),
+        "AFF_LABEL": policy,
+        "Params": params,
+        "Result dir": str(result_dir),
+    }
+
+
+def _best_of(args: argparse.Namespace, cmd: List[str], cwd: Path, env: Dict[str, str],
+             out: Path, parse, key: str) -> Optional[Dict[str, object]]:
+    """
+    Run `cmd` args.repeats times, keep the fastest parsed result in `out`.
+    The exit status is not trusted (life_par's main() falls off the end),
+    a run counts when its output parses.
+    """
+    out.parent.mkdir(parents=True, exist_ok=True)
+    best: Optional[Dict[str, object]] = None
+    best_stdout = ""
+    for _ in range(args.repeats):
+        proc = subprocess.run(cmd, cwd=cwd, env=_clean_env(env), capture_output=True, text=True)
+        out.write_text(proc.stdout)
+        parsed = parse(out)
+        if parsed is None:
+            print(f"WARNING: {' '.join(cmd)} exited {proc.returncode} without a result "
+                  f"({env.get('GOMP_CPU_AFFINITY', 'unbound')})", file=sys.stderr)
+            continue
+        if best is None or parsed[key] < best[key]:
+            best, best_stdout = parsed, proc.stdout
+    if best is not None:
+        out.write_text(best_stdout)
+    return best
+
+
+def run_kmeans(args: argparse.Namespace, policy: str, threads: int,
+               env: Dict[str, str]) -> Optional[Dict[str, object]]:
+    kind = KMEANS_KIND.get(args.kmeans_bin, "other")
+    tag = f"S{args.size}_N{args.coords}_C{args.clusters}_L{args.loops}_T{threads}"
+    result_dir = args.outdir / "kmeans" / kind / policy / tag
+    params = f"-s {args.size} -n {args.coords} -c {args.clusters} -l {args.loops}"
+    cmd = [str(A2_KMEANS_DIR / args.kmeans_bin)] + params.split()
+
+    best = _best_of(args, cmd, A2_KMEANS_DIR, env, result_dir / "output.txt",
+                    br.parse_kmeans_output, "TOTAL")
+    if best is None:
+        return None
+    _write_meta(result_dir / "meta.txt", _meta_fields(args.kmeans_bin, policy, env, params, result_dir))
+    return {"KIND": kind, "RUN_TAG": tag, "BIN": args.kmeans_bin, "T": threads, "AFF": policy,
+            "SEEDING": "first", "SIZE": args.size, "COORDS": args.coords, "CLUSTERS": args.clusters,
+            "LOOPS": args.loops, "NLOOPS": best["NLOOPS"], "TOTAL": best["TOTAL"],
+            "PER_LOOP": best["PER_LOOP"], "TTS": best["TTS"]}
+
+
+def run_life(args: argparse.Namespace, policy: str, threads: int,
+             env: Dict[str, str]) -> Optional[Dict[str, object]]:
+    result_dir = args.outdir / "life" / policy / f"N{args.life_n}_T{threads}"
+    cmd = [str(A1_DIR / "life_par"), str(args.life_n), str(args.life_steps)]
+
+    best = _best_of(args, cmd, A1_DIR, env, result_dir / f"life_{threads}_{args.life_n}.out",
+                    br.parse_life_out, "TIME")
+    if best is None:
+        return None
+    _write_meta(result_dir / "meta.txt",
+                _meta_fields("life_par", policy, env, f"{args.life_n} {args.life_steps}", result_dir))
+    return {"KERNEL": "life", "THREADS": threads, "AFF": policy, "TIME": best["TIME"]}
+
+
+def best_per_thread(rows: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    best: Dict[tuple, Dict[str, object]] = {}
+    for r in rows:
+        key = (r["KERNEL"], r["THREADS"])
+        if key not in best or r["TIME"] < best[key]["TIME"]:
+            best[key] = r
+    out = []
+    for key in sorted(best):
+        r = dict(best[key])
+        worst = max(x["TIME"] for x in rows if (x["KERNEL"], x["THREADS"]) == key)
+        r["GAIN"] = worst / r["TIME"] if r["TIME"] > 0 else float("nan")
+        out.append(r)
+    return out
+
+
+def format_best(rows: List[Dict[str, object]]) -> str:
+    lines = ["KERNEL\tTHREADS\tBEST_AFF\tTIME\tGAIN_VS_WORST"]
+    for r in rows:
+        lines.append(f"{r['KERNEL']}\t{r['THREADS']}\t{r['AFF']}\t{r['TIME']:.6f}\t{r['GAIN']:.3f}")
+    return "\n".join(lines) + "\n"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Explore thread placements for kmeans and life.")
+    parser.add_argument("--kernels", nargs="+", choices=("kmeans", "life"), default=["kmeans", "life"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--policies", nargs="+", choices=ALL_POLICIES, default=list(ALL_POLICIES))
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per point; the best is kept.")
+    parser.add_argument("--kmeans-bin", default="omp_reduction_kmeans", choices=tuple(KMEANS_KIND))
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--coords", type=int, default=16)
+    parser.add_argument("--clusters", type=int, default=32)
+    parser.add_argument("--loops", type=int, default=10)
+    parser.add_argument("--life-n", type=int, default=1024)
+    parser.add_argument("--life-steps", type=int, default=1000)
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis/placement).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only print the topology and the placement of every run.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    pus = read_topology()
+    print(f"Topology: {describe(pus)}")
+    threads = [t for t in args.threads if t <= len(pus)]
+    if not threads:
+        raise SystemExit(f"No thread count fits on {len(pus)} PU(s).")
+
+    kmeans_rows: List[Dict[str, object]] = []
+    rows: List[Dict[str, object]] = []
+    for kernel in args.kernels:
+        for t in threads:
+            for policy in args.policies:
+                env = policy_env(policy, pus, t)
+                if env is None:
+                    continue
+                placement = env.get("GOMP_CPU_AFFINITY") or \
+                    " ".join(f"{k}={env[k]}" for k in ("OMP_PLACES", "OMP_PROC_BIND") if k in env) or "unbound"
+                if args.dry_run:
+                    print(f"{kernel:6s} T={t:<3d} {policy:14s} {placement}")
+                    continue
+                if kernel == "kmeans":
+                    row = run_kmeans(args, policy, t, env)
+                    if row is None:
+                        continue
+                    kmeans_rows.append(row)
+                    rows.append({"KERNEL": "kmeans", "THREADS": t, "AFF": policy, "TIME": row["TOTAL"]})
+                else:
+                    row = run_life(args, policy, t, env)
+                    if row is None:
+                        continue
+                    rows.append(row)
+                print(f"{kernel:6s} T={t:<3d} {policy:14s} {rows[-1]['TIME']:.4f}s  [{placement}]")
+
+    if args.dry_run or not rows:
+        return
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    if kmeans_rows:
+        table = args.outdir / "results_placement.txt"
+        table.write_text(br.format_kmeans_table(kmeans_rows))
+        print(f"Wrote {table}")
+    best = args.outdir / "placement_best.txt"
+    best.write_text(format_best(best_per_thread(rows)))
+    print(f"Wrote {best}")
+    sys.stdout.write(best.read_text())
+
+
+if __name__ == "__main__":
+    main()
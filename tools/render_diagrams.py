@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Render every assignment's report diagrams in one process.
+
+Runs the existing plotting scripts (a1/diagrams/diagrams.py, the four
+a2/kmeans/diagrams/results_2.1.x_*.py, a3/diagrams/diagrams.py) as modules
+of this interpreter instead of six interpreters, so matplotlib (Agg) is
+imported and its font cache loaded once. Each script renders exactly what
+it renders on its own, with its default arguments.
+
+Usage:
+    python render_diagrams.py [--only PATTERN ...] [--list] [--outdir DIR]
+
+--only keeps the jobs whose name matches one of the patterns (fnmatch, or
+a plain prefix): a1, a1-mpi, a2/2.1.1_shared, a2/*reduction, a3, ...
+a1-mpi (diagrams.py --mpi) is only discovered when a1/benchmarks/mpi exists.
+
+Timing summary (printed, and written to <outdir>/render_diagrams.txt,
+default tools/analysis/), per job:
+    LOAD    executing the script module (its own imports are cached)
+    PARSE   its table / .out readers, run up front on the sources found
+            by discovery (the script then gets the parsed results back)
+    RENDER  the rest of its main(): building the figures and tables
+    SAVE    Figure.savefig calls
+plus the one-off DISCOVER and IMPORT (matplotlib) stages.
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import functools
+import importlib.util
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+A1_DIAGRAMS = br.REPO_ROOT / "a1" / "diagrams" / "diagrams.py"
+A2_DIAGRAMS = br.REPO_ROOT / "a2" / "kmeans" / "diagrams"
+A3_DIAGRAMS = br.REPO_ROOT / "a3" / "diagrams" / "diagrams.py"
+
+STAGES = ("LOAD", "PARSE", "RENDER", "SAVE")
+
+
+@dataclass
+class Job:
+    name: str
+    script: Path
+    argv: List[str] = field(default_factory=list)
+    # (reader function name in the script, its arguments as the script's main() passes them)
+    parse: List[Tuple[str, Tuple]] = field(default_factory=list)
+    times: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    figures: List[Path] = field(default_factory=list)
+    error: str = ""
+
+
+def discover() -> List[Job]:
+    jobs: List[Job] = []
+    bench = br.A1_BENCH
+    if A1_DIAGRAMS.exists() and bench.exists():
+        jobs.append(Job("a1", A1_DIAGRAMS, [],
+                        [("collect_times", (bench,)), ("collect_trace_summaries", (bench,))]))
+        if (bench / "mpi").exists():
+            jobs.append(Job("a1-mpi", A1_DIAGRAMS, ["--mpi"], [("collect_mpi_runs", (bench / "mpi",))]))
+    for script in sorted(A2_DIAGRAMS.glob("results_2.1.*.py")):
+        table = A2_DIAGRAMS / "results" / f"{script.stem}.txt"
+        if table.exists():
+            # the scripts build the path with os.path.join
+            jobs.append(Job(f"a2/{script.stem.removeprefix('results_')}", script, [],
+                            [("parse_results", (str(table),))]))
+    tables = sorted((A3_DIAGRAMS.parent / "results").glob("results_*.txt"))
+    if A3_DIAGRAMS.exists() and tables:
+        jobs.append(Job("a3", A3_DIAGRAMS, [], [("parse_results_table", (t,)) for t in tables]))
+    return jobs
+
+
+def select(jobs: List[Job], patterns: Sequence[str]) -> List[Job]:
+    if not patterns:
+        return jobs
+    return [j for j in jobs if any(fnmatch.fnmatch(j.name, p) or j.name.startswith(p) for p in patterns)]
+
+
+def import_matplotlib() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401  (the scripts' own import is then a cache hit)
+
+
+def timed_savefig(current: List[Job]) -> None:
+    """Route every Figure.savefig (plt.savefig included) through a timer for the running job."""
+    from matplotlib.figure import Figure
+
+    savefig = Figure.savefig
+
+    @functools.wraps(savefig)
+    def wrapper(self, fname, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return savefig(self, fname, *args, **kwargs)
+        finally:
+            if current:
+                current[0].times["SAVE"] += time.perf_counter() - t0
+                current[0].figures.append(Path(str(fname)))
+
+    Figure.savefig = wrapper
+
+
+def _memoized(fn: Callable, cache: Dict[Tuple, object]) -> Callable:
+    @functools.wraps(fn)
+    def wrapper(*args):
+        if args not in cache:
+            cache[args] = fn(*args)
+        return cache[args]
+
+    return wrapper
+
+
+def run_job(job: Job, current: List[Job]) -> None:
+    current[:] = [job]
+    t0 = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(f"diagrams_{job.name.replace('/', '_').replace('.', '_')}",
+                                                  job.script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    job.times["LOAD"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    readers: Dict[str, Dict[Tuple, object]] = {}
+    for name, args in job.parse:
+        cache = readers.setdefault(name, {})
+        cache[args] = getattr(module, name)(*args)
+    for name, cache in readers.items():
+        setattr(module, name, _memoized(getattr(module, name), cache))
+    job.times["PARSE"] = time.perf_counter() - t0
+
+    argv = sys.argv
+    sys.argv = [str(job.script)] + job.argv
+    t0 = time.perf_counter()
+    try:
+        module.main()
+    finally:
+        sys.argv = argv
+        job.times["RENDER"] = time.perf_counter() - t0 - job.times["SAVE"]
+        current.clear()
+
+
+def summary(jobs: List[Job], discover_s: float, import_s: float) -> str:
+    lines = [f"DISCOVER\t{discover_s:.4f}", f"IMPORT\t{import_s:.4f}", "",
+             "\t".join(("JOB",) + STAGES + ("TOTAL", "FIGURES", "STATUS"))]
+    totals = dict.fromkeys(STAGES, 0.0)
+    for j in jobs:
+        for s in STAGES:
+            totals[s] += j.times[s]
+        lines.append("\t".join([j.name] + [f"{j.times[s]:.4f}" for s in STAGES] +
+                               [f"{sum(j.times.values()):.4f}", str(len(j.figures)), j.error or "ok"]))
+    lines.append("\t".join(["all"] + [f"{totals[s]:.4f}" for s in STAGES] +
+                           [f"{sum(totals.values()) + discover_s + import_s:.4f}",
+                            str(sum(len(j.figures) for j in jobs)), ""]))
+    return "\n".join(lines) + "\n"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render all assignments' diagrams in one process.")
+    parser.add_argument("--only", nargs="+", default=[], metavar="PATTERN",
+                        help="Jobs to run (fnmatch pattern or prefix of a1, a1-mpi, a2/<table>, a3).")
+    parser.add_argument("--list", action="store_true", help="Only list the discovered jobs.")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Where render_diagrams.txt goes (default: tools/analysis).")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    t0 = time.perf_counter()
+    jobs = select(discover(), args.only)
+    discover_s = time.perf_counter() - t0
+    if args.list:
+        for j in jobs:
+            print(f"{j.name}\t{j.script.relative_to(br.REPO_ROOT)} {' '.join(j.argv)}")
+        return
+    if not jobs:
+        raise SystemExit("No diagram jobs found" + (f" matching {' '.join(args.only)}." if args.only else "."))
+
+    t0 = time.perf_counter()
+    import_matplotlib()
+    import_s = time.perf_counter() - t0
+    current: List[Job] = []
+    timed_savefig(current)
+
+    for job in jobs:
+        try:
+            run_job(job, current)
+        except SystemExit as e:       # the scripts exit on missing / bad inputs
+            job.error = f"exit {e.code}"
+        except Exception as e:        # keep rendering the other assignments
+            job.error = f"{type(e).__name__}: {e}"
+        if job.error:
+            print(f"WARNING: {job.name}: {job.error}", file=sys.stderr)
+
+    text = summary(jobs, discover_s, import_s)
+    print()
+    print(text, end="")
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    (args.outdir / "render_diagrams.txt").write_text(text)
+    print(f"Wrote {args.outdir / 'render_diagrams.txt'}")
+    if any(j.error for j in jobs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
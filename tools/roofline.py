@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Roofline and parallel-efficiency analysis over the parsed benchmark results.
+
+Usage:
+    python roofline.py [--machine probe.txt] [--outdir DIR] [--no-plots]
+
+    # on the benchmark node, once:
+    gcc -O3 -march=native -fopenmp stream_probe.c -o stream_probe
+    ./stream_probe -t "1 2 4 8 16 32 64" > probe_sandman.txt
+
+For every run found by bench_results (a1 life, a2/a3 kmeans tables, a2 FW)
+it combines the measured time with a per-kernel operation/byte model:
+
+    kmeans  ops   = numObjs x numClusters x numCoords x 3 flops (sub, mul, add) per loop
+            bytes = numObjs x (numCoords x 8 + 2 x 4) per loop   (objects + membership r/w)
+    life    ops   = (N-2)^2 x Steps cell updates
+            bytes = (N-2)^2 x Steps x 2 x 4                      (read previous, write current)
+    FW      ops   = N^3 x 2 (add + min)
+            bytes = N^3 x 12 / B                                 (3 int BxB blocks per base case)
+
+and reports GOP/s, GB/s, arithmetic intensity, speedup / efficiency / Karp-Flatt
+serial fraction against the 1-thread run of the same configuration and, with
+--machine, the roofline bound (memory or compute) at that thread count.
+
+Outputs (in --outdir, default tools/analysis/):
+    roofline_analysis.txt     tab-separated table, one row per run
+    roofline_<kernel>.png     log-log roofline with every run placed on it
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+
+KMEANS_FLOPS_PER_TERM = 3  # (x - c), square, accumulate
+FW_OPS_PER_UPDATE = 2      # add + min
+INT_BYTES = 4
+DOUBLE_BYTES = 8
+
+RE_PROBE = re.compile(r"^PROBE\s+(.*)$")
+
+COLUMNS = ("KERNEL", "CONFIG", "THREADS", "TIME", "SPEEDUP", "EFFICIENCY",
+           "KARP_FLATT", "GOPS", "GBS", "AI", "ROOF_GOPS", "ROOF_FRAC", "BOUND")
+
+
+# --------------------------------------------------------------------------
+# operation / byte models
+# --------------------------------------------------------------------------
+
+def kmeans_model(row: Dict[str, object]) -> Tuple[float, float]:
+    loops = int(row["NLOOPS"])
+    coords = int(row["COORDS"])
+    objs = br.kmeans_num_objs(float(row["SIZE"]), coords)
+    ops = objs * int(row["CLUSTERS"]) * coords * KMEANS_FLOPS_PER_TERM * loops
+    nbytes = objs * (coords * DOUBLE_BYTES + 2 * INT_BYTES) * loops
+    return float(ops), float(nbytes)
+
+
+def life_model(n: int, steps: int) -> Tuple[float, float]:
+    cells = float(n - 2) ** 2 * steps
+    return cells, cells * 2 * INT_BYTES
+
+
+def fw_model(n: int, b: Optional[int]) -> Tuple[float, float]:
+    updates = float(n) ** 3
+    # untiled FW streams a row of A per (k, i): ~ 2 ints per update
+    per_update = 3.0 * INT_BYTES / b if b else 2.0 * INT_BYTES
+    return updates * FW_OPS_PER_UPDATE, updates * per_update
+
+
+# --------------------------------------------------------------------------
+# machine description from stream_probe
+# --------------------------------------------------------------------------
+
+def load_machine(path: Path) -> Dict[int, Dict[str, float]]:
+    """{threads: {"triad": GB/s, "peak_gflops": GFLOP/s, ...}} from stream_probe output."""
+    machine: Dict[int, Dict[str, float]] = {}
+    for line in path.read_text().splitlines():
+        m = RE_PROBE.match(line.strip())
+        if not m:
+            continue
+        fields = dict(kv.split("=", 1) for kv in m.group(1).split())
+        machine[int(fields.pop("threads"))] = {k: float(v) for k, v in fields.items()}
+    if not machine:
+        raise ValueError(f"No PROBE lines in {path}")
+    return machine
+
+
+def roof_at(machine: Dict[int, Dict[str, float]], threads: int) -> Dict[str, float]:
+    """Probe line for `threads`, else the closest measured thread count below it."""
+    below = [t for t in machine if t <= threads]
+    return machine[max(below)] if below else machine[min(machine)]
+
+
+# --------------------------------------------------------------------------
+# gather runs
+# --------------------------------------------------------------------------
+
+def gather_runs() -> List[Dict[str, object]]:
+    """Uniform rows: KERNEL, CONFIG, THREADS, TIME, OPS, BYTES."""
+    runs: List[Dict[str, object]] = []
+
+    for r in br.collect_life_runs():
+        ops, nbytes = life_model(int(r["N"]), int(r["STEPS"]))
+        runs.append({"KERNEL": "life", "CONFIG": f"N{r['N']}_S{r['STEPS']}",
+                     "THREADS": r["THREADS"], "TIME": r["TIME"], "OPS": ops, "BYTES": nbytes})
+
+    for results_dir in (br.A2_KMEANS_RESULTS, br.A3_RESULTS):
+        for table in sorted(results_dir.glob("results_*.txt")):
+            for r in br.parse_kmeans_table(table):
+                ops, nbytes = kmeans_model(r)
+                config = f"{table.stem.replace('results_', '')}:{r['KIND']}:{r['AFF']}:" \
+                         f"S{r['SIZE']}_N{r['COORDS']}_C{r['CLUSTERS']}"
+                runs.append({"KERNEL": "kmeans", "CONFIG": config, "THREADS": r["THREADS"],
+                             "TIME": r["TOTAL"], "OPS": ops, "BYTES": nbytes})
+
+    for r in br.collect_fw_runs():
+        ops, nbytes = fw_model(int(r["N"]), r["B"])
+        config = f"{r['ALGO']}_N{r['N']}" + (f"_B{r['B']}" if r["B"] else "") \
+            + (f"_C{r['C']}" if r["C"] else "")
+        runs.append({"KERNEL": "fw", "CONFIG": config, "THREADS": r["THREADS"],
+                     "TIME": r["TIME"], "OPS": ops, "BYTES": nbytes})
+    return runs
+
+
+def analyse(runs: List[Dict[str, object]],
+            machine: Optional[Dict[int, Dict[str, float]]]) -> List[Dict[str, object]]:
+    t1: Dict[Tuple[str, str], float] = {}
+    for r in runs:
+        if r["THREADS"] == 1:
+            t1[(r["KERNEL"], r["CONFIG"])] = float(r["TIME"])
+
+    out: List[Dict[str, object]] = []
+    for r in sorted(runs, key=lambda x: (x["KERNEL"], x["CONFIG"], x["THREADS"])):
+        p = int(r["THREADS"])
+        time = float(r["TIME"])
+        row = dict(r)
+        row["GOPS"] = r["OPS"] / time / 1e9 if time > 0 else float("nan")
+        row["GBS"] = r["BYTES"] / time / 1e9 if time > 0 else float("nan")
+        row["AI"] = r["OPS"] / r["BYTES"]
+
+        base = t1.get((r["KERNEL"], r["CONFIG"]))
+        if base is not None and time > 0:
+            s = base / time
+            row["SPEEDUP"] = s
+            row["EFFICIENCY"] = s / p
+            # Karp-Flatt experimentally determined serial fraction
+            row["KARP_FLATT"] = (1.0 / s - 1.0 / p) / (1.0 - 1.0 / p) if p > 1 else float("nan")
+
+        if machine:
+            roof = roof_at(machine, p)
+            bw, peak = roof["triad"], roof["peak_gflops"]
+            row["ROOF_GOPS"] = min(peak, row["AI"] * bw)
+            row["ROOF_FRAC"] = row["GOPS"] / row["ROOF_GOPS"]
+            row["BOUND"] = "memory" if row["AI"] * bw < peak else "compute"
+        out.append(row)
+    return out
+
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    lines = ["\t".join(COLUMNS)]
+    for r in rows:
+        cells = []
+        for col in COLUMNS:
+            v = r.get(col, "-")
+            cells.append(f"{v:.6g}" if isinstance(v, float) else str(v))
+        lines.append("\t".join(cells))
+    return "\n".join(lines) + "\n"
+
+
+def plot_rooflines(rows: List[Dict[str, object]],
+                   machine: Optional[Dict[int, Dict[str, float]]], outdir: Path) -> List[Path]:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    written: List[Path] = []
+    for kernel in sorted({r["KERNEL"] for r in rows}):
+        krows = [r for r in rows if r["KERNEL"] == kernel]
+        fig, ax = plt.subplots(figsize=(8, 5))
+        ais = [r["AI"] for r in krows]
+        if machine:
+            lo, hi = min(ais) / 4, max(ais) * 4
+            for t in sorted(machine):
+                bw, peak = machine[t]["triad"], machine[t]["peak_gflops"]
+                xs = [lo, peak / bw, hi]
+                ax.plot(xs, [min(peak, x * bw) for x in xs], linewidth=1,
+                        label=f"roof T={t} ({bw:.0f} GB/s, {peak:.0f} GOP/s)")
+        sc = ax.scatter(ais, [r["GOPS"] for r in krows],
+                        c=[r["THREADS"] for r in krows], cmap="viridis", zorder=3)
+        fig.colorbar(sc, ax=ax, label="Threads")
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("Arithmetic intensity (ops / byte)")
+        ax.set_ylabel("Achieved GOP/s")
+        ax.set_title(f"Roofline - {kernel}")
+        ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+        if machine:
+            ax.legend(fontsize=7)
+        out = outdir / f"roofline_{kernel}.png"
+        fig.tight_layout()
+        fig.savefig(out, dpi=150)
+        plt.close(fig)
+        written.append(out)
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Roofline / efficiency analysis of all benchmarks.")
+    parser.add_argument("--machine", type=Path, default=None,
+                        help="stream_probe output for the benchmark node (enables the roofline).")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis).")
+    parser.add_argument("--no-plots", action="store_true", help="Only write the table.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    machine = load_machine(args.machine) if args.machine else None
+    runs = gather_runs()
+    if not runs:
+        raise SystemExit("No benchmark results found.")
+    rows = analyse(runs, machine)
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    table = args.outdir / "roofline_analysis.txt"
+    table.write_text(format_table(rows))
+    print(f"Wrote {table} ({len(rows)} runs)")
+
+    if not args.no_plots:
+        for path in plot_rooflines(rows, machine, args.outdir):
+            print(f"Wrote {path}")
+
+    if machine:
+        top = [r for r in rows if r["KERNEL"] == "kmeans"
+               and r["THREADS"] == max(x["THREADS"] for x in rows if x["KERNEL"] == "kmeans")]
+        for r in top:
+            print(f"kmeans {r['CONFIG']} T={r['THREADS']}: {r['BOUND']}-bound, "
+                  f"{r['GBS']:.1f} GB/s, {100 * r['ROOF_FRAC']:.0f}% of roof", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
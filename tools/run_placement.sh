@@ -0,0 +1,24 @@
+#!/bin/bash
+
+## Runs the thread-placement explorer (placement.py) on the benchmark node.
+## Build the kernels first (make in a1/ and a2/kmeans/), then:
+##   qsub -q serial -l nodes=sandman:ppn=64 run_placement.sh
+##   qsub -q serial -l nodes=sandman:ppn=64 -v KERNELS=kmeans,THREADS_LIST="8 16 32 64" run_placement.sh
+
+#PBS -N placement
+#PBS -o placement.out
+#PBS -e placement.err
+#PBS -l nodes=1:ppn=64
+#PBS -l walltime=02:00:00
+
+module load openmp
+
+cd "${PBS_O_WORKDIR:-.}" || exit 1
+
+: "${KERNELS:=kmeans life}"
+: "${THREADS_LIST:=1 2 4 8 16 32 64}"
+: "${REPEATS:=3}"
+: "${KMEANS_BIN:=omp_reduction_kmeans}"
+
+python3 placement.py --kernels ${KERNELS} --threads ${THREADS_LIST} \
+  --repeats "${REPEATS}" --kmeans-bin "${KMEANS_BIN}"
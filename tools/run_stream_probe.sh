@@ -0,0 +1,20 @@
+#!/bin/bash
+
+## Measures the roofline ceilings (memory bandwidth + FMA peak) of the
+## benchmark node for tools/roofline.py --machine.
+##   qsub -q serial -l nodes=sandman:ppn=64 run_stream_probe.sh
+
+#PBS -N stream_probe
+#PBS -o stream_probe.out
+#PBS -e stream_probe.err
+#PBS -l nodes=1:ppn=64
+#PBS -l walltime=00:20:00
+
+module load openmp
+
+cd "${PBS_O_WORKDIR:-.}" || exit 1
+
+: "${THREADS_LIST:=1 2 4 8 16 32 64}"
+
+gcc -O3 -march=native -fopenmp stream_probe.c -o stream_probe
+./stream_probe -t "${THREADS_LIST}" > "probe_$(hostname -s).txt"
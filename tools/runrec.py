@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Reader for the binary run records written by the C drivers (common/runrec.h).
+
+Usage:
+    python runrec.py a2/kmeans/benchmarks [more files or dirs ...] [--iters]
+
+Directories are searched recursively for *.rec files (run_on_queue.sh points
+RUNREC_FILE at <result dir>/run.rec, a1 at life_<t>_<n>.rec). Without --iters
+one line per record is printed; with it, the per-iteration times as well.
+
+Loading does no text parsing: each file is read once, headers and the fixed
+size param/env entries are decoded with struct.unpack_from straight out of the
+buffer, and the per-iteration block is handed out as a view over that buffer
+(numpy.frombuffer when numpy is installed, else memoryview.cast("d")), so
+thousands of records load in about the time it takes to read the files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional: fall back to memoryviews
+    np = None
+
+MAGIC = b"RUNR"
+VERSION = 1
+HEADER = struct.Struct("=4sHHIi24sddHHI")   # keep in sync with runrec_header_t
+PARAM = struct.Struct("=16sd")
+ENV = struct.Struct("=32s96s")
+ITER_SIZE = 16                             # runrec_iter_t: double time, value
+
+if np is not None:
+    ITER_DTYPE = np.dtype([("time", "f8"), ("value", "f8")])   # native, like the writer
+
+
+class RunRecord(NamedTuple):
+    kernel: str
+    threads: int
+    total_time: float
+    wall_start: float
+    params: Dict[str, float]
+    env: Dict[str, str]
+    iters: object        # numpy structured array (time, value) or memoryview (n, 2)
+    source: str
+
+    @property
+    def niters(self) -> int:
+        return len(self.iters)
+
+    def iter_times(self) -> Sequence[float]:
+        if np is not None:
+            return self.iters["time"]
+        return [self.iters[i, 0] for i in range(len(self.iters))]
+
+    def iter_values(self) -> Sequence[float]:
+        if np is not None:
+            return self.iters["value"]
+        return [self.iters[i, 1] for i in range(len(self.iters))]
+
+
+def _cstr(raw: bytes) -> str:
+    return raw.split(b"\0", 1)[0].decode(errors="replace")
+
+
+def iter_records(buf: Union[bytes, memoryview], source: str = "") -> Iterator[RunRecord]:
+    view = memoryview(buf)
+    off = 0
+    while off + HEADER.size <= len(view):
+        (magic, version, header_size, size, threads, kernel, total_time, wall_start,
+         nparams, nenv, niters) = HEADER.unpack_from(view, off)
+        if magic != MAGIC:
+            raise ValueError(f"{source}: bad record magic at offset {off}")
+        if version != VERSION:
+            off += size          # newer/older layout: skip it, sizes are self-describing
+            continue
+
+        p = off + header_size
+        params = {}
+        for _ in range(nparams):
+            name, value = PARAM.unpack_from(view, p)
+            params[_cstr(name)] = value
+            p += PARAM.size
+        env = {}
+        for _ in range(nenv):
+            name, value = ENV.unpack_from(view, p)
+            env[_cstr(name)] = _cstr(value)
+            p += ENV.size
+
+        if np is not None:
+            iters = np.frombuffer(view, dtype=ITER_DTYPE, count=niters, offset=p)
+        else:
+            iters = view[p:p + niters * ITER_SIZE].cast("B").cast("d", (niters, 2)) \
+                if niters else view[p:p].cast("B").cast("d")
+        yield RunRecord(_cstr(kernel), threads, total_time, wall_start,
+                        params, env, iters, source)
+        off += size
+
+
+def read_records(path: Path) -> List[RunRecord]:
+    return list(iter_records(path.read_bytes(), str(path)))
+
+
+def find_record_files(paths: Iterable[Path]) -> List[Path]:
+    files: List[Path] = []
+    for p in paths:
+        files.extend(sorted(p.rglob("*.rec")) if p.is_dir() else [p])
+    return files
+
+
+def load_records(paths: Iterable[Path]) -> List[RunRecord]:
+    records: List[RunRecord] = []
+    for f in find_record_files(paths):
+        records.extend(read_records(f))
+    return records
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Print binary run records (common/runrec.h).")
+    parser.add_argument("paths", nargs="+", type=Path, help="*.rec files or directories")
+    parser.add_argument("--iters", action="store_true", help="Also print per-iteration data.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    records = load_records(args.paths)
+    if not records:
+        print("No run records found.", file=sys.stderr)
+        sys.exit(1)
+    for r in records:
+        params = " ".join(f"{k}={v:g}" for k, v in r.params.items())
+        print(f"{r.kernel}\tT={r.threads}\ttotal={r.total_time:.6f}s\titers={r.niters}\t"
+              f"{params}\t{r.source}")
+        if args.iters:
+            for i, (t, v) in enumerate(zip(r.iter_times(), r.iter_values())):
+                print(f"\t{i}\t{t:.6f}\t{v:g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Run one benchmark command and record its memory / scheduling footprint.
+
+Usage (what the run_on_queue.sh scripts do around every binary):
+    python3 rusage_run.py -o RESULT_DIR/rusage.txt [--interval 0.05] -- ./omp_naive_kmeans -s 256 ...
+
+The command inherits stdin/stdout/stderr (so `| tee output.txt` and the
+kernels' own output are untouched) and its exit status is passed on. Two
+sources, written as "[rusage] KEY=VALUE" lines (bench_results.parse_rusage):
+
+    wait4() of the command, covering it and every descendant it reaped
+    (mpirun's ranks included):
+        MINFLT      minor page faults (first touch of a page, no I/O)
+        MAJFLT      major page faults (page read from disk)
+        NVCSW       voluntary context switches (blocking: barriers that
+                    sleep, I/O, locks handed to the kernel)
+        NIVCSW      involuntary context switches (preempted: oversubscription)
+        UTIME STIME user / system CPU seconds, WALL elapsed seconds
+    /proc sampling every --interval seconds, over the process tree:
+        MAXRSS_KB   peak resident set of the largest single process: the
+                    largest VmHWM seen. Not wait4's ru_maxrss, which never
+                    drops below this launcher's own ~10 MB (posix_spawn
+                    shares our mm until exec, and Linux carries that
+                    high-water mark over). VmHWM only grows, so a sample
+                    after the peak is exact; only a peak within the last
+                    --interval before exit is missed. A command that ends
+                    before the first sample falls back to ru_maxrss.
+        RSS_PEAK_KB peak of the summed VmRSS of all live processes (what
+                    several MPI ranks on one node hold together)
+        SAMPLES     number of samples taken
+    and EXIT, the command's exit status (128 + signal if killed).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+
+def children(pid: int) -> List[int]:
+    """Direct children of pid, from /proc/<pid>/task/*/children."""
+    kids: List[int] = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return kids
+    for tid in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                kids.extend(int(p) for p in f.read().split())
+        except OSError:
+            continue
+    return kids
+
+
+def process_tree(pid: int) -> Set[int]:
+    seen: Set[int] = set()
+    todo = [pid]
+    while todo:
+        p = todo.pop()
+        if p not in seen:
+            seen.add(p)
+            todo.extend(children(p))
+    return seen
+
+
+def status_kb(pid: int) -> Tuple[int, int]:
+    """(VmRSS, VmHWM) of pid in kB, 0 for a process that is gone or has no mm."""
+    rss = hwm = 0
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    hwm = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, hwm
+
+
+def run(cmd: List[str], interval: float) -> Dict[str, object]:
+    t0 = time.perf_counter()
+    pid = os.posix_spawnp(cmd[0], cmd, os.environ)   # returns once the child has exec'd
+
+    def forward(signum, _frame):   # PBS / Ctrl-C: stop the benchmark, not just us
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(sig, forward)
+
+    peak, hwm, samples = 0, 0, 0
+    while True:
+        # os.wait4, never Popen.wait: the rusage of the reaped child is the point
+        wpid, status, ru = os.wait4(pid, os.WNOHANG)
+        if wpid:
+            break
+        tree = [status_kb(p) for p in process_tree(pid)]
+        peak = max(peak, sum(rss for rss, _ in tree))
+        hwm = max([hwm] + [h for _, h in tree])
+        samples += 1
+        time.sleep(interval)
+    wall = time.perf_counter() - t0
+
+    code = os.waitstatus_to_exitcode(status)
+    return {
+        "MAXRSS_KB": hwm or ru.ru_maxrss, "MINFLT": ru.ru_minflt, "MAJFLT": ru.ru_majflt,
+        "NVCSW": ru.ru_nvcsw, "NIVCSW": ru.ru_nivcsw,
+        "UTIME": f"{ru.ru_utime:.4f}", "STIME": f"{ru.ru_stime:.4f}", "WALL": f"{wall:.4f}",
+        "RSS_PEAK_KB": peak or ru.ru_maxrss, "SAMPLES": samples,   # too short to sample: wait4's
+        "EXIT": code if code >= 0 else 128 - code,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a command and record its rusage and sampled RSS.")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Where the [rusage] lines go.")
+    parser.add_argument("--interval", type=float, default=0.05,
+                        help="Seconds between /proc samples (default: 0.05).")
+    parser.add_argument("cmd", nargs=argparse.REMAINDER, help="-- command [args...]")
+    args = parser.parse_args()
+    if args.cmd and args.cmd[0] == "--":
+        args.cmd = args.cmd[1:]
+    if not args.cmd:
+        parser.error("no command given")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        rec = run(args.cmd, args.interval)
+    except OSError as e:
+        print(f"rusage_run: {args.cmd[0]}: {e.strerror}", file=sys.stderr)
+        sys.exit(127)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text("".join(f"[rusage] {k}={v}\n" for k, v in rec.items()))
+    sys.exit(rec["EXIT"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Amdahl / Gustafson / Universal Scalability Law fits of every measured
+time-vs-threads series, extrapolation beyond the sweep, and the next sweep
+points that would shrink the fits' uncertainty the most.
+
+Usage:
+    python scaling_models.py [--predict-threads 128] [--max-threads 128] [--suggest 3]
+                             [--size life=16384 --size kmeans=1024 ...]
+                             [--outdir DIR] [--no-plots]
+
+Series (via bench_results, the same sources as the diagram scripts):
+    life    a1/benchmarks/N*_T*            one series per N
+    kmeans  a2/kmeans/benchmarks/<kind>/   one per kind, affinity and run tag
+    locks   a3/benchmarks/<lock>/          one per lock and run tag
+    fw      a2/FW/benchmarks/*.out         one per binary, N (B, C)
+Series with fewer than two thread counts (serial) are left out.
+
+Models, all linear in their coefficients, fitted by least squares on the
+relative error (rows weighted by 1/T), so the standard errors come from
+the residuals and the coefficients' covariance; derived quantities get
+theirs by the delta method:
+    Amdahl     T(N) = a + b/N                 serial fraction s = a / (a + b)
+    USL        T(N) = T1 (1 + sigma (N-1) + kappa N (N-1)) / N
+               sigma: contention, kappa: coherency; peak at sqrt((1-sigma)/kappa)
+    Gustafson  alpha(N) = a / T(N), the serial share of an N-thread run, and
+               the scaled speedup alpha + N (1 - alpha) if the parallel work
+               grew with N (weak scaling)
+USL needs three thread counts, the others two; with exactly as many counts
+as coefficients the fit is exact and has no uncertainty (nan).
+BEST is the model with the lower AICc (Amdahl vs USL).
+
+Next points: every --max-threads grid count (measured ones included:
+repeats help too) is scored by how much one more run there would cut the
+standard errors of sigma and kappa (mean relative reduction, from the
+updated covariance, no new data needed). Without a USL fit, the counts
+farthest (in log2) from the measured ones come first.
+
+--size FAMILY=S extrapolates in dataset size too (N for life and fw, MB
+for kmeans and locks): for series that only differ in size (at least two
+sizes), log T1 and log a are fitted against log size and T(N) at size S is
+predicted from them (no uncertainty from two sizes).
+
+Outputs (in --outdir, default tools/analysis/):
+    scaling_models.txt       one row per series
+    scaling_models.json      everything, with predictions and next points
+    scaling_<family>.png     measured times and fitted curves up to --max-threads
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import bench_results as br
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTDIR = BASE_DIR / "analysis"
+GRID = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256)
+NAN = float("nan")
+
+COLUMNS = ("FAMILY", "SERIES", "POINTS", "T_MAX", "AMDAHL_S", "AMDAHL_S_SE", "USL_SIGMA", "USL_SIGMA_SE",
+           "USL_KAPPA", "USL_KAPPA_SE", "USL_PEAK", "GUSTAFSON_ALPHA", "BEST", "PRED_N", "PRED_T",
+           "PRED_T_SE", "NEXT")
+
+Series = Dict[str, object]
+
+
+# --------------------------------------------------------------------------
+# series
+# --------------------------------------------------------------------------
+
+def collect_series() -> List[Series]:
+    """{family, name, group, size, points: [(threads, time)]} per measured series."""
+    points: Dict[Tuple, List[Tuple[int, float]]] = defaultdict(list)
+
+    for r in br.collect_life_runs():
+        init = "" if r["INIT"] == "serial" else f" {r['INIT']}"
+        points[("life", f"life_par N{r['N']}{init}", f"life_par N*{init}", r["N"])].append(
+            (r["THREADS"], r["TIME"]))
+
+    for family, root in (("kmeans", br.A2_KMEANS_BENCH), ("locks", br.A3_BENCH)):
+        for r in br.collect_kmeans_runs(root):
+            tag = re.sub(r"_T\d+", "", str(r["RUN_TAG"]))
+            kind = f"{r['KIND']}/{r['AFF']}" if family == "kmeans" else str(r["KIND"])
+            points[(family, f"{kind} {tag}", f"{kind} {re.sub(r'^S[0-9]+', 'S*', tag)}", r["SIZE"])].append(
+                (r["THREADS"], r["TOTAL"]))
+
+    for r in br.collect_fw_runs():
+        binary = Path(str(r["SOURCE"])).stem.split("_N")[0]
+        extra = (f"_B{r['B']}" if r["B"] else "") + (f"_C{r['C']}" if r["C"] else "")
+        points[("fw", f"{binary} N{r['N']}{extra}", f"{binary} N*{extra}", r["N"])].append(
+            (r["THREADS"], r["TIME"]))
+
+    series: List[Series] = []
+    for (family, name, group, size), pts in sorted(points.items(), key=lambda kv: kv[0][:2]):
+        if len({t for t, _ in pts}) >= 2 and all(tm > 0 for _, tm in pts):
+            series.append({"family": family, "name": name, "group": group, "size": size,
+                           "points": sorted(pts)})
+    return series
+
+
+# --------------------------------------------------------------------------
+# weighted least squares (a handful of coefficients: plain Python)
+# --------------------------------------------------------------------------
+
+def invert(m: List[List[float]]) -> Optional[List[List[float]]]:
+    n = len(m)
+    a = [row[:] + [1.0 if i == j else 0.0 for j in range(n)] for i, row in enumerate(m)]
+    for c in range(n):
+        p = max(range(c, n), key=lambda r: abs(a[r][c]))
+        if abs(a[p][c]) < 1e-300:
+            return None
+        a[c], a[p] = a[p], a[c]
+        piv = a[c][c]
+        a[c] = [v / piv for v in a[c]]
+        for r in range(n):
+            if r != c and a[r][c]:
+                f = a[r][c]
+                a[r] = [v - f * w for v, w in zip(a[r], a[c])]
+    return [row[n:] for row in a]
+
+
+def quad(x: Sequence[float], m: Sequence[Sequence[float]], y: Sequence[float]) -> float:
+    return sum(x[i] * m[i][j] * y[j] for i in range(len(x)) for j in range(len(y)))
+
+
+class Fit:
+    """Least squares of y ~ features(x), rows weighted by w (relative error: w = 1/y)."""
+
+    def __init__(self, features: Callable[[float], List[float]], xs: Sequence[float],
+                 ys: Sequence[float], ws: Sequence[float]):
+        self.features = features
+        rows = [[w * f for f in features(x)] for x, w in zip(xs, ws)]
+        rhs = [w * y for y, w in zip(ys, ws)]
+        k = len(rows[0])
+        self.n, self.k = len(rows), k
+        self.info = [[sum(r[i] * r[j] for r in rows) for j in range(k)] for i in range(k)]
+        self.info_inv = invert(self.info)
+        if self.info_inv is None:
+            raise ValueError("singular fit")
+        xty = [sum(r[i] * y for r, y in zip(rows, rhs)) for i in range(k)]
+        self.coef = [sum(self.info_inv[i][j] * xty[j] for j in range(k)) for i in range(k)]
+        self.rss = sum((y - sum(c * f for c, f in zip(self.coef, r))) ** 2 for r, y in zip(rows, rhs))
+        self.s2 = self.rss / (self.n - k) if self.n > k else NAN
+
+    def cov(self, info_inv: Optional[List[List[float]]] = None) -> List[List[float]]:
+        m = info_inv or self.info_inv
+        return [[self.s2 * v for v in row] for row in m]
+
+    def se(self, grad: Sequence[float], info_inv: Optional[List[List[float]]] = None) -> float:
+        """Delta-method standard error of a derived quantity with this gradient."""
+        v = quad(grad, self.cov(info_inv), grad)
+        return math.sqrt(v) if v >= 0 else NAN
+
+    def predict(self, x: float) -> Tuple[float, float]:
+        f = self.features(x)
+        return sum(c * v for c, v in zip(self.coef, f)), self.se(f)
+
+    def aicc(self) -> float:
+        n, k = self.n, self.k
+        if self.rss <= 0:
+            return -math.inf
+        aic = n * math.log(self.rss / n) + 2 * k
+        return aic + (2 * k * (k + 1) / (n - k - 1) if n - k - 1 > 0 else 0.0)
+
+
+def amdahl_features(n: float) -> List[float]:
+    return [1.0, 1.0 / n]
+
+
+def usl_features(n: float) -> List[float]:
+    return [1.0 / n, (n - 1.0) / n, n - 1.0]
+
+
+def usl_grads(coef: Sequence[float]) -> Tuple[List[float], List[float]]:
+    a, b, c = coef
+    return [-b / a ** 2, 1.0 / a, 0.0], [-c / a ** 2, 0.0, 1.0 / a]
+
+
+# --------------------------------------------------------------------------
+# models
+# --------------------------------------------------------------------------
+
+def fit_series(s: Series, predict_n: int, max_threads: int, suggest: int) -> Dict[str, object]:
+    ns = [float(t) for t, _ in s["points"]]
+    ts = [tm for _, tm in s["points"]]
+    ws = [1.0 / tm for tm in ts]
+    distinct = sorted({int(n) for n in ns})
+    res: Dict[str, object] = {"family": s["family"], "name": s["name"], "size": s["size"],
+                              "points": s["points"], "threads": distinct}
+
+    amd = Fit(amdahl_features, ns, ts, ws)
+    a, b = amd.coef
+    t1 = a + b
+    res["amdahl"] = {
+        "T1": t1, "serial_time": a,
+        "s": a / t1, "s_se": amd.se([b / t1 ** 2, -a / t1 ** 2]),
+        "aicc": amd.aicc(),
+    }
+    # Gustafson: serial share of the largest measured run, and its scaled speedup
+    nmax = distinct[-1]
+    alpha = a / (a + b / nmax)
+    res["gustafson"] = {"N": nmax, "alpha": alpha,
+                        "alpha_se": amd.se([(b / nmax) / (a + b / nmax) ** 2, -(a / nmax) / (a + b / nmax) ** 2]),
+                        "scaled_speedup": alpha + nmax * (1 - alpha)}
+
+    usl = None
+    if len(distinct) >= 3:
+        usl = Fit(usl_features, ns, ts, ws)
+        ua, ub, uc = usl.coef
+        g_sigma, g_kappa = usl_grads(usl.coef)
+        sigma, kappa = ub / ua, uc / ua
+        res["usl"] = {
+            "T1": ua, "sigma": sigma, "sigma_se": usl.se(g_sigma),
+            "kappa": kappa, "kappa_se": usl.se(g_kappa),
+            "peak": math.sqrt((1 - sigma) / kappa) if kappa > 0 and sigma < 1 else None,
+            "aicc": usl.aicc(),
+        }
+        res["best"] = "usl" if usl.aicc() < amd.aicc() else "amdahl"
+    else:
+        res["best"] = "amdahl"
+
+    model = usl if res["best"] == "usl" else amd
+    pt, pse = model.predict(float(predict_n))
+    alpha_p = a / (a + b / predict_n)
+    res["prediction"] = {"N": predict_n, "model": res["best"], "T": pt, "T_se": pse,
+                         "speedup": res[res["best"]]["T1"] / pt if pt > 0 else NAN,
+                         "gustafson_scaled_speedup": alpha_p + predict_n * (1 - alpha_p)}
+    res["next"] = next_points(usl, distinct, max_threads, suggest)
+    return res
+
+
+def next_points(usl: Optional[Fit], measured: Sequence[int], max_threads: int,
+                suggest: int) -> List[Dict[str, object]]:
+    grid = [n for n in GRID if n <= max_threads]
+    scored: List[Dict[str, object]] = []
+    if usl is None or math.isnan(usl.s2):
+        # nothing to shrink yet: spread the sweep (farthest from what was run, in log2)
+        for n in grid:
+            d = min(abs(math.log2(n) - math.log2(m)) for m in measured)
+            scored.append({"N": n, "score": d, "why": "spread"})
+    else:
+        g_sigma, g_kappa = usl_grads(usl.coef)
+        se0 = (usl.se(g_sigma), usl.se(g_kappa))
+        for n in grid:
+            t_pred, _ = usl.predict(float(n))
+            if t_pred <= 0:
+                continue
+            x = [f / t_pred for f in usl_features(float(n))]
+            info = [[usl.info[i][j] + x[i] * x[j] for j in range(3)] for i in range(3)]
+            inv = invert(info)
+            if inv is None:
+                continue
+            se1 = (usl.se(g_sigma, inv), usl.se(g_kappa, inv))
+            cut = [1 - new / old for new, old in zip(se1, se0) if old > 0]
+            if cut:
+                scored.append({"N": n, "score": sum(cut) / len(cut), "why": "se",
+                               "sigma_se": se1[0], "kappa_se": se1[1]})
+    scored.sort(key=lambda p: (-p["score"], p["N"]))
+    return scored[:suggest]
+
+
+def size_extrapolation(fits: List[Dict[str, object]], series: List[Series],
+                       targets: Dict[str, float], predict_n: int) -> List[Dict[str, object]]:
+    """log T1 and log (serial time) against log size, per group of series that differ only in size."""
+    groups: Dict[Tuple[str, str], List[Dict[str, object]]] = defaultdict(list)
+    for s, f in zip(series, fits):
+        groups[(s["family"], s["group"])].append(f)
+    out: List[Dict[str, object]] = []
+    for (family, group), fs in sorted(groups.items()):
+        if family not in targets or len({f["size"] for f in fs}) < 2:
+            continue
+        size = targets[family]
+        xs = [math.log(f["size"]) for f in fs]
+        ones = [1.0] * len(fs)
+        lin = lambda x: [1.0, x]
+        t1 = Fit(lin, xs, [math.log(f["amdahl"]["T1"]) for f in fs], ones)
+        serial = Fit(lin, xs, [math.log(max(f["amdahl"]["serial_time"], 1e-12)) for f in fs], ones)
+        lt1, lt1_se = t1.predict(math.log(size))
+        la, _ = serial.predict(math.log(size))
+        T1, a = math.exp(lt1), min(math.exp(la), math.exp(lt1))
+        out.append({"family": family, "group": group, "sizes": sorted({f["size"] for f in fs}),
+                    "target_size": size, "T1_exponent": t1.coef[1], "serial_exponent": serial.coef[1],
+                    "T1": T1, "T1_rel_se": lt1_se, "s": a / T1, "N": predict_n,
+                    "T": a + (T1 - a) / predict_n})
+    return out
+
+
+# --------------------------------------------------------------------------
+# output
+# --------------------------------------------------------------------------
+
+def _f(v: object, fmt: str = ".4g") -> str:
+    if v is None:
+        return "-"
+    if isinstance(v, float):
+        return "nan" if math.isnan(v) else format(v, fmt)
+    return str(v)
+
+
+def write_table(fits: List[Dict[str, object]], path: Path) -> None:
+    lines = ["\t".join(COLUMNS)]
+    for f in fits:
+        usl = f.get("usl", {})
+        amd, gus, p = f["amdahl"], f["gustafson"], f["prediction"]
+        lines.append("\t".join([
+            f["family"], f["name"], str(len(f["points"])), str(f["threads"][-1]),
+            _f(amd["s"]), _f(amd["s_se"]), _f(usl.get("sigma")), _f(usl.get("sigma_se")),
+            _f(usl.get("kappa")), _f(usl.get("kappa_se")), _f(usl.get("peak"), ".1f"),
+            _f(gus["alpha"]), f["best"], str(p["N"]), _f(p["T"]), _f(p["T_se"]),
+            ",".join(str(n["N"]) for n in f["next"]) or "-"]))
+    path.write_text("\n".join(lines) + "\n")
+
+
+def plot_family(family: str, fits: List[Dict[str, object]], max_threads: int, outdir: Path) -> Path:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(9, 6))
+    xs = [n for n in GRID if n <= max_threads]
+    for f in fits:
+        pts = f["points"]
+        line, = ax.plot([t for t, _ in pts], [tm for _, tm in pts], "o", markersize=4, label=f["name"])
+        a, b = f["amdahl"]["serial_time"], f["amdahl"]["T1"] - f["amdahl"]["serial_time"]
+        ax.plot(xs, [a + b / n for n in xs], "--", linewidth=0.8, color=line.get_color())
+        if "usl" in f:
+            u = f["usl"]
+            ax.plot(xs, [u["T1"] * (1 + u["sigma"] * (n - 1) + u["kappa"] * n * (n - 1)) / n for n in xs],
+                    "-", linewidth=1.0, color=line.get_color())
+    ax.set_xscale("log", base=2)
+    ax.set_yscale("log")
+    ax.set_xlabel("Threads")
+    ax.set_ylabel("Time (s)")
+    ax.set_title(f"{family}: measured (points), USL (solid), Amdahl (dashed)")
+    ax.grid(True, which="both", linestyle="--", linewidth=0.5, alpha=0.7)
+    ax.legend(fontsize=6, ncol=2)
+    out = outdir / f"scaling_{family}.png"
+    fig.tight_layout()
+    fig.savefig(out, dpi=150)
+    plt.close(fig)
+    return out
+
+
+def parse_size(spec: str) -> Tuple[str, float]:
+    family, sep, value = spec.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected FAMILY=SIZE, got {spec!r}")
+    return family, float(value)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Fit Amdahl / Gustafson / USL to the measured sweeps.")
+    parser.add_argument("--predict-threads", type=int, default=128,
+                        help="Thread count to extrapolate to (default: 128).")
+    parser.add_argument("--max-threads", type=int, default=128,
+                        help="Largest thread count a next sweep point may have (default: 128).")
+    parser.add_argument("--suggest", type=int, default=3, help="Next points per series (default: 3).")
+    parser.add_argument("--size", type=parse_size, action="append", default=[], metavar="FAMILY=SIZE",
+                        help="Also extrapolate to this dataset size (life/fw: N, kmeans/locks: MB).")
+    parser.add_argument("--outdir", type=Path, default=DEFAULT_OUTDIR,
+                        help="Output directory (default: tools/analysis).")
+    parser.add_argument("--no-plots", action="store_true", help="Only write the table and JSON.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    series = collect_series()
+    if not series:
+        raise SystemExit("No time-vs-threads series found under the benchmark trees.")
+    fits = [fit_series(s, args.predict_threads, args.max_threads, args.suggest) for s in series]
+    sizes = size_extrapolation(fits, series, dict(args.size), args.predict_threads)
+
+    args.outdir.mkdir(parents=True, exist_ok=True)
+    table = args.outdir / "scaling_models.txt"
+    write_table(fits, table)
+    report = args.outdir / "scaling_models.json"
+    report.write_text(json.dumps({"series": fits, "size_extrapolation": sizes}, indent=1, default=str))
+    print(f"Wrote {table} ({len(fits)} series)")
+    print(f"Wrote {report}")
+
+    for f in fits:
+        u = f.get("usl")
+        desc = (f"sigma={_f(u['sigma'])}±{_f(u['sigma_se'])} kappa={_f(u['kappa'])}±{_f(u['kappa_se'])}"
+                if u else f"s={_f(f['amdahl']['s'])}±{_f(f['amdahl']['s_se'])}")
+        p = f["prediction"]
+        print(f"  {f['family']:6s} {f['name']:40s} {desc}  T({p['N']})={_f(p['T'])}s [{f['best']}]"
+              f"  next: {','.join(str(n['N']) for n in f['next'])}")
+    for e in sizes:
+        print(f"  {e['family']:6s} {e['group']:40s} size {e['target_size']:g}: T1={_f(e['T1'])}s "
+              f"s={_f(e['s'])} T({e['N']})={_f(e['T'])}s")
+
+    if not args.no_plots:
+        by_family: Dict[str, List[Dict[str, object]]] = defaultdict(list)
+        for f in fits:
+            by_family[f["family"]].append(f)
+        for family, fs in sorted(by_family.items()):
+            print(f"Wrote {plot_family(family, fs, args.max_threads, args.outdir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+/*
+ * STREAM-style memory bandwidth and FMA peak probe for the roofline analysis.
+ *
+ * Usage:    ./stream_probe [-n elements] [-r repeats] [-t "1 2 4 8"]
+ * Build:    gcc -O3 -march=native -fopenmp stream_probe.c -o stream_probe
+ *
+ * For every thread count it prints one line
+ *     PROBE threads=T copy=.. scale=.. add=.. triad=.. peak_gflops=..
+ * (bandwidths in GB/s, best of `repeats`), which tools/roofline.py reads
+ * with --machine. Run it on the node the benchmarks ran on (sandman for a2/a3).
+ *
+ * Arrays are first-touched in parallel with the same static partition as
+ * the kernels, as in the reference STREAM; keep -n well above the LLC size
+ * (default: 3 x 128 MB).
+ */
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <unistd.h>
+#include <omp.h>
+
+#define FMA_CHAINS 16        /* independent accumulators per thread */
+#define FMA_ITERS  20000000L
+
+static double best_time(double t, double best)
+{
+    return (best < 0 || t < best) ? t : best;
+}
+
+static double peak_gflops(int nthreads)
+{
+    double t0, t, sink = 0.0;
+
+    t0 = omp_get_wtime();
+    #pragma omp parallel num_threads(nthreads) reduction(+:sink)
+    {
+        double acc[FMA_CHAINS];
+        double x = 1.0 + 1e-9 * omp_get_thread_num(), y = 1e-9;
+        long it;
+        int c;
+
+        for (c = 0; c < FMA_CHAINS; c++)
+            acc[c] = c;
+        for (it = 0; it < FMA_ITERS; it++)
+            for (c = 0; c < FMA_CHAINS; c++)
+                acc[c] = acc[c] * x + y;
+        for (c = 0; c < FMA_CHAINS; c++)
+            sink += acc[c];
+    }
+    t = omp_get_wtime() - t0;
+    if (sink == 42.0)   /* keep the loop alive */
+        printf("#");
+    return 2.0 * FMA_CHAINS * FMA_ITERS * nthreads / t / 1e9;
+}
+
+int main(int argc, char **argv)
+{
+    long n = 1L << 24, i;
+    int repeats = 10, r, opt, k, nthreads_list[64], nlist = 0;
+    char *tlist = NULL, *tok;
+    double *a, *b, *c, scalar = 3.0;
+
+    while ((opt = getopt(argc, argv, "n:r:t:h")) != EOF) {
+        switch (opt) {
+            case 'n': n = atol(optarg); break;
+            case 'r': repeats = atoi(optarg); break;
+            case 't': tlist = optarg; break;
+            default:
+                fprintf(stderr, "Usage: %s [-n elements] [-r repeats] [-t \"1 2 4 8\"]\n", argv[0]);
+                return 1;
+        }
+    }
+    if (tlist) {
+        for (tok = strtok(tlist, " ,"); tok && nlist < 64; tok = strtok(NULL, " ,"))
+            nthreads_list[nlist++] = atoi(tok);
+    } else {
+        nthreads_list[nlist++] = omp_get_max_threads();
+    }
+
+    a = (double *) malloc(n * sizeof(double));
+    b = (double *) malloc(n * sizeof(double));
+    c = (double *) malloc(n * sizeof(double));
+    if (!a || !b || !c) {
+        fprintf(stderr, "stream_probe: out of memory\n");
+        return 1;
+    }
+
+    printf("# stream_probe: n=%ld (%.1f MB per array), repeats=%d\n",
+           n, n * sizeof(double) / 1048576.0, repeats);
+
+    for (k = 0; k < nlist; k++) {
+        int T = nthreads_list[k];
+        double t, t_copy = -1, t_scale = -1, t_add = -1, t_triad = -1;
+
+        /* first touch with the kernels' static partition */
+        #pragma omp parallel for schedule(static) num_threads(T)
+        for (i = 0; i < n; i++) {
+            a[i] = 1.0;
+            b[i] = 2.0;
+            c[i] = 0.0;
+        }
+
+        for (r = 0; r < repeats; r++) {
+            t = omp_get_wtime();
+            #pragma omp parallel for schedule(static) num_threads(T)
+            for (i = 0; i < n; i++)
+                c[i] = a[i];
+            t_copy = best_time(omp_get_wtime() - t, t_copy);
+
+            t = omp_get_wtime();
+            #pragma omp parallel for schedule(static) num_threads(T)
+            for (i = 0; i < n; i++)
+                b[i] = scalar * c[i];
+            t_scale = best_time(omp_get_wtime() - t, t_scale);
+
+            t = omp_get_wtime();
+            #pragma omp parallel for schedule(static) num_threads(T)
+            for (i = 0; i < n; i++)
+                c[i] = a[i] + b[i];
+            t_add = best_time(omp_get_wtime() - t, t_add);
+
+            t = omp_get_wtime();
+            #pragma omp parallel for schedule(static) num_threads(T)
+            for (i = 0; i < n; i++)
+                a[i] = b[i] + scalar * c[i];
+            t_triad = best_time(omp_get_wtime() - t, t_triad);
+        }
+
+        printf("PROBE threads=%d copy=%.3f scale=%.3f add=%.3f triad=%.3f peak_gflops=%.3f\n",
+               T,
+               2.0 * n * sizeof(double) / t_copy / 1e9,
+               2.0 * n * sizeof(double) / t_scale / 1e9,
+               3.0 * n * sizeof(double) / t_add / 1e9,
+               3.0 * n * sizeof(double) / t_triad / 1e9,
+               peak_gflops(T));
+        fflush(stdout);
+    }
+
+    free(a);
+    free(b);
+    free(c);
+    return 0;
+}
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Convert OMPTRACE dumps (common/omp_trace.h) into Chrome trace-event JSON and
+summarise load imbalance and barrier wait per run.
+
+Usage:
+    python trace2chrome.py life_8_1024.trace [more.trace ...]
+                           [--json-dir DIR] [--table trace_summary.txt]
+
+For every input X.trace this writes:
+    X.json          open in chrome://tracing or https://ui.perfetto.dev
+    X.summary.txt   one-row table (see SUMMARY_COLUMNS) picked up by the
+                    diagram scripts next to the .out/.trace files
+
+Definitions (per parallel region instance, per thread):
+    busy          time inside CHUNK events (the thread's share of the work)
+    merge         time inside MERGE events (a serial merge one thread runs
+                  in an omp single while the others wait)
+    barrier wait  region duration - busy - merge (waiting at barriers /
+                  taskwaits, the others' wait for a merge included, plus
+                  runtime overhead)
+    imbalance     max(busy) / mean(busy) - 1   (0.0 = perfectly balanced)
+Run-level IMBALANCE is the region-duration weighted mean, BARRIER_WAIT is
+summed over threads and regions, BARRIER_FRAC = BARRIER_WAIT / (threads * sum
+of region durations), MERGE_TIME is the serial merge time summed over
+regions (its share of REGION_TIME is the part no thread count shortens).
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+MAGIC = b"OMPTRACE"
+HEADER = struct.Struct("=8sIIQ32s")   # magic, version, nthreads, capacity, name
+COUNTS = struct.Struct("=QQ")         # count, stored
+EVENT = struct.Struct("=ddii")        # t_begin, t_end, kind, id
+
+# keep in sync with the TRACE_* kinds in common/omp_trace.h
+REGION, CHUNK, BARRIER, MERGE = 0, 1, 2, 3
+KIND_NAMES = {REGION: "region", CHUNK: "chunk", BARRIER: "barrier", MERGE: "merge"}
+
+SUMMARY_COLUMNS = ("NAME", "THREADS", "REGIONS", "REGION_TIME",
+                   "IMBALANCE", "BARRIER_WAIT", "BARRIER_FRAC", "MERGE_TIME")
+
+
+class Event(NamedTuple):
+    thread: int
+    kind: int
+    id: int
+    t_begin: float
+    t_end: float
+
+
+class Trace(NamedTuple):
+    name: str
+    nthreads: int
+    events: List[Event]
+    dropped: int   # events overwritten because a ring buffer wrapped
+
+
+def read_trace(path: Path) -> Trace:
+    data = path.read_bytes()
+    magic, version, nthreads, _capacity, raw_name = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not an OMPTRACE file")
+    if version != 1:
+        raise ValueError(f"{path}: unsupported trace version {version}")
+    name = raw_name.split(b"\0", 1)[0].decode(errors="replace")
+
+    events: List[Event] = []
+    dropped = 0
+    offset = HEADER.size
+    for thread in range(nthreads):
+        count, stored = COUNTS.unpack_from(data, offset)
+        offset += COUNTS.size
+        dropped += count - stored
+        for t_begin, t_end, kind, ev_id in EVENT.iter_unpack(
+            data[offset:offset + stored * EVENT.size]
+        ):
+            events.append(Event(thread, kind, ev_id, t_begin, t_end))
+        offset += stored * EVENT.size
+    return Trace(name, nthreads, events, dropped)
+
+
+def to_chrome(trace: Trace) -> Dict[str, object]:
+    """Complete ("X") events, one Chrome thread row per OpenMP thread."""
+    out: List[Dict[str, object]] = [
+        {"name": "process_name", "ph": "M", "pid": 0,
+         "args": {"name": trace.name}},
+    ]
+    for thread in range(trace.nthreads):
+        out.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": thread,
+                    "args": {"name": f"omp thread {thread}"}})
+    for ev in trace.events:
+        kind = KIND_NAMES.get(ev.kind, f"kind{ev.kind}")
+        out.append({
+            "name": f"{kind} {ev.id}",
+            "cat": kind,
+            "ph": "X",
+            "pid": 0,
+            "tid": ev.thread,
+            "ts": ev.t_begin * 1e6,
+            "dur": max(ev.t_end - ev.t_begin, 0.0) * 1e6,
+            "args": {"id": ev.id},
+        })
+    return {"traceEvents": out, "displayTimeUnit": "ms"}
+
+
+def _merged_length(intervals: List[Tuple[float, float]]) -> float:
+    """Total length of a set of possibly overlapping intervals."""
+    total = 0.0
+    cur_b: Optional[float] = None
+    cur_e = 0.0
+    for b, e in sorted(intervals):
+        if cur_b is None or b > cur_e:
+            if cur_b is not None:
+                total += cur_e - cur_b
+            cur_b, cur_e = b, e
+        else:
+            cur_e = max(cur_e, e)
+    if cur_b is not None:
+        total += cur_e - cur_b
+    return total
+
+
+def summarise(trace: Trace) -> Dict[str, object]:
+    regions = sorted((ev for ev in trace.events if ev.kind == REGION),
+                     key=lambda ev: ev.t_begin)
+    starts = [r.t_begin for r in regions]
+
+    # chunks / merges[region][thread] -> list of (begin, end)
+    chunks: List[Dict[int, List[Tuple[float, float]]]] = [{} for _ in regions]
+    merges: List[Dict[int, List[Tuple[float, float]]]] = [{} for _ in regions]
+    for ev in trace.events:
+        if ev.kind not in (CHUNK, MERGE):
+            continue
+        idx = bisect.bisect_right(starts, ev.t_begin) - 1
+        if idx < 0 or ev.t_end > regions[idx].t_end:
+            continue  # outside every recorded region (e.g. lost to ring wrap)
+        target = chunks if ev.kind == CHUNK else merges
+        target[idx].setdefault(ev.thread, []).append((ev.t_begin, ev.t_end))
+
+    region_time = 0.0
+    weighted_imbalance = 0.0
+    barrier_wait = 0.0
+    merge_time = 0.0
+    for region, per_thread, per_thread_merge in zip(regions, chunks, merges):
+        duration = region.t_end - region.t_begin
+        busy = [_merged_length(per_thread.get(t, [])) for t in range(trace.nthreads)]
+        merge = [_merged_length(per_thread_merge.get(t, [])) for t in range(trace.nthreads)]
+        mean_busy = sum(busy) / len(busy) if busy else 0.0
+        if mean_busy > 0:
+            weighted_imbalance += (max(busy) / mean_busy - 1.0) * duration
+        barrier_wait += sum(max(duration - b - m, 0.0) for b, m in zip(busy, merge))
+        merge_time += max(merge, default=0.0)
+        region_time += duration
+
+    return {
+        "NAME": trace.name,
+        "THREADS": trace.nthreads,
+        "REGIONS": len(regions),
+        "REGION_TIME": region_time,
+        "IMBALANCE": weighted_imbalance / region_time if region_time > 0 else 0.0,
+        "BARRIER_WAIT": barrier_wait,
+        "BARRIER_FRAC": (barrier_wait / (trace.nthreads * region_time)
+                         if region_time > 0 else 0.0),
+        "MERGE_TIME": merge_time,
+    }
+
+
+def format_summary_table(rows: List[Dict[str, object]]) -> str:
+    lines = ["\t".join(SUMMARY_COLUMNS)]
+    for row in rows:
+        cells = []
+        for col in SUMMARY_COLUMNS:
+            value = row[col]
+            cells.append(f"{value:.6f}" if isinstance(value, float) else str(value))
+        lines.append("\t".join(cells))
+    return "\n".join(lines) + "\n"
+
+
+def read_summary_table(path: Path) -> List[Dict[str, object]]:
+    """Inverse of format_summary_table (used by the diagram scripts)."""
+    lines = [l for l in path.read_text().splitlines() if l.strip()]
+    if not lines:
+        return []
+    header = lines[0].split("\t")
+    rows: List[Dict[str, object]] = []
+    for line in lines[1:]:
+        row: Dict[str, object] = {}
+        for col, cell in zip(header, line.split("\t")):
+            if col == "NAME":
+                row[col] = cell
+            elif col in ("THREADS", "REGIONS"):
+                row[col] = int(cell)
+            else:
+                row[col] = float(cell)
+        rows.append(row)
+    return rows
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Convert OMPTRACE dumps to Chrome trace JSON and summarise them.",
+    )
+    parser.add_argument("traces", nargs="+", type=Path, help="*.trace files")
+    parser.add_argument("--json-dir", type=Path, default=None,
+                        help="Where to write the .json files (default: next to each trace).")
+    parser.add_argument("--table", type=Path, default=None,
+                        help="Also write all summaries into one tab-separated table.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rows: List[Dict[str, object]] = []
+    for path in args.traces:
+        trace = read_trace(path)
+        if trace.dropped:
+            print(f"WARNING: {path}: {trace.dropped} events lost to ring wrap-around "
+                  f"(raise TRACE_EVENTS)", file=sys.stderr)
+
+        json_dir = args.json_dir or path.parent
+        json_dir.mkdir(parents=True, exist_ok=True)
+        json_path = json_dir / f"{path.stem}.json"
+        json_path.write_text(json.dumps(to_chrome(trace)))
+
+        summary = summarise(trace)
+        path.with_suffix(".summary.txt").write_text(format_summary_table([summary]))
+        rows.append(summary)
+        print(f"{path}: threads={summary['THREADS']} regions={summary['REGIONS']} "
+              f"imbalance={summary['IMBALANCE']:.3f} "
+              f"barrier_wait={summary['BARRIER_WAIT']:.4f}s "
+              f"({100 * summary['BARRIER_FRAC']:.1f}%) "
+              f"merge={summary['MERGE_TIME']:.4f}s -> {json_path}")
+
+    if args.table:
+        args.table.write_text(format_summary_table(rows))
+        print(f"Wrote {args.table}")
+
+
+if __name__ == "__main__":
+    main()